@@ -0,0 +1,270 @@
+"""
+Файл: flange_batch.py
+Путь: data/flange_batch.py
+
+Описание:
+~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+Пакетный подбор размеров фланцев для всей спецификации аппарата.
+
+На вход — таблица позиций (standard, type, face, DN, PN/class), например
+строки спецификации или DataFrame.to_dict("records"). На выход — по одному
+FlangeBatchResult на строку: статус, сообщение и размеры. Окна с ошибками
+не показываются — статус каждой строки решает вызывающий код.
+
+Поддерживаются:
+- EN 1092-1 (en1092-1.db): через каталог в памяти
+  (flange_catalog_en1092_1.py), база читается один раз;
+- ASME B16.5 (AME_B16_5.db): через движок flange_catalog_asme_b16_5.py,
+  все новые позиции — одним SQL-запросом по уникальным индексам,
+  уже встречавшиеся — из его LRU-кэша.
+
+Одинаковые позиции считаются один раз.
+
+Зависимости:
+- sqlite3 (стандартная библиотека)
+- data.flange_catalog_en1092_1
+- data.flange_catalog_asme_b16_5
+
+Автор: AT-CAD Dev Team
+Дата: 2026-10-18
+Версия: 1.1
+~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+"""
+
+import logging
+import re
+import sqlite3
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Mapping, Optional
+
+from data.flange_catalog_asme_b16_5 import AsmeKey, get_engine
+from data.flange_catalog_en1092_1 import FlangeLookupError, get_catalog
+
+logger = logging.getLogger(__name__)
+
+STANDARD_EN = "EN 1092-1"
+STANDARD_ASME = "ASME B16.5"
+
+# Статусы строки результата
+STATUS_OK = "ok"
+STATUS_NO_DIMENSIONS = "no_dimensions"    # позиция допустима, но размеров в базе нет
+STATUS_NOT_APPLICABLE = "not_applicable"  # стандарт не предусматривает
+STATUS_NOT_FOUND = "not_found"            # тип / DN / PN (class) нет в базе
+STATUS_INVALID = "invalid"                # строка заполнена неверно
+STATUS_ERROR = "error"                    # база недоступна
+
+# Ключ ошибки каталога EN -> статус
+_EN_ERROR_STATUS = {
+    "not_applicable": STATUS_NOT_APPLICABLE,
+    "pn_not_found": STATUS_NOT_FOUND,
+    "type_not_found": STATUS_NOT_FOUND,
+    "dn_not_found": STATUS_NOT_FOUND,
+    "applicability_empty": STATUS_ERROR,
+}
+
+
+@dataclass
+class FlangeBatchResult:
+    """
+    Результат по одной строке входной таблицы.
+
+    data — размеры в формате get_flange_en1092_1:
+    {"D": {"value": "340", "restricted": False, "source": "PN16", "number": 340.0}, ...}
+    """
+    index: int
+    standard: str
+    type: str
+    face: str
+    dn: str
+    pn: str
+    status: str = STATUS_OK
+    message: str = ""
+    data: Dict[str, dict] = field(default_factory=dict)
+
+    @property
+    def ok(self) -> bool:
+        return self.status == STATUS_OK
+
+    @property
+    def dimensions(self) -> Dict[str, float]:
+        """Только числовые размеры: {"D": 340.0, ...}."""
+        return {k: v["number"] for k, v in self.data.items() if v.get("number") is not None}
+
+    def to_row(self) -> Dict[str, Any]:
+        """Плоская строка для таблицы / Excel: входные поля, статус и размеры."""
+        row = {
+            "standard": self.standard,
+            "type": self.type,
+            "face": self.face,
+            "DN": self.dn,
+            "PN": self.pn,
+            "status": self.status,
+            "message": self.message,
+        }
+        row.update({k: v["value"] for k, v in self.data.items()})
+        return row
+
+
+# ============================================================
+# Разбор входных строк
+# ============================================================
+
+def _get(row: Mapping[str, Any], *names: str) -> str:
+    lowered = {str(k).strip().lower(): v for k, v in row.items()}
+    for name in names:
+        value = lowered.get(name)
+        if value is not None and str(value).strip() not in ("", "nan"):
+            return str(value).strip()
+    return ""
+
+
+def normalize_standard(value: Any) -> Optional[str]:
+    """'EN1092-1', 'en 1092', 'EN' -> STANDARD_EN; 'ASME', 'B16.5' -> STANDARD_ASME."""
+    text = re.sub(r"[\s_.\-]", "", str(value or "")).upper()
+    if not text or text.startswith("EN") or text.startswith("DIN"):
+        return STANDARD_EN
+    if "ASME" in text or "B165" in text or text.startswith("ANSI"):
+        return STANDARD_ASME
+    return None
+
+
+# ============================================================
+# EN 1092-1
+# ============================================================
+
+def _lookup_en(results: List[FlangeBatchResult], db_path: "str | Path | None") -> None:
+    try:
+        catalog = get_catalog(db_path)
+    except (OSError, sqlite3.Error) as e:
+        for res in results:
+            res.status, res.message = STATUS_ERROR, f"EN 1092-1 database: {e}"
+        return
+
+    for res in results:
+        if not (res.type and res.dn and res.pn):
+            res.status, res.message = STATUS_INVALID, "type, DN and PN are required"
+            continue
+        try:
+            res.data = catalog.lookup(res.type, res.face, res.dn, res.pn)
+        except FlangeLookupError as e:
+            res.status, res.message = _EN_ERROR_STATUS.get(e.key, STATUS_ERROR), e.message
+            continue
+        if not res.data:
+            res.status, res.message = STATUS_NO_DIMENSIONS, "No dimensions defined, use manufacturer data"
+
+
+# ============================================================
+# ASME B16.5
+# ============================================================
+
+def _lookup_asme(
+    results: List[FlangeBatchResult],
+    rows: List[Mapping[str, Any]],
+    db_path: "str | Path | None",
+) -> None:
+    try:
+        engine = get_engine(db_path)
+    except (OSError, sqlite3.Error) as e:
+        for res in results:
+            res.status, res.message = STATUS_ERROR, f"ASME B16.5 database: {e}"
+        return
+
+    # Разбор строк в ключи движка; одинаковые позиции — один ключ
+    requests: Dict[AsmeKey, List[FlangeBatchResult]] = {}
+    for res, row in zip(results, rows):
+        try:
+            key = engine.resolve(res.type, res.face, _get(row, "nps"), res.pn, dn=res.dn)
+        except FlangeLookupError as e:
+            res.status, res.message = STATUS_NOT_FOUND, e.message
+            continue
+        requests.setdefault(key, []).append(res)
+
+    try:
+        found = engine.lookup_keys(requests)
+    except sqlite3.Error as e:
+        for targets in requests.values():
+            for res in targets:
+                res.status, res.message = STATUS_ERROR, f"ASME B16.5 database: {e}"
+        return
+
+    for key, targets in requests.items():
+        data = found.get(key, {})
+        for res in targets:
+            if isinstance(data, FlangeLookupError):
+                res.status, res.message = STATUS_NOT_APPLICABLE, data.message
+            elif not data:
+                res.status, res.message = STATUS_NO_DIMENSIONS, "No dimensions in ASME B16.5 database"
+            else:
+                res.data = {k: dict(v) for k, v in data.items()}
+
+
+# ============================================================
+# Публичный API
+# ============================================================
+
+def lookup_flanges(
+    rows: Iterable[Mapping[str, Any]],
+    en_db_path: "str | Path | None" = None,
+    asme_db_path: "str | Path | None" = None,
+) -> List[FlangeBatchResult]:
+    """
+    Подбирает размеры для всех строк спецификации за один проход.
+
+    Args:
+        rows: строки с ключами (регистр не важен):
+            standard — "EN 1092-1" (по умолчанию) или "ASME B16.5";
+            type     — тип фланца ("11", "05" / "WN", "BL");
+            face     — уплотнение ("B1" / "RF"), необязательно;
+            DN       — номинальный диаметр (для ASME можно "NPS": "1 1/2");
+            PN       — давление (для ASME — "class": 150, 300, ...).
+        en_db_path / asme_db_path: пути к базам (по умолчанию — рядом с модулем).
+
+    Returns:
+        list[FlangeBatchResult]: в том же порядке, что и rows.
+    """
+    rows = list(rows)
+    results: List[FlangeBatchResult] = []
+    by_standard: Dict[str, List[int]] = {STANDARD_EN: [], STANDARD_ASME: []}
+
+    for i, row in enumerate(rows):
+        raw_standard = _get(row, "standard", "norm")
+        standard = normalize_standard(raw_standard)
+        res = FlangeBatchResult(
+            index=i,
+            standard=standard or raw_standard,
+            type=_get(row, "type", "typ"),
+            face=_get(row, "face", "facing", "form"),
+            dn=_get(row, "dn", "nps"),
+            pn=_get(row, "pn", "class", "pressure_class"),
+        )
+        results.append(res)
+        if standard is None:
+            res.status, res.message = STATUS_INVALID, f"Unknown standard {raw_standard!r}"
+        else:
+            by_standard[standard].append(i)
+
+    if by_standard[STANDARD_EN]:
+        _lookup_en([results[i] for i in by_standard[STANDARD_EN]], en_db_path)
+    if by_standard[STANDARD_ASME]:
+        idx = by_standard[STANDARD_ASME]
+        _lookup_asme([results[i] for i in idx], [rows[i] for i in idx], asme_db_path)
+
+    logger.info(
+        f"Пакетный подбор фланцев: {len(results)} строк, "
+        f"успешно {sum(r.ok for r in results)}"
+    )
+    return results
+
+
+# === 🔧 Тестовый запуск ===
+if __name__ == "__main__":
+    bom = [
+        {"standard": "EN 1092-1", "type": "11", "face": "B1", "DN": 200, "PN": 16},
+        {"standard": "EN 1092-1", "type": "02", "face": "B1", "DN": 100, "PN": "2,5"},
+        {"standard": "EN 1092-1", "type": "01", "face": "B1", "DN": 2000, "PN": 40},
+        {"standard": "ASME B16.5", "type": "WN", "face": "RF", "NPS": "1 1/2", "class": 150},
+        {"standard": "JIS", "type": "11", "DN": 50, "PN": 16},
+    ]
+    for res in lookup_flanges(bom):
+        print(res.index, res.standard, res.type, res.dn, res.pn, res.status, res.message, res.dimensions)
@@ -0,0 +1,473 @@
+"""
+Файл: flange_catalog_asme_b16_5.py
+Путь: data/flange_catalog_asme_b16_5.py
+
+Описание:
+~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+Поиск фланцев ASME B16.5 в базе AME_B16_5.db — пара к каталогу EN 1092-1
+(flange_catalog_en1092_1.py).
+
+Справочники (nps, pressure_class, flange_type, facing_type, bolt_type, i18n)
+читаются один раз при создании. Размеры запрашиваются по ключу
+(NPS, class, тип, уплотнение) одним запросом к flange_base_dimensions,
+flange_type_dimensions, facing_dimensions, flange_applicability и bolt_length
+по их уникальным индексам. Тексты запросов постоянные, поэтому sqlite3
+держит их подготовленными; соединения только для чтения берутся из пула,
+а готовые ответы хранятся в LRU-кэше.
+
+Результат — в том же формате, что и у EN 1092-1:
+{"od": {"value": "127", "restricted": False,
+        "source": "flange_base_dimensions", "number": 127.0}, ...}
+Ошибки — FlangeLookupError с теми же ключами перевода
+(type_not_found, dn_not_found, pn_not_found, not_applicable).
+
+Если файл базы изменился, get_engine() создаёт новый экземпляр.
+
+Размеры в базу записывает data/works/import_asme_csvs.py (из
+data/works/asme_*.csv); для позиций без строк в CSV lookup возвращает
+пустой словарь.
+
+Зависимости:
+- sqlite3 (стандартная библиотека)
+- data.flange_catalog_en1092_1 (FlangeLookupError)
+
+Автор: AT-CAD Dev Team
+Дата: 2026-10-18
+Версия: 1.0
+~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+"""
+
+import logging
+import os
+import queue
+import sqlite3
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from fractions import Fraction
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple, Union
+
+from data.flange_catalog_en1092_1 import FlangeLookupError
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_DB_PATH = Path(__file__).with_name("AME_B16_5.db")
+
+# Колонки размеров: таблица -> поля
+DIMENSION_COLUMNS: Dict[str, Tuple[str, ...]] = {
+    "flange_base_dimensions": (
+        "od", "pcd", "bolt_hole_diameter", "number_of_bolts", "bolt_diameter",
+        "thickness", "hub_diameter", "raised_face_height",
+        "ring_joint_groove_d", "ring_joint_groove_h",
+    ),
+    "flange_type_dimensions": (
+        "y", "neck_d1", "neck_d2", "socket_depth", "thread_length", "lap_joint_radius",
+    ),
+    "facing_dimensions": (
+        "diameter_g", "width_g", "depth_g", "male_d", "male_h", "tongue_d", "tongue_h",
+    ),
+}
+
+_ALIASES = {"b": "flange_base_dimensions", "td": "flange_type_dimensions", "fd": "facing_dimensions"}
+
+_UNICODE_FRACTIONS = {"½": "1/2", "¼": "1/4", "¾": "3/4", "⅛": "1/8", "⅜": "3/8", "⅝": "5/8", "⅞": "7/8"}
+
+# Не больше ключей в одном VALUES (ограничение числа параметров SQLite)
+CHUNK_SIZE = 500
+
+# Ключ запроса: (nps_id, class_id, type_id, facing_id)
+AsmeKey = Tuple[int, int, int, Optional[int]]
+AsmeResult = Union[Dict[str, dict], FlangeLookupError]
+
+
+def nps_value(text: Any) -> Optional[Fraction]:
+    """'1 1/2', '1-1/2', '1 ½', '1.5' -> Fraction(3, 2); None, если не разобрать."""
+    text = str(text or "")
+    for symbol, frac in _UNICODE_FRACTIONS.items():
+        text = text.replace(symbol, f" {frac}")
+    parts = text.replace("-", " ").replace('"', "").split()
+    try:
+        return sum((Fraction(p.replace(",", ".")) for p in parts), Fraction(0)) if parts else None
+    except (ValueError, ZeroDivisionError):
+        return None
+
+
+def _number(value: Any) -> Optional[float]:
+    try:
+        return float(str(value).strip().replace(",", "."))
+    except (TypeError, ValueError):
+        return None
+
+
+def _item(value: Any, source: str) -> dict:
+    return {
+        "value": f"{value:g}" if isinstance(value, float) else str(value),
+        "restricted": False,
+        "source": source,
+        "number": float(value),
+    }
+
+
+def _query(count: int) -> str:
+    """Размеры и применимость для count ключей; текст зависит только от count."""
+    values = ", ".join(["(?, ?, ?, ?, ?)"] * count)
+    columns = ", ".join(
+        f"{alias}.{col}" for alias, table in _ALIASES.items() for col in DIMENSION_COLUMNS[table]
+    )
+    return f"""
+        WITH req(pos, nps_id, class_id, type_id, facing_id) AS (VALUES {values})
+        SELECT req.pos, b.id, fa.allowed, {columns}
+        FROM req
+        LEFT JOIN flange_base_dimensions b
+               ON b.nps_id = req.nps_id AND b.class_id = req.class_id
+        LEFT JOIN flange_type_dimensions td
+               ON td.base_dim_id = b.id AND td.flange_type_id = req.type_id
+        LEFT JOIN facing_dimensions fd
+               ON fd.base_dim_id = b.id AND fd.facing_type_id = req.facing_id
+        LEFT JOIN flange_applicability fa
+               ON fa.flange_type_id = req.type_id AND fa.nps_id = req.nps_id AND fa.class_id = req.class_id
+    """
+
+
+def _bolt_query(count: int) -> str:
+    """Длины болтов/шпилек для count ключей (по всем bolt_type)."""
+    values = ", ".join(["(?, ?, ?, ?, ?)"] * count)
+    return f"""
+        WITH req(pos, nps_id, class_id, type_id, facing_id) AS (VALUES {values})
+        SELECT req.pos, bt.code, bl.bolt_length
+        FROM req
+        JOIN flange_base_dimensions b
+          ON b.nps_id = req.nps_id AND b.class_id = req.class_id
+        JOIN bolt_length bl
+          ON bl.base_dim_id = b.id AND bl.flange_type_id = req.type_id AND bl.facing_type_id = req.facing_id
+        JOIN bolt_type bt ON bt.id = bl.bolt_type_id
+        WHERE bl.bolt_length IS NOT NULL
+        ORDER BY req.pos, bt.id
+    """
+
+
+# ============================================================
+# Движок
+# ============================================================
+
+class FlangeQueryEngineASME:
+    """
+    Поиск фланцев в AME_B16_5.db.
+
+    Пример:
+        engine = get_engine()
+        data = engine.lookup("WN", "RF", "1 1/2", 150)      # как result["data"] EN
+        sizes = engine.dimensions("WN", "RF", "1 1/2", 150) # {"od": 127.0, ...}
+    """
+
+    def __init__(self, db_path: "str | Path", pool_size: int = 4, cache_size: int = 1024):
+        self.db_path = Path(db_path)
+        self.mtime_ns = os.stat(self.db_path).st_mtime_ns
+        self.cache_size = cache_size
+
+        self.types: Dict[str, int] = {}
+        self.facings: Dict[str, int] = {}
+        self.classes: Dict[int, int] = {}
+        self.nps_by_value: Dict[Fraction, int] = {}
+        self.nps_by_dn: Dict[int, int] = {}
+        self.nps_info: Dict[int, Dict[str, Any]] = {}
+        self.names: Dict[Tuple[str, str], Dict[str, str]] = {}
+
+        self._uri = self.db_path.resolve().as_uri() + "?mode=ro"
+        self._pool: "queue.LifoQueue[sqlite3.Connection]" = queue.LifoQueue(maxsize=pool_size)
+        self._cache: "OrderedDict[AsmeKey, AsmeResult]" = OrderedDict()
+        self._lock = threading.Lock()
+
+        self._load()
+
+    # --------------------------------------------------------
+    # Соединения
+    # --------------------------------------------------------
+
+    def _connect(self) -> sqlite3.Connection:
+        # Текстов запросов немного (по одному на размер пачки) — все держим подготовленными
+        return sqlite3.connect(self._uri, uri=True, check_same_thread=False, cached_statements=256)
+
+    @contextmanager
+    def _connection(self) -> Iterator[sqlite3.Connection]:
+        """Соединение из пула; после запроса возвращается обратно."""
+        try:
+            conn = self._pool.get_nowait()
+        except queue.Empty:
+            conn = self._connect()
+        try:
+            yield conn
+        finally:
+            try:
+                self._pool.put_nowait(conn)
+            except queue.Full:
+                conn.close()
+
+    def close(self) -> None:
+        """Закрывает соединения пула."""
+        while True:
+            try:
+                self._pool.get_nowait().close()
+            except queue.Empty:
+                break
+
+    # --------------------------------------------------------
+    # Загрузка справочников
+    # --------------------------------------------------------
+
+    def _load(self) -> None:
+        with self._connection() as conn:
+            for entity, table, target in (
+                ("flange_type", "flange_type", self.types),
+                ("facing_type", "facing_type", self.facings),
+                ("bolt_type", "bolt_type", None),
+            ):
+                for id_, code, en, ru, de in conn.execute(
+                    f'SELECT id, code, description_en, description_ru, description_de FROM "{table}"'
+                ):
+                    code = str(code or "").strip().upper()
+                    if target is not None:
+                        target[code] = id_
+                    self.names[(entity, code)] = {"en": en, "ru": ru, "de": de}
+                    self.names[(entity, str(id_))] = self.names[(entity, code)]
+
+            # Переводы из i18n дополняют/заменяют описания справочников
+            for entity, entity_id, lang, text in conn.execute(
+                "SELECT entity_type, entity_id, lang, text FROM i18n"
+            ):
+                names = self.names.get((entity, str(entity_id)))
+                if names is not None:
+                    names[lang] = text
+
+            for id_, value in conn.execute("SELECT id, class FROM pressure_class"):
+                self.classes[int(value)] = id_
+
+            for id_, text, numeric, dn, pipe_od in conn.execute(
+                "SELECT id, nps_text, nps_numeric, dn, pipe_od FROM nps"
+            ):
+                value = nps_value(text)
+                if value is not None:
+                    self.nps_by_value.setdefault(value, id_)
+                if dn is not None:
+                    self.nps_by_dn.setdefault(int(dn), id_)
+                self.nps_info[id_] = {"nps": str(text), "dn": dn, "pipe_od": pipe_od}
+
+        logger.info(
+            f"Справочник ASME B16.5 загружен: {self.db_path}, "
+            f"NPS {len(self.nps_info)}, классов {len(self.classes)}, типов {len(self.types)}"
+        )
+
+    def name(self, entity: str, code: Any, lang: str = "en") -> str:
+        """Описание типа/уплотнения/болта: name("flange_type", "WN", "de") -> 'Vorschweißflansch'."""
+        names = self.names.get((entity, str(code or "").strip().upper()), {})
+        return names.get(lang) or names.get("en") or str(code)
+
+    # --------------------------------------------------------
+    # Ключи
+    # --------------------------------------------------------
+
+    def resolve(self, type_code: Any, face_code: Any, nps: Any, pressure_class: Any,
+                dn: Any = None) -> AsmeKey:
+        """
+        Переводит входные значения в ключ (nps_id, class_id, type_id, facing_id).
+
+        nps — '1 1/2', '1 ½', 1.5; если не задан, ищется по dn (40).
+
+        Raises:
+            FlangeLookupError: тип, NPS/DN, class или уплотнение не найдены.
+        """
+        type_text = str(type_code or "").strip()
+        face_text = str(face_code or "").strip()
+        type_id = self.types.get(type_text.upper())
+        if type_id is None:
+            raise FlangeLookupError(
+                "type_not_found", f"Flange type {type_text!r} not found", type_text
+            )
+
+        if nps not in (None, ""):
+            value = nps_value(nps)
+            nps_id = self.nps_by_value.get(value) if value is not None else None
+            size_text = str(nps)
+        else:
+            dn_number = _number(dn)
+            nps_id = self.nps_by_dn.get(int(dn_number)) if dn_number is not None else None
+            size_text = str(dn or "")
+        if nps_id is None:
+            raise FlangeLookupError("dn_not_found", f"NPS/DN {size_text!r} not found", size_text)
+
+        class_number = _number(pressure_class)
+        class_id = self.classes.get(int(class_number)) if class_number is not None else None
+        if class_id is None:
+            raise FlangeLookupError(
+                "pn_not_found", f"Class {pressure_class!r} not found", str(pressure_class or "")
+            )
+
+        facing_id = self.facings.get(face_text.upper()) if face_text else None
+        if face_text and self.facings and facing_id is None:
+            raise FlangeLookupError("face_not_found", f"Facing {face_text!r} not found", face_text)
+
+        return nps_id, class_id, type_id, facing_id
+
+    # --------------------------------------------------------
+    # Запросы
+    # --------------------------------------------------------
+
+    def _fetch(self, keys: List[AsmeKey]) -> Dict[AsmeKey, AsmeResult]:
+        """Размеры для уникальных ключей пачками по CHUNK_SIZE."""
+        found: Dict[AsmeKey, AsmeResult] = {}
+        with self._connection() as conn:
+            for start in range(0, len(keys), CHUNK_SIZE):
+                chunk = keys[start:start + CHUNK_SIZE]
+                params = [v for pos, key in enumerate(chunk) for v in (pos,) + key]
+
+                for row in conn.execute(_query(len(chunk)), params):
+                    pos, base_id, allowed = row[0], row[1], row[2]
+                    key = chunk[pos]
+                    if allowed is not None and not allowed:
+                        found[key] = FlangeLookupError(
+                            "not_applicable", "Not applicable according to the standard"
+                        )
+                        continue
+                    data: Dict[str, dict] = {}
+                    if base_id is not None:
+                        values = iter(row[3:])
+                        for table in _ALIASES.values():
+                            for col in DIMENSION_COLUMNS[table]:
+                                value = next(values)
+                                if value is not None:
+                                    data[col] = _item(value, table)
+                    found[key] = data
+
+                if any(key[3] is not None for key in chunk):
+                    for pos, code, length in conn.execute(_bolt_query(len(chunk)), params):
+                        data = found.get(chunk[pos])
+                        if isinstance(data, dict) and data:
+                            data[f"bolt_length_{str(code).strip().lower()}"] = _item(length, "bolt_length")
+        return found
+
+    def lookup_keys(self, keys: Iterable[AsmeKey]) -> Dict[AsmeKey, AsmeResult]:
+        """
+        Результаты для готовых ключей resolve(): словарь размеров
+        (пустой — размеров в базе нет) либо FlangeLookupError("not_applicable").
+
+        Ключи из кэша в базу не уходят, остальные — одним запросом на пачку.
+        """
+        result: Dict[AsmeKey, AsmeResult] = {}
+        missing: List[AsmeKey] = []
+        with self._lock:
+            for key in dict.fromkeys(keys):
+                cached = self._cache.get(key)
+                if cached is None:
+                    missing.append(key)
+                else:
+                    self._cache.move_to_end(key)
+                    result[key] = cached
+
+        if missing:
+            fetched = self._fetch(missing)
+            with self._lock:
+                for key, value in fetched.items():
+                    self._cache[key] = value
+                    result[key] = value
+                while len(self._cache) > self.cache_size:
+                    self._cache.popitem(last=False)
+        return result
+
+    def _cached(self, type_code: Any, face_code: Any, nps: Any, pressure_class: Any,
+                dn: Any = None) -> Dict[str, dict]:
+        key = self.resolve(type_code, face_code, nps, pressure_class, dn)
+        cached = self.lookup_keys([key])[key]
+        if isinstance(cached, FlangeLookupError):
+            raise cached
+        return cached
+
+    def lookup(self, type_code: Any, face_code: Any, nps: Any, pressure_class: Any,
+               dn: Any = None) -> Dict[str, dict]:
+        """
+        Размеры фланца в формате EN-каталога:
+        {"od": {"value": "127", "restricted": False, "source": "flange_base_dimensions",
+                "number": 127.0}, ...}; пустой словарь — размеров в базе нет.
+
+        Raises:
+            FlangeLookupError: тип/NPS/class/уплотнение не найдены или фланец не применяется.
+        """
+        return {field: dict(item) for field, item in
+                self._cached(type_code, face_code, nps, pressure_class, dn).items()}
+
+    def dimensions(self, type_code: Any, face_code: Any, nps: Any, pressure_class: Any,
+                   dn: Any = None) -> Dict[str, float]:
+        """
+        Только числовые размеры: {"od": 127.0, "pcd": 98.6, ...}.
+
+        Raises:
+            FlangeLookupError: как lookup().
+        """
+        return {field: item["number"] for field, item in
+                self._cached(type_code, face_code, nps, pressure_class, dn).items()}
+
+    def is_applicable(self, type_code: Any, nps: Any, pressure_class: Any, dn: Any = None) -> bool:
+        try:
+            self._cached(type_code, "", nps, pressure_class, dn)
+        except FlangeLookupError:
+            return False
+        return True
+
+    def available_classes(self) -> List[int]:
+        return sorted(self.classes)
+
+    def available_nps(self) -> List[str]:
+        """NPS в порядке возрастания: ['½', '¾', '1', ...]."""
+        return [info["nps"] for _id, info in sorted(self.nps_info.items())]
+
+
+# ============================================================
+# Общий экземпляр
+# ============================================================
+
+_engines: Dict[str, FlangeQueryEngineASME] = {}
+_engines_lock = threading.Lock()
+
+
+def get_engine(db_path: "str | Path | None" = None) -> FlangeQueryEngineASME:
+    """
+    Движок для файла базы; создаётся при первом обращении
+    и пересоздаётся, если файл изменился.
+
+    Raises:
+        OSError: файла базы нет.
+        sqlite3.Error: база не читается.
+    """
+    path = os.path.abspath(db_path or DEFAULT_DB_PATH)
+    mtime_ns = os.stat(path).st_mtime_ns
+
+    with _engines_lock:
+        engine = _engines.get(path)
+        if engine is None or engine.mtime_ns != mtime_ns:
+            if engine is not None:
+                engine.close()
+            engine = FlangeQueryEngineASME(path)
+            _engines[path] = engine
+        return engine
+
+
+# === 🔧 Тестовый запуск ===
+if __name__ == "__main__":
+    import time
+
+    engine = get_engine()
+    print("NPS:", engine.available_nps())
+    print("Классы:", engine.available_classes())
+    print("WN:", engine.name("flange_type", "WN", "ru"))
+    try:
+        print(engine.lookup("WN", "", "1 1/2", 150) or "размеров в базе нет")
+    except FlangeLookupError as e:
+        print("Ошибка:", e.message)
+
+    t0 = time.perf_counter()
+    n = 0
+    for nps in engine.available_nps() * 50:
+        for cls in engine.available_classes():
+            engine.lookup("WN", "", nps, cls)
+            n += 1
+    print(f"{n} запросов: {(time.perf_counter() - t0) / n * 1e6:.1f} мкс/запрос")
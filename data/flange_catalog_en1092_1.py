@@ -0,0 +1,444 @@
+"""
+Файл: flange_catalog_en1092_1.py
+Путь: data/flange_catalog_en1092_1.py
+
+Описание:
+~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+Каталог фланцев EN 1092-1 в памяти.
+
+База en1092-1.db читается один раз: таблицы Applicability, Terms, PNxx и Face
+переводятся в словари с числовыми ключами (PN, DN) и уже разобранными
+значениями размеров. Аналоги типов (02 ↔ 32/35/36/37, 04 ↔ 34, 12 ↔ 13)
+сопоставляются со строками Applicability при загрузке, а готовые ответы
+запоминаются по ключу (тип, уплотнение, DN, PN).
+
+Повторный запрос из диалога (перебор DN/PN в комбобоксах) стоит несколько
+микросекунд вместо четырёх pandas-загрузок. Если файл базы изменился
+(например, после data/add_applicability.py), get_catalog() перечитывает его.
+
+Модуль не показывает сообщений: ошибки выдаются исключением FlangeLookupError
+с ключом перевода, а get_flange_en1092_1 уже решает, как их показать.
+
+Зависимости:
+- sqlite3 (стандартная библиотека)
+
+Автор: AT-CAD Dev Team
+Дата: 2026-10-18
+Версия: 1.0
+~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+"""
+
+import logging
+import os
+import re
+import sqlite3
+import threading
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_DB_PATH = Path(__file__).with_name("en1092-1.db")
+
+# Пары "фланец + бурт": тип из запроса ищется в Applicability вместе с аналогами
+TYPE_ALIASES: Dict[str, Tuple[str, ...]] = {
+    "02": ("35", "32", "36", "37"),
+    "35": ("02", "32", "36", "37"),
+    "04": ("34",),
+    "34": ("04",),
+    "12": ("13",),
+    "13": ("12",),
+}
+
+# Спец-коды Terms: размер берётся из колонки с суффиксом (H4_35, F_32, ...)
+SPECIAL_MARKS = frozenset({32, 34, 35, 36, 37})
+
+_PN_TABLE_RE = re.compile(r"^PN(\d+(?:,\d+)?)$")
+
+
+# ============================================================
+# Типы данных
+# ============================================================
+
+@dataclass(frozen=True)
+class FlangeValue:
+    """
+    Значение размера из таблицы PNxx или Face.
+
+    text — как записано в базе (для совместимости с прежним выводом),
+    number — то же значение числом; None для "—", сносок и т.п.
+    """
+    text: str
+    number: Optional[float]
+
+
+class FlangeLookupError(LookupError):
+    """
+    Фланец не найден или не применяется.
+
+    key — ключ перевода (loc), args — параметры сообщения,
+    message — текст для поля "error" результата.
+    """
+
+    def __init__(self, key: str, message: str, *args: Any):
+        super().__init__(message)
+        self.key = key
+        self.message = message
+        self.args_for_message = args
+
+
+def _to_number(text: str) -> Optional[float]:
+    try:
+        return float(text.strip().replace(",", "."))
+    except ValueError:
+        return None
+
+
+def _to_int_safe(x: Any) -> int:
+    """Безопасное преобразование к целому числу."""
+    try:
+        return int(str(x).strip())
+    except Exception:
+        return 0
+
+
+def _pn_key(value: Any) -> Optional[float]:
+    """'2,5' / '2.5' / 16 -> число PN; None, если не число."""
+    return _to_number(str(value or ""))
+
+
+def _dn_key(value: Any) -> Optional[int]:
+    try:
+        return int(str(value or "").strip())
+    except ValueError:
+        return None
+
+
+# ============================================================
+# Каталог
+# ============================================================
+
+class FlangeCatalogEN1092:
+    """
+    Содержимое en1092-1.db в памяти.
+
+    Пример:
+        catalog = get_catalog()
+        data = catalog.lookup("11", "B1", 200, 16)      # как result["data"]
+        sizes = catalog.dimensions("11", "B1", 200, 16) # {"D": 340.0, ...}
+    """
+
+    def __init__(self, db_path: "str | Path"):
+        self.db_path = Path(db_path)
+        self.mtime_ns = os.stat(self.db_path).st_mtime_ns
+
+        self.type_names: Dict[str, Dict[str, str]] = {}
+        self.face_names: Dict[str, Dict[str, str]] = {}
+        self.fields: Tuple[str, ...] = ()
+        self.terms: Dict[str, Dict[str, int]] = {}
+        self.pn_labels: Dict[float, str] = {}
+        self.applicability: Optional[Dict[float, List[Tuple[str, Dict[int, int]]]]] = None
+        self.dimensions_by_pn: Dict[float, Dict[int, Dict[str, FlangeValue]]] = {}
+        self.face: Dict[int, Dict[str, FlangeValue]] = {}
+
+        self._resolved: Dict[Tuple[str, float], Optional[Tuple[str, Dict[int, int]]]] = {}
+        self._results: Dict[Tuple[str, str, Optional[int], Optional[float]], Any] = {}
+        self._lock = threading.Lock()
+
+        self._load()
+
+    # --------------------------------------------------------
+    # Загрузка
+    # --------------------------------------------------------
+
+    def _load(self) -> None:
+        uri = self.db_path.resolve().as_uri() + "?mode=ro"
+        conn = sqlite3.connect(uri, uri=True)
+        try:
+            tables = {
+                r[0] for r in conn.execute("SELECT name FROM sqlite_master WHERE type IN ('table', 'view')")
+            }
+
+            if "Type" in tables:
+                for code, de, en, ru in conn.execute('SELECT Typ, name_de, name_en, name_ru FROM "Type"'):
+                    self.type_names[str(code).strip()] = {"de": de, "en": en, "ru": ru}
+            if "Form" in tables:
+                for code, de, en, ru in conn.execute(
+                    'SELECT code, description_de, description_en, description_ru FROM "Form"'
+                ):
+                    self.face_names[str(code).strip()] = {"de": de, "en": en, "ru": ru}
+
+            if "Terms" in tables:
+                cur = conn.execute('SELECT * FROM "Terms"')
+                columns = [d[0] for d in cur.description]
+                self.fields = tuple(c.strip() for c in columns[1:] if c.strip())
+                for row in cur:
+                    code = str(row[0]).strip()
+                    # Первая строка с данным кодом побеждает (как в прежнем поиске)
+                    self.terms.setdefault(code, {
+                        col.strip(): _to_int_safe(v)
+                        for col, v in zip(columns[1:], row[1:])
+                        if col.strip()
+                    })
+
+            for table in tables:
+                m = _PN_TABLE_RE.match(table)
+                if m:
+                    pn = _pn_key(m.group(1))
+                    self.pn_labels[pn] = m.group(1)
+                    self.dimensions_by_pn[pn] = self._read_by_dn(conn, table)
+            if "Face" in tables:
+                self.face = self._read_by_dn(conn, "Face")
+
+            if "Applicability" in tables:
+                self.applicability = {}
+                cur = conn.execute('SELECT * FROM "Applicability"')
+                columns = [str(d[0]).strip() for d in cur.description]
+                for row in cur:
+                    values = dict(zip(columns, row))
+                    pn = _pn_key(values.pop("PN", None))
+                    typ = str(values.pop("Typ", "") or "").strip()
+                    flags = {
+                        dn: _to_int_safe(v)
+                        for col, v in values.items()
+                        if (dn := _dn_key(col)) is not None
+                    }
+                    if pn is not None:
+                        self.applicability.setdefault(pn, []).append((typ, flags))
+        finally:
+            conn.close()
+
+        # Аналоги типов сопоставляются заранее для всех известных кодов
+        for code in set(self.terms) | set(self.type_names):
+            for pn in self.applicability or ():
+                self._resolve(code, pn)
+
+        logger.info(
+            f"Каталог EN 1092-1 загружен: {self.db_path}, "
+            f"PN-таблиц {len(self.dimensions_by_pn)}, типов {len(self.terms)}"
+        )
+
+    @staticmethod
+    def _read_by_dn(conn: sqlite3.Connection, table: str) -> Dict[int, Dict[str, FlangeValue]]:
+        cur = conn.execute(f'SELECT * FROM "{table}"')
+        columns = [str(d[0]).strip() for d in cur.description]
+        result: Dict[int, Dict[str, FlangeValue]] = {}
+        for row in cur:
+            values = {
+                col: FlangeValue(str(v), _to_number(str(v)))
+                for col, v in zip(columns, row)
+                if v is not None
+            }
+            dn = _dn_key(values.pop("DN", FlangeValue("", None)).text)
+            if dn is not None:
+                result.setdefault(dn, values)
+        return result
+
+    # --------------------------------------------------------
+    # Применимость
+    # --------------------------------------------------------
+
+    def _resolve(self, type_code: str, pn: float) -> Optional[Tuple[str, Dict[int, int]]]:
+        """
+        Первая строка Applicability для PN, в коде которой есть тип или его аналог.
+        """
+        key = (type_code, pn)
+        if key not in self._resolved:
+            candidates = (type_code,) + TYPE_ALIASES.get(type_code, ())
+            self._resolved[key] = next(
+                (
+                    (typ, flags)
+                    for typ, flags in (self.applicability or {}).get(pn, ())
+                    if any(sub in typ for sub in candidates)
+                ),
+                None,
+            )
+        return self._resolved[key]
+
+    def _check_applicability(self, type_code: str, dn: Optional[int], pn: Optional[float],
+                             dn_text: str, pn_text: str) -> None:
+        aliases = [type_code] + list(TYPE_ALIASES.get(type_code, ()))
+
+        if not self.applicability:
+            raise FlangeLookupError("applicability_empty", "Applicability table is empty")
+        if pn is None or pn not in self.applicability:
+            raise FlangeLookupError("pn_not_found", f"PN{pn_text} not found in Applicability", pn_text)
+
+        match = self._resolve(type_code, pn)
+        if match is None:
+            raise FlangeLookupError(
+                "type_not_found",
+                f"Type {type_code} (aliases {aliases}) with PN {pn_text} not found",
+                type_code, ", ".join(aliases), pn_text,
+            )
+
+        _typ, flags = match
+        if dn is None or dn not in flags:
+            raise FlangeLookupError("dn_not_found", f"DN{dn_text} column not found in Applicability", dn_text)
+        if flags[dn] == 0:
+            raise FlangeLookupError(
+                "not_applicable",
+                f"Type {type_code} PN{pn_text} DN{dn_text} not applicable",
+                type_code, ", ".join(aliases), pn_text, dn_text,
+            )
+
+    def is_applicable(self, type_code: Any, dn: Any, pn: Any) -> bool:
+        try:
+            self._check_applicability(
+                str(type_code or "").strip(), _dn_key(dn), _pn_key(pn), str(dn), str(pn)
+            )
+        except FlangeLookupError:
+            return False
+        return True
+
+    def available_pns(self, type_code: Any) -> List[float]:
+        """PN, для которых тип (или его аналог) есть в Applicability."""
+        code = str(type_code or "").strip()
+        return sorted(pn for pn in self.applicability or () if self._resolve(code, pn))
+
+    def available_dns(self, type_code: Any, pn: Any) -> List[int]:
+        """DN, применимые для типа при данном PN."""
+        key = _pn_key(pn)
+        match = self._resolve(str(type_code or "").strip(), key) if key in (self.applicability or {}) else None
+        return sorted(dn for dn, flag in match[1].items() if flag) if match else []
+
+    # --------------------------------------------------------
+    # Размеры
+    # --------------------------------------------------------
+
+    def _build(self, type_code: str, face_code: str, dn: int, pn: float) -> Dict[str, dict]:
+        pn_table = f"PN{self.pn_labels.get(pn, pn)}"
+        pn_row = self.dimensions_by_pn.get(pn, {}).get(dn, {})
+        face_row = self.face.get(dn, {})
+        terms_type = self.terms.get(type_code, {})
+        terms_face = self.terms.get(face_code, {})
+
+        final: Dict[str, dict] = {}
+        for field in self.fields:
+            type_mark = terms_type.get(field, 0)
+            face_mark = terms_face.get(field, 0)
+
+            if face_mark in SPECIAL_MARKS:
+                eff_mark = face_mark
+            elif type_mark in SPECIAL_MARKS:
+                eff_mark = type_mark
+            elif 2 in (face_mark, type_mark):
+                eff_mark = 2
+            elif 1 in (face_mark, type_mark):
+                eff_mark = 1
+            else:
+                continue
+
+            # Для спец-кода сначала колонка с суффиксом (_36), затем обычная
+            names = (f"{field}_{eff_mark}", field) if eff_mark in SPECIAL_MARKS else (field,)
+            value, source = None, None
+            for src, data in ((pn_table, pn_row), ("Face", face_row)):
+                for name in names:
+                    cell = data.get(name)
+                    if cell is not None and cell.text:
+                        value, source = cell, src
+                        break
+                if value is not None:
+                    break
+
+            if value is not None:
+                final[field] = {
+                    "value": value.text,
+                    "restricted": eff_mark == 2,
+                    "source": source,
+                    "number": value.number,
+                }
+            else:
+                logger.debug(f"Поле {field} отмечено в Terms, но не найдено в {pn_table}/Face")
+        return final
+
+    def _cached(self, type_code: Any, face_code: Any, dn: Any, pn: Any) -> Dict[str, dict]:
+        type_code = str(type_code or "").strip()
+        face_code = str(face_code or "").strip()
+        dn_key, pn_key = _dn_key(dn), _pn_key(pn)
+        key = (type_code, face_code, dn_key, pn_key)
+
+        cached = self._results.get(key)
+        if cached is None:
+            try:
+                self._check_applicability(
+                    type_code, dn_key, pn_key, str(dn or "").strip(), str(pn or "").strip()
+                )
+                cached = self._build(type_code, face_code, dn_key, pn_key)
+            except FlangeLookupError as e:
+                cached = e
+            with self._lock:
+                self._results[key] = cached
+
+        if isinstance(cached, FlangeLookupError):
+            raise cached
+        return cached
+
+    def lookup(self, type_code: Any, face_code: Any, dn: Any, pn: Any) -> Dict[str, dict]:
+        """
+        Размеры фланца в формате result["data"] из get_flange_en1092_1:
+        {"D": {"value": "340", "restricted": False, "source": "PN16", "number": 340.0}, ...}
+
+        Raises:
+            FlangeLookupError: PN/тип/DN не найдены или фланец не применяется.
+        """
+        return {field: dict(item) for field, item in self._cached(type_code, face_code, dn, pn).items()}
+
+    def dimensions(self, type_code: Any, face_code: Any, dn: Any, pn: Any) -> Dict[str, float]:
+        """
+        Только числовые размеры: {"D": 340.0, "K": 295.0, ...}.
+
+        Raises:
+            FlangeLookupError: как lookup().
+        """
+        return {
+            field: item["number"]
+            for field, item in self._cached(type_code, face_code, dn, pn).items()
+            if item["number"] is not None
+        }
+
+
+# ============================================================
+# Общий экземпляр
+# ============================================================
+
+_catalogs: Dict[str, FlangeCatalogEN1092] = {}
+_catalogs_lock = threading.Lock()
+
+
+def get_catalog(db_path: "str | Path | None" = None) -> FlangeCatalogEN1092:
+    """
+    Каталог для файла базы; загружается при первом обращении
+    и перечитывается, если файл изменился.
+
+    Raises:
+        OSError: файла базы нет.
+        sqlite3.Error: база не читается.
+    """
+    path = os.path.abspath(db_path or DEFAULT_DB_PATH)
+    mtime_ns = os.stat(path).st_mtime_ns
+
+    with _catalogs_lock:
+        catalog = _catalogs.get(path)
+        if catalog is None or catalog.mtime_ns != mtime_ns:
+            catalog = FlangeCatalogEN1092(path)
+            _catalogs[path] = catalog
+        return catalog
+
+
+# === 🔧 Тестовый запуск ===
+if __name__ == "__main__":
+    import time
+    from pprint import pprint
+
+    catalog = get_catalog()
+    pprint(catalog.dimensions("11", "B1", 200, 16))
+    print("PN для типа 02:", catalog.available_pns("02"))
+    print("DN для 11/PN16:", catalog.available_dns("11", 16))
+
+    t0 = time.perf_counter()
+    for dn in catalog.available_dns("11", 16) * 100:
+        catalog.lookup("11", "B1", dn, 16)
+    n = len(catalog.available_dns("11", 16)) * 100
+    print(f"{n} запросов: {(time.perf_counter() - t0) / n * 1e6:.1f} мкс/запрос")
@@ -0,0 +1,338 @@
+"""
+Файл: handbook_client.py
+Путь: data/handbook_client.py
+
+Описание:
+~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+Клиент JSON API справочника engineering_handbook (api/materials/...,
+api/standards/) для AT-CAD.
+
+Каждый ответ сохраняется на диск вместе с ETag. Повторный запрос идёт
+с If-None-Match: если данные не менялись, сервер отвечает 304 и тело
+берётся из кэша, то есть списки загружаются один раз на версию данных.
+В памяти ответ живёт revalidate_after секунд без обращения к серверу.
+
+Если сервер недоступен, используется дисковый кэш (офлайн-режим),
+повторная попытка соединения — не раньше чем через retry_after секунд.
+Плотности без сервера и без кэша берутся из config/common_data.json.
+
+Адрес сервера: переменная окружения AT_HANDBOOK_URL, например
+http://127.0.0.1:8000/api/. Без неё клиент в сеть не обращается,
+а плотности берутся из config/common_data.json.
+
+Кэш хранится в папке пользователя, а не в программе:
+%LOCALAPPDATA%\\AT-CAD\\handbook_cache (Windows) или
+$XDG_CACHE_HOME/AT-CAD/handbook_cache (~/.cache/AT-CAD/handbook_cache).
+
+Зависимости:
+- urllib, json (стандартная библиотека)
+
+Автор: AT-CAD Dev Team
+Дата: 2026-10-18
+Версия: 1.0
+~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+"""
+
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+DEFAULT_BASE_URL = os.environ.get("AT_HANDBOOK_URL") or None
+DEFAULT_CACHE_DIR = Path(
+    os.environ.get("LOCALAPPDATA") or os.environ.get("XDG_CACHE_HOME") or Path.home() / ".cache"
+) / "AT-CAD" / "handbook_cache"
+COMMON_DATA_PATH = BASE_DIR / "config" / "common_data.json"
+
+# Максимальный размер страницы на сервере (engineering_handbook/api.py)
+PAGE_LIMIT = 1000
+
+# Единица плотности в ответе сервера -> множитель до г/см³
+DENSITY_TO_G_CM3 = {"kg/m³": 0.001, "kg/m3": 0.001, "g/cm³": 1.0, "g/cm3": 1.0}
+
+
+class HandbookUnavailable(RuntimeError):
+    """Справочник не настроен или недоступен, и в кэше нет ответа."""
+
+
+# ============================================================
+# Клиент
+# ============================================================
+
+class HandbookClient:
+    """
+    Клиент API справочника с кэшем на диске и в памяти.
+
+    Args:
+        base_url: адрес API (с завершающим "/"); None — офлайн, без запросов
+        cache_dir: папка дискового кэша
+        timeout: таймаут запроса, с
+        revalidate_after: сколько секунд ответ из памяти не перепроверяется
+        retry_after: пауза перед новой попыткой после ошибки соединения, с
+    """
+
+    def __init__(
+        self,
+        base_url: Optional[str] = DEFAULT_BASE_URL,
+        cache_dir: Path = DEFAULT_CACHE_DIR,
+        timeout: float = 2.0,
+        revalidate_after: float = 600.0,
+        retry_after: float = 60.0,
+    ):
+        self.base_url = base_url.rstrip("/") + "/" if base_url else None
+        self.cache_dir = Path(cache_dir)
+        self.timeout = timeout
+        self.revalidate_after = revalidate_after
+        self.retry_after = retry_after
+        # url -> (время проверки, etag, payload)
+        self._memory: Dict[str, Tuple[float, Optional[str], Any]] = {}
+        self._offline_until = 0.0
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        """Задан ли адрес справочника."""
+        return self.base_url is not None
+
+    # --------------------------------------------------------
+    # Кэш
+    # --------------------------------------------------------
+
+    def _cache_path(self, url: str) -> Path:
+        return self.cache_dir / (hashlib.sha1(url.encode("utf-8")).hexdigest() + ".json")
+
+    def _read_cache(self, url: str) -> Tuple[Optional[str], Any]:
+        try:
+            with self._cache_path(url).open("r", encoding="utf-8") as f:
+                entry = json.load(f)
+            return entry.get("etag"), entry.get("payload")
+        except (OSError, ValueError):
+            return None, None
+
+    def _write_cache(self, url: str, etag: Optional[str], payload: Any) -> None:
+        path = self._cache_path(url)
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = path.with_suffix(".tmp")
+            with tmp.open("w", encoding="utf-8") as f:
+                json.dump({"url": url, "etag": etag, "payload": payload}, f, ensure_ascii=False)
+            os.replace(tmp, path)
+        except OSError as e:
+            logger.warning(f"Не удалось записать кэш {path}: {e}")
+
+    # --------------------------------------------------------
+    # Запросы
+    # --------------------------------------------------------
+
+    def url(self, path: str, params: Optional[Dict[str, Any]] = None) -> str:
+        url = urllib.parse.urljoin(self.base_url, path.lstrip("/"))
+        params = {k: v for k, v in (params or {}).items() if v is not None}
+        if params:
+            url += "?" + urllib.parse.urlencode(sorted(params.items()))
+        return url
+
+    def get(self, path: str, params: Optional[Dict[str, Any]] = None) -> Any:
+        """
+        Ответ API (разобранный JSON): из памяти, после проверки ETag или из дискового кэша.
+
+        Raises:
+            HandbookUnavailable: справочник не настроен (AT_HANDBOOK_URL)
+                или недоступен, и ответа в кэше нет
+        """
+        if not self.enabled:
+            raise HandbookUnavailable("Адрес справочника не задан (AT_HANDBOOK_URL)")
+
+        url = self.url(path, params)
+        now = time.monotonic()
+        with self._lock:
+            cached = self._memory.get(url)
+            if cached is not None and now - cached[0] < self.revalidate_after:
+                return cached[2]
+            offline = now < self._offline_until
+        etag, payload = (cached[1], cached[2]) if cached is not None else self._read_cache(url)
+        if offline:
+            return self._offline(url, payload)
+
+        # Запрос идёт без блокировки: остальные потоки тем временем
+        # получают ответы из памяти
+        request = urllib.request.Request(url, headers={"Accept": "application/json"})
+        if etag and payload is not None:
+            request.add_header("If-None-Match", etag)
+        try:
+            with urllib.request.urlopen(request, timeout=self.timeout) as response:
+                payload = json.loads(response.read().decode("utf-8"))
+                etag = response.headers.get("ETag")
+            self._write_cache(url, etag, payload)
+        except urllib.error.HTTPError as e:
+            if e.code < 500 and e.code != 304:
+                raise
+            if e.code >= 500:
+                logger.warning(f"Ошибка сервера справочника ({url}): {e}")
+                return self._go_offline(url, payload)
+        except (urllib.error.URLError, OSError, ValueError) as e:
+            logger.warning(f"Справочник недоступен ({url}): {e}")
+            return self._go_offline(url, payload)
+
+        with self._lock:
+            self._memory[url] = (now, etag, payload)
+        return payload
+
+    def _go_offline(self, url: str, payload: Any) -> Any:
+        with self._lock:
+            self._offline_until = time.monotonic() + self.retry_after
+        return self._offline(url, payload)
+
+    def _offline(self, url: str, payload: Any) -> Any:
+        if payload is None:
+            raise HandbookUnavailable(f"Нет соединения со справочником и нет кэша: {url}")
+        with self._lock:
+            self._memory.setdefault(url, (time.monotonic(), None, payload))
+        return payload
+
+    def get_all(self, path: str, params: Optional[Dict[str, Any]] = None) -> List[dict]:
+        """Все страницы списка (offset/limit) одним списком."""
+        params = dict(params or {}, limit=PAGE_LIMIT)
+        results: List[dict] = []
+        offset: Optional[int] = 0
+        while offset is not None:
+            page = self.get(path, dict(params, offset=offset))
+            results.extend(page["results"])
+            offset = page.get("next")
+        return results
+
+    def clear(self) -> None:
+        """Сбросить кэш в памяти (дисковый остаётся для офлайн-режима)."""
+        with self._lock:
+            self._memory.clear()
+            self._offline_until = 0.0
+
+    # --------------------------------------------------------
+    # Данные справочника
+    # --------------------------------------------------------
+
+    def materials(self, **filters) -> List[dict]:
+        return self.get_all("materials/", filters)
+
+    def material(self, number: str) -> dict:
+        return self.get(f"materials/{urllib.parse.quote(number)}/")
+
+    def densities(self) -> Dict[str, float]:
+        """
+        Материал -> плотность в г/см³ (как в common_data.json).
+
+        Raises:
+            KeyError: сервер вернул неизвестную единицу плотности
+        """
+        payload = self.get("materials/densities/")
+        if not payload["results"]:
+            return {}
+        factor = DENSITY_TO_G_CM3[payload["unit"]]
+        return {item["name"]: round(item["density"] * factor, 4) for item in payload["results"]}
+
+    def properties(self, number: str, kind: str = "mechanical", temperature: float = 20.0) -> List[dict]:
+        payload = self.get(f"materials/{urllib.parse.quote(number)}/properties/", {"kind": kind, "t": temperature})
+        return payload["results"]
+
+    def values(
+        self,
+        materials: List[str],
+        key: str,
+        temperatures: List[float],
+        bound: str = "min",
+    ) -> Dict[str, List[Optional[float]]]:
+        """
+        Значения свойства, интерполированные по температуре:
+        материал -> [значение для каждой температуры] (None — нет данных).
+        """
+        payload = self.get("materials/values/", {
+            "materials": ",".join(materials),
+            "property": key,
+            "t": ",".join(f"{t:g}" for t in temperatures),
+            "bound": bound,
+        })
+        return dict(zip(payload["materials"], payload["values"]))
+
+    def analogues(self, code: str, system: Optional[str] = None) -> List[dict]:
+        return self.get("materials/analogues/", {"code": code, "system": system})["analogues"]
+
+    def standards(self, **filters) -> List[dict]:
+        return self.get_all("standards/", filters)
+
+
+# ============================================================
+# Общий клиент и плотности для AT-CAD
+# ============================================================
+
+_client: Optional[HandbookClient] = None
+_common_densities: Optional[Dict[str, float]] = None
+
+
+def get_client() -> HandbookClient:
+    global _client
+    if _client is None:
+        _client = HandbookClient()
+    return _client
+
+
+def _load_common_densities() -> Dict[str, float]:
+    """Плотности из config/common_data.json (читается один раз за процесс)."""
+    global _common_densities
+    if _common_densities is None:
+        _common_densities = {}
+        try:
+            with COMMON_DATA_PATH.open("r", encoding="utf-8") as f:
+                data = json.load(f)
+            for item in data.get("dimensions", {}).get("material", []):
+                if item.get("name"):
+                    _common_densities[item["name"]] = item.get("density")
+        except (OSError, ValueError) as e:
+            logger.error(f"Ошибка загрузки {COMMON_DATA_PATH}: {e}")
+    return _common_densities
+
+
+def material_densities() -> Dict[str, float]:
+    """
+    Материал -> плотность, г/см³.
+
+    Порядок и значения из common_data.json, справочник дополняет
+    и уточняет их; без справочника и кэша — только common_data.json.
+    """
+    densities = dict(_load_common_densities())
+    try:
+        densities.update(get_client().densities())
+    except HandbookUnavailable as e:
+        logger.info(f"Плотности из common_data.json: {e}")
+    except (urllib.error.HTTPError, KeyError, TypeError) as e:
+        logger.warning(f"Некорректный ответ справочника: {e}")
+    return densities
+
+
+def material_list() -> List[dict]:
+    """Список материалов для диалогов: [{"name", "density"}, ...]."""
+    return [{"name": name, "density": density} for name, density in material_densities().items()]
+
+
+# ============================================================
+# === 🔧 Тестовый запуск ===
+# ============================================================
+
+if __name__ == "__main__":
+    client = get_client()
+    print("API:", client.base_url or "не задан (AT_HANDBOOK_URL), офлайн")
+    try:
+        print("Материалов:", len(client.materials()))
+        print("Стандартов:", len(client.standards()))
+    except HandbookUnavailable as e:
+        print(e)
+    densities = material_densities()
+    print(f"Плотностей: {len(densities)}, 1.4404 = {densities.get('1.4404')} г/см³")
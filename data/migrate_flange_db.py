@@ -0,0 +1,420 @@
+"""
+Файл: migrate_flange_db.py
+Путь: data/migrate_flange_db.py
+
+Описание:
+~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+Перевод баз фланцев в нормализованную типизированную схему.
+
+В en1092-1.db размеры лежат в отдельной таблице на каждое давление
+(PN2,5 … PN400), плюс Face и Applicability, и все колонки там TEXT.
+Миграция складывает их в две "длинные" таблицы:
+
+- flange_dimensions — одна строка на (стандарт, исходная таблица, тип, PN, DN),
+  размеры в колонках REAL. Нечисловые значения ("—", сноски "d", "8b")
+  сохраняются в text_overrides (JSON), чтобы ничего не потерять;
+- flange_dn_applicability — применимость (стандарт, тип, PN, DN) -> 0/1.
+
+Составные индексы (standard, type, dn, pn) и (standard, pn, dn)
+превращают запросы вида "все PN16 с D ≤ 300" в поиск по индексу
+(find_dimensions).
+
+Старые таблицы заменяются представлениями (VIEW) с теми же именами,
+колонками, текстом значений и порядком строк — get_flange_en1092_1,
+каталог и прочие читатели продолжают работать без изменений.
+Перед миграцией рядом создаётся копия базы (*.bak; если такая уже есть —
+*.1.bak, *.2.bak, …). Уже переведённая база не копируется и не меняется.
+
+ASME B16.5 сюда не переносится: его размеры лежат в типизированных
+таблицах AME_B16_5.db (импорт — data/works/import_asme_csvs.py).
+
+Запуск:
+    python -m data.migrate_flange_db [путь_к_en1092-1.db]
+
+Важно: перед запуском закройте все программы, которые держат базу открытой.
+После миграции Applicability — представление, поэтому data/add_applicability.py
+(первичное заполнение таблицы) запускается только на непереведённой базе.
+
+Зависимости:
+- sqlite3 (стандартная библиотека, JSON1)
+
+Автор: AT-CAD Dev Team
+Дата: 2026-10-18
+Версия: 1.0
+~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+"""
+
+import json
+import logging
+import re
+import sqlite3
+import sys
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_EN_DB_PATH = Path(__file__).with_name("en1092-1.db")
+
+STANDARD_EN = "EN 1092-1"
+
+# Служебные колонки flange_dimensions; всё остальное — размеры (REAL)
+KEY_COLUMNS = ("id", "standard", "source", "type", "pn", "dn", "nps", "ordinal", "text_overrides")
+
+SCHEMA_SQL = """
+CREATE TABLE IF NOT EXISTS flange_dimensions (
+    id INTEGER PRIMARY KEY,
+    standard TEXT NOT NULL,              -- 'EN 1092-1'
+    source TEXT NOT NULL,                -- исходная таблица: 'PN16', 'Face'
+    type TEXT NOT NULL DEFAULT '',       -- '' = общие размеры для всех типов
+    pn REAL NOT NULL DEFAULT 0,          -- PN / class; 0 = не зависит от давления
+    dn INTEGER NOT NULL,
+    nps TEXT NOT NULL DEFAULT '',
+    ordinal INTEGER NOT NULL DEFAULT 0,  -- порядок строк исходной таблицы
+    text_overrides TEXT,                 -- JSON {колонка: исходный текст}
+    UNIQUE (standard, source, type, pn, dn, nps)
+);
+-- Выборка по типу (и DN) — каталог EN по типу фланца
+CREATE INDEX IF NOT EXISTS ix_flange_dimensions_type
+    ON flange_dimensions (standard, type, dn, pn);
+-- find_dimensions(pn=...): фильтр по PN, строки уже идут по DN
+CREATE INDEX IF NOT EXISTS ix_flange_dimensions_pn
+    ON flange_dimensions (standard, pn, dn);
+
+CREATE TABLE IF NOT EXISTS flange_dn_applicability (
+    standard TEXT NOT NULL,
+    type TEXT NOT NULL,
+    pn REAL NOT NULL,
+    dn INTEGER NOT NULL,
+    allowed INTEGER,
+    ordinal INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (standard, type, pn, dn)
+);
+CREATE INDEX IF NOT EXISTS ix_flange_dn_applicability_pn
+    ON flange_dn_applicability (standard, pn, dn);
+"""
+
+_PN_TABLE_RE = re.compile(r"^PN(\d+(?:,\d+)?)$")
+
+
+# ============================================================
+# Значения
+# ============================================================
+
+def _q(name: str) -> str:
+    """Имя колонки / таблицы в кавычках SQL."""
+    return '"' + name.replace('"', '""') + '"'
+
+
+def split_value(value: Any) -> Tuple[Optional[float], Optional[str]]:
+    """
+    Значение ячейки -> (число для REAL, исходный текст, если число его не передаёт).
+
+    "17.2" -> (17.2, None); "4.50" -> (4.5, "4.50"); "—" -> (None, "—"); None -> (None, None).
+    """
+    if value is None:
+        return None, None
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return float(value), None
+
+    text = str(value)
+    try:
+        number = float(text.strip().replace(",", "."))
+    except ValueError:
+        return None, text
+    # Представление отдаёт число как printf('%g'); иначе сохраняем исходный текст
+    return number, (None if "%g" % number == text else text)
+
+
+def pn_number(label: Any) -> float:
+    """'2,5' -> 2.5, '16' -> 16.0."""
+    return float(str(label).strip().replace(",", "."))
+
+
+# ============================================================
+# Схема и запись
+# ============================================================
+
+def create_schema(conn: sqlite3.Connection) -> None:
+    """Создаёт нормализованные таблицы и индексы (повторный вызов безопасен)."""
+    conn.executescript(SCHEMA_SQL)
+
+
+def dimension_columns(conn: sqlite3.Connection) -> List[str]:
+    """Колонки размеров flange_dimensions в порядке создания."""
+    return [
+        r[1] for r in conn.execute("PRAGMA table_info(flange_dimensions)")
+        if r[1] not in KEY_COLUMNS
+    ]
+
+
+def _ensure_columns(conn: sqlite3.Connection, names: Iterable[str]) -> None:
+    existing = set(dimension_columns(conn))
+    for name in names:
+        if name not in existing and name not in KEY_COLUMNS:
+            conn.execute(f"ALTER TABLE flange_dimensions ADD COLUMN {_q(name)} REAL")
+            existing.add(name)
+
+
+def upsert_dimensions(
+    conn: sqlite3.Connection,
+    standard: str,
+    source: str,
+    rows: Iterable[Mapping[str, Any]],
+    replace: bool = True,
+) -> int:
+    """
+    Записывает строки размеров в flange_dimensions.
+
+    Каждая строка: {"type", "pn", "dn", "nps", "ordinal", "values": {колонка: значение}}.
+    Новые колонки размеров добавляются автоматически.
+    replace=False — при совпадении ключа остаётся первая строка (как в исходных таблицах).
+    """
+    rows = list(rows)
+    _ensure_columns(conn, dict.fromkeys(
+        str(col).strip() for row in rows for col in row.get("values", {})
+    ))
+
+    verb = "INSERT OR REPLACE" if replace else "INSERT OR IGNORE"
+    count = 0
+    for row in rows:
+        numbers: Dict[str, Optional[float]] = {}
+        overrides: Dict[str, str] = {}
+        for col, value in row.get("values", {}).items():
+            col = str(col).strip()
+            numbers[col], text = split_value(value)
+            if text is not None:
+                overrides[col] = text
+
+        columns = ["standard", "source", "type", "pn", "dn", "nps", "ordinal", "text_overrides"] + list(numbers)
+        params = [
+            standard,
+            source,
+            str(row.get("type") or ""),
+            float(row.get("pn") or 0),
+            int(row["dn"]),
+            str(row.get("nps") or ""),
+            int(row.get("ordinal") or 0),
+            json.dumps(overrides, ensure_ascii=False) if overrides else None,
+        ] + list(numbers.values())
+        conn.execute(
+            f"{verb} INTO flange_dimensions ({', '.join(_q(c) for c in columns)}) "
+            f"VALUES ({', '.join('?' * len(columns))})",
+            params,
+        )
+        count += 1
+    return count
+
+
+def upsert_applicability(
+    conn: sqlite3.Connection,
+    standard: str,
+    rows: Iterable[Tuple[str, float, int, Optional[int], int]],
+) -> int:
+    """Строки (type, pn, dn, allowed, ordinal) в flange_dn_applicability."""
+    cur = conn.executemany(
+        "INSERT OR IGNORE INTO flange_dn_applicability (standard, type, pn, dn, allowed, ordinal) "
+        "VALUES (?, ?, ?, ?, ?, ?)",
+        [(standard,) + tuple(r) for r in rows],
+    )
+    return cur.rowcount
+
+
+# ============================================================
+# Представления совместимости
+# ============================================================
+
+def _text_expr(column: str) -> str:
+    """Исходный текст ячейки: из text_overrides, иначе число как printf('%g')."""
+    path = "$." + json.dumps(column, ensure_ascii=False)
+    return (
+        f"COALESCE(json_extract(text_overrides, '{path}'), "
+        f"CASE WHEN {_q(column)} IS NOT NULL THEN printf('%g', {_q(column)}) END)"
+    )
+
+
+def create_dimension_view(
+    conn: sqlite3.Connection,
+    view: str,
+    standard: str,
+    source: str,
+    columns: Sequence[str],
+    key_column: str = "DN",
+) -> None:
+    """
+    VIEW в форме старой таблицы: все колонки TEXT, исходные имена и порядок строк.
+    """
+    select = [f"CAST(dn AS TEXT) AS {_q(key_column)}"] + [
+        f"{_text_expr(col.strip())} AS {_q(col)}" for col in columns if col != key_column
+    ]
+    conn.execute(f"DROP VIEW IF EXISTS {_q(view)}")
+    conn.execute(
+        f"CREATE VIEW {_q(view)} AS SELECT {', '.join(select)} FROM flange_dimensions "
+        f"WHERE standard = '{standard}' AND source = '{source}' ORDER BY ordinal"
+    )
+
+
+def create_applicability_view(conn: sqlite3.Connection, standard: str, dn_columns: Sequence[str]) -> None:
+    """VIEW "Applicability": строка на (Typ, PN), колонка на каждый DN."""
+    select = [
+        'type AS "Typ"',
+        "replace(printf('%g', pn), '.', ',') AS \"PN\"",
+    ] + [
+        f"MAX(CASE WHEN dn = {int(dn)} THEN CAST(allowed AS TEXT) END) AS {_q(dn)}"
+        for dn in dn_columns
+    ]
+    conn.execute('DROP VIEW IF EXISTS "Applicability"')
+    conn.execute(
+        f'CREATE VIEW "Applicability" AS SELECT {", ".join(select)} FROM flange_dn_applicability '
+        f"WHERE standard = '{standard}' GROUP BY type, pn ORDER BY MIN(ordinal)"
+    )
+
+
+# ============================================================
+# Миграция EN 1092-1
+# ============================================================
+
+def _table_kind(conn: sqlite3.Connection, name: str) -> Optional[str]:
+    row = conn.execute("SELECT type FROM sqlite_master WHERE name = ?", (name,)).fetchone()
+    return row[0] if row else None
+
+
+def _backup(db_path: Path) -> Path:
+    """Копия базы рядом с ней; существующие копии не перезаписываются."""
+    target = db_path.with_name(db_path.name + ".bak")
+    n = 0
+    while target.exists():
+        n += 1
+        target = db_path.with_name(f"{db_path.name}.{n}.bak")
+    src = sqlite3.connect(db_path)
+    dst = sqlite3.connect(target)
+    try:
+        src.backup(dst)
+    finally:
+        dst.close()
+        src.close()
+    return target
+
+
+def migrate_en1092(db_path: "str | Path" = DEFAULT_EN_DB_PATH, backup: bool = True) -> Dict[str, int]:
+    """
+    Переводит en1092-1.db на flange_dimensions / flange_dn_applicability.
+
+    Таблицы PNxx, Face и Applicability заменяются одноимёнными представлениями.
+    Уже переведённые таблицы (VIEW) пропускаются; если переводить нечего,
+    база не копируется и не открывается на запись.
+
+    Returns:
+        dict: число перенесённых строк по исходным таблицам.
+    """
+    db_path = Path(db_path)
+    stats: Dict[str, int] = {}
+    conn = sqlite3.connect(db_path)
+    try:
+        names = [r[0] for r in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")]
+        sources = [n for n in names if _PN_TABLE_RE.match(n) or n == "Face"]
+        if not sources and _table_kind(conn, "Applicability") != "table":
+            logger.info(f"{db_path}: уже переведена")
+            return stats
+
+        if backup:
+            logger.info(f"Резервная копия: {_backup(db_path)}")
+
+        with conn:
+            create_schema(conn)
+
+            for table in sources:
+                cur = conn.execute(f"SELECT rowid, * FROM {_q(table)}")
+                columns = [d[0] for d in cur.description][1:]
+                m = _PN_TABLE_RE.match(table)
+                pn = pn_number(m.group(1)) if m else 0.0
+
+                rows = []
+                for rowid, *values in cur:
+                    data = dict(zip(columns, values))
+                    dn = str(data.pop("DN", "") or "").strip()
+                    if not dn.isdigit():
+                        logger.warning(f"{table}: строка {rowid} без DN пропущена")
+                        continue
+                    rows.append({"pn": pn, "dn": int(dn), "ordinal": rowid, "values": data})
+
+                stats[table] = upsert_dimensions(conn, STANDARD_EN, table, rows, replace=False)
+                conn.execute(f"DROP TABLE {_q(table)}")
+                create_dimension_view(conn, table, STANDARD_EN, table, columns)
+
+            if _table_kind(conn, "Applicability") == "table":
+                cur = conn.execute('SELECT rowid, * FROM "Applicability"')
+                columns = [d[0] for d in cur.description][1:]
+                dn_columns = [c for c in columns if str(c).strip().isdigit()]
+
+                rows = []
+                for rowid, *values in cur:
+                    data = dict(zip(columns, values))
+                    typ = str(data.get("Typ") or "").strip()
+                    pn = pn_number(data.get("PN"))
+                    for dn in dn_columns:
+                        allowed, _text = split_value(data[dn])
+                        rows.append((typ, pn, int(dn), None if allowed is None else int(allowed), rowid))
+
+                stats["Applicability"] = upsert_applicability(conn, STANDARD_EN, rows)
+                conn.execute('DROP TABLE "Applicability"')
+                create_applicability_view(conn, STANDARD_EN, dn_columns)
+
+        conn.execute("ANALYZE")
+    finally:
+        conn.close()
+
+    logger.info(f"Миграция {db_path}: {stats}")
+    return stats
+
+
+# ============================================================
+# Запросы по диапазонам
+# ============================================================
+
+def find_dimensions(
+    conn: sqlite3.Connection,
+    standard: str = STANDARD_EN,
+    pn: Optional[float] = None,
+    type: Optional[str] = None,
+    source: Optional[str] = None,
+    **bounds: Tuple[Optional[float], Optional[float]],
+) -> List[Dict[str, Any]]:
+    """
+    Строки flange_dimensions по стандарту, PN, типу и диапазонам размеров.
+
+    Пример — все PN16 с D ≤ 300:
+        find_dimensions(conn, pn=16, D=(None, 300))
+    """
+    allowed = set(dimension_columns(conn))
+    where, params = ["standard = ?"], [standard]
+    for column, value in (("pn", pn), ("type", type), ("source", source)):
+        if value is not None:
+            where.append(f"{column} = ?")
+            params.append(value)
+    for column, (low, high) in bounds.items():
+        if column not in allowed:
+            raise KeyError(f"Неизвестная колонка размеров: {column}")
+        if low is not None:
+            where.append(f"{_q(column)} >= ?")
+            params.append(low)
+        if high is not None:
+            where.append(f"{_q(column)} <= ?")
+            params.append(high)
+
+    cur = conn.execute(
+        f"SELECT * FROM flange_dimensions WHERE {' AND '.join(where)} ORDER BY pn, dn, ordinal",
+        params,
+    )
+    names = [d[0] for d in cur.description]
+    return [
+        {k: v for k, v in zip(names, row) if v is not None or k in KEY_COLUMNS}
+        for row in cur
+    ]
+
+
+# === 🔧 Запуск ===
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    target = Path(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_EN_DB_PATH
+    print(migrate_en1092(target))
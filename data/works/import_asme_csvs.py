@@ -1,65 +1,109 @@
-# data/import_asme_csvs.py
-# Требования: pandas, sqlite3
+# data/works/import_asme_csvs.py
+# Импорт размеров ASME B16.5 из CSV (asme_*.csv рядом со скриптом)
+# в типизированные таблицы data/AME_B16_5.db, которые читает
+# data/flange_catalog_asme_b16_5.py:
+#   D, T, C, holes, hole_dia -> flange_base_dimensions (NPS + class)
+#   Y                        -> flange_type_dimensions (+ тип фланца)
+# Колонке R (диаметр выступа RF) в схеме соответствия нет, она не переносится.
+# Справочники standards, nps, pressure_class и flange_type берутся из базы;
+# строки с неизвестным стандартом, NPS, классом или типом пропускаются.
+# Повторный импорт обновляет строки по уникальным ключам таблиц.
+# Требования: sqlite3
+import csv
 import sqlite3
+import sys
 from pathlib import Path
-import pandas as pd
-
-ROOT = Path(__file__).resolve().parents[1]
-DATA_DIR = ROOT / "data"
-DB_PATH = DATA_DIR / "asme_b16_5.db"
-
-# SQL схема (упрощённая) — создаст таблицу asme_flanges
-CREATE_SQL = """
-PRAGMA foreign_keys = ON;
-CREATE TABLE IF NOT EXISTS asme_flanges (
-    id INTEGER PRIMARY KEY,
-    standard TEXT,
-    flange_type TEXT,
-    pressure_class TEXT,
-    nps TEXT,
-    D REAL,
-    T REAL,
-    R REAL,
-    Y REAL,
-    C REAL,
-    holes INTEGER,
-    hole_dia REAL,
-    notes TEXT,
-    UNIQUE (standard, flange_type, pressure_class, nps)
-);
-"""
-
-def create_db():
-    conn = sqlite3.connect(DB_PATH)
-    conn.executescript(CREATE_SQL)
-    conn.commit()
-    conn.close()
-    print("DB created:", DB_PATH)
-
-def import_csv(csv_path):
-    df = pd.read_csv(csv_path)
-    # Приведём названия колонок к общему виду
-    df = df.rename(columns=lambda c: c.strip())
-    conn = sqlite3.connect(DB_PATH)
-    for _, row in df.iterrows():
-        # upsert: попробуем обновить, иначе вставим
-        conn.execute("""
-            INSERT OR REPLACE INTO asme_flanges (id, standard, flange_type, pressure_class, nps, D, T, R, Y, C, holes, hole_dia)
-            VALUES (
-                (SELECT id FROM asme_flanges WHERE standard=? AND flange_type=? AND pressure_class=? AND nps=?),
-                ?,?,?,?,?,?,?,?,?,?
-            )
-        """, (row.get('standard'), row.get('flange_type'), row.get('pressure_class'), str(row.get('nps')),
-              row.get('standard'), row.get('flange_type'), row.get('pressure_class'), str(row.get('nps')),
-              row.get('D'), row.get('T'), row.get('R'), row.get('Y'), row.get('C'), int(row.get('holes') or 0), row.get('hole_dia')))
-    conn.commit()
-    conn.close()
-    print("Imported:", csv_path)
-
-def import_all():
-    create_db()
-    for p in DATA_DIR.glob("asme_*.csv"):
-        import_csv(p)
+
+ROOT = Path(__file__).resolve().parents[2]
+CSV_DIR = Path(__file__).resolve().parent
+DB_PATH = ROOT / "data" / "AME_B16_5.db"
+
+# NPS -> DN (ASME B36.10 / EN ISO 6708); NPS в базе ищется по DN
+NPS_TO_DN = {
+    "1/2": 15, "3/4": 20, "1": 25, "1.25": 32, "1 1/4": 32, "1.5": 40, "1 1/2": 40,
+    "2": 50, "2.5": 65, "2 1/2": 65, "3": 80, "3.5": 90, "3 1/2": 90, "4": 100,
+    "5": 125, "6": 150, "8": 200, "10": 250, "12": 300, "14": 350, "16": 400,
+    "18": 450, "20": 500, "22": 550, "24": 600,
+}
+
+# Колонка CSV -> колонка таблицы
+BASE_COLUMNS = {"D": "od", "T": "thickness", "C": "pcd", "holes": "number_of_bolts", "hole_dia": "bolt_hole_diameter"}
+TYPE_COLUMNS = {"Y": "y"}
+
+
+def _key(text):
+    return str(text or "").replace("_", " ").strip().upper()
+
+
+def _number(text):
+    text = (text or "").strip().replace(",", ".")
+    return float(text) if text else None
+
+
+def _upsert_sql(table, keys, columns):
+    names = list(keys) + list(columns)
+    updates = ", ".join(f"{c} = excluded.{c}" for c in columns)
+    return (
+        f"INSERT INTO {table} ({', '.join(names)}) VALUES ({', '.join('?' * len(names))}) "
+        f"ON CONFLICT ({', '.join(k for k in keys if k != 'standard_id')}) DO UPDATE SET {updates}"
+    )
+
+
+BASE_SQL = _upsert_sql("flange_base_dimensions", ("standard_id", "nps_id", "class_id"), BASE_COLUMNS.values())
+TYPE_SQL = _upsert_sql("flange_type_dimensions", ("base_dim_id", "flange_type_id"), TYPE_COLUMNS.values())
+
+
+def load_references(conn):
+    return {
+        "standard": {_key(name): id_ for id_, name in conn.execute("SELECT id, name FROM standards")},
+        "nps": {int(dn): id_ for id_, dn in conn.execute("SELECT id, dn FROM nps WHERE dn IS NOT NULL")},
+        "class": {int(value): id_ for id_, value in conn.execute("SELECT id, class FROM pressure_class")},
+        "type": {_key(code): id_ for id_, code in conn.execute("SELECT id, code FROM flange_type")},
+    }
+
+
+def import_csv(csv_path, db_path=DB_PATH):
+    conn = sqlite3.connect(db_path)
+    imported = 0
+    try:
+        refs = load_references(conn)
+        with open(csv_path, newline="", encoding="utf-8") as f, conn:
+            reader = csv.DictReader(f)
+            reader.fieldnames = [c.strip() for c in reader.fieldnames or []]
+            for line_no, row in enumerate(reader, 2):
+                nps = (row.get("nps") or "").strip()
+                if not (row.get("standard") or "").strip() or not nps:
+                    continue
+                try:
+                    standard_id = refs["standard"][_key(row["standard"])]
+                    nps_id = refs["nps"][NPS_TO_DN[nps]]
+                    class_id = refs["class"][int(_number(row["pressure_class"]))]
+                    type_id = refs["type"][_key(row["flange_type"])]
+                except (KeyError, TypeError, ValueError) as e:
+                    print(f"{csv_path.name}:{line_no}: unknown value {e}, skipped")
+                    continue
+
+                base = [_number(row.get(c)) for c in BASE_COLUMNS]
+                if base[3] is not None:
+                    base[3] = int(base[3])
+                conn.execute(BASE_SQL, [standard_id, nps_id, class_id] + base)
+                base_dim_id = conn.execute(
+                    "SELECT id FROM flange_base_dimensions WHERE nps_id = ? AND class_id = ?",
+                    (nps_id, class_id),
+                ).fetchone()[0]
+                conn.execute(TYPE_SQL, [base_dim_id, type_id] + [_number(row.get(c)) for c in TYPE_COLUMNS])
+                imported += 1
+    finally:
+        conn.close()
+    print("Imported:", csv_path, imported)
+    return imported
+
+
+def import_all(db_path=DB_PATH):
+    if not Path(db_path).is_file():
+        sys.exit(f"DB not found: {db_path}")
+    return sum(import_csv(p, db_path) for p in sorted(CSV_DIR.glob("asme_*.csv")))
+
 
 if __name__ == "__main__":
-    import_all()
+    import_all(Path(sys.argv[1]) if len(sys.argv) > 1 else DB_PATH)
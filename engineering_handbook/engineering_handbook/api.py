@@ -0,0 +1,60 @@
+"""
+Helpers for the read-only JSON API (api/...).
+
+Every response carries an ETag (hash of the body); a request with a
+matching If-None-Match gets 304 without a body, so clients download a
+list only when the data changed. Lists are paginated with offset/limit.
+"""
+
+import hashlib
+import json
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import HttpResponse, HttpResponseNotModified, JsonResponse
+from django.utils.http import parse_etags
+
+DEFAULT_LIMIT = 100
+MAX_LIMIT = 1000
+
+
+def error(message: str, status: int = 400) -> JsonResponse:
+    return JsonResponse({"error": message}, status=status)
+
+
+def json_response(request, payload) -> HttpResponse:
+    """JSON with a content ETag; 304 when If-None-Match matches."""
+    body = json.dumps(payload, cls=DjangoJSONEncoder, ensure_ascii=False, sort_keys=True, separators=(",", ":"))
+    etag = '"%s"' % hashlib.sha1(body.encode("utf-8")).hexdigest()
+
+    if_none_match = request.headers.get("If-None-Match")
+    if if_none_match and (etag in parse_etags(if_none_match) or if_none_match.strip() == "*"):
+        response = HttpResponseNotModified()
+    else:
+        response = HttpResponse(body, content_type="application/json; charset=utf-8")
+    response["ETag"] = etag
+    # Клиент всегда перепроверяет, данные не устаревают молча
+    response["Cache-Control"] = "no-cache"
+    return response
+
+
+def paginate(request, items, serialize) -> dict:
+    """
+    ?offset=0&limit=100 (limit <= MAX_LIMIT) over a queryset or list.
+    -> {"count", "offset", "limit", "next", "results"}; next is the
+    offset of the following page or None.
+    """
+    try:
+        offset = max(int(request.GET.get("offset", 0)), 0)
+        limit = min(max(int(request.GET.get("limit", DEFAULT_LIMIT)), 1), MAX_LIMIT)
+    except ValueError:
+        raise ValueError("offset and limit must be integers")
+
+    count = items.count() if hasattr(items, "count") and not isinstance(items, list) else len(items)
+    page = items[offset:offset + limit]
+    return {
+        "count": count,
+        "offset": offset,
+        "limit": limit,
+        "next": offset + limit if offset + limit < count else None,
+        "results": [serialize(item) for item in page],
+    }
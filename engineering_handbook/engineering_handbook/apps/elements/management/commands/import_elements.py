@@ -1,26 +1,52 @@
 # engineering_handbook/apps/elements/management/commands/import_elements.py
 
-import json
 from pathlib import Path
 
 from django.core.management.base import BaseCommand
-from django.conf import settings
+from django.db import transaction
 
-# Устанавливаем корректный импорт моделей через Django
-import django
-django.setup()
+from engineering_handbook.apps.elements.models import Element, Period
+from engineering_handbook.importing import (
+    BulkImporter, ImportSpec, Lookup, read_records, text, to_float, to_int,
+)
 
-from engineering_handbook.apps.elements.models import Element
+TEXT_FIELDS = ("name_en", "name_ru", "name_de", "oxidation_states", "color_hex")
+FLOAT_FIELDS = ("atomic_mass", "density", "melting_point", "boiling_point", "electronegativity_pauling")
+
+
+def element_spec() -> ImportSpec:
+    """Element by atomic_number; JSON keys as in fixtures/elements_full_en.json."""
+    periods = Lookup(Period, "number", required=False)
+
+    def row(r):
+        values = {
+            "atomic_number": to_int(r["atomic_number"]),
+            "symbol": text(r["symbol"]),
+            "name": text(r.get("name") or r.get("name_en")),
+            "block": text(r.get("block")) or None,
+            "period_id": periods(to_int(r.get("period"))),
+        }
+        values.update({f: text(r.get(f)) for f in TEXT_FIELDS})
+        values.update({f: to_float(r.get(f)) for f in FLOAT_FIELDS})
+        return values
+
+    return ImportSpec(
+        name="elements",
+        model=Element,
+        key=("atomic_number",),
+        fields=("atomic_number", "symbol", "name", "block", "period_id") + TEXT_FIELDS + FLOAT_FIELDS,
+        row=row,
+    )
 
 
 class Command(BaseCommand):
-    help = "Импорт элементов из JSON файла"
+    help = "Импорт элементов из JSON / CSV / XLSX (обновление по atomic_number)"
 
     def add_arguments(self, parser):
         parser.add_argument(
             '--file',
             type=str,
-            help='Путь к JSON файлу с элементами',
+            help='Путь к файлу с элементами (.json, .jsonl, .csv, .xlsx)',
             required=True
         )
         parser.add_argument(
@@ -28,6 +54,9 @@ class Command(BaseCommand):
             action='store_true',
             help='Очистить таблицу элементов перед импортом',
         )
+        parser.add_argument('--sheet', help='Лист XLSX (по умолчанию первый)')
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument('--dry-run', action='store_true', help='Проверить без записи')
 
     def handle(self, *args, **options):
         file_path = Path(options['file'])
@@ -35,19 +64,24 @@ class Command(BaseCommand):
             self.stderr.write(f"Файл {file_path} не найден")
             return
 
-        if options['flush']:
-            Element.objects.all().delete()
-            self.stdout.write("Таблица элементов очищена")
-
-        with open(file_path, 'r', encoding='utf-8') as f:
-            data = json.load(f)
+        flush = options['flush'] and not options['dry_run']
+        importer = BulkImporter(batch_size=options['batch_size'], dry_run=options['dry_run'])
 
-        for elem_data in data:
-            # пример: предполагаем, что JSON содержит 'name', 'symbol', 'atomic_number'
-            Element.objects.create(
-                name=elem_data['name_en'],
-                symbol=elem_data['symbol'],
-                atomic_number=elem_data['atomic_number']
-            )
+        # Очистка и импорт — одна транзакция: при ошибке таблица остаётся прежней
+        with transaction.atomic():
+            if flush:
+                Element.objects.all().delete()
+            report = importer.run([
+                (element_spec(), lambda: read_records(file_path, sheet=options['sheet'])),
+            ])
+            if flush and report.errors:
+                transaction.set_rollback(True)
 
-        self.stdout.write(self.style.SUCCESS(f"Импортировано {len(data)} элементов"))
+        for error in report.errors:
+            self.stderr.write(error)
+        if flush and report.errors:
+            self.stderr.write("Импорт с --flush отменён из-за ошибок, таблица элементов не изменена")
+            return
+        if flush:
+            self.stdout.write("Таблица элементов очищена")
+        self.stdout.write(self.style.SUCCESS(report.summary()))
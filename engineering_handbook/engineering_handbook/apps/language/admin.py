@@ -1,8 +1,10 @@
 from django.contrib import admin
 from django.contrib.contenttypes.models import ContentType
 from django.contrib.contenttypes.admin import GenericTabularInline
+from django.contrib.admin.views.main import ChangeList
 from django.utils.text import Truncator
 from .models import Language, Translation
+from .services import get_default_language, get_translation, prefetch_translations
 
 
 @admin.register(Language)
@@ -53,3 +55,39 @@ class TranslationAdmin(admin.ModelAdmin):
         return Truncator(obj.text).chars(50)
 
     short_text.short_description = "Текст"
+
+
+class TranslationPrefetchMixin:
+    """
+    ModelAdmin mixin: translations of `translation_fields` for the current
+    changelist page are loaded in one query, so columns built with
+    translated() do not add queries per row.
+    """
+
+    translation_fields: tuple = ("name",)
+
+    def translation_language_code(self, request) -> str:
+        language = get_default_language()
+        return language.code if language else ""
+
+    def get_changelist(self, request, **kwargs):
+        admin = self
+
+        class TranslatedChangeList(ChangeList):
+            def get_results(self, request):
+                super().get_results(request)
+                # result_list stays a queryset (list_editable formsets need it);
+                # evaluating it here fills its cache with the prefetched instances
+                prefetch_translations(
+                    self.result_list,
+                    admin.translation_fields,
+                    admin.translation_language_code(request),
+                )
+
+        return TranslatedChangeList
+
+    def translated(self, obj, field: str = "name") -> str:
+        language = get_default_language()
+        if language is None:
+            return ""
+        return get_translation(obj, field, language.code)
@@ -1,7 +1,5 @@
-from django.contrib.contenttypes.models import ContentType
-from django.conf import settings
-
-from .models import Translation, Language
+from .models import Language
+from .services import get_default_language, get_translation, prefetch_translations
 
 
 class TranslatableModel:
@@ -16,41 +14,29 @@ class TranslatableModel:
         1. provided language
         2. default language
         3. empty string
-        """
 
-        content_type = ContentType.objects.get_for_model(self)
+        Values loaded by prefetch_translations() are used without queries.
+        """
 
         # 1️⃣ Определяем язык
         if language is None:
-            language = (
-                Language.objects.filter(is_default=True).first()
-            )
+            language = get_default_language()
 
         if language is None:
             return ""
 
-        # 2️⃣ Пытаемся получить перевод
-        translation = Translation.objects.filter(
-            content_type=content_type,
-            object_id=self.pk,
-            field=field,
-            language=language,
-        ).first()
-
-        if translation:
-            return translation.text
-
-        # 3️⃣ Fallback на default язык (если был передан другой)
-        if not language.is_default:
-            default_language = Language.objects.filter(is_default=True).first()
-            if default_language:
-                translation = Translation.objects.filter(
-                    content_type=content_type,
-                    object_id=self.pk,
-                    field=field,
-                    language=default_language,
-                ).first()
-                if translation:
-                    return translation.text
-
-        return ""
+        # 2️⃣ Перевод с fallback на default язык
+        return get_translation(self, field, language, fallback=True, default="")
+
+    @classmethod
+    def prefetch_translations(cls, objects, fields, language: Language | None = None) -> list:
+        """
+        Loads translations of `fields` for all objects in one query
+        and returns them as a list (querysets are evaluated).
+        """
+        objects = list(objects)
+        if language is None:
+            language = get_default_language()
+        if language is not None:
+            prefetch_translations(objects, fields, language, fallback=True)
+        return objects
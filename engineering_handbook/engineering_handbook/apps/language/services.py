@@ -1,52 +1,161 @@
+from collections import defaultdict
+from typing import Dict, Iterable, Optional, Sequence, Union
+
 from django.contrib.contenttypes.models import ContentType
+from django.db.models.signals import post_delete, post_save
 
 from .models import Translation, Language
 
 
+# ============================================================
+# Per-process cache of languages
+# ============================================================
+
+# code -> Language (active only); None = not loaded yet
+_languages: Optional[Dict[str, Language]] = None
+_default_language: Optional[Language] = None
+
+
+def _load_languages() -> Dict[str, Language]:
+    global _languages, _default_language
+    if _languages is None:
+        languages = list(Language.objects.all())
+        _languages = {lang.code: lang for lang in languages if lang.is_active}
+        _default_language = next((lang for lang in languages if lang.is_default), None)
+    return _languages
+
+
+def clear_language_cache(**kwargs) -> None:
+    """Drop cached languages; called on every Language save/delete."""
+    global _languages, _default_language
+    _languages = None
+    _default_language = None
+
+
+post_save.connect(clear_language_cache, sender=Language, dispatch_uid="language_cache_save")
+post_delete.connect(clear_language_cache, sender=Language, dispatch_uid="language_cache_delete")
+
+
+def get_language(language_code: str) -> Optional[Language]:
+    """Active language by code, without a query after the first call."""
+    return _load_languages().get(language_code)
+
+
+def get_default_language() -> Optional[Language]:
+    """Default language (is_default=True), cached per process."""
+    _load_languages()
+    return _default_language
+
+
+def _resolve(language: Union[str, Language]) -> Optional[Language]:
+    """A code resolves to an active language only; a Language is used as given."""
+    if isinstance(language, Language):
+        return language
+    return get_language(language)
+
+
+# ============================================================
+# Bulk prefetch
+# ============================================================
+
+def _cache_key(field: str, language_code: str, fallback: bool) -> tuple:
+    return field, language_code, fallback
+
+
+def prefetch_translations(
+    objects: Iterable,
+    fields: Sequence[str],
+    language: Union[str, Language],
+    fallback: bool = True,
+) -> Dict[int, Dict[str, str]]:
+    """
+    Load translations of `fields` for all `objects` in one query.
+
+    Fallback to the default language is resolved in memory. The result is
+    also stored on each instance, so later get_translation() calls for these
+    fields and language do not hit the database (request-scoped cache:
+    it lives as long as the instances).
+
+    :param objects: model instances or a queryset (evaluated here)
+    :param fields: field names (name, description, ...)
+    :param language: active language code (en, ru, de) or a Language instance
+    :param fallback: use the default language where translation is missing
+    :return: {pk: {field: text}}; missing translations are absent
+    """
+    objects = [obj for obj in objects if obj is not None]
+    if not objects or not fields:
+        return {}
+
+    language_code = language.code if isinstance(language, Language) else language
+    language = _resolve(language)
+    default_language = get_default_language() if fallback else None
+    language_ids = [lang.pk for lang in (language, default_language) if lang is not None]
+
+    found: Dict[tuple, Dict[str, Dict[int, str]]] = defaultdict(lambda: defaultdict(dict))
+    if language_ids:
+        by_model = defaultdict(list)
+        for obj in objects:
+            by_model[obj.__class__].append(obj.pk)
+        for model, pks in by_model.items():
+            content_type = ContentType.objects.get_for_model(model)
+            rows = Translation.objects.filter(
+                content_type=content_type,
+                object_id__in=pks,
+                field__in=list(fields),
+                language_id__in=language_ids,
+            ).values_list("object_id", "field", "language_id", "text")
+            for object_id, field, language_id, text in rows:
+                found[(model, object_id)][field][language_id] = text
+
+    result: Dict[int, Dict[str, str]] = {}
+    for obj in objects:
+        texts = found.get((obj.__class__, obj.pk), {})
+        cache = obj.__dict__.setdefault("_translation_cache", {})
+        values = {}
+        for field in fields:
+            by_language = texts.get(field, {})
+            text = None
+            if language is not None:
+                text = by_language.get(language.pk)
+            if text is None and default_language is not None:
+                text = by_language.get(default_language.pk)
+            # None is cached too: "no translation" must not trigger a query
+            cache[_cache_key(field, language_code, fallback)] = text
+            if text is not None:
+                values[field] = text
+        result[obj.pk] = values
+    return result
+
+
 def get_translation(
     obj,
     field: str,
-    language_code: str,
+    language: Union[str, Language],
     fallback: bool = True,
     default: str = "",
 ) -> str:
     """
     Get translated text for any model instance.
 
+    Uses the values loaded by prefetch_translations() when available,
+    otherwise loads this field with a single query.
+
     :param obj: model instance
     :param field: field name to translate (name, description, title, ...)
-    :param language_code: language code (en, ru, de)
+    :param language: active language code (en, ru, de) or a Language instance
     :param fallback: try default language if not found
     :param default: value returned if translation not found
     """
 
-    content_type = ContentType.objects.get_for_model(obj.__class__)
-
-    try:
-        language = Language.objects.get(code=language_code, is_active=True)
-    except Language.DoesNotExist:
+    if _resolve(language) is None:
         return default
 
-    translation = Translation.objects.filter(
-        content_type=content_type,
-        object_id=obj.pk,
-        field=field,
-        language=language,
-    ).first()
+    language_code = language.code if isinstance(language, Language) else language
+    cache = obj.__dict__.get("_translation_cache", {})
+    key = _cache_key(field, language_code, fallback)
+    if key not in cache:
+        prefetch_translations([obj], [field], language, fallback=fallback)
+        cache = obj.__dict__["_translation_cache"]
 
-    if translation:
-        return translation.text
-
-    if fallback:
-        default_language = Language.objects.filter(is_default=True).first()
-        if default_language and default_language != language:
-            fallback_translation = Translation.objects.filter(
-                content_type=content_type,
-                object_id=obj.pk,
-                field=field,
-                language=default_language,
-            ).first()
-            if fallback_translation:
-                return fallback_translation.text
-
-    return default
+    text = cache.get(key)
+    return default if text is None else text
@@ -1,3 +1,54 @@
+from django.contrib.contenttypes.models import ContentType
 from django.test import TestCase
 
-# Create your tests here.
+from ..materials.models import MaterialCategory
+from .models import Language, Translation
+from .services import clear_language_cache, get_translation, prefetch_translations
+
+
+class TranslationPrefetchTest(TestCase):
+    def setUp(self):
+        clear_language_cache()
+        self.en = Language.objects.create(code="en", name="English", is_default=True)
+        self.de = Language.objects.create(code="de", name="Deutsch")
+        self.categories = [
+            MaterialCategory.objects.create(key=f"cat{i}", sort_order=i) for i in range(3)
+        ]
+        ct = ContentType.objects.get_for_model(MaterialCategory)
+        for cat in self.categories:
+            Translation.objects.create(
+                content_type=ct, object_id=cat.pk, field="name", language=self.en, text=f"{cat.key} en"
+            )
+        Translation.objects.create(
+            content_type=ct, object_id=self.categories[0].pk, field="name", language=self.de, text="cat0 de"
+        )
+
+    def tearDown(self):
+        clear_language_cache()
+
+    def test_prefetch_one_query_and_fallback(self):
+        get_translation(self.categories[0], "name", "de")  # warm language/content type caches
+        categories = list(MaterialCategory.objects.order_by("sort_order"))
+
+        with self.assertNumQueries(1):
+            result = prefetch_translations(categories, ["name", "description"], "de")
+        self.assertEqual(result[categories[0].pk], {"name": "cat0 de"})
+        self.assertEqual(result[categories[1].pk], {"name": "cat1 en"})
+
+        with self.assertNumQueries(0):
+            texts = [get_translation(cat, "name", "de") for cat in categories]
+            missing = get_translation(categories[2], "description", "de", default="-")
+        self.assertEqual(texts, ["cat0 de", "cat1 en", "cat2 en"])
+        self.assertEqual(missing, "-")
+
+    def test_no_fallback(self):
+        self.assertEqual(get_translation(self.categories[1], "name", "de", fallback=False), "")
+        self.assertEqual(get_translation(self.categories[1], "name", "xx", default="?"), "?")
+
+    def test_explicit_inactive_language(self):
+        Language.objects.filter(pk=self.de.pk).update(is_active=False)
+        self.de.refresh_from_db()
+        clear_language_cache()
+        self.assertEqual(get_translation(self.categories[0], "name", "de"), "")
+        self.assertEqual(get_translation(self.categories[0], "name", self.de), "cat0 de")
+        self.assertEqual(get_translation(self.categories[1], "name", self.de), "cat1 en")
@@ -1,5 +1,5 @@
 from django.contrib import admin
-from django.utils.html import format_html
+from django.utils.html import escape, format_html
 from django.utils.safestring import mark_safe
 
 from .models import (
@@ -20,6 +20,8 @@ from .models import (
     MaterialAnalogue,
 )
 from ..units.models import Unit
+from ..language.admin import TranslationPrefetchMixin
+from .services import find_analogues
 
 
 # ============================================================
@@ -140,22 +142,23 @@ class MaterialAdmin(admin.ModelAdmin):
         if not obj or not obj.standard_system:
             return "—"
 
-        analogues = MaterialAnalogue.objects.filter(
-            from_system=obj.standard_system,
-            from_material_code=obj.material_number
-        )
+        # Прямые и транзитивные аналоги из замыкания (services.find_analogues)
+        analogues = find_analogues(obj.material_number, system=obj.standard_system.key)
 
-        if not analogues.exists():
+        if not analogues:
             return "Аналоги не заданы"
 
         rows = []
         for a in analogues:
+            system, code, kind = escape(a["system"]), escape(a["code"]), escape(a["equivalence_type"])
+            if a["depth"] > 1:
+                kind += f" (транзитивно, звеньев: {a['depth']})"
             rows.append(
                 f"""
                 <tr>
-                    <td>{a.to_system.key}</td>
-                    <td>{a.to_material_code}</td>
-                    <td>{a.equivalence_type}</td>
+                    <td>{system}</td>
+                    <td>{code}</td>
+                    <td>{kind}</td>
                 </tr>
                 """
             )
@@ -182,9 +185,10 @@ class MaterialAdmin(admin.ModelAdmin):
 # ============================================================
 
 @admin.register(MechanicalPropertyType)
-class MechanicalPropertyTypeAdmin(admin.ModelAdmin):
+class MechanicalPropertyTypeAdmin(TranslationPrefetchMixin, admin.ModelAdmin):
     list_display = (
         "key",
+        "translated_name",
         "symbol",
         "physical_quantity",
         "default_unit",
@@ -195,11 +199,17 @@ class MechanicalPropertyTypeAdmin(admin.ModelAdmin):
     ordering = ("sort_order", "key")
     search_fields = ("key", "symbol")
 
+    def translated_name(self, obj):
+        return self.translated(obj, "name") or "—"
+
+    translated_name.short_description = "Название"
+
 
 @admin.register(PhysicalPropertyType)
-class PhysicalPropertyTypeAdmin(admin.ModelAdmin):
+class PhysicalPropertyTypeAdmin(TranslationPrefetchMixin, admin.ModelAdmin):
     list_display = (
         "key",
+        "translated_name",
         "symbol",
         "physical_quantity",
         "default_unit",
@@ -210,6 +220,11 @@ class PhysicalPropertyTypeAdmin(admin.ModelAdmin):
     ordering = ("sort_order", "key")
     search_fields = ("key", "symbol")
 
+    def translated_name(self, obj):
+        return self.translated(obj, "name") or "—"
+
+    translated_name.short_description = "Название"
+
 
 # ============================================================
 # Inline: Значения свойств
@@ -5,3 +5,9 @@ class MaterialsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'engineering_handbook.apps.materials'
     label = "materials"
+
+    def ready(self):
+        from . import evaluation, services
+
+        services.connect_signals()
+        evaluation.connect_signals()
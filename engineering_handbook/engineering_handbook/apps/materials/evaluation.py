@@ -0,0 +1,327 @@
+"""
+Property values at arbitrary temperatures.
+
+Property sets store values per temperature range (temperature_min/max,
+converted to °C; a set without a temperature unit is in °C).
+For one property type (e.g. "rp02", "density", "thermal_expansion") the
+sets of all materials are packed into one PropertyTable of NumPy arrays:
+every set contributes its range ends as points, values are converted to
+the base unit, and a query is linear interpolation between the points.
+
+Rows of all materials share one axis (row offset + temperature), so any
+number of (material, temperature) pairs is evaluated with a single
+searchsorted, without a Python loop per material.
+
+Outside the tabulated range the result is NaN, unless the nearest set has
+an open bound (NULL temperature = valid for any temperature on that side)
+or clamp=True is requested.
+
+    engine = get_engine()
+    engine.value("1.4404", "rp02", 150.0)                  # one value
+    engine.evaluate(["1.4404", "1.4571"], "rp02", [20, 100, 200])   # 2 x 3 grid
+"""
+
+import threading
+from collections import OrderedDict, defaultdict
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+from django.db.models.signals import post_delete, post_save
+
+from ..units.models import Unit, to_celsius
+from .models import (
+    MaterialMechanicalProperty,
+    MaterialMechanicalPropertySet,
+    MaterialPhysicalProperty,
+    MaterialPhysicalPropertySet,
+    MechanicalPropertyType,
+    PhysicalPropertyType,
+)
+
+# Температура для наборов без границ, °C
+ROOM_TEMPERATURE = 20.0
+
+BOUNDS = ("min", "max", "mean")
+
+KINDS = {
+    "mechanical": (MaterialMechanicalProperty, MechanicalPropertyType),
+    "physical": (MaterialPhysicalProperty, PhysicalPropertyType),
+}
+
+# Сколько таблиц держать в памяти
+MAX_TABLES = 64
+
+
+# ============================================================
+# Tables
+# ============================================================
+
+@dataclass(frozen=True)
+class PropertyTable:
+    """
+    Points of one property for many materials.
+
+    Row r (material materials[r]) owns x/y[start[r]:end[r]], sorted by
+    temperature. gx = x + r * span is increasing over the whole array.
+    """
+    key: str
+    bound: str
+    unit: str
+    materials: Tuple[str, ...]
+    index: Dict[str, int]
+    x: np.ndarray
+    y: np.ndarray
+    gx: np.ndarray
+    start: np.ndarray
+    end: np.ndarray
+    open_low: np.ndarray
+    open_high: np.ndarray
+    span: float
+
+    def rows(self, materials: Iterable[str]) -> np.ndarray:
+        """Row numbers; -1 for materials without this property."""
+        return np.fromiter((self.index.get(m, -1) for m in materials), dtype=np.int64)
+
+    def evaluate_rows(self, rows, temperatures, clamp: bool = False) -> np.ndarray:
+        """
+        Values for (row, temperature) pairs; rows and temperatures broadcast.
+        NaN for rows == -1 and for temperatures outside a closed range.
+        """
+        rows, t = np.broadcast_arrays(np.asarray(rows, dtype=np.int64), np.asarray(temperatures, dtype=float))
+        result = np.full(t.shape, np.nan)
+        known = rows >= 0
+        if not known.any() or not len(self.x):
+            return result
+
+        r = rows[known]
+        tq = t[known]
+        start, end = self.start[r], self.end[r]
+        low, high = self.x[start], self.x[end - 1]
+        tc = np.clip(tq, low, high)
+
+        # Интервал [j, j + 1] внутри строки r
+        j = np.searchsorted(self.gx, tc + r * self.span, side="right") - 1
+        j = np.clip(j, start, np.maximum(end - 2, start))
+        x0, x1 = self.x[j], self.x[np.minimum(j + 1, end - 1)]
+        y0, y1 = self.y[j], self.y[np.minimum(j + 1, end - 1)]
+        dx = x1 - x0
+        w = np.divide(tc - x0, dx, out=np.zeros_like(tc), where=dx > 0)
+        values = y0 + w * (y1 - y0)
+
+        if not clamp:
+            outside = ((tq < low) & ~self.open_low[r]) | ((tq > high) & ~self.open_high[r])
+            values[outside] = np.nan
+        result[known] = values
+        return result
+
+    def evaluate(self, materials: Sequence[str], temperatures, clamp: bool = False) -> np.ndarray:
+        """Grid: len(materials) x len(temperatures)."""
+        rows = self.rows(materials)[:, None]
+        return self.evaluate_rows(rows, np.atleast_1d(np.asarray(temperatures, dtype=float))[None, :], clamp)
+
+
+def _reduce(values: List[float], bound: str) -> float:
+    # Несколько наборов в одной точке (разные стандарты): для min — наименьшее
+    if bound == "min":
+        return min(values)
+    if bound == "max":
+        return max(values)
+    return sum(values) / len(values)
+
+
+def build_table(key: str, rows: Iterable[tuple], bound: str = "min", unit: str = "") -> PropertyTable:
+    """
+    rows: (material_number, temperature_min, temperature_max, min_value, max_value)
+    with temperatures in °C and values already in the base unit.
+    """
+    if bound not in BOUNDS:
+        raise ValueError(f"bound must be one of {BOUNDS}")
+
+    points: Dict[str, Dict[float, List[float]]] = defaultdict(lambda: defaultdict(list))
+    open_low: Dict[str, Tuple[float, bool]] = {}
+    open_high: Dict[str, Tuple[float, bool]] = {}
+
+    for number, t_min, t_max, min_value, max_value in rows:
+        value = {"min": min_value, "max": max_value, "mean": (min_value + max_value) / 2}[bound]
+        if value is None:
+            continue
+        low = t_min if t_min is not None else (t_max if t_max is not None else ROOM_TEMPERATURE)
+        high = t_max if t_max is not None else low
+        for temperature in {low, high}:
+            points[number][float(temperature)].append(float(value))
+        # Открытая граница крайнего набора действует за пределами таблицы
+        if number not in open_low or low < open_low[number][0]:
+            open_low[number] = (low, t_min is None)
+        if number not in open_high or high > open_high[number][0]:
+            open_high[number] = (high, t_max is None)
+
+    materials = tuple(sorted(points))
+    xs, ys, start, end = [], [], [], []
+    for number in materials:
+        start.append(len(xs))
+        for temperature in sorted(points[number]):
+            xs.append(temperature)
+            ys.append(_reduce(points[number][temperature], bound))
+        end.append(len(xs))
+
+    x = np.asarray(xs, dtype=float)
+    start_arr = np.asarray(start, dtype=np.int64)
+    end_arr = np.asarray(end, dtype=np.int64)
+    span = float(x.max() - x.min() + 1.0) if len(x) else 1.0
+    row_of_point = np.repeat(np.arange(len(materials)), end_arr - start_arr)
+    return PropertyTable(
+        key=key,
+        bound=bound,
+        unit=unit,
+        materials=materials,
+        index={number: row for row, number in enumerate(materials)},
+        x=x,
+        y=np.asarray(ys, dtype=float),
+        gx=x + row_of_point * span,
+        start=start_arr,
+        end=end_arr,
+        open_low=np.asarray([open_low[m][1] for m in materials], dtype=bool),
+        open_high=np.asarray([open_high[m][1] for m in materials], dtype=bool),
+        span=span,
+    )
+
+
+# ============================================================
+# Engine
+# ============================================================
+
+class PropertyEngine:
+    """
+    Loads PropertyTables on demand (one query each) and keeps them in an
+    LRU cache; property changes clear the cache (see connect_signals).
+    """
+
+    def __init__(self, max_tables: int = MAX_TABLES):
+        self.max_tables = max_tables
+        self._tables: "OrderedDict[tuple, PropertyTable]" = OrderedDict()
+        self._kinds: Optional[Dict[str, str]] = None
+        self._lock = threading.Lock()
+
+    def clear(self, **kwargs) -> None:
+        with self._lock:
+            self._tables.clear()
+            self._kinds = None
+
+    def kind_of(self, key: str) -> str:
+        """"mechanical" or "physical" for a property type key."""
+        if self._kinds is None:
+            kinds = {}
+            for kind, (_value_model, type_model) in KINDS.items():
+                kinds.update(dict.fromkeys(type_model.objects.values_list("key", flat=True), kind))
+            self._kinds = kinds
+        try:
+            return self._kinds[key]
+        except KeyError:
+            raise KeyError(f"unknown property type: {key}")
+
+    def table(self, key: str, bound: str = "min") -> PropertyTable:
+        cache_key = (key, bound)
+        with self._lock:
+            table = self._tables.get(cache_key)
+            if table is not None:
+                self._tables.move_to_end(cache_key)
+                return table
+
+        table = self._load(key, bound)
+        with self._lock:
+            self._tables[cache_key] = table
+            while len(self._tables) > self.max_tables:
+                self._tables.popitem(last=False)
+        return table
+
+    def _load(self, key: str, bound: str) -> PropertyTable:
+        value_model, type_model = KINDS[self.kind_of(key)]
+        property_type = type_model.objects.select_related("default_unit").get(key=key)
+        base = Unit.objects.filter(quantity_id=property_type.physical_quantity_id, is_base=True).first()
+        unit = (base or property_type.default_unit).symbol
+
+        rows = value_model.objects.filter(property_type=property_type).values_list(
+            "property_set__material__material_number",
+            "property_set__temperature_min",
+            "property_set__temperature_max",
+            "property_set__temperature_unit__factor",
+            "property_set__temperature_unit__offset",
+            "min_value",
+            "max_value",
+            "unit__factor",
+            "unit__offset",
+        )
+        return build_table(
+            key,
+            (
+                (
+                    number,
+                    to_celsius(t_min, t_factor, t_offset),
+                    to_celsius(t_max, t_factor, t_offset),
+                    lo * factor + offset,
+                    hi * factor + offset,
+                )
+                for number, t_min, t_max, t_factor, t_offset, lo, hi, factor, offset in rows
+            ),
+            bound=bound,
+            unit=unit,
+        )
+
+    # --------------------------------------------------------
+
+    def evaluate(
+        self,
+        materials: Sequence[str],
+        key: str,
+        temperatures,
+        bound: str = "min",
+        clamp: bool = False,
+    ) -> np.ndarray:
+        """Grid len(materials) x len(temperatures) in the base unit (NaN = no value)."""
+        return self.table(key, bound).evaluate(materials, temperatures, clamp=clamp)
+
+    def evaluate_pairs(
+        self,
+        materials: Sequence[str],
+        key: str,
+        temperatures,
+        bound: str = "min",
+        clamp: bool = False,
+    ) -> np.ndarray:
+        """One value per (materials[i], temperatures[i]) pair."""
+        table = self.table(key, bound)
+        return table.evaluate_rows(table.rows(materials), temperatures, clamp=clamp)
+
+    def value(self, material: str, key: str, temperature: float, bound: str = "min", clamp: bool = False) -> Optional[float]:
+        """Single value or None."""
+        result = float(self.evaluate_pairs([material], key, [temperature], bound, clamp)[0])
+        return None if np.isnan(result) else result
+
+
+_engine: Optional[PropertyEngine] = None
+
+
+def get_engine() -> PropertyEngine:
+    global _engine
+    if _engine is None:
+        _engine = PropertyEngine()
+    return _engine
+
+
+def _clear_engine(**kwargs) -> None:
+    if _engine is not None:
+        _engine.clear()
+
+
+def connect_signals() -> None:
+    """Any property, set or type change drops the cached tables."""
+    models = (
+        MaterialMechanicalProperty, MaterialPhysicalProperty,
+        MaterialMechanicalPropertySet, MaterialPhysicalPropertySet,
+        MechanicalPropertyType, PhysicalPropertyType, Unit,
+    )
+    for model in models:
+        uid = model._meta.label_lower
+        post_save.connect(_clear_engine, sender=model, dispatch_uid=f"property_engine_save_{uid}")
+        post_delete.connect(_clear_engine, sender=model, dispatch_uid=f"property_engine_delete_{uid}")
@@ -0,0 +1,228 @@
+# engineering_handbook/apps/materials/management/commands/import_materials.py
+
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+
+from engineering_handbook.apps.elements.models import Element
+from engineering_handbook.apps.materials.models import (
+    ISO15608Group,
+    Material,
+    MaterialAnalogue,
+    MaterialCategory,
+    MaterialChemicalComposition,
+    MaterialChemicalElement,
+    MaterialMechanicalProperty,
+    MaterialMechanicalPropertySet,
+    MaterialPhysicalProperty,
+    MaterialPhysicalPropertySet,
+    MechanicalPropertyType,
+    PhysicalPropertyType,
+    StandardSystem,
+)
+from engineering_handbook.apps.materials.services import rebuild_analogue_closure
+from engineering_handbook.apps.standards.models import StandardEdition
+from engineering_handbook.apps.units.models import Unit
+from engineering_handbook.importing import (
+    BulkImporter, ImportSpec, Lookup, MapLookup, read_records, text, to_bool, to_float, to_int,
+)
+
+# Колонки входного файла по видам импорта
+COLUMNS = {
+    "materials": "material_number, main_group, steel_group, system, category, iso_group, is_active",
+    "chemical": "material, standard, element, min, max, unit",
+    "mechanical": "material, standard, t_min, t_max, t_unit, property, min, max, unit",
+    "physical": "material, standard, t_min, t_max, t_unit, property, min, max, unit",
+    "analogues": "from_system, from_code, to_system, to_code, type, notes",
+}
+
+
+def _load_editions():
+    """
+    "EN 10088-1:2014" -> pk and "EN 10088-1" -> newest edition.
+    Editions are few, one query for the whole import.
+    """
+    mapping = {}
+    editions = StandardEdition.objects.select_related("base_standard__series__organization")
+    for edition in editions.order_by("base_standard", "-year"):
+        base = str(edition.base_standard)
+        if edition.year:
+            mapping[f"{base}:{edition.year}"] = edition.pk
+        mapping.setdefault(base, edition.pk)
+    return mapping
+
+
+def _system(value) -> str:
+    """StandardSystem keys are lowercase ("en", "asme"); "EN" in a file matches too."""
+    return text(value).lower()
+
+
+def material_spec() -> ImportSpec:
+    systems = Lookup(StandardSystem, "key")
+    categories = Lookup(MaterialCategory, "key", required=False)
+    groups = Lookup(ISO15608Group, "code", required=False)
+
+    return ImportSpec(
+        name="materials",
+        model=Material,
+        key=("material_number",),
+        fields=("material_number", "main_group", "steel_group_en10020", "standard_system_id",
+                "material_category_id", "iso_15608_group_id", "is_active"),
+        row=lambda r: {
+            "material_number": text(r["material_number"]),
+            "main_group": to_int(r["main_group"]),
+            "steel_group_en10020": to_int(r.get("steel_group")),
+            "standard_system_id": systems(_system(r.get("system")) or "en"),
+            "material_category_id": categories(r.get("category")),
+            "iso_15608_group_id": groups(r.get("iso_group")),
+            "is_active": to_bool(r.get("is_active")),
+        },
+    )
+
+
+def chemical_specs():
+    """Compositions (material + standard), then their elements."""
+    materials = Lookup(Material, "material_number")
+    editions = MapLookup(StandardEdition, _load_editions)
+    compositions = Lookup(MaterialChemicalComposition, ("material__material_number", "standard_id"))
+    elements = Lookup(Element, "symbol")
+    units = Lookup(Unit, "key")
+
+    compositions_spec = ImportSpec(
+        name="chemical compositions",
+        model=MaterialChemicalComposition,
+        key=("material_id", "standard_id"),
+        fields=("material_id", "standard_id"),
+        row=lambda r: {
+            "material_id": materials(r["material"]),
+            "standard_id": editions(r["standard"]),
+        },
+    )
+    elements_spec = ImportSpec(
+        name="chemical elements",
+        model=MaterialChemicalElement,
+        key=("composition_id", "element_id"),
+        fields=("composition_id", "element_id", "unit_id", "min_value", "max_value"),
+        row=lambda r: {
+            "composition_id": compositions(text(r["material"]), editions.get(r["standard"])),
+            "element_id": elements(r["element"]),
+            "unit_id": units(r.get("unit") or "percent"),
+            "min_value": to_float(r.get("min")) or 0.0,
+            "max_value": to_float(r["max"]),
+        },
+    )
+    return [compositions_spec, elements_spec]
+
+
+def property_specs(kind: str):
+    """Property sets (material, edition, temperature range), then values."""
+    set_model, value_model, type_model = {
+        "mechanical": (MaterialMechanicalPropertySet, MaterialMechanicalProperty, MechanicalPropertyType),
+        "physical": (MaterialPhysicalPropertySet, MaterialPhysicalProperty, PhysicalPropertyType),
+    }[kind]
+
+    materials = Lookup(Material, "material_number")
+    editions = MapLookup(StandardEdition, _load_editions)
+    units = Lookup(Unit, "key")
+    temperature_units = Lookup(Unit, "key", required=False)
+    property_types = Lookup(type_model, "key")
+    property_sets = Lookup(
+        set_model, ("material__material_number", "standard_edition_id", "temperature_min", "temperature_max")
+    )
+
+    set_spec = ImportSpec(
+        name=f"{kind} property sets",
+        model=set_model,
+        key=("material_id", "standard_edition_id", "temperature_min", "temperature_max"),
+        fields=("material_id", "standard_edition_id", "temperature_min", "temperature_max", "temperature_unit_id"),
+        row=lambda r: {
+            "material_id": materials(r["material"]),
+            "standard_edition_id": editions.get(r.get("standard")),
+            "temperature_min": to_float(r.get("t_min")),
+            "temperature_max": to_float(r.get("t_max")),
+            "temperature_unit_id": temperature_units(r.get("t_unit")),
+        },
+    )
+    value_spec = ImportSpec(
+        name=f"{kind} properties",
+        model=value_model,
+        key=("property_set_id", "property_type_id"),
+        fields=("property_set_id", "property_type_id", "min_value", "max_value", "unit_id"),
+        row=lambda r: {
+            "property_set_id": property_sets(
+                text(r["material"]),
+                editions.get(r.get("standard")),
+                to_float(r.get("t_min")),
+                to_float(r.get("t_max")),
+            ),
+            "property_type_id": property_types(r["property"]),
+            "min_value": to_float(r["min"]),
+            "max_value": to_float(r.get("max") or r["min"]),
+            "unit_id": units(r["unit"]),
+        },
+    )
+    return [set_spec, value_spec]
+
+
+def analogue_spec() -> ImportSpec:
+    systems = Lookup(StandardSystem, "key")
+
+    return ImportSpec(
+        name="analogues",
+        model=MaterialAnalogue,
+        key=("from_system_id", "from_material_code", "to_system_id", "to_material_code"),
+        fields=("from_system_id", "from_material_code", "to_system_id", "to_material_code",
+                "equivalence_type", "notes"),
+        row=lambda r: {
+            "from_system_id": systems(_system(r["from_system"])),
+            "from_material_code": text(r["from_code"]),
+            "to_system_id": systems(_system(r["to_system"])),
+            "to_material_code": text(r["to_code"]),
+            "equivalence_type": text(r.get("type")) or "comparable",
+            "notes": text(r.get("notes")),
+        },
+    )
+
+
+class Command(BaseCommand):
+    help = (
+        "Пакетный импорт материалов из JSON / CSV / XLSX с обновлением по естественным ключам.\n"
+        + "\n".join(f"  {kind}: {columns}" for kind, columns in COLUMNS.items())
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('kind', choices=sorted(COLUMNS), help='Вид данных')
+        parser.add_argument('--file', required=True, help='Путь к файлу (.json, .jsonl, .csv, .xlsx)')
+        parser.add_argument('--sheet', help='Лист XLSX (по умолчанию первый)')
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument('--dry-run', action='store_true', help='Проверить без записи')
+
+    def handle(self, *args, **options):
+        file_path = Path(options['file'])
+        if not file_path.exists():
+            raise CommandError(f"Файл {file_path} не найден")
+
+        kind = options['kind']
+        if kind == "materials":
+            specs = [material_spec()]
+        elif kind == "chemical":
+            specs = chemical_specs()
+        elif kind == "analogues":
+            specs = [analogue_spec()]
+        else:
+            specs = property_specs(kind)
+
+        def source():
+            return read_records(file_path, sheet=options['sheet'])
+
+        importer = BulkImporter(batch_size=options['batch_size'], dry_run=options['dry_run'])
+        report = importer.run([(spec, source) for spec in specs])
+
+        for error in report.errors:
+            self.stderr.write(error)
+        self.stdout.write(self.style.SUCCESS(report.summary()))
+
+        # bulk_create не вызывает сигналы: замыкание аналогов строим целиком
+        if kind == "analogues" and not options['dry_run']:
+            count = rebuild_analogue_closure()
+            self.stdout.write(f"Замыкание аналогов: {count} пар")
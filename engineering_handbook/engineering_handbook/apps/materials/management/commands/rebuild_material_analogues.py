@@ -0,0 +1,13 @@
+# engineering_handbook/apps/materials/management/commands/rebuild_material_analogues.py
+
+from django.core.management.base import BaseCommand
+
+from engineering_handbook.apps.materials.services import rebuild_analogue_closure
+
+
+class Command(BaseCommand):
+    help = "Полная перестройка замыкания аналогов материалов (MaterialAnalogueClosure)"
+
+    def handle(self, *args, **options):
+        count = rebuild_analogue_closure()
+        self.stdout.write(self.style.SUCCESS(f"Записано {count} пар аналогов"))
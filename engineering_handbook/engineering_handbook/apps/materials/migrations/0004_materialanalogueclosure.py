@@ -0,0 +1,82 @@
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def build_closure(apps, schema_editor):
+    from engineering_handbook.apps.materials.services import rebuild_analogue_closure
+
+    rebuild_analogue_closure(
+        analogue_model=apps.get_model("materials", "MaterialAnalogue"),
+        closure_model=apps.get_model("materials", "MaterialAnalogueClosure"),
+    )
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("materials", "0003_alter_materialanalogue_options_and_more"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="MaterialAnalogueClosure",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("from_material_code", models.CharField(max_length=50)),
+                ("to_material_code", models.CharField(max_length=50)),
+                (
+                    "equivalence_type",
+                    models.CharField(
+                        choices=[
+                            ("equivalent", "Equivalent"),
+                            ("comparable", "Comparable"),
+                            ("approximate", "Approximate"),
+                        ],
+                        max_length=20,
+                    ),
+                ),
+                ("strength", models.PositiveSmallIntegerField()),
+                ("depth", models.PositiveSmallIntegerField()),
+                (
+                    "from_system",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="+",
+                        to="materials.standardsystem",
+                    ),
+                ),
+                (
+                    "to_system",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="+",
+                        to="materials.standardsystem",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Аналог материала (замыкание)",
+                "verbose_name_plural": "Аналоги материалов (замыкание)",
+                "indexes": [
+                    models.Index(
+                        fields=["from_material_code", "from_system"],
+                        name="ix_analogue_closure_from",
+                    )
+                ],
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("from_system", "from_material_code", "to_system", "to_material_code"),
+                        name="uniq_material_analogue_closure",
+                    )
+                ],
+            },
+        ),
+        migrations.RunPython(build_closure, migrations.RunPython.noop),
+    ]
@@ -10,7 +10,7 @@ class StandardSystem(models.Model):
     """
     Top-level standard system (EN, ASME, ASTM, etc.)
     """
-    key = models.CharField(max_length=20, unique=True)   # EN, ASME
+    key = models.CharField(max_length=20, unique=True)   # en, asme
     name = models.CharField(max_length=100)              # European Norms, ASME BPVC
     is_primary = models.BooleanField(default=False)
     sort_order = models.PositiveSmallIntegerField(default=0)
@@ -558,5 +558,65 @@ class MaterialAnalogue(models.Model):
         verbose_name_plural = "Аналоги материалов"
 
 
+# Сила соответствия: чем больше, тем строже
+EQUIVALENCE_STRENGTH = {
+    "equivalent": 3,
+    "comparable": 2,
+    "approximate": 1,
+}
 
 
+class MaterialAnalogueClosure(models.Model):
+    """
+    Materialized transitive closure of MaterialAnalogue.
+
+    One row per pair of reachable codes (edges are treated as symmetric).
+    equivalence_type is the weakest link on the strongest path,
+    depth is the number of edges on that path.
+    Rebuilt per connected component by signals (see services.py).
+    """
+
+    from_system = models.ForeignKey(
+        StandardSystem,
+        on_delete=models.CASCADE,
+        related_name="+"
+    )
+    from_material_code = models.CharField(max_length=50)
+
+    to_system = models.ForeignKey(
+        StandardSystem,
+        on_delete=models.CASCADE,
+        related_name="+"
+    )
+    to_material_code = models.CharField(max_length=50)
+
+    equivalence_type = models.CharField(
+        max_length=20,
+        choices=[
+            ("equivalent", "Equivalent"),
+            ("comparable", "Comparable"),
+            ("approximate", "Approximate"),
+        ]
+    )
+    strength = models.PositiveSmallIntegerField()
+    depth = models.PositiveSmallIntegerField()
+
+    class Meta:
+        verbose_name = "Аналог материала (замыкание)"
+        verbose_name_plural = "Аналоги материалов (замыкание)"
+        constraints = [
+            models.UniqueConstraint(
+                fields=["from_system", "from_material_code", "to_system", "to_material_code"],
+                name="uniq_material_analogue_closure"
+            )
+        ]
+        indexes = [
+            models.Index(
+                fields=["from_material_code", "from_system"],
+                name="ix_analogue_closure_from"
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.from_material_code} → {self.to_material_code} ({self.equivalence_type})"
+
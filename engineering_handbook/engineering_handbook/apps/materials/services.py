@@ -0,0 +1,368 @@
+from collections import defaultdict, deque
+from typing import Dict, Iterable, List, Optional, Sequence, Set, Tuple
+
+from django.db import transaction
+from django.db.models import Q
+from django.db.models.signals import post_delete, post_save, pre_save
+
+from ..units.models import to_celsius
+from .evaluation import ROOM_TEMPERATURE, get_engine
+from .models import (
+    EQUIVALENCE_STRENGTH,
+    MaterialAnalogue,
+    MaterialAnalogueClosure,
+    MaterialMechanicalProperty,
+    MaterialPhysicalProperty,
+)
+
+# (standard_system_id, material_code)
+Node = Tuple[int, str]
+
+STRENGTH_EQUIVALENCE = {strength: key for key, strength in EQUIVALENCE_STRENGTH.items()}
+
+BATCH_SIZE = 1000
+
+
+# ============================================================
+# Graph
+# ============================================================
+
+def _node(system_id: int, code: str) -> Node:
+    return system_id, (code or "").strip()
+
+
+def build_adjacency(edges: Iterable[tuple]) -> Dict[Node, Dict[Node, int]]:
+    """
+    Undirected graph from (from_system_id, from_code, to_system_id, to_code,
+    equivalence_type) rows; parallel edges keep the strongest type.
+    """
+    adjacency: Dict[Node, Dict[Node, int]] = defaultdict(dict)
+    for from_system, from_code, to_system, to_code, equivalence_type in edges:
+        a, b = _node(from_system, from_code), _node(to_system, to_code)
+        if a == b or not a[1] or not b[1]:
+            continue
+        strength = EQUIVALENCE_STRENGTH.get(equivalence_type, min(EQUIVALENCE_STRENGTH.values()))
+        if strength > adjacency[a].get(b, 0):
+            adjacency[a][b] = strength
+            adjacency[b][a] = strength
+    return adjacency
+
+
+def components(adjacency: Dict[Node, Dict[Node, int]], nodes: Iterable[Node]) -> List[Set[Node]]:
+    """Connected components containing the given nodes."""
+    seen: Set[Node] = set()
+    result = []
+    for start in nodes:
+        if start in seen:
+            continue
+        component = {start}
+        queue = deque([start])
+        while queue:
+            for neighbour in adjacency.get(queue.popleft(), {}):
+                if neighbour not in component:
+                    component.add(neighbour)
+                    queue.append(neighbour)
+        seen |= component
+        result.append(component)
+    return result
+
+
+def node_closure(adjacency: Dict[Node, Dict[Node, int]], source: Node) -> Dict[Node, Tuple[int, int]]:
+    """
+    All nodes reachable from source: node -> (strength, depth).
+
+    strength is the weakest edge on the strongest path (bottleneck path);
+    with three strength levels this is a BFS per level, strongest first,
+    so depth is the shortest path among the strongest ones.
+    """
+    result: Dict[Node, Tuple[int, int]] = {}
+    for level in sorted(STRENGTH_EQUIVALENCE, reverse=True):
+        depth = {source: 0}
+        queue = deque([source])
+        while queue:
+            node = queue.popleft()
+            for neighbour, strength in adjacency.get(node, {}).items():
+                if strength >= level and neighbour not in depth:
+                    depth[neighbour] = depth[node] + 1
+                    queue.append(neighbour)
+        for node, hops in depth.items():
+            if node != source and node not in result:
+                result[node] = (level, hops)
+    return result
+
+
+def closure_rows(adjacency: Dict[Node, Dict[Node, int]], nodes: Iterable[Node]) -> Iterable[tuple]:
+    """(from_node, to_node, strength, depth) for every reachable pair."""
+    for source in nodes:
+        for target, (strength, depth) in node_closure(adjacency, source).items():
+            yield source, target, strength, depth
+
+
+# ============================================================
+# Database
+# ============================================================
+
+def _nodes_q(nodes: Iterable[Node], system_field: str, code_field: str) -> Q:
+    """OR over standard systems: few systems, many codes per IN list."""
+    by_system: Dict[int, Set[str]] = defaultdict(set)
+    for system_id, code in nodes:
+        by_system[system_id].add(code)
+    q = Q(pk__in=[])
+    for system_id, codes in by_system.items():
+        q |= Q(**{system_field: system_id, f"{code_field}__in": sorted(codes)})
+    return q
+
+
+def _edge_values(queryset) -> List[tuple]:
+    return list(queryset.values_list(
+        "from_system_id", "from_material_code", "to_system_id", "to_material_code", "equivalence_type"
+    ))
+
+
+def _load_component_edges(nodes: Set[Node], analogue_model=MaterialAnalogue) -> List[tuple]:
+    """Edges of the components containing nodes, one query per BFS level."""
+    seen = set(nodes)
+    frontier = set(nodes)
+    edges: Dict[tuple, tuple] = {}
+    while frontier:
+        rows = _edge_values(analogue_model.objects.filter(
+            _nodes_q(frontier, "from_system_id", "from_material_code")
+            | _nodes_q(frontier, "to_system_id", "to_material_code")
+        ))
+        frontier = set()
+        for row in rows:
+            edges[row] = row
+            for node in (_node(row[0], row[1]), _node(row[2], row[3])):
+                if node not in seen:
+                    seen.add(node)
+                    frontier.add(node)
+    return list(edges)
+
+
+def _write_rows(rows: Iterable[tuple], closure_model=MaterialAnalogueClosure) -> int:
+    batch = []
+    count = 0
+    for (from_system, from_code), (to_system, to_code), strength, depth in rows:
+        batch.append(closure_model(
+            from_system_id=from_system,
+            from_material_code=from_code,
+            to_system_id=to_system,
+            to_material_code=to_code,
+            equivalence_type=STRENGTH_EQUIVALENCE[strength],
+            strength=strength,
+            depth=depth,
+        ))
+        if len(batch) >= BATCH_SIZE:
+            closure_model.objects.bulk_create(batch)
+            count += len(batch)
+            batch = []
+    if batch:
+        closure_model.objects.bulk_create(batch)
+        count += len(batch)
+    return count
+
+
+def update_analogue_closure(nodes: Iterable[Node]) -> int:
+    """
+    Rebuild closure rows for the components that contain (or contained) nodes.
+
+    The old component is taken from the closure itself, so a component
+    split by a deleted edge is rebuilt as well.
+    """
+    nodes = {_node(*n) for n in nodes if n[0] and (n[1] or "").strip()}
+    if not nodes:
+        return 0
+
+    with transaction.atomic():
+        old = MaterialAnalogueClosure.objects.filter(
+            _nodes_q(nodes, "from_system_id", "from_material_code")
+        ).values_list("to_system_id", "to_material_code")
+        affected = nodes | {_node(s, c) for s, c in old}
+
+        adjacency = build_adjacency(_load_component_edges(affected))
+        affected |= {n for component in components(adjacency, affected) for n in component}
+
+        MaterialAnalogueClosure.objects.filter(
+            _nodes_q(affected, "from_system_id", "from_material_code")
+        ).delete()
+        return _write_rows(closure_rows(adjacency, sorted(affected)))
+
+
+def rebuild_analogue_closure(analogue_model=MaterialAnalogue, closure_model=MaterialAnalogueClosure) -> int:
+    """Full rebuild (migration / management command). Returns the number of rows."""
+    adjacency = build_adjacency(_edge_values(analogue_model.objects.all()))
+    with transaction.atomic():
+        closure_model.objects.all().delete()
+        return _write_rows(closure_rows(adjacency, sorted(adjacency)), closure_model)
+
+
+# ============================================================
+# Signals
+# ============================================================
+
+def _edge_nodes(analogue) -> Set[Node]:
+    return {
+        _node(analogue.from_system_id, analogue.from_material_code),
+        _node(analogue.to_system_id, analogue.to_material_code),
+    }
+
+
+def _remember_old_edge(sender, instance, raw=False, **kwargs):
+    instance._closure_old_nodes = set()
+    if instance.pk and not raw:
+        old = sender.objects.filter(pk=instance.pk).first()
+        if old is not None:
+            instance._closure_old_nodes = _edge_nodes(old)
+
+
+def _analogue_saved(sender, instance, raw=False, **kwargs):
+    if not raw:
+        update_analogue_closure(_edge_nodes(instance) | getattr(instance, "_closure_old_nodes", set()))
+
+
+def _analogue_deleted(sender, instance, **kwargs):
+    update_analogue_closure(_edge_nodes(instance))
+
+
+def connect_signals() -> None:
+    pre_save.connect(_remember_old_edge, sender=MaterialAnalogue, dispatch_uid="analogue_closure_pre_save")
+    post_save.connect(_analogue_saved, sender=MaterialAnalogue, dispatch_uid="analogue_closure_save")
+    post_delete.connect(_analogue_deleted, sender=MaterialAnalogue, dispatch_uid="analogue_closure_delete")
+
+
+# ============================================================
+# Lookup
+# ============================================================
+
+def find_analogues(
+    material_code: str,
+    system: Optional[str] = None,
+    to_systems: Optional[Sequence[str]] = None,
+    min_equivalence: Optional[str] = None,
+) -> List[dict]:
+    """
+    All analogues of a material code across standard systems, one indexed query.
+
+    :param material_code: e.g. "1.4404"
+    :param system: StandardSystem key of the code ("en"); None = any system
+    :param to_systems: restrict results to these system keys ("asme", "astm", ...)
+    :param min_equivalence: "equivalent", "comparable" or "approximate"
+    :return: [{"system", "code", "equivalence_type", "depth"}, ...],
+             strongest and closest first
+    """
+    qs = MaterialAnalogueClosure.objects.filter(from_material_code=(material_code or "").strip())
+    if system:
+        qs = qs.filter(from_system__key=system)
+    if to_systems:
+        qs = qs.filter(to_system__key__in=list(to_systems))
+    if min_equivalence:
+        qs = qs.filter(strength__gte=EQUIVALENCE_STRENGTH[min_equivalence])
+
+    result = []
+    seen = set()
+    rows = qs.order_by("-strength", "depth", "to_system__sort_order", "to_material_code").values_list(
+        "to_system__key", "to_material_code", "equivalence_type", "depth"
+    )
+    for system_key, code, equivalence_type, depth in rows:
+        # Без system один код может встречаться в нескольких системах
+        if (system_key, code) in seen:
+            continue
+        seen.add((system_key, code))
+        result.append({
+            "system": system_key,
+            "code": code,
+            "equivalence_type": equivalence_type,
+            "depth": depth,
+        })
+    return result
+
+
+# ============================================================
+# Property values
+# ============================================================
+
+PROPERTY_MODELS = {
+    "mechanical": MaterialMechanicalProperty,
+    "physical": MaterialPhysicalProperty,
+}
+
+DENSITY_KEY = "density"
+
+
+def _covers(temperature_min: Optional[float], temperature_max: Optional[float], temperature: float) -> bool:
+    """Open bounds (NULL) cover any temperature."""
+    return ((temperature_min is None or temperature_min <= temperature)
+            and (temperature_max is None or temperature <= temperature_max))
+
+
+def _span(temperature_min: Optional[float], temperature_max: Optional[float]) -> float:
+    if temperature_min is None or temperature_max is None:
+        return float("inf")
+    return temperature_max - temperature_min
+
+
+def _bounds(prop_set) -> Tuple[Optional[float], Optional[float]]:
+    """temperature_min/max of a set in °C (a set without a unit is in °C)."""
+    unit = prop_set.temperature_unit
+    if unit is None:
+        return prop_set.temperature_min, prop_set.temperature_max
+    return (to_celsius(prop_set.temperature_min, unit.factor, unit.offset),
+            to_celsius(prop_set.temperature_max, unit.factor, unit.offset))
+
+
+def material_densities() -> dict:
+    """
+    Density of every material at 20 °C in the base unit of the density
+    quantity, interpolated by the property engine (nearest value outside the table).
+    :return: {"unit": symbol, "results": [{"name": material_number, "density": float}, ...]},
+             results sorted by name; unit None when there is no density type
+    """
+    try:
+        table = get_engine().table(DENSITY_KEY, bound="mean")
+    except KeyError:
+        return {"unit": None, "results": []}
+    values = table.evaluate(table.materials, [ROOM_TEMPERATURE], clamp=True)[:, 0]
+    return {
+        "unit": table.unit,
+        "results": [{"name": number, "density": float(value)} for number, value in zip(table.materials, values)],
+    }
+
+
+def properties_at(material_number: str, kind: str, temperature: float) -> List[dict]:
+    """
+    Property values of a material valid at a temperature: for every property
+    type the set whose range covers the temperature (narrowest first).
+    temperature and the returned bounds are in °C; sets without a
+    temperature unit are taken as °C.
+    """
+    rows = PROPERTY_MODELS[kind].objects.filter(
+        property_set__material__material_number=material_number
+    ).select_related(
+        "property_type", "unit", "property_set__temperature_unit",
+        "property_set__standard_edition__base_standard__series__organization",
+    ).order_by("property_type__sort_order", "property_type__key")
+
+    # property_type_id -> (property, (t_min, t_max) in °C)
+    chosen: Dict[int, Tuple[object, Tuple[Optional[float], Optional[float]]]] = {}
+    for prop in rows:
+        bounds = _bounds(prop.property_set)
+        if not _covers(*bounds, temperature):
+            continue
+        current = chosen.get(prop.property_type_id)
+        if current is None or _span(*bounds) < _span(*current[1]):
+            chosen[prop.property_type_id] = (prop, bounds)
+
+    return [
+        {
+            "property": prop.property_type.key,
+            "symbol": prop.property_type.symbol,
+            "min": prop.min_value,
+            "max": prop.max_value,
+            "unit": prop.unit.symbol,
+            "temperature_min": t_min,
+            "temperature_max": t_max,
+            "standard": str(prop.property_set.standard_edition.base_standard)
+            if prop.property_set.standard_edition else None,
+        }
+        for prop, (t_min, t_max) in chosen.values()
+    ]
@@ -1,3 +1,163 @@
 from django.test import TestCase
 
-# Create your tests here.
+from engineering_handbook.importing import BulkImporter
+from .management.commands.import_materials import material_spec
+from ..units.models import PhysicalQuantity, Unit
+from .evaluation import get_engine
+from .models import (
+    Material,
+    MaterialAnalogue,
+    MaterialAnalogueClosure,
+    MaterialMechanicalProperty,
+    MaterialMechanicalPropertySet,
+    MechanicalPropertyType,
+    StandardSystem,
+)
+from .services import find_analogues, properties_at, rebuild_analogue_closure
+
+
+class MaterialAnalogueClosureTest(TestCase):
+    def setUp(self):
+        self.en = StandardSystem.objects.create(key="en", name="European Norms")
+        self.astm = StandardSystem.objects.create(key="astm", name="ASTM")
+        self.gost = StandardSystem.objects.create(key="gost", name="GOST")
+        self.jis = StandardSystem.objects.create(key="jis", name="JIS")
+
+    def _edge(self, a, a_code, b, b_code, kind):
+        return MaterialAnalogue.objects.create(
+            from_system=a, from_material_code=a_code, to_system=b, to_material_code=b_code, equivalence_type=kind
+        )
+
+    def test_transitive_weakest_link_and_incremental_update(self):
+        self._edge(self.en, "1.4404", self.astm, "316L", "equivalent")
+        self._edge(self.astm, "316L", self.gost, "03Kh17N14M3", "comparable")
+        link = self._edge(self.gost, "03Kh17N14M3", self.jis, "SUS316L", "equivalent")
+
+        result = {a["code"]: (a["equivalence_type"], a["depth"]) for a in find_analogues("1.4404", "en")}
+        self.assertEqual(result, {
+            "316L": ("equivalent", 1),
+            "03Kh17N14M3": ("comparable", 2),
+            "SUS316L": ("comparable", 3),
+        })
+        self.assertEqual([a["code"] for a in find_analogues("SUS316L", to_systems=["en"])], ["1.4404"])
+
+        link.delete()
+        self.assertEqual(find_analogues("SUS316L"), [])
+        self.assertEqual(len(find_analogues("1.4404", "en", min_equivalence="comparable")), 2)
+
+        rows = MaterialAnalogueClosure.objects.count()
+        self.assertEqual(rebuild_analogue_closure(), rows)
+
+
+class MaterialImportTest(TestCase):
+    def setUp(self):
+        StandardSystem.objects.create(key="en", name="European Norms")
+
+    def test_upsert_by_material_number(self):
+        rows = [
+            {"material_number": "1.4404", "main_group": "1", "steel_group": "44"},
+            {"material_number": "1.4571", "main_group": "1", "steel_group": "45", "system": "EN"},
+            {"material_number": "1.0000", "main_group": "x"},
+            {"material_number": "1.4541", "main_group": "1", "system": "NOPE"},
+        ]
+        report = BulkImporter().run([(material_spec(), lambda: rows)])
+        stage = report.stages[0]
+        self.assertEqual((stage.created, stage.updated, stage.skipped), (2, 0, 2))
+        self.assertEqual(len(report.errors), 2)
+
+        rows = [
+            {"material_number": "1.4404", "main_group": "1", "steel_group": "44"},
+            {"material_number": "1.4571", "main_group": "1", "steel_group": "46"},
+        ]
+        stage = BulkImporter().run([(material_spec(), lambda: rows)]).stages[0]
+        self.assertEqual((stage.created, stage.updated, stage.unchanged), (0, 1, 1))
+        self.assertEqual(Material.objects.get(material_number="1.4571").steel_group_en10020, 46)
+
+
+class MaterialApiTest(TestCase):
+    def setUp(self):
+        en = StandardSystem.objects.create(key="en", name="European Norms")
+        for number in ("1.4301", "1.4404", "1.4571"):
+            Material.objects.create(material_number=number, main_group=1, standard_system=en)
+
+    def test_pagination_and_etag(self):
+        response = self.client.get("/api/materials/", {"limit": 2})
+        data = response.json()
+        self.assertEqual((data["count"], data["next"]), (3, 2))
+        self.assertEqual([m["material_number"] for m in data["results"]], ["1.4301", "1.4404"])
+
+        etag = response["ETag"]
+        response = self.client.get("/api/materials/", {"limit": 2}, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+        Material.objects.filter(material_number="1.4404").update(is_active=False)
+        response = self.client.get("/api/materials/", {"limit": 2}, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response["ETag"], etag)
+
+    def test_unknown_material(self):
+        self.assertEqual(self.client.get("/api/materials/9.9999/").status_code, 404)
+        self.assertEqual(self.client.get("/api/materials/1.4404/properties/", {"kind": "x"}).status_code, 400)
+
+
+class PropertyEngineTest(TestCase):
+    def setUp(self):
+        get_engine().clear()
+        stress = PhysicalQuantity.objects.create(key="stress", name_en="Stress", name_ru="Напряжение", name_de="Spannung")
+        self.mpa = Unit.objects.create(
+            quantity=stress, key="mpa", symbol="MPa", name_en="MPa", name_ru="МПа", name_de="MPa", is_base=True
+        )
+        self.rp02 = MechanicalPropertyType.objects.create(key="rp02", physical_quantity=stress, default_unit=self.mpa)
+        self.material = Material.objects.create(material_number="1.4404", main_group=1)
+        for t, value in ((20, 220), (100, 180), (200, 160)):
+            self._value(t, t, value)
+
+    def _value(self, t_min, t_max, value, material=None, temperature_unit=None):
+        prop_set = MaterialMechanicalPropertySet.objects.create(
+            material=material or self.material, temperature_min=t_min, temperature_max=t_max,
+            temperature_unit=temperature_unit,
+        )
+        MaterialMechanicalProperty.objects.create(
+            property_set=prop_set, property_type=self.rp02, min_value=value, max_value=value + 30, unit=self.mpa
+        )
+
+    def test_interpolation_and_range(self):
+        engine = get_engine()
+        grid = engine.evaluate(["1.4404", "9.9999"], "rp02", [20, 60, 150, 250])
+        self.assertEqual(grid[0, :3].tolist(), [220.0, 200.0, 170.0])
+        self.assertTrue(all(v != v for v in (grid[0, 3], *grid[1])))  # NaN
+        self.assertEqual(engine.value("1.4404", "rp02", 250, clamp=True), 160.0)
+        self.assertEqual(engine.value("1.4404", "rp02", 60, bound="max"), 230.0)
+
+    def test_cache_cleared_on_change(self):
+        engine = get_engine()
+        self.assertIsNone(engine.value("1.4404", "rp02", 300))
+        with self.assertNumQueries(0):
+            engine.value("1.4404", "rp02", 150)
+        self._value(300, None, 150)
+        self.assertEqual(engine.value("1.4404", "rp02", 250), 155.0)
+        self.assertEqual(engine.value("1.4404", "rp02", 500), 150.0)
+
+    def _kelvin(self):
+        temperature = PhysicalQuantity.objects.create(
+            key="temperature", name_en="Temperature", name_ru="Температура", name_de="Temperatur"
+        )
+        return Unit.objects.create(
+            quantity=temperature, key="k", symbol="K", name_en="K", name_ru="К", name_de="K", is_base=True
+        )
+
+    def test_temperature_unit_of_set(self):
+        kelvin = self._kelvin()
+        material = Material.objects.create(material_number="1.4571", main_group=1)
+        self._value(293.15, 293.15, 220, material, kelvin)
+        self._value(473.15, 473.15, 160, material, kelvin)
+        self.assertAlmostEqual(get_engine().value("1.4571", "rp02", 110), 190.0)
+
+    def test_properties_at_in_celsius(self):
+        material = Material.objects.create(material_number="1.4571", main_group=1)
+        self._value(373.15, 573.15, 150, material, self._kelvin())
+        (result,) = properties_at("1.4571", "mechanical", 200)
+        self.assertEqual(result["min"], 150)
+        self.assertAlmostEqual(result["temperature_min"], 100.0)
+        self.assertAlmostEqual(result["temperature_max"], 300.0)
+        self.assertEqual(properties_at("1.4571", "mechanical", 400), [])
@@ -1,3 +1,189 @@
-from django.shortcuts import render
+import math
 
-# Create your views here.
+from django.db.models import Prefetch, Q
+from django.views.decorators.http import require_GET
+
+from ...api import error, json_response, paginate
+from ..standards.services import designation
+from .evaluation import BOUNDS, get_engine
+from .models import EQUIVALENCE_STRENGTH, Material, MaterialChemicalComposition, MaterialSymbolicName
+from .services import PROPERTY_MODELS, find_analogues, material_densities, properties_at
+
+
+def _material(material: Material) -> dict:
+    names = list(material.symbolic_names.all())
+    preferred = next((n for n in names if n.is_preferred), names[0] if names else None)
+    return {
+        "material_number": material.material_number,
+        "symbol": preferred.symbol if preferred else "",
+        "system": material.standard_system.key if material.standard_system else None,
+        "main_group": material.main_group,
+        "steel_group": material.steel_group_en10020,
+        "category": material.material_category.key if material.material_category else None,
+        "iso_15608_group": material.iso_15608_group.code if material.iso_15608_group else None,
+        "is_active": material.is_active,
+    }
+
+
+def _materials():
+    return Material.objects.select_related(
+        "standard_system", "material_category", "iso_15608_group"
+    ).prefetch_related(
+        Prefetch("symbolic_names", queryset=MaterialSymbolicName.objects.order_by("-is_preferred", "symbol"))
+    )
+
+
+@require_GET
+def material_list(request):
+    """
+    GET ?q=1.44&system=en&active=1&offset=0&limit=100
+    -> {"count", "offset", "limit", "next", "results": [material, ...]}
+    """
+    qs = _materials()
+    q = request.GET.get("q", "").strip()
+    if q:
+        qs = qs.filter(Q(material_number__icontains=q) | Q(symbolic_names__symbol__icontains=q)).distinct()
+    if request.GET.get("system"):
+        qs = qs.filter(standard_system__key=request.GET["system"].strip().lower())
+    if request.GET.get("active") == "1":
+        qs = qs.filter(is_active=True)
+
+    try:
+        return json_response(request, paginate(request, qs.order_by("material_number"), _material))
+    except ValueError as e:
+        return error(str(e))
+
+
+@require_GET
+def material_detail(request, number):
+    """Material with symbolic names, equivalents and chemical composition."""
+    material = _materials().prefetch_related(
+        "symbolic_names__standard__base_standard__series__organization",
+        "symbolic_names__standard__edition_orgs__organization",
+        "equivalents__standard__base_standard__series__organization",
+        "equivalents__standard__edition_orgs__organization",
+        Prefetch(
+            "chemical_compositions",
+            queryset=MaterialChemicalComposition.objects.select_related(
+                "standard__base_standard__series__organization"
+            ).prefetch_related("standard__edition_orgs__organization", "elements__element", "elements__unit"),
+        ),
+    ).filter(material_number=number).first()
+    if material is None:
+        return error(f"material {number} not found", status=404)
+
+    payload = _material(material)
+    payload["symbolic_names"] = [
+        {"symbol": n.symbol, "standard": designation(n.standard), "is_preferred": n.is_preferred}
+        for n in material.symbolic_names.all()
+    ]
+    payload["equivalents"] = [
+        {"designation": e.designation, "standard": designation(e.standard), "equivalence_type": e.equivalence_type}
+        for e in material.equivalents.all()
+    ]
+    payload["chemical_composition"] = [
+        {
+            "standard": designation(c.standard),
+            "elements": [
+                {"element": el.element.symbol, "min": el.min_value, "max": el.max_value, "unit": el.unit.symbol}
+                for el in c.elements.all()
+            ],
+        }
+        for c in material.chemical_compositions.all()
+    ]
+    return json_response(request, payload)
+
+
+@require_GET
+def material_densities_view(request):
+    """
+    All material densities in the base unit of density, for AT-CAD weight calculations.
+    -> {"unit": "kg/m³", "results": [{"name", "density"}, ...]}
+    """
+    return json_response(request, material_densities())
+
+
+@require_GET
+def material_properties(request, number):
+    """
+    GET ?kind=mechanical|physical&t=20
+    -> {"material", "kind", "temperature", "results": [{"property", "min", "max", "unit", ...}]}
+    """
+    kind = request.GET.get("kind", "mechanical")
+    if kind not in PROPERTY_MODELS:
+        return error(f"unknown kind: {kind}")
+    try:
+        temperature = float(request.GET.get("t", 20))
+    except ValueError:
+        return error("t must be a number")
+    if not Material.objects.filter(material_number=number).exists():
+        return error(f"material {number} not found", status=404)
+
+    return json_response(request, {
+        "material": number,
+        "kind": kind,
+        "temperature": temperature,
+        "results": properties_at(number, kind, temperature),
+    })
+
+
+@require_GET
+def material_property_values(request):
+    """
+    GET ?materials=1.4404,1.4571&property=rp02&t=20,100,150[&bound=min][&clamp=1]
+    -> {"property", "unit", "bound", "materials", "temperatures",
+        "values": [[...per temperature] per material]}; null = no value
+    Interpolated between property sets, see evaluation.py.
+    """
+    materials = [m.strip() for m in request.GET.get("materials", "").split(",") if m.strip()]
+    key = request.GET.get("property", "").strip()
+    bound = request.GET.get("bound", "min")
+    if not materials or not key:
+        return error("materials and property are required")
+    if bound not in BOUNDS:
+        return error(f"bound must be one of {', '.join(BOUNDS)}")
+    try:
+        temperatures = [float(t) for t in request.GET.get("t", "20").split(",") if t.strip()]
+    except ValueError:
+        return error("t must be a comma separated list of numbers")
+
+    try:
+        table = get_engine().table(key, bound)
+    except KeyError as e:
+        return error(str(e.args[0]), status=404)
+    grid = table.evaluate(materials, temperatures, clamp=request.GET.get("clamp") == "1")
+
+    return json_response(request, {
+        "property": key,
+        "unit": table.unit,
+        "bound": bound,
+        "materials": materials,
+        "temperatures": temperatures,
+        "values": [[None if math.isnan(v) else v for v in row] for row in grid.tolist()],
+    })
+
+
+@require_GET
+def material_analogues(request):
+    """
+    GET ?code=1.4404[&system=en][&to=asme,astm][&min=comparable]
+    -> {"code": ..., "analogues": [{"system", "code", "equivalence_type", "depth"}, ...]}
+    """
+    code = request.GET.get("code", "").strip()
+    if not code:
+        return error("code is required")
+
+    min_equivalence = request.GET.get("min") or None
+    if min_equivalence and min_equivalence not in EQUIVALENCE_STRENGTH:
+        return error(f"unknown equivalence type: {min_equivalence}")
+
+    to_systems = [s.strip().lower() for s in request.GET.get("to", "").split(",") if s.strip()]
+    return json_response(request, {
+        "code": code,
+        "analogues": find_analogues(
+            code,
+            system=request.GET.get("system", "").strip().lower() or None,
+            to_systems=to_systems or None,
+            min_equivalence=min_equivalence,
+        ),
+    })
@@ -0,0 +1,100 @@
+# engineering_handbook/apps/standards/management/commands/import_standards.py
+
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+
+from engineering_handbook.apps.standards.models import (
+    BaseStandard,
+    StandardEdition,
+    StandardOrganization,
+    StandardSeries,
+)
+from engineering_handbook.importing import BulkImporter, ImportSpec, Lookup, read_records, text, to_bool, to_int
+
+COLUMNS = "organization, series, number, separator, year, title_en, title_ru, title_de, is_active"
+
+
+def _number(value):
+    return text(value) or None
+
+
+def standard_specs():
+    """
+    Organizations and series are only created (names are kept),
+    base standards and editions are created or updated.
+    """
+    organizations = Lookup(StandardOrganization, "code")
+    series = Lookup(StandardSeries, ("organization__code", "code"))
+    base_standards = Lookup(BaseStandard, ("series__organization__code", "series__code", "number"))
+
+    return [
+        ImportSpec(
+            name="organizations",
+            model=StandardOrganization,
+            key=("code",),
+            fields=("code", "name_en"),
+            row=lambda r: {"code": text(r["organization"]), "name_en": text(r["organization"])},
+            update=False,
+        ),
+        ImportSpec(
+            name="series",
+            model=StandardSeries,
+            key=("organization_id", "code"),
+            fields=("organization_id", "code"),
+            row=lambda r: {"organization_id": organizations(r["organization"]), "code": text(r["series"])},
+            update=False,
+        ),
+        ImportSpec(
+            name="base standards",
+            model=BaseStandard,
+            key=("series_id", "number"),
+            fields=("series_id", "number", "separator", "title_en", "title_ru", "title_de"),
+            row=lambda r: {
+                "series_id": series(text(r["organization"]), text(r["series"])),
+                "number": _number(r.get("number")),
+                "separator": text(r.get("separator")) or "-",
+                "title_en": text(r.get("title_en")),
+                "title_ru": text(r.get("title_ru")),
+                "title_de": text(r.get("title_de")),
+            },
+        ),
+        ImportSpec(
+            name="editions",
+            model=StandardEdition,
+            key=("base_standard_id", "year"),
+            fields=("base_standard_id", "year", "is_active"),
+            row=lambda r: {
+                "base_standard_id": base_standards(
+                    text(r["organization"]), text(r["series"]), _number(r.get("number"))
+                ),
+                "year": to_int(r.get("year")),
+                "is_active": to_bool(r.get("is_active")),
+            },
+        ),
+    ]
+
+
+class Command(BaseCommand):
+    help = f"Пакетный импорт стандартов из JSON / CSV / XLSX. Колонки: {COLUMNS}"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--file', required=True, help='Путь к файлу (.json, .jsonl, .csv, .xlsx)')
+        parser.add_argument('--sheet', help='Лист XLSX (по умолчанию первый)')
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument('--dry-run', action='store_true', help='Проверить без записи')
+
+    def handle(self, *args, **options):
+        file_path = Path(options['file'])
+        if not file_path.exists():
+            raise CommandError(f"Файл {file_path} не найден")
+
+        def source():
+            return read_records(file_path, sheet=options['sheet'])
+
+        importer = BulkImporter(batch_size=options['batch_size'], dry_run=options['dry_run'])
+        report = importer.run([(spec, source) for spec in standard_specs()])
+
+        for error in report.errors:
+            self.stderr.write(error)
+        self.stdout.write(self.style.SUCCESS(report.summary()))
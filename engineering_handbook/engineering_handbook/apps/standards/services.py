@@ -0,0 +1,18 @@
+from .models import StandardEdition
+
+
+def editions_for_listing():
+    """Editions with everything designation() needs, without per-row queries."""
+    return StandardEdition.objects.select_related(
+        "base_standard__series__organization"
+    ).prefetch_related("edition_orgs__organization")
+
+
+def designation(edition) -> str:
+    """
+    Same text as StandardEdition.__str__ ("DIN EN 1092-1:2018"), but from
+    the prefetched edition_orgs instead of one query per edition.
+    """
+    orgs = " ".join(link.organization.code for link in edition.edition_orgs.all())
+    suffix = f":{edition.year}" if edition.year else ""
+    return f"{orgs} {edition.base_standard}{suffix}".strip()
@@ -1,3 +1,45 @@
-from django.shortcuts import render
+from django.db.models import Q
+from django.views.decorators.http import require_GET
 
-# Create your views here.
+from ...api import error, json_response, paginate
+from .services import designation, editions_for_listing
+
+
+def _edition(edition) -> dict:
+    base = edition.base_standard
+    return {
+        "designation": designation(edition),
+        "standard": str(base),
+        "year": edition.year,
+        "title_en": base.title_en,
+        "title_ru": base.title_ru,
+        "title_de": base.title_de,
+        "is_active": edition.is_active,
+    }
+
+
+@require_GET
+def edition_list(request):
+    """
+    GET ?q=1092&organization=EN&active=1&offset=0&limit=100
+    -> {"count", "offset", "limit", "next", "results": [edition, ...]}
+    """
+    qs = editions_for_listing()
+    q = request.GET.get("q", "").strip()
+    if q:
+        qs = qs.filter(
+            Q(base_standard__series__code__icontains=q)
+            | Q(base_standard__number__icontains=q)
+            | Q(base_standard__title_en__icontains=q)
+        )
+    if request.GET.get("organization"):
+        qs = qs.filter(base_standard__series__organization__code=request.GET["organization"])
+    if request.GET.get("active") == "1":
+        qs = qs.filter(is_active=True)
+
+    qs = qs.order_by("base_standard__series__organization__code", "base_standard__series__code",
+                     "base_standard__number", "-year")
+    try:
+        return json_response(request, paginate(request, qs, _edition))
+    except ValueError as e:
+        return error(str(e))
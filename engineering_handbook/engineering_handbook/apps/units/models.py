@@ -72,3 +72,17 @@ def convert_value(value, from_unit, to_unit):
 
     # from base
     return (base_value - to_unit.offset) / to_unit.factor
+
+
+# Базовая единица температуры — K
+CELSIUS_ZERO = 273.15
+
+
+def to_celsius(value, factor=None, offset=None):
+    """
+    Temperature -> °C, given the factor/offset of its unit (base K).
+    Without a unit (factor None) the value is already in °C.
+    """
+    if value is None or factor is None:
+        return value
+    return value * factor + offset - CELSIUS_ZERO
@@ -0,0 +1,442 @@
+"""
+Bulk import of handbook tables from JSON / JSONL / CSV / XLSX.
+
+Records are read as a stream and processed in batches:
+
+    read → transform (ImportSpec.row) → resolve (foreign keys, one query
+    per lookup and batch) → match (existing rows by natural key, one query)
+    → create (bulk_create) → update (bulk_update, changed rows only)
+
+The whole run is one transaction (dry_run rolls it back). Every stage
+is timed, see ImportReport.summary().
+
+Example:
+    spec = ImportSpec(
+        name="materials",
+        model=Material,
+        key=("material_number",),
+        fields=("material_number", "main_group", "standard_system_id"),
+        row=lambda r: {
+            "material_number": text(r["material_number"]),
+            "main_group": to_int(r["main_group"]),
+            "standard_system_id": systems(r.get("system")),
+        },
+    )
+    report = BulkImporter().run([(spec, lambda: read_records(path))])
+
+Note: bulk_create / bulk_update do not send model signals.
+"""
+
+import csv
+import json
+import logging
+import time
+from collections import defaultdict
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+from django.db import transaction
+
+logger = logging.getLogger(__name__)
+
+STAGES = ("read", "transform", "resolve", "match", "create", "update")
+
+# Сколько ошибок строк хранить в отчёте
+MAX_ERRORS = 50
+
+
+class ImportRowError(ValueError):
+    """Row cannot be imported; the message goes to the report."""
+
+
+# ============================================================
+# Readers
+# ============================================================
+
+def read_records(path, sheet: Optional[str] = None, delimiter: Optional[str] = None) -> Iterator[dict]:
+    """
+    Stream records (dicts) from a file; the format is taken from the suffix.
+
+    .json        — list of objects (or {"items": [...]})
+    .jsonl       — one object per line
+    .csv         — header row; delimiter "," or ";" is detected
+    .xlsx/.xlsm  — header row of the sheet (default: first); needs openpyxl
+    """
+    path = Path(path)
+    suffix = path.suffix.lower()
+
+    if suffix == ".json":
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+        if isinstance(data, dict):
+            data = data.get("items", data.get("records", []))
+        yield from data
+
+    elif suffix in (".jsonl", ".ndjson"):
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+
+    elif suffix == ".csv":
+        with open(path, encoding="utf-8-sig", newline="") as f:
+            if delimiter is None:
+                sample = f.read(4096)
+                f.seek(0)
+                delimiter = ";" if sample.count(";") > sample.count(",") else ","
+            for row in csv.DictReader(f, delimiter=delimiter):
+                yield {k.strip(): v for k, v in row.items() if k}
+
+    elif suffix in (".xlsx", ".xlsm"):
+        from openpyxl import load_workbook
+
+        workbook = load_workbook(path, read_only=True, data_only=True)
+        try:
+            ws = workbook[sheet] if sheet else workbook.worksheets[0]
+            rows = ws.iter_rows(values_only=True)
+            header = [str(h).strip() if h is not None else "" for h in next(rows, ())]
+            for values in rows:
+                if any(v not in (None, "") for v in values):
+                    yield {h: v for h, v in zip(header, values) if h}
+        finally:
+            workbook.close()
+
+    else:
+        raise ValueError(f"Unsupported file type: {path.suffix}")
+
+
+# ============================================================
+# Value helpers
+# ============================================================
+
+def text(value: Any) -> str:
+    return "" if value is None else str(value).strip()
+
+
+def to_float(value: Any) -> Optional[float]:
+    value = text(value).replace(",", ".")
+    if not value:
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        raise ImportRowError(f"not a number: {value!r}")
+
+
+def to_int(value: Any) -> Optional[int]:
+    number = to_float(value)
+    return None if number is None else int(number)
+
+
+def to_bool(value: Any, default: bool = True) -> bool:
+    value = text(value).lower()
+    if not value:
+        return default
+    return value in ("1", "true", "yes", "y", "ja", "да", "x")
+
+
+# ============================================================
+# Foreign keys
+# ============================================================
+
+@dataclass(frozen=True)
+class Ref:
+    """Placeholder for a foreign key, replaced by the pk in the resolve stage."""
+    lookup: "Lookup"
+    value: Any
+
+
+class Lookup:
+    """
+    Natural value → pk for one model, resolved per batch with one query.
+
+        materials = Lookup(Material, "material_number")
+        row["material_id"] = materials(record["material"])
+
+    fields may be a tuple (composite value): the query filters on the
+    first field with __in, the rest are matched in Python.
+    required=False: unknown values become None instead of a row error.
+    """
+
+    def __init__(self, model, fields, required: bool = True, queryset=None):
+        self.model = model
+        self.fields: Tuple[str, ...] = (fields,) if isinstance(fields, str) else tuple(fields)
+        self.required = required
+        self.queryset = queryset
+        self.cache: Dict[Any, Optional[int]] = {}
+        self.ambiguous: set = set()
+
+    def __call__(self, *value: Any) -> Optional[Ref]:
+        value = value[0] if len(value) == 1 else tuple(value)
+        if isinstance(value, str):
+            value = value.strip()
+        if value in (None, ""):
+            return None
+        return Ref(self, value)
+
+    def resolve(self, values: Iterable[Any]) -> None:
+        missing = {v for v in values if v not in self.cache}
+        if not missing:
+            return
+        first = {v[0] if len(self.fields) > 1 else v for v in missing}
+        qs = self.queryset if self.queryset is not None else self.model._default_manager.all()
+        found: Dict[Any, List[int]] = defaultdict(list)
+        for row in qs.filter(**{f"{self.fields[0]}__in": list(first)}).values_list(*self.fields, "pk"):
+            value = row[0] if len(self.fields) == 1 else tuple(row[:-1])
+            found[value].append(row[-1])
+        for value in missing:
+            pks = found.get(value, [])
+            if len(pks) > 1:
+                self.ambiguous.add(value)
+            self.cache[value] = pks[0] if len(pks) == 1 else None
+
+    def get(self, value: Any) -> Optional[int]:
+        """Immediate pk (for values that are part of another natural key)."""
+        ref = self(value)
+        if ref is None:
+            return None
+        self.resolve([ref.value])
+        pk = self.cache.get(ref.value)
+        if pk is None and self.required:
+            raise ImportRowError(self.describe(ref.value))
+        return pk
+
+    def forget_missing(self) -> None:
+        """Unknown values may exist after the next stage created them."""
+        self.cache = {k: v for k, v in self.cache.items() if v is not None}
+
+    def describe(self, value: Any) -> str:
+        reason = "ambiguous" if value in self.ambiguous else "not found"
+        return f"{self.model.__name__} {'/'.join(self.fields)}={value!r} {reason}"
+
+
+class MapLookup(Lookup):
+    """Lookup over a mapping loaded once (small tables with computed names)."""
+
+    def __init__(self, model, loader: Callable[[], Dict[Any, int]], required: bool = True):
+        super().__init__(model, ("name",), required=required)
+        self.loader = loader
+        self.mapping: Optional[Dict[Any, int]] = None
+
+    def resolve(self, values: Iterable[Any]) -> None:
+        if self.mapping is None:
+            self.mapping = self.loader()
+        for value in values:
+            self.cache[value] = self.mapping.get(value)
+
+    def forget_missing(self) -> None:
+        self.mapping = None
+        super().forget_missing()
+
+
+# ============================================================
+# Spec and report
+# ============================================================
+
+@dataclass
+class ImportSpec:
+    """
+    One target model.
+
+    key    — natural key (model attnames, e.g. ("material_id", "standard_id"));
+             the first key field must not be NULL
+    fields — attnames written on create/update (key included)
+    row    — record → {attname: value or Ref}; None skips the record
+    """
+    name: str
+    model: Any
+    key: Tuple[str, ...]
+    fields: Tuple[str, ...]
+    row: Callable[[dict], Optional[dict]]
+    update: bool = True
+
+
+@dataclass
+class StageReport:
+    name: str
+    rows: int = 0
+    created: int = 0
+    updated: int = 0
+    unchanged: int = 0
+    skipped: int = 0
+    errors: List[str] = field(default_factory=list)
+    timings: Dict[str, float] = field(default_factory=lambda: dict.fromkeys(STAGES, 0.0))
+
+    def error(self, line: int, message: str) -> None:
+        self.skipped += 1
+        if len(self.errors) < MAX_ERRORS:
+            self.errors.append(f"{self.name} #{line}: {message}")
+
+    def summary(self) -> str:
+        timings = ", ".join(f"{k}={v:.2f}s" for k, v in self.timings.items() if v >= 0.005)
+        return (f"{self.name}: {self.rows} rows, created {self.created}, updated {self.updated}, "
+                f"unchanged {self.unchanged}, skipped {self.skipped}" + (f"; {timings}" if timings else ""))
+
+
+@dataclass
+class ImportReport:
+    stages: List[StageReport] = field(default_factory=list)
+    dry_run: bool = False
+    total: float = 0.0
+
+    @property
+    def errors(self) -> List[str]:
+        return [e for s in self.stages for e in s.errors]
+
+    def summary(self) -> str:
+        lines = [s.summary() for s in self.stages]
+        lines.append(f"total {self.total:.2f}s" + (" (dry run, rolled back)" if self.dry_run else ""))
+        return "\n".join(lines)
+
+
+# ============================================================
+# Importer
+# ============================================================
+
+class BulkImporter:
+    """
+    Runs import specs over record streams in one transaction.
+
+        report = BulkImporter(batch_size=1000).run([
+            (composition_spec, lambda: read_records(path)),
+            (element_spec, lambda: read_records(path)),
+        ])
+
+    Stages run in order, so later specs can reference rows created
+    by earlier ones (the source is re-read through the factory).
+    """
+
+    def __init__(self, batch_size: int = 1000, dry_run: bool = False):
+        self.batch_size = batch_size
+        self.dry_run = dry_run
+
+    def run(self, stages: Sequence[Tuple[ImportSpec, Callable[[], Iterable[dict]]]]) -> ImportReport:
+        report = ImportReport(dry_run=self.dry_run)
+        started = time.perf_counter()
+        with transaction.atomic():
+            for spec, source in stages:
+                stage = self.run_spec(spec, source())
+                report.stages.append(stage)
+                logger.info(stage.summary())
+            if self.dry_run:
+                transaction.set_rollback(True)
+        report.total = time.perf_counter() - started
+        return report
+
+    def run_spec(self, spec: ImportSpec, records: Iterable[dict]) -> StageReport:
+        stage = StageReport(spec.name)
+        lookups = set()
+        iterator = iter(records)
+        line = 0
+        while True:
+            t = time.perf_counter()
+            batch = []
+            for record in iterator:
+                line += 1
+                batch.append((line, record))
+                if len(batch) >= self.batch_size:
+                    break
+            stage.timings["read"] += time.perf_counter() - t
+            if not batch:
+                break
+            self._batch(spec, batch, stage, lookups)
+
+        for lookup in lookups:
+            lookup.forget_missing()
+        return stage
+
+    # --------------------------------------------------------
+
+    def _batch(self, spec: ImportSpec, batch: List[Tuple[int, dict]], stage: StageReport, lookups: set) -> None:
+        timings = stage.timings
+        stage.rows += len(batch)
+
+        # transform
+        t = time.perf_counter()
+        rows: List[Tuple[int, dict]] = []
+        for line, record in batch:
+            try:
+                values = spec.row(record)
+            except (ImportRowError, KeyError, TypeError, ValueError) as e:
+                stage.error(line, f"{type(e).__name__}: {e}")
+                continue
+            if values is None:
+                stage.skipped += 1
+            else:
+                rows.append((line, values))
+        timings["transform"] += time.perf_counter() - t
+
+        # resolve: one query per lookup for the whole batch
+        t = time.perf_counter()
+        pending: Dict[Lookup, set] = defaultdict(set)
+        for _line, values in rows:
+            for value in values.values():
+                if isinstance(value, Ref):
+                    pending[value.lookup].add(value.value)
+        for lookup, refs in pending.items():
+            lookups.add(lookup)
+            lookup.resolve(refs)
+
+        resolved: Dict[tuple, dict] = {}
+        for line, values in rows:
+            problem = None
+            for name, value in values.items():
+                if isinstance(value, Ref):
+                    pk = value.lookup.cache.get(value.value)
+                    if pk is None and value.lookup.required:
+                        problem = value.lookup.describe(value.value)
+                        break
+                    values[name] = pk
+            if problem:
+                stage.error(line, problem)
+                continue
+            key = tuple(values.get(k) for k in spec.key)
+            if key[0] is None:
+                stage.error(line, f"empty key {spec.key[0]}")
+                continue
+            if key in resolved:
+                stage.skipped += 1  # повтор ключа в пачке: побеждает последняя строка
+            resolved[key] = values
+        timings["resolve"] += time.perf_counter() - t
+        if not resolved:
+            return
+
+        # match existing rows by natural key
+        t = time.perf_counter()
+        fields = tuple(dict.fromkeys(spec.fields))
+        first = {key[0] for key in resolved}
+        existing: Dict[tuple, dict] = {}
+        qs = spec.model._default_manager.filter(**{f"{spec.key[0]}__in": list(first)})
+        for current in qs.values("pk", *fields):
+            existing[tuple(current.get(k) for k in spec.key)] = current
+        timings["match"] += time.perf_counter() - t
+
+        # create
+        t = time.perf_counter()
+        new = [spec.model(**values) for key, values in resolved.items() if key not in existing]
+        if new:
+            spec.model._default_manager.bulk_create(new, batch_size=self.batch_size)
+            stage.created += len(new)
+        timings["create"] += time.perf_counter() - t
+
+        # update: only rows whose values differ
+        t = time.perf_counter()
+        update_fields = [f for f in fields if f not in spec.key]
+        changed = []
+        for key, values in resolved.items():
+            current = existing.get(key)
+            if current is None:
+                continue
+            if not spec.update or all(current.get(f) == values.get(f) for f in update_fields if f in values):
+                stage.unchanged += 1
+                continue
+            obj = spec.model(pk=current["pk"], **{f: current.get(f) for f in fields})
+            for f in update_fields:
+                if f in values:
+                    setattr(obj, f, values[f])
+            changed.append(obj)
+        if changed and update_fields:
+            spec.model._default_manager.bulk_update(changed, update_fields, batch_size=self.batch_size)
+            stage.updated += len(changed)
+        timings["update"] += time.perf_counter() - t
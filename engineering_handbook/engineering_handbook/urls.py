@@ -1,6 +1,23 @@
 from django.contrib import admin
 from django.urls import path
 
+from .apps.materials.views import (
+    material_analogues,
+    material_densities_view,
+    material_detail,
+    material_list,
+    material_properties,
+    material_property_values,
+)
+from .apps.standards.views import edition_list
+
 urlpatterns = [
     path('admin/', admin.site.urls),
+    path('api/materials/', material_list, name='material-list'),
+    path('api/materials/densities/', material_densities_view, name='material-densities'),
+    path('api/materials/analogues/', material_analogues, name='material-analogues'),
+    path('api/materials/values/', material_property_values, name='material-property-values'),
+    path('api/materials/<str:number>/', material_detail, name='material-detail'),
+    path('api/materials/<str:number>/properties/', material_properties, name='material-properties'),
+    path('api/standards/', edition_list, name='standard-list'),
 ]
@@ -49,19 +49,61 @@
     "{\"cancelled\": true}")
 )
 
+(defun atc-json-entity-body (ename / edata handle layer etype)
+  (setq edata (entget ename)
+        handle (cdr (assoc 5 edata))
+        layer (cdr (assoc 8 edata))
+        etype (cdr (assoc 0 edata)))
+  (strcat "{"
+          "\"handle\": \"" handle "\", "
+          "\"layer\": \"" (atc-json-escape layer) "\", "
+          "\"type\": \"" etype "\"}")
+)
+
 (defun atc-json-entity (ename)
   (if ename
-    (let* ((edata (entget ename))
-           (handle (cdr (assoc 5 edata)))
-           (layer (cdr (assoc 8 edata)))
-           (etype (cdr (assoc 0 edata))))
-      (strcat "{\"entity\": {"
-              "\"handle\": \"" handle "\", "
-              "\"layer\": \"" (atc-json-escape layer) "\", "
-              "\"type\": \"" etype "\"}}"))
+    (strcat "{\"entity\": " (atc-json-entity-body ename) "}")
     "{\"cancelled\": true}")
 )
 
+; Liefert (name . position) des nachsten "command"-Eintrags ab start
+(defun atc-json-command (data start / key pos from to)
+  (setq key "\"command\": \"")
+  (if (setq pos (vl-string-search key data start))
+    (progn
+      (setq from (+ pos (strlen key)))
+      (setq to (vl-string-search "\"" data from))
+      (cons (substr data (1+ from) (- to from)) to))
+    nil)
+)
+
+; Liefert den Textwert von "key" ab start (ohne Escape-Behandlung)
+(defun atc-json-string (data key start / pat pos from to)
+  (setq pat (strcat "\"" key "\": \""))
+  (if (setq pos (vl-string-search pat data start))
+    (progn
+      (setq from (+ pos (strlen pat)))
+      (setq to (vl-string-search "\"" data from))
+      (substr data (1+ from) (- to from)))
+    nil)
+)
+
+; ------------------------------------------------------------
+; Zeichnungsplan laden (programs/at_lisp_plan.py): die Datei erzeugt
+; alle Objekte und setzt atc-plan-last-result (Anzahl je Typ)
+; ------------------------------------------------------------
+(defun atc-load-file (fname)
+  (atc-log (strcat "> load_file: " fname))
+  (setq atc-plan-last-result nil)
+  (cond
+    ((not (and fname (findfile fname)))
+     "{\"error\": \"Datei nicht gefunden\"}")
+    ((vl-catch-all-error-p (vl-catch-all-apply 'load (list fname)))
+     "{\"error\": \"Fehler beim Laden\"}")
+    (atc-plan-last-result atc-plan-last-result)
+    (T "{\"status\": \"ok\"}"))
+)
+
 ; ------------------------------------------------------------
 ; Hauptpfade
 ; ------------------------------------------------------------
@@ -69,10 +111,124 @@
 (setq reqFile  (strcat base "lisp_bridge\\request.json"))
 (setq respFile (strcat base "lisp_bridge\\response.json"))
 
+; ------------------------------------------------------------
+; Einzelbefehl ausfuhren  liefert JSON-Text der Antwort
+; ------------------------------------------------------------
+(defun atc-exec-command (cmd / pt sel p1 p2 dist txt lname ss i item items)
+  (cond
+    ((= cmd "get_point")
+     (atc-log "> get_point angefordert.")
+     (setq pt (getpoint "\nWahlen Sie einen Punkt: "))
+     (if pt
+       (atc-log "Punkt erfolgreich gespeichert.")
+       (atc-log "Punktauswahl abgebrochen."))
+     (atc-json-point pt)
+    )
+
+    ((= cmd "get_entity")
+     (atc-log "> get_entity angefordert.")
+     (setq sel (entsel "\nWahlen Sie ein Objekt: "))
+     (atc-log "Objektauswahl abgeschlossen.")
+     (if sel
+       (atc-json-entity (car sel))
+       "{\"cancelled\": true}")
+    )
+
+    ((= cmd "get_selection")
+     (atc-log "> get_selection angefordert.")
+     (if (setq ss (ssget))
+       (progn
+         (setq i 0 items "")
+         (repeat (sslength ss)
+           (setq item (atc-json-entity-body (ssname ss i)))
+           (setq items (if (= items "") item (strcat items ", " item)))
+           (setq i (1+ i)))
+         (strcat "{\"entities\": [" items "]}"))
+       "{\"cancelled\": true}")
+    )
+
+    ((= cmd "get_distance")
+     (atc-log "> get_distance angefordert.")
+     (setq p1 (getpoint "\nErster Punkt: "))
+     (if p1
+       (progn
+         (setq p2 (getpoint p1 "\nZweiter Punkt: "))
+         (if p2
+           (progn
+             (setq dist (distance p1 p2))
+             (atc-log "Abstand berechnet und gespeichert.")
+             (strcat "{\"distance\": " (rtos dist 2 6)
+                     ", \"points\": ["
+                     (rtos (car p1) 2 6) ", "
+                     (rtos (cadr p1) 2 6) ", "
+                     (rtos (caddr p1) 2 6) ", "
+                     (rtos (car p2) 2 6) ", "
+                     (rtos (cadr p2) 2 6) ", "
+                     (rtos (caddr p2) 2 6) "]}"))
+           "{\"cancelled\": true}"))
+       "{\"cancelled\": true}")
+    )
+
+    ((= cmd "get_text")
+     (atc-log "> get_text angefordert.")
+     (setq txt (getstring T "\nGeben Sie den Text ein: "))
+     (if (and txt (/= txt ""))
+       (strcat "{\"text\": \"" (atc-json-escape txt) "\"}")
+       "{\"cancelled\": true}")
+    )
+
+    ((= cmd "set_layer")
+     (atc-log "> set_layer angefordert.")
+     (setq lname (getstring T "\nNeuer Layername: "))
+     (if (and lname (/= lname ""))
+       (progn
+         (command "_-layer" "M" lname "")
+         (atc-log (strcat "Layer " lname " erstellt und aktuell gesetzt."))
+         (strcat "{\"status\": \"ok\", \"layer\": \"" lname "\"}"))
+       "{\"cancelled\": true}")
+    )
+
+    ((= cmd "ping")
+     (atc-log "> ping empfangen.")
+     "{\"status\": \"ok\", \"message\": \"pong\"}"
+    )
+
+    ((= cmd "load_lisp")
+     (atc-log "> load_lisp angefordert (nichts zu laden  bereits aktiv).")
+     "{\"status\": \"ok\", \"message\": \"LISP-Modul aktiv\"}"
+    )
+
+    (T
+     (atc-log "> Unbekannter Befehl.")
+     "{\"error\": \"unbekannter Befehl\"}"
+    )
+  )
+)
+
+; ------------------------------------------------------------
+; Stapel: mehrere Befehle in einer Anfrage, Ergebnisse in Reihenfolge.
+; Bei "stop_on_cancel" (Standard) endet der Stapel beim ersten Abbruch
+; oder Fehler,
+; die restlichen Befehle fehlen in "results" (Python: "skipped").
+; ------------------------------------------------------------
+(defun atc-run-batch (data start / stop done next res results)
+  (atc-log "> batch angefordert.")
+  (setq stop (not (vl-string-search "\"stop_on_cancel\": false" data)))
+  (setq results "" done nil)
+  (while (and (not done) (setq next (atc-json-command data start)))
+    (setq res (atc-exec-command (car next)))
+    (setq results (if (= results "") res (strcat results ", " res)))
+    (setq start (cdr next))
+    (if (and stop (or (vl-string-search "\"cancelled\"" res)
+                      (vl-string-search "\"error\"" res)))
+      (setq done T)))
+  (strcat "{\"status\": \"ok\", \"results\": [" results "]}")
+)
+
 ; ------------------------------------------------------------
 ; Hauptfunktion  Aufruf von Python-Seite
 ; ------------------------------------------------------------
-(defun c:ATC_PROCESS_REQUEST ( / reqData)
+(defun c:ATC_PROCESS_REQUEST ( / reqData cmd)
   (atc-log "Starte Anfrageverarbeitung...")
 
   (setq reqData (atc-read-file reqFile))
@@ -81,81 +237,16 @@
       (atc-log "Keine Anfrage gefunden.")
       (princ))
     (progn
+      (setq cmd (atc-json-command reqData 0))
       (cond
-        ((vl-string-search "get_point" reqData)
-         (atc-log "> get_point angefordert.")
-         (setq pt (getpoint "\nWahlen Sie einen Punkt: "))
-         (atc-write-file respFile (atc-json-point pt))
-         (if pt
-           (atc-log "Punkt erfolgreich gespeichert.")
-           (atc-log "Punktauswahl abgebrochen."))
-        )
-
-        ((vl-string-search "get_entity" reqData)
-         (atc-log "> get_entity angefordert.")
-         (setq sel (entsel "\nWahlen Sie ein Objekt: "))
-         (if sel
-           (atc-write-file respFile (atc-json-entity (car sel)))
-           (atc-write-file respFile "{\"cancelled\": true}"))
-         (atc-log "Objektauswahl abgeschlossen.")
-        )
-
-        ((vl-string-search "get_distance" reqData)
-         (atc-log "> get_distance angefordert.")
-         (setq p1 (getpoint "\nErster Punkt: "))
-         (if p1
-           (progn
-             (setq p2 (getpoint p1 "\nZweiter Punkt: "))
-             (if p2
-               (progn
-                 (setq dist (distance p1 p2))
-                 (atc-write-file respFile
-                   (strcat "{\"distance\": " (rtos dist 2 6)
-                           ", \"points\": ["
-                           (rtos (car p1) 2 6) ", "
-                           (rtos (cadr p1) 2 6) ", "
-                           (rtos (caddr p1) 2 6) ", "
-                           (rtos (car p2) 2 6) ", "
-                           (rtos (cadr p2) 2 6) ", "
-                           (rtos (caddr p2) 2 6) "]}"))
-                 (atc-log "Abstand berechnet und gespeichert."))
-               (atc-write-file respFile "{\"cancelled\": true}")))
-           (atc-write-file respFile "{\"cancelled\": true}"))
-        )
-
-        ((vl-string-search "get_text" reqData)
-         (atc-log "> get_text angefordert.")
-         (setq txt (getstring T "\nGeben Sie den Text ein: "))
-         (if (and txt (/= txt ""))
-           (atc-write-file respFile (strcat "{\"text\": \"" (atc-json-escape txt) "\"}"))
-           (atc-write-file respFile "{\"cancelled\": true}"))
-        )
-
-        ((vl-string-search "set_layer" reqData)
-         (atc-log "> set_layer angefordert.")
-         (setq lname (getstring T "\nNeuer Layername: "))
-         (if (and lname (/= lname ""))
-           (progn
-             (command "_-layer" "M" lname "")
-             (atc-write-file respFile (strcat "{\"status\": \"ok\", \"layer\": \"" lname "\"}"))
-             (atc-log (strcat "Layer " lname " erstellt und aktuell gesetzt.")))
-           (atc-write-file respFile "{\"cancelled\": true}"))
-        )
-
-        ((vl-string-search "ping" reqData)
-         (atc-log "> ping empfangen.")
-         (atc-write-file respFile "{\"status\": \"ok\", \"message\": \"pong\"}")
-        )
-
-        ((vl-string-search "load_lisp" reqData)
-         (atc-log "> load_lisp angefordert (nichts zu laden  bereits aktiv).")
-         (atc-write-file respFile "{\"status\": \"ok\", \"message\": \"LISP-Modul aktiv\"}")
-        )
-
+        ((not cmd)
+         (atc-write-file respFile "{\"error\": \"unbekannter Befehl\"}"))
+        ((= (car cmd) "batch")
+         (atc-write-file respFile (atc-run-batch reqData (cdr cmd))))
+        ((= (car cmd) "load_file")
+         (atc-write-file respFile (atc-load-file (atc-json-string reqData "file" 0))))
         (T
-         (atc-log "> Unbekannter Befehl.")
-         (atc-write-file respFile "{\"error\": \"unbekannter Befehl\"}")
-        )
+         (atc-write-file respFile (atc-exec-command (car cmd))))
       )
 
       ;; Anfrage loschen, um Wiederholungen zu vermeiden
@@ -7,10 +7,10 @@ programs/at_addhead.py
 
 import math
 import logging
-from typing import Tuple, List, Optional, Dict
+from typing import Tuple, List, Dict
 import wx
 from config.at_cad_init import ATCadInit
-from programs.at_base import layer_context, ensure_layer
+from programs.at_bulk_emit import BulkEmitSession, ComEmitBackend
 from programs.at_geometry import at_bulge
 from windows.at_window_utils import show_popup
 from locales.at_translations import loc
@@ -55,80 +55,23 @@ loc.register_translations(TRANSLATIONS)
 DEFAULT_LAYER = "0"
 
 
-def add_polyline(model: object, points: List[float], layer_name: str) -> Optional[object]:
+def head_bulges(count: int,
+               bulge_data: List[Tuple[int, Tuple[Tuple[float, float], Tuple[float, float], Tuple[float, float]]]]
+               ) -> List[float]:
     """
-    Создаёт полилинию в AutoCAD.
+    Список коэффициентов выпуклости для всех вершин полилинии.
 
     Args:
-        model: Модельное пространство AutoCAD.
-        points: Список координат [x1, y1, x2, y2, ...].
-        layer_name: Имя слоя.
-
-    Returns:
-        Optional[object]: Объект полилинии AutoCAD или None при ошибке.
-    """
-    try:
-        import pythoncom
-        from win32com.client import VARIANT
-        # Проверка корректности координат
-        if not points or len(points) % 2 != 0:
-            raise ValueError(f"Некорректный список координат: {points}")
-        for coord in points:
-            if not isinstance(coord, (int, float)) or math.isnan(coord) or math.isinf(coord):
-                raise ValueError(f"Некорректная координата: {coord}")
-        # Преобразование в VARIANT
-        points_variant = VARIANT(pythoncom.VT_ARRAY | pythoncom.VT_R8, points)
-        poly = model.AddLightWeightPolyline(points_variant)
-        poly.Closed = True
-        poly.Layer = layer_name
-        logging.info(f"Полилиния создана на слое {layer_name} с координатами: {points}")
-        return poly
-    except Exception as e:
-        logging.error(f"Ошибка при создании полилинии на слое {layer_name}: {e}")
-        logging.error(f"Переданные координаты: {points}")
-        logging.getLogger().handlers[0].flush()
-        return None
-
-def create_polyline(model: object, points: List[Tuple[float, float]],
-                    bulge_data: List[Tuple[int, Tuple[Tuple[float, float], Tuple[float, float], Tuple[float, float]]]],
-                    layer_name: str) -> Optional[object]:
-    """
-    Создаёт полилинию с заданными точками и коэффициентами выпуклости.
-
-    Args:
-        model: Модельное пространство AutoCAD.
-        points: Список точек полилинии [(x1, y1), (x2, y2), ...].
+        count: Число вершин полилинии.
         bulge_data: Список кортежей (индекс, (начальная_точка, конечная_точка, центр)).
-        layer_name: Имя слоя.
 
     Returns:
-        Optional[object]: Объект полилинии или None при ошибке.
+        List[float]: bulge для каждой вершины (0.0 — прямой сегмент).
     """
-    try:
-        points_list = [coord for point in points for coord in point]
-        poly = add_polyline(model, points_list, layer_name)
-        if poly is None:
-            logging.error(f"Не удалось создать полилинию на слое {layer_name}")
-            if wx.GetApp() is not None:
-                show_popup(loc.get("polyline_error", "Ошибка при создании полилинии"), popup_type="error")
-            else:
-                logging.warning("Не удалось показать всплывающее окно: wx.App не инициализирован")
-            logging.getLogger().handlers[0].flush()
-            return None
-        for idx, (start, end, center) in bulge_data:
-            bulge = at_bulge(start, end, center)
-            poly.SetBulge(idx, bulge)
-            logging.info(f"Установлен коэффициент выпуклости {bulge:.4f} для индекса {idx}")
-        logging.info(f"Полилиния успешно создана на слое {layer_name}")
-        return poly
-    except Exception as e:
-        logging.error(f"Ошибка при создании полилинии: {e}")
-        if wx.GetApp() is not None:
-            show_popup(loc.get("heads_error", "Ошибка построения днища") + f": {str(e)}", popup_type="error")
-        else:
-            logging.warning("Не удалось показать всплывающее окно: wx.App не инициализирован")
-        logging.getLogger().handlers[0].flush()
-        return None
+    bulges = [0.0] * count
+    for idx, (start, end, center) in bulge_data:
+        bulges[idx] = at_bulge(start, end, center)
+    return bulges
 
 
 def main(data: Dict) -> bool:
@@ -239,49 +182,40 @@ def main(data: Dict) -> bool:
         x0, y0 = float(insert_point[0]), float(insert_point[1])
         points = {k: [p[0] + x0, p[1] + y0] for k, p in points.items()}
 
-        # Построение полилиний
-        with layer_context(adoc, layer):
-            ensure_layer(adoc, layer)
-            logging.info(f"Создание полилиний на слое {layer}")
-
-            # Внутренняя полилиния
-            inner_points = (
-                points["p1"], points["p4"], points["p8"],
-                points["p12"], points["p14"], points["p17"], points["p1"]
-            )
-            inner_bulge_data = [
-                (1, (points["p4"], points["p8"], points["p5"])),
-                (2, (points["p8"], points["p12"], points["p18"])),
-                (3, (points["p12"], points["p14"], points["p13"]))
-            ]
-            inner_poly = create_polyline(model, inner_points, inner_bulge_data, layer)
-            if not inner_poly:
-                logging.error("Не удалось создать внутреннюю полилинию")
-                return False
-
-            # Внешняя полилиния
-            outer_points = (
-                points["p2"], points["p3"], points["p9"],
-                points["p11"], points["p15"], points["p16"], points["p2"]
-            )
-            outer_bulge_data = [
-                (1, (points["p3"], points["p9"], points["p5"])),
-                (2, (points["p9"], points["p11"], points["p18"])),
-                (3, (points["p11"], points["p15"], points["p13"]))
-            ]
-            outer_poly = create_polyline(model, outer_points, outer_bulge_data, layer)
-            if not outer_poly:
-                logging.error("Не удалось создать внешнюю полилинию")
-                return False
-
-        # Регенерация чертежа
-        try:
-            adoc.Regen(1)  # acActiveViewport
-            logging.info("Чертеж успешно регенерирован")
-        except Exception as e:
-            logging.error(f"Ошибка регенерации чертежа: {e}")
+        # Построение полилиний: обе полилинии уходят одним пакетом —
+        # один undo-блок, одна смена слоя, один regen (acActiveViewport)
+        inner_points = (
+            points["p1"], points["p4"], points["p8"],
+            points["p12"], points["p14"], points["p17"], points["p1"]
+        )
+        inner_bulge_data = [
+            (1, (points["p4"], points["p8"], points["p5"])),
+            (2, (points["p8"], points["p12"], points["p18"])),
+            (3, (points["p12"], points["p14"], points["p13"]))
+        ]
+        outer_points = (
+            points["p2"], points["p3"], points["p9"],
+            points["p11"], points["p15"], points["p16"], points["p2"]
+        )
+        outer_bulge_data = [
+            (1, (points["p3"], points["p9"], points["p5"])),
+            (2, (points["p9"], points["p11"], points["p18"])),
+            (3, (points["p11"], points["p15"], points["p13"]))
+        ]
+
+        logging.info(f"Создание полилиний на слое {layer}")
+        with BulkEmitSession(ComEmitBackend(adoc, model, regen_mode=1)) as session:
+            session.plan.polyline(inner_points, layer, closed=True,
+                                  bulges=head_bulges(len(inner_points), inner_bulge_data))
+            session.plan.polyline(outer_points, layer, closed=True,
+                                  bulges=head_bulges(len(outer_points), outer_bulge_data))
+
+        report = session.report
+        logging.info(f"Пакетное построение днища: {report.summary()}")
+        if not report.ok:
+            logging.error(f"Не удалось создать полилинии днища: {report.errors}")
             if wx.GetApp() is not None:
-                show_popup(loc.get("regen_error", "Ошибка регенерации чертежа"), popup_type="error")
+                show_popup(loc.get("heads_error", "Ошибка построения днища"), popup_type="error")
             else:
                 logging.warning("Не удалось показать всплывающее окно: wx.App не инициализирован")
             logging.getLogger().handlers[0].flush()
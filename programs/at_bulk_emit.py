@@ -0,0 +1,439 @@
+"""
+Файл: at_bulk_emit.py
+Путь: programs/at_bulk_emit.py
+
+Описание:
+Транзакционное пакетное создание объектов по плану (DrawingPlan).
+
+BulkEmitSession собирает все примитивы построения в очередь и создаёт их
+одним проходом при выходе из with:
+    1. один undo-блок (StartUndoMark / EndUndoMark) на всё построение —
+       одно «Отменить» убирает весь результат;
+    2. примитивы сгруппированы по слою — активный слой переключается
+       один раз на группу, а не присваивается каждому объекту;
+    3. regen выполняется ровно один раз в конце;
+    4. время каждой фазы попадает в EmitReport.
+
+Блоки плана (DrawingPlan.blocks) определяются сразу после begin(),
+до первой вставки; уже существующие в чертеже блоки не переопределяются.
+
+Приёмник плана (EmitBackend) вынесен в отдельный класс:
+    ComEmitBackend       — AutoCAD через COM (win32com импортируется лениво)
+    RecordingEmitBackend — заменитель без AutoCAD: запоминает вызовы
+Это позволяет отдавать план и другим приёмникам, не меняя построители.
+
+Примечание:
+    Группировка по слоям меняет порядок создания объектов разных слоёв
+    (draw order). Внутри слоя порядок сохраняется.
+
+Пример:
+    with BulkEmitSession(ComEmitBackend(adoc, model)) as session:
+        session.plan.polyline(points, layer="AM_0", bulges=bulges)
+        session.plan.text(point, "K1234", layer="schrift")
+    print(session.report.summary())
+"""
+
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from abc import ABC, abstractmethod
+from contextlib import ExitStack
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+
+from programs.at_plan import (
+    DrawingPlan, PlanEntity,
+    LINE, CIRCLE, POLYLINE, SPLINE, TEXT, DIMENSION, INSERT,
+)
+
+logger = logging.getLogger(__name__)
+
+# Фазы отчёта в порядке выполнения
+PHASES = ("plan", "begin", "blocks", "layers", "emit", "finish", "regen")
+
+
+# ============================================================
+# ОТЧЁТ
+# ============================================================
+
+@dataclass
+class EmitReport:
+    """
+    Итог пакетного создания.
+
+    created — создано объектов
+    failed  — примитивов, которые не удалось создать
+    layers  — сколько раз переключался активный слой
+    timings — фаза → секунды (plan, begin, layers, emit, finish, regen, total)
+    """
+    created: int = 0
+    failed: int = 0
+    layers: int = 0
+    regens: int = 0
+    timings: Dict[str, float] = field(default_factory=dict)
+    errors: List[str] = field(default_factory=list)
+
+    @property
+    def ok(self) -> bool:
+        return self.failed == 0
+
+    def summary(self) -> str:
+        phases = ", ".join(
+            f"{name}={self.timings[name] * 1000:.1f} мс"
+            for name in (*PHASES, "total") if name in self.timings
+        )
+        return (f"создано {self.created}, ошибок {self.failed}, "
+                f"слоёв {self.layers}, regen {self.regens}; {phases}")
+
+
+# ============================================================
+# ПРИЁМНИКИ ПЛАНА
+# ============================================================
+
+class EmitBackend(ABC):
+    """
+    Интерфейс приёмника плана.
+
+    Порядок вызовов сессией:
+        begin() → define_block()* → (set_layer() → emit()*)* → finish() → regen()
+    finish() вызывается всегда, даже при ошибке в emit().
+    """
+
+    name = "base"
+
+    def begin(self) -> None:
+        pass
+
+    @abstractmethod
+    def define_block(self, name: str, entities: List[PlanEntity]) -> None:
+        ...
+
+    def set_layer(self, layer: str) -> None:
+        pass
+
+    @abstractmethod
+    def emit(self, entity: PlanEntity) -> Any:
+        ...
+
+    def finish(self) -> None:
+        pass
+
+    def regen(self) -> None:
+        pass
+
+
+class ComEmitBackend(EmitBackend):
+    """
+    Приёмник плана для AutoCAD (COM).
+
+    Объекты создаются на активном слое, поэтому .Layer отдельно не
+    присваивается. На время пакета включается construction_batch(),
+    чтобы вложенные maybe_regen() не перерисовывали чертёж.
+
+    Args:
+        adoc: ActiveDocument (по умолчанию — из ATCadInit)
+        model: ModelSpace (по умолчанию — из ATCadInit)
+        regen_mode: 0 — acAllViewports, 1 — acActiveViewport
+    """
+
+    name = "com"
+
+    def __init__(self, adoc: Any = None, model: Any = None, regen_mode: int = 0):
+        import pythoncom
+        from win32com.client import VARIANT
+
+        if adoc is None:
+            from config.at_cad_init import ATCadInit
+            cad = ATCadInit()
+            adoc, model = cad.document, cad.model_space
+        self.adoc = adoc
+        self.model = model if model is not None else adoc.ModelSpace
+        self.regen_mode = regen_mode
+        self._variant = lambda values: VARIANT(pythoncom.VT_ARRAY | pythoncom.VT_R8, values)
+        self._prev_layer = None
+        self._stack = ExitStack()
+
+    # ---------------- жизненный цикл ----------------
+
+    def begin(self) -> None:
+        from programs.at_construction import construction_batch
+
+        self._stack.enter_context(construction_batch())
+        try:
+            self._prev_layer = self.adoc.ActiveLayer
+        except Exception as e:
+            logger.warning(f"ComEmitBackend: не удалось запомнить слой: {e}")
+            self._prev_layer = None
+        self.adoc.StartUndoMark()
+
+    def define_block(self, name: str, entities: List[PlanEntity]) -> None:
+        from programs.at_base import ensure_layer
+
+        try:
+            self.adoc.Blocks.Item(name)
+            return
+        except Exception:
+            pass
+        block = self.adoc.Blocks.Add(self._variant([0.0, 0.0, 0.0]), name)
+        for entity in entities:
+            # Внутри блока активный слой не действует — слой задаётся объекту
+            obj = self._emit_into(block, entity)
+            ensure_layer(self.adoc, entity.layer)
+            obj.Layer = entity.layer
+
+    def set_layer(self, layer: str) -> None:
+        from programs.at_base import ensure_layer
+
+        target = ensure_layer(self.adoc, layer)
+        if target is None:
+            raise RuntimeError(f"Слой недоступен: {layer}")
+        self.adoc.ActiveLayer = target
+
+    def finish(self) -> None:
+        try:
+            if self._prev_layer is not None:
+                try:
+                    self.adoc.ActiveLayer = self._prev_layer
+                except Exception as e:
+                    logger.warning(f"ComEmitBackend: не удалось восстановить слой: {e}")
+            self.adoc.EndUndoMark()
+        finally:
+            self._stack.close()
+
+    def regen(self) -> None:
+        self.adoc.Regen(self.regen_mode)
+
+    # ---------------- примитивы ----------------
+
+    def emit(self, entity: PlanEntity) -> Any:
+        return self._emit_into(self.model, entity)
+
+    def _emit_into(self, model: Any, entity: PlanEntity) -> Any:
+        d = entity.data
+        v = self._variant
+
+        if entity.kind == LINE:
+            return model.AddLine(v(list(d["start"])), v(list(d["end"])))
+
+        if entity.kind == CIRCLE:
+            return model.AddCircle(v(list(d["center"])), d["radius"])
+
+        if entity.kind == POLYLINE:
+            flat = [c for x, y, _ in d["vertices"] for c in (x, y)]
+            pl = model.AddLightWeightPolyline(v(flat))
+            pl.Closed = d["closed"]
+            for i, (_, _, b) in enumerate(d["vertices"]):
+                if abs(b) > 1e-12:
+                    pl.SetBulge(i, b)
+            return pl
+
+        if entity.kind == SPLINE:
+            flat = [c for p in d["points"] for c in p]
+            zero = v([0.0, 0.0, 0.0])
+            return model.AddSpline(v(flat), zero, zero)
+
+        if entity.kind == TEXT:
+            point = v(list(d["point"]))
+            text = model.AddText(d["text"], point, d["height"])
+            text.Alignment = d["alignment"]
+            if d["alignment"] not in (0, 1, 2):
+                text.TextAlignmentPoint = point
+            text.Rotation = d["angle"]
+            return text
+
+        if entity.kind == DIMENSION:
+            from programs.at_dimension import add_dimension
+            return add_dimension(self.adoc, d["dim_type"], list(d["start"]), list(d["end"]),
+                                 offset=d["offset"])
+
+        if entity.kind == INSERT:
+            scale = d["scale"]
+            return model.InsertBlock(v(list(d["point"])), d["name"], scale, scale, scale, d["angle"])
+
+        raise ValueError(f"Неизвестный тип примитива: {entity.kind}")
+
+
+class RecordingEmitBackend(EmitBackend):
+    """
+    Заменитель AutoCAD: ничего не рисует, а записывает вызовы.
+
+    Используется для проверки построителей и диспетчера без Windows.
+    delay — искусственная задержка на один примитив (имитация COM).
+
+    Атрибуты после пакета:
+        entities — [(слой, PlanEntity), ...] в порядке создания
+        blocks   — имя блока → примитивы определения
+        calls    — журнал вызовов ("begin", "layer:AM_0", "finish", "regen")
+        threads  — идентификаторы потоков, из которых шли вызовы
+    """
+
+    name = "recording"
+
+    def __init__(self, document: str = "", delay: float = 0.0):
+        self.document = document
+        self.delay = delay
+        self.entities: List[tuple] = []
+        self.blocks: Dict[str, List[PlanEntity]] = {}
+        self.calls: List[str] = []
+        self.threads = set()
+        self._layer = "0"
+
+    def _log(self, call: str) -> None:
+        self.calls.append(call)
+        self.threads.add(threading.get_ident())
+
+    def begin(self) -> None:
+        self._log("begin")
+
+    def define_block(self, name: str, entities: List[PlanEntity]) -> None:
+        self.blocks.setdefault(name, list(entities))
+        self._log(f"block:{name}")
+
+    def set_layer(self, layer: str) -> None:
+        self._layer = layer
+        self._log(f"layer:{layer}")
+
+    def emit(self, entity: PlanEntity) -> Any:
+        if self.delay:
+            time.sleep(self.delay)
+        self.entities.append((self._layer, entity))
+        self.threads.add(threading.get_ident())
+        return entity
+
+    def finish(self) -> None:
+        self._log("finish")
+
+    def regen(self) -> None:
+        self._log("regen")
+
+
+# ============================================================
+# СЕССИЯ
+# ============================================================
+
+class BulkEmitSession:
+    """
+    Очередь примитивов с отложенным созданием.
+
+    Внутри with построители добавляют примитивы в session.plan
+    (или целые планы через queue()). При нормальном выходе из with
+    план создаётся commit()-ом; при исключении очередь отбрасывается
+    и в чертеже ничего не появляется.
+
+    Args:
+        backend: приёмник плана (ComEmitBackend и т.п.)
+        regen:   выполнить regen после создания (один раз)
+    """
+
+    def __init__(self, backend: EmitBackend, regen: bool = True):
+        self.backend = backend
+        self.regen = regen
+        self.plan = DrawingPlan()
+        self.report = EmitReport()
+        self.created: List[Any] = []
+        self._started: Optional[float] = None
+        self._committed = False
+
+    # ---------------- очередь ----------------
+
+    def queue(self, plan: DrawingPlan) -> "BulkEmitSession":
+        self.plan.extend(plan)
+        return self
+
+    def add(self, entity: PlanEntity) -> PlanEntity:
+        return self.plan.add(entity)
+
+    # ---------------- with ----------------
+
+    def __enter__(self) -> "BulkEmitSession":
+        self._started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> bool:
+        if exc_type is None:
+            self.commit()
+        else:
+            logger.error(f"BulkEmitSession: построение прервано, очередь отброшена: {exc_val}")
+        return False
+
+    # ---------------- создание ----------------
+
+    def commit(self) -> EmitReport:
+        """Создаёт все примитивы очереди. Повторный вызов возвращает тот же отчёт."""
+        if self._committed:
+            return self.report
+        self._committed = True
+
+        report = self.report
+        timings = report.timings
+        t_start = time.perf_counter()
+        if self._started is not None:
+            timings["plan"] = t_start - self._started
+
+        if not self.plan:
+            timings["total"] = time.perf_counter() - t_start
+            return report
+
+        backend = self.backend
+        t = time.perf_counter()
+        backend.begin()
+        timings["begin"] = time.perf_counter() - t
+        timings["layers"] = 0.0
+        timings["emit"] = 0.0
+
+        try:
+            t = time.perf_counter()
+            for name, entities in self.plan.blocks.items():
+                try:
+                    backend.define_block(name, entities)
+                except Exception as e:
+                    report.errors.append(f"block {name}: {e}")
+            timings["blocks"] = time.perf_counter() - t
+
+            for layer, entities in self.plan.layer_groups():
+                t = time.perf_counter()
+                try:
+                    backend.set_layer(layer)
+                    report.layers += 1
+                except Exception as e:
+                    report.failed += len(entities)
+                    report.errors.append(f"layer {layer}: {e}")
+                    timings["layers"] += time.perf_counter() - t
+                    continue
+                timings["layers"] += time.perf_counter() - t
+
+                t = time.perf_counter()
+                for entity in entities:
+                    try:
+                        obj = backend.emit(entity)
+                    except Exception as e:
+                        obj = None
+                        report.errors.append(f"{entity.kind}@{layer}: {e}")
+                    if obj is None:
+                        report.failed += 1
+                    else:
+                        report.created += 1
+                        self.created.append(obj)
+                timings["emit"] += time.perf_counter() - t
+        finally:
+            t = time.perf_counter()
+            backend.finish()
+            timings["finish"] = time.perf_counter() - t
+
+        if self.regen and report.created:
+            t = time.perf_counter()
+            try:
+                backend.regen()
+                report.regens += 1
+            except Exception as e:
+                report.errors.append(f"regen: {e}")
+            timings["regen"] = time.perf_counter() - t
+
+        timings["total"] = time.perf_counter() - t_start
+        if report.errors:
+            logger.error(f"BulkEmitSession: {report.summary()}; ошибки: {report.errors}")
+        else:
+            logger.info(f"BulkEmitSession: {report.summary()}")
+        return report
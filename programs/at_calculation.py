@@ -2,8 +2,7 @@
 Файл: at_calculation.py
 Путь: programs/at_calculation.py
 """
-import json
-import os
+from data.handbook_client import material_densities
 
 
 def at_plate_weight(thickness: float, density: float, area: float) -> float:
@@ -22,31 +21,22 @@ def at_plate_weight(thickness: float, density: float, area: float) -> float:
 
 def at_density(material: str) -> float:
     """
-    Возвращает плотность материала в зависимости от ее марки
+    Возвращает плотность материала в зависимости от ее марки.
+    Плотности загружаются один раз (справочник engineering_handbook с кэшем,
+    без него — config/common_data.json), см. data/handbook_client.py.
+
     Args:
-        material: строковое название материала из json
+        material: строковое название материала
 
-    Returns: плотность материала в кг/м куб.
+    Returns: плотность материала, г/см³
 
     Raises:
-        ValueError: если материал не найден в JSON-файле
+        ValueError: если материал не найден
     """
-    # Получаем путь к папке, где находится скрипт
-    script_dir = os.path.dirname(os.path.abspath(__file__))
-    # Формируем абсолютный путь к JSON-файлу
-    json_path = os.path.join(script_dir, '..', 'config', 'common_data.json')
-
-    try:
-        with open(json_path, 'r', encoding='utf-8') as file:
-            data = json.load(file)
-    except FileNotFoundError:
-        raise FileNotFoundError(f"Файл не найден по пути: {json_path}")
-
-    for item in data['dimensions']['material']:
-        if item['name'] == material:
-            return item['density']
-
-    raise ValueError(f"Материал {material} не найден в JSON-файле")
+    density = material_densities().get(material)
+    if density is None:
+        raise ValueError(f"Материал {material} не найден в справочнике и common_data.json")
+    return density
 
 
 if __name__ == "__main__":
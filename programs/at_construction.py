@@ -17,6 +17,7 @@
 """
 import math
 import sys
+import threading
 from typing import Optional, Any, List, Union, Sequence, Tuple
 import os
 import logging
@@ -1136,6 +1137,12 @@ class _ConstructionContext:
         self.batch_mode = False
         self.suppress_regen = False
         self.objects_created = 0
+        # Глубина вложенности construction_batch (в том числе из разных
+        # потоков — см. programs/at_dispatcher.py). Флаги восстанавливаются
+        # только при выходе из самого внешнего пакета.
+        self.depth = 0
+        self.saved = (False, False)
+        self.lock = threading.Lock()
 
 CTX = _ConstructionContext()
 
@@ -1148,17 +1155,20 @@ def construction_batch(do_regen: bool = False):
     Args:
         do_regen: выполнить regen после завершения
     """
-    prev_batch = CTX.batch_mode
-    prev_regen = CTX.suppress_regen
-
-    CTX.batch_mode = True
-    CTX.suppress_regen = True
+    with CTX.lock:
+        if CTX.depth == 0:
+            CTX.saved = (CTX.batch_mode, CTX.suppress_regen)
+        CTX.depth += 1
+        CTX.batch_mode = True
+        CTX.suppress_regen = True
 
     try:
         yield
     finally:
-        CTX.batch_mode = prev_batch
-        CTX.suppress_regen = prev_regen
+        with CTX.lock:
+            CTX.depth -= 1
+            if CTX.depth == 0:
+                CTX.batch_mode, CTX.suppress_regen = CTX.saved
 
         if do_regen:
             try:
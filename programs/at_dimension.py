@@ -35,6 +35,7 @@ from win32com.client import VARIANT
 from config.at_cad_init import ATCadInit
 from programs.at_geometry import ensure_point_variant
 from programs.at_input import at_get_point
+from programs.at_plan import dim_line_point
 from config.at_config import (
     DEFAULT_DIM_SCALE,
     DEFAULT_DIM_OFFSET,
@@ -98,56 +99,8 @@ def _dim_mid_offset(dim_type: str, point1: VARIANT, point2: VARIANT, offset: flo
     Returns:
         VARIANT: Смещённая точка в формате [x, y, 0].
     """
-    # Преобразуем VARIANT в списки [x, y, z]
-    p1 = _xyz_from_variant(point1)
-    p2 = _xyz_from_variant(point2)
-
-    # Средняя y-координата
-    mid_y = (p1[1] + p2[1]) / 2.0
-
-    # Вектор p1->p2 (XY)
-    vx, vy = p2[0] - p1[0], p2[1] - p1[1]
-
-    # Инициализация результирующей точки
-    result = [0.0, mid_y, 0.0]
-
-    # Определяем нормаль и смещение
-    # nx, ny = 0.0, 0.0
-    if dim_type == "H":
-        # Для горизонтального размера: ближайшая точка с большей y
-        base_point = p2 if p2[1] > p1[1] else p1
-        # Нормаль перпендикулярна линии p1->p2
-        nx, ny = -vy, vx
-        nlen = math.hypot(nx, ny)
-        if nlen > 0:
-            nx /= nlen
-            ny /= nlen
-            # Смещение от base_point
-            result[0] = base_point[0] + nx * offset
-            result[1] = base_point[1] + ny * offset
-    elif dim_type == "V":
-        # Для вертикального размера: направление зависит от y point1
-        if p1[1] < p2[1]:  # point1 нижняя
-            # Выбираем точку с минимальной x
-            base_point = p1 if p1[0] <= p2[0] else p2
-            result[0] = base_point[0] - offset  # Влево
-        else:  # point1 верхняя или y равны
-            # Выбираем точку с максимальной x
-            base_point = p1 if p1[0] >= p2[0] else p2
-            result[0] = base_point[0] + offset  # Вправо
-        result[1] = mid_y  # Средняя y
-    elif dim_type == "L":
-        # Для линейного размера: смещение от середины
-        result[0] = (p1[0] + p2[0]) / 2.0
-        nx, ny = -vy, vx
-        nlen = math.hypot(nx, ny)
-        if nlen > 0:
-            nx /= nlen
-            ny /= nlen
-            result[0] += nx * offset
-            result[1] += ny * offset
-
-    return VARIANT(pythoncom.VT_ARRAY | pythoncom.VT_R8, result)
+    result = dim_line_point(dim_type, _xyz_from_variant(point1), _xyz_from_variant(point2), offset)
+    return VARIANT(pythoncom.VT_ARRAY | pythoncom.VT_R8, list(result))
 
 def _safe_leader_len(leader_len: Optional[float]) -> float:
     """
@@ -0,0 +1,265 @@
+"""
+Файл: at_dispatcher.py
+Путь: programs/at_dispatcher.py
+
+Описание:
+Параллельный диспетчер построений по нескольким открытым чертежам.
+
+ATCadInit — singleton, привязанный к одному ActiveDocument, поэтому
+обычные построения выполняются строго по очереди в одном чертеже.
+Для больших заказов (лист/сборка — отдельный чертёж) диспетчер:
+
+    1. считает геометрию (DrawingPlan) в пуле потоков — это чистый Python;
+    2. отдаёт готовый план рабочему потоку нужного документа;
+    3. рабочий поток документа создаёт объекты через BulkEmitSession.
+
+У каждого документа — свой поток и своя очередь. Поток инициализирует
+COM в режиме STA (CoInitialize) и сам получает объекты AutoCAD через
+GetActiveObject: COM-ссылки нельзя передавать между апартаментами.
+Пока один документ занят созданием объектов, следующие планы уже
+рассчитываются, а другие документы заполняются параллельно.
+
+Порядок: задания одного документа создаются в порядке submit(),
+даже если расчёт более позднего плана закончился раньше.
+
+Приёмники:
+    com_backend_factory     — реальные документы AutoCAD по имени
+    RecordingBackendFactory — RecordingEmitBackend (без Windows)
+
+Пример:
+    with DocumentDispatcher() as dispatcher:
+        f1 = dispatcher.submit("Blech_1.dwg", build_sheet, sheet1)
+        f2 = dispatcher.submit("Baugruppe.dwg", build_assembly, data)
+    print(f1.result().summary())
+"""
+
+from __future__ import annotations
+
+import logging
+import os
+import queue
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple, Union
+
+from programs.at_bulk_emit import BulkEmitSession, EmitBackend, EmitReport, RecordingEmitBackend
+from programs.at_plan import DrawingPlan
+
+logger = logging.getLogger(__name__)
+
+BackendFactory = Callable[[str], EmitBackend]
+PlanSource = Union[DrawingPlan, Callable[..., DrawingPlan]]
+
+_STOP = object()
+
+
+# ============================================================
+# ФАБРИКИ ПРИЁМНИКОВ
+# ============================================================
+
+def com_backend_factory(document: str) -> EmitBackend:
+    """
+    Возвращает ComEmitBackend для открытого чертежа с именем document.
+
+    Вызывается в рабочем потоке документа (после CoInitialize).
+    document — имя вкладки ("Blech_1.dwg") или полный путь. Если чертёж
+    не открыт, но путь существует — он открывается.
+
+    Raises:
+        LookupError: чертёж не найден.
+    """
+    import win32com.client
+    from programs.at_bulk_emit import ComEmitBackend
+
+    acad = win32com.client.GetActiveObject("AutoCAD.Application")
+    docs = acad.Documents
+    wanted = document.lower()
+    for i in range(docs.Count):
+        doc = docs.Item(i)
+        if wanted in (str(doc.Name).lower(), str(doc.FullName).lower()):
+            return ComEmitBackend(doc, doc.ModelSpace)
+    if os.path.isfile(document):
+        doc = docs.Open(document)
+        return ComEmitBackend(doc, doc.ModelSpace)
+    raise LookupError(f"Чертёж не открыт: {document}")
+
+
+class RecordingBackendFactory:
+    """
+    Фабрика RecordingEmitBackend: по одному заменителю на документ.
+    backends — созданные заменители по имени документа (для проверки).
+    """
+
+    def __init__(self, delay: float = 0.0):
+        self.delay = delay
+        self.backends: Dict[str, RecordingEmitBackend] = {}
+        self._lock = threading.Lock()
+
+    def __call__(self, document: str) -> EmitBackend:
+        with self._lock:
+            backend = self.backends.get(document)
+            if backend is None:
+                backend = RecordingEmitBackend(document, delay=self.delay)
+                self.backends[document] = backend
+            return backend
+
+
+@contextmanager
+def _com_apartment():
+    """STA-инициализация COM в рабочем потоке; без pywin32 — ничего не делает."""
+    try:
+        import pythoncom
+    except ImportError:
+        yield
+        return
+    pythoncom.CoInitialize()
+    try:
+        yield
+    finally:
+        pythoncom.CoUninitialize()
+
+
+# ============================================================
+# РАБОЧИЙ ПОТОК ДОКУМЕНТА
+# ============================================================
+
+class _DocumentWorker(threading.Thread):
+    """Поток одного документа: очередь (план-future, результат-future)."""
+
+    def __init__(self, document: str, factory: BackendFactory, regen: bool):
+        super().__init__(name=f"atc-doc-{document}", daemon=True)
+        self.document = document
+        self.factory = factory
+        self.regen = regen
+        self.jobs: "queue.Queue[Any]" = queue.Queue()
+
+    def run(self) -> None:
+        with _com_apartment():
+            backend: Optional[EmitBackend] = None
+            while True:
+                job = self.jobs.get()
+                if job is _STOP:
+                    break
+                plan_future, result = job
+                if not result.set_running_or_notify_cancel():
+                    continue
+                try:
+                    plan = plan_future.result()
+                    if backend is None:
+                        backend = self.factory(self.document)
+                    session = BulkEmitSession(backend, regen=self.regen)
+                    session.queue(plan)
+                    result.set_result(session.commit())
+                except Exception as e:
+                    logger.error(f"[{self.document}] построение не выполнено: {e}")
+                    result.set_exception(e)
+
+
+# ============================================================
+# ДИСПЕТЧЕР
+# ============================================================
+
+class DocumentDispatcher:
+    """
+    Распределяет построения по именованным документам.
+
+    Args:
+        backend_factory: document -> EmitBackend (по умолчанию — AutoCAD)
+        compute_workers: размер пула для расчёта планов
+        regen:           regen после каждого задания (один на задание)
+    """
+
+    def __init__(self, backend_factory: BackendFactory = com_backend_factory,
+                 compute_workers: int = 4, regen: bool = True):
+        self.backend_factory = backend_factory
+        self.regen = regen
+        self._compute = ThreadPoolExecutor(max_workers=compute_workers,
+                                           thread_name_prefix="atc-plan")
+        self._workers: Dict[str, _DocumentWorker] = {}
+        self._lock = threading.Lock()
+        self._closed = False
+
+    def _worker(self, document: str) -> _DocumentWorker:
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("DocumentDispatcher уже остановлен")
+            worker = self._workers.get(document)
+            if worker is None:
+                worker = _DocumentWorker(document, self.backend_factory, self.regen)
+                self._workers[document] = worker
+                worker.start()
+            return worker
+
+    def submit(self, document: str, build: PlanSource, *args: Any, **kwargs: Any) -> "Future[EmitReport]":
+        """
+        Ставит построение в очередь документа.
+
+        build — готовый DrawingPlan или функция, возвращающая DrawingPlan
+        (вызывается в пуле расчёта с *args, **kwargs).
+        Возвращает Future с EmitReport.
+        """
+        worker = self._worker(document)
+        if isinstance(build, DrawingPlan):
+            plan_future: Future = Future()
+            plan_future.set_result(build)
+        else:
+            plan_future = self._compute.submit(build, *args, **kwargs)
+        result: Future = Future()
+        worker.jobs.put((plan_future, result))
+        return result
+
+    def map(self, jobs: Iterable[Tuple[str, PlanSource]]) -> List["Future[EmitReport]"]:
+        """Ставит в очередь пары (документ, план/функция)."""
+        return [self.submit(document, build) for document, build in jobs]
+
+    @property
+    def documents(self) -> List[str]:
+        return list(self._workers)
+
+    def shutdown(self, wait: bool = True) -> None:
+        """Останавливает потоки после выполнения уже поставленных заданий."""
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            workers = list(self._workers.values())
+        for worker in workers:
+            worker.jobs.put(_STOP)
+        if wait:
+            for worker in workers:
+                worker.join()
+        self._compute.shutdown(wait=wait)
+
+    def __enter__(self) -> "DocumentDispatcher":
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        self.shutdown(wait=True)
+
+
+# ============================================================
+# Прямой тест (без AutoCAD)
+# ============================================================
+if __name__ == "__main__":
+    import math
+    import time
+
+    logging.basicConfig(level=logging.INFO)
+
+    def _ring_plan(index: int, count: int = 400) -> DrawingPlan:
+        plan = DrawingPlan(f"ring_{index}")
+        pts = [(100 * math.cos(2 * math.pi * k / count), 100 * math.sin(2 * math.pi * k / count))
+               for k in range(count)]
+        for a, b in zip(pts, pts[1:] + pts[:1]):
+            plan.line(a, b, layer="AM_0")
+        plan.text((0, 0), f"Ring {index}", layer="schrift")
+        return plan
+
+    factory = RecordingBackendFactory(delay=0.0005)
+    t0 = time.perf_counter()
+    with DocumentDispatcher(factory) as dispatcher:
+        futures = [dispatcher.submit(f"Blech_{i % 3}.dwg", _ring_plan, i) for i in range(6)]
+    for f in futures:
+        print(f.result().summary())
+    print(f"Всего: {time.perf_counter() - t0:.2f} с, документов: {len(factory.backends)}")
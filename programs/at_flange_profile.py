@@ -0,0 +1,410 @@
+"""
+Файл: at_flange_profile.py
+Путь: programs/at_flange_profile.py
+
+Описание:
+Параметрический чертёж фланца по данным каталога (EN 1092-1, ASME B16.5).
+
+Размеры из справочников (flange_catalog_en1092_1, flange_catalog_asme_b16_5)
+переводятся в геометрию фланца (FlangeProfile):
+    - разрез: половина профиля (уплотнительная поверхность, диск,
+      ступица/воротник, отверстие) слева и справа от оси;
+    - вид сверху: наружный диаметр, уплотнительная поверхность,
+      ступица, отверстие, окружность болтов и отверстия под болты.
+
+Геометрия считается один раз на (стандарт, тип, уплотнение, DN, PN)
+и хранится в кэше; flange_plan() только переносит её в точку вставки
+и складывает в DrawingPlan, который создаётся через BulkEmitSession
+или компилируется в LISP (at_lisp_plan). Отверстия под болты — один
+блок на диаметр отверстия и по вставке на отверстие.
+
+Профиль упрощённый: ступица — конус от N до A, скругления R1 не
+рисуются; разрез проходит между отверстиями (только осевые линии).
+
+Модуль не импортирует win32com/wx.
+
+Пример:
+    plan = flange_plan("EN 1092-1", "11", "B1", 200, 16, origin=(0, 0))
+    with BulkEmitSession(ComEmitBackend()) as session:
+        session.queue(plan)
+"""
+
+from __future__ import annotations
+
+import functools
+import logging
+import math
+from dataclasses import dataclass
+from typing import Any, Dict, Optional, Tuple
+
+from programs.at_plan import DrawingPlan, TEXT_LAYER
+
+logger = logging.getLogger(__name__)
+
+# Слои (config.at_config.LAYER_DATA): контур, осевые линии
+CONTOUR_LAYER = "AM_0"
+AXIS_LAYER = "AM_7"
+
+# Выступ осевых линий за контур, мм
+AXIS_OVERHANG = 5.0
+
+# Размер кэша профилей
+PROFILE_CACHE_SIZE = 512
+
+# Поля EN 1092-1 в порядке приоритета (у разных типов — разные индексы)
+_EN_THICKNESS = ("C1", "C2", "C3", "C4")
+_EN_BORE = ("B1", "B2", "B3")
+_EN_HUB = ("N1", "N2", "N3")
+_EN_HEIGHT = ("H2", "H1", "H3")
+
+_ASME_BLIND = frozenset({"BL"})
+
+Point2 = Tuple[float, float]
+
+
+# ============================================================
+# ГЕОМЕТРИЯ
+# ============================================================
+
+@dataclass(frozen=True)
+class FlangeProfile:
+    """
+    Геометрия фланца, мм; начало координат — центр уплотнительной поверхности,
+    ось Y — ось фланца (вверх — к трубе).
+
+    outer_d / pcd / hole_d / bolts — D, K, L, число болтов
+    thickness — толщина диска (без выступа уплотнения)
+    bore_d — диаметр отверстия; 0 — глухой фланец
+    face_d / face_h — выступ уплотнения (0 — без выступа)
+    hub_d / neck_d / height — ступица у диска, диаметр трубы, общая высота
+    neck_length — прямой участок у торца ступицы
+    half_section — правая половина разреза: [(r, y), ...], замкнутая
+    """
+    standard: str
+    type_code: str
+    face: str
+    dn: str
+    pn: str
+    outer_d: float
+    pcd: float
+    hole_d: float
+    bolts: int
+    thickness: float
+    bore_d: float = 0.0
+    face_d: float = 0.0
+    face_h: float = 0.0
+    hub_d: float = 0.0
+    neck_d: float = 0.0
+    height: float = 0.0
+    neck_length: float = 0.0
+    half_section: Tuple[Point2, ...] = ()
+
+    @property
+    def label(self) -> str:
+        return f"{self.standard} {self.type_code} DN{self.dn} PN{self.pn}" + (f" {self.face}" if self.face else "")
+
+    @property
+    def hole_block(self) -> str:
+        """Имя блока отверстия под болт: одно на диаметр отверстия."""
+        return f"ATC_FLANGE_HOLE_{self.hole_d:g}".replace(".", "_")
+
+    @property
+    def total_height(self) -> float:
+        return max(self.height, self.thickness) + self.face_h
+
+    def hole_centers(self) -> Tuple[Point2, ...]:
+        """Центры отверстий на виде сверху; отверстия — между осями (со сдвигом на полшага)."""
+        r = self.pcd / 2.0
+        step = 2.0 * math.pi / self.bolts
+        return tuple(
+            (r * math.cos(step * (k + 0.5)), r * math.sin(step * (k + 0.5)))
+            for k in range(self.bolts)
+        )
+
+
+def _first(dims: Dict[str, float], names: Tuple[str, ...]) -> float:
+    for name in names:
+        value = dims.get(name)
+        if value:
+            return float(value)
+    return 0.0
+
+
+def _half_section(p: Dict[str, float]) -> Tuple[Point2, ...]:
+    """Правая половина разреза против часовой стрелки, от отверстия у уплотнения."""
+    rb = p["bore_d"] / 2.0
+    ro = p["outer_d"] / 2.0
+    c = p["thickness"]
+    pts = []
+
+    if p["face_h"] > 0 and rb < p["face_d"] / 2.0 < ro:
+        rf, f = p["face_d"] / 2.0, p["face_h"]
+        pts += [(rb, -f), (rf, -f), (rf, 0.0)]
+    else:
+        pts.append((rb, 0.0))
+    pts += [(ro, 0.0), (ro, c)]
+
+    height = p["height"]
+    rh, rn = p["hub_d"] / 2.0, p["neck_d"] / 2.0
+    if height > c and rb < rh < ro:
+        # Ступица: конус от N у диска до A, затем прямой участок до торца
+        neck_r = rn if rb < rn < rh else rh
+        neck_start = height - p["neck_length"] if 0 < p["neck_length"] < height - c else height
+        pts.append((rh, c))
+        if neck_r != rh:
+            pts.append((neck_r, neck_start))
+        pts += [(neck_r, height), (rb, height)]
+    else:
+        pts.append((rb, c))
+
+    # Повторы подряд (например, ступица без прямого участка) убираются
+    result = [pts[0]]
+    for pt in pts[1:]:
+        if pt != result[-1]:
+            result.append(pt)
+    return tuple((round(r, 6), round(y, 6)) for r, y in result)
+
+
+def make_profile(standard: str, type_code: str, face: str, dn: Any, pn: Any,
+                 params: Dict[str, float]) -> FlangeProfile:
+    """
+    Профиль по нормализованным размерам:
+    outer_d, pcd, hole_d, bolts, thickness, bore_d, face_d, face_h,
+    hub_d, neck_d, height, neck_length.
+
+    Raises:
+        ValueError: не хватает D, K, L, числа болтов или толщины.
+    """
+    p = {k: float(params.get(k) or 0.0) for k in (
+        "outer_d", "pcd", "hole_d", "bolts", "thickness", "bore_d", "face_d", "face_h",
+        "hub_d", "neck_d", "height", "neck_length",
+    )}
+    missing = [k for k in ("outer_d", "pcd", "hole_d", "bolts", "thickness") if p[k] <= 0]
+    if missing:
+        raise ValueError(f"Недостаточно размеров для чертежа фланца: {', '.join(missing)}")
+    if not p["bore_d"] < p["pcd"] - p["hole_d"] < p["outer_d"]:
+        raise ValueError("Размеры фланца противоречивы: нужно bore < K - L < D")
+
+    return FlangeProfile(
+        standard=standard,
+        type_code=str(type_code),
+        face=str(face or ""),
+        dn=str(dn),
+        pn=str(pn),
+        outer_d=p["outer_d"],
+        pcd=p["pcd"],
+        hole_d=p["hole_d"],
+        bolts=int(p["bolts"]),
+        thickness=p["thickness"],
+        bore_d=p["bore_d"],
+        face_d=p["face_d"],
+        face_h=p["face_h"],
+        hub_d=p["hub_d"],
+        neck_d=p["neck_d"],
+        height=p["height"],
+        neck_length=p["neck_length"],
+        half_section=_half_section(p),
+    )
+
+
+# ============================================================
+# РАЗМЕРЫ ИЗ КАТАЛОГОВ
+# ============================================================
+
+def _en_params(dims: Dict[str, float]) -> Dict[str, float]:
+    bore = _first(dims, _EN_BORE)
+    if not bore and dims.get("A") and dims.get("S"):
+        bore = dims["A"] - 2.0 * dims["S"]
+    return {
+        "outer_d": dims.get("D", 0.0),
+        "pcd": dims.get("K", 0.0),
+        "hole_d": dims.get("L", 0.0),
+        "bolts": dims.get("Q", 0.0),
+        "thickness": _first(dims, _EN_THICKNESS),
+        "bore_d": bore,
+        "face_d": dims.get("d1", 0.0),
+        "face_h": dims.get("f1", 0.0),
+        "hub_d": _first(dims, _EN_HUB),
+        "neck_d": dims.get("A", 0.0),
+        "height": _first(dims, _EN_HEIGHT),
+        "neck_length": dims.get("H3", 0.0) if dims.get("H2") else 0.0,
+    }
+
+
+def _asme_params(dims: Dict[str, float], type_code: str, pipe_od: Optional[float]) -> Dict[str, float]:
+    # Внутреннего диаметра в AME_B16_5.db нет: отверстие — по наружному диаметру трубы
+    blind = type_code.upper() in _ASME_BLIND
+    return {
+        "outer_d": dims.get("od", 0.0),
+        "pcd": dims.get("pcd", 0.0),
+        "hole_d": dims.get("bolt_hole_diameter", 0.0),
+        "bolts": dims.get("number_of_bolts", 0.0),
+        "thickness": dims.get("thickness", 0.0),
+        "bore_d": 0.0 if blind else float(pipe_od or 0.0),
+        "face_d": dims.get("male_d") or dims.get("diameter_g", 0.0),
+        "face_h": dims.get("raised_face_height", 0.0),
+        "hub_d": dims.get("hub_diameter") or dims.get("neck_d1", 0.0),
+        "neck_d": dims.get("neck_d2") or float(pipe_od or 0.0),
+        "height": dims.get("y", 0.0),
+        "neck_length": 0.0,
+    }
+
+
+@functools.lru_cache(maxsize=PROFILE_CACHE_SIZE)
+def _cached_profile(standard: str, type_code: str, face: str, dn: str, pn: str) -> FlangeProfile:
+    from data.flange_batch import STANDARD_ASME, normalize_standard
+
+    norm = normalize_standard(standard)
+    if norm == STANDARD_ASME:
+        from data.flange_catalog_asme_b16_5 import get_engine
+
+        engine = get_engine()
+        key = engine.resolve(type_code, face, dn, pn)
+        params = _asme_params(
+            engine.dimensions(type_code, face, dn, pn), type_code, engine.nps_info[key[0]]["pipe_od"]
+        )
+    elif norm is not None:
+        from data.flange_catalog_en1092_1 import get_catalog
+
+        catalog = get_catalog()
+        dims = catalog.dimensions(type_code, face, dn, pn)
+        if not any(name in dims for name in _EN_THICKNESS[:3]):
+            # Для глухого фланца (05) Terms отмечает только C4 — толщину диска
+            # берём из той же строки PNxx (C1)
+            row = catalog.dimensions_by_pn.get(float(str(pn).replace(",", ".")), {}).get(int(dn), {})
+            if row.get("C1") is not None and row["C1"].number:
+                dims = dict(dims, C1=row["C1"].number)
+        params = _en_params(dims)
+    else:
+        raise ValueError(f"Неизвестный стандарт фланца: {standard!r}")
+    return make_profile(norm, type_code, face, dn, pn, params)
+
+
+def flange_profile(standard: str, type_code: Any, face: Any, dn: Any, pn: Any) -> FlangeProfile:
+    """
+    Геометрия фланца из каталога; считается один раз на
+    (стандарт, тип, уплотнение, DN, PN). Для ASME dn — NPS ("1 1/2"), pn — class.
+
+    Raises:
+        FlangeLookupError: фланца нет в каталоге или он не применяется.
+        ValueError: в каталоге не хватает размеров для чертежа.
+    """
+    return _cached_profile(
+        str(standard or "").strip(), str(type_code or "").strip(), str(face or "").strip(),
+        str(dn or "").strip(), str(pn or "").strip(),
+    )
+
+
+# ============================================================
+# ПЛАН ПОСТРОЕНИЯ
+# ============================================================
+
+def _hole_block(profile: FlangeProfile) -> DrawingPlan:
+    """Отверстие под болт с осевым крестом; точка вставки — центр."""
+    block = DrawingPlan(profile.hole_block)
+    r = profile.hole_d / 2.0
+    a = r + AXIS_OVERHANG / 2.0
+    block.circle((0.0, 0.0), r, layer=CONTOUR_LAYER)
+    block.line((-a, 0.0), (a, 0.0), layer=AXIS_LAYER)
+    block.line((0.0, -a), (0.0, a), layer=AXIS_LAYER)
+    return block
+
+
+def add_section(plan: DrawingPlan, profile: FlangeProfile, origin: Any = (0.0, 0.0)) -> DrawingPlan:
+    """Разрез фланца: origin — центр уплотнительной поверхности."""
+    ox, oy = float(origin[0]), float(origin[1])
+    right = [(ox + r, oy + y) for r, y in profile.half_section]
+    left = [(ox - r, oy + y) for r, y in profile.half_section]
+
+    if profile.bore_d > 0:
+        plan.polyline(right, layer=CONTOUR_LAYER)
+        plan.polyline(left, layer=CONTOUR_LAYER)
+    else:
+        # Глухой фланец — один контур: правая половина и зеркальная левая
+        plan.polyline(right[:-1] + list(reversed(left[1:-1])), layer=CONTOUR_LAYER)
+
+    bottom = oy - profile.face_h - AXIS_OVERHANG
+    top = oy + max(profile.height, profile.thickness) + AXIS_OVERHANG
+    plan.line((ox, bottom), (ox, top), layer=AXIS_LAYER)
+    for x in (ox - profile.pcd / 2.0, ox + profile.pcd / 2.0):
+        plan.line((x, oy - AXIS_OVERHANG), (x, oy + profile.thickness + AXIS_OVERHANG), layer=AXIS_LAYER)
+    return plan
+
+
+def add_top_view(plan: DrawingPlan, profile: FlangeProfile, origin: Any = (0.0, 0.0)) -> DrawingPlan:
+    """Вид сверху: origin — центр фланца; отверстия — вставки блока."""
+    ox, oy = float(origin[0]), float(origin[1])
+    center = (ox, oy)
+
+    # Видимые окружности по профилю: все радиусы контура, кроме оси
+    radii = sorted({r for r, _y in profile.half_section if r > 0}, reverse=True)
+    for r in radii:
+        plan.circle(center, r, layer=CONTOUR_LAYER)
+    plan.circle(center, profile.pcd / 2.0, layer=AXIS_LAYER)
+
+    a = profile.outer_d / 2.0 + AXIS_OVERHANG
+    plan.line((ox - a, oy), (ox + a, oy), layer=AXIS_LAYER)
+    plan.line((ox, oy - a), (ox, oy + a), layer=AXIS_LAYER)
+
+    name = plan.define_block(profile.hole_block, _hole_block(profile))
+    for x, y in profile.hole_centers():
+        plan.insert(name, (ox + x, oy + y), layer=CONTOUR_LAYER)
+    return plan
+
+
+def flange_plan(standard: str, type_code: Any, face: Any, dn: Any, pn: Any,
+                origin: Any = (0.0, 0.0), views: Tuple[str, ...] = ("section", "top"),
+                label: bool = True, text_height: float = 10.0) -> DrawingPlan:
+    """
+    План построения фланца из каталога.
+
+    origin — центр уплотнительной поверхности разреза; вид сверху
+    ставится справа на расстоянии наружного диаметра.
+    views — ("section",), ("top",) или оба.
+
+    Raises:
+        FlangeLookupError / ValueError: как flange_profile().
+    """
+    profile = flange_profile(standard, type_code, face, dn, pn)
+    plan = DrawingPlan(f"flange {profile.label}")
+    ox, oy = float(origin[0]), float(origin[1])
+
+    if "section" in views:
+        add_section(plan, profile, (ox, oy))
+    if "top" in views:
+        shift = profile.outer_d * 1.25 if "section" in views else 0.0
+        add_top_view(plan, profile, (ox + shift, oy + profile.total_height / 2.0))
+    if label:
+        plan.text((ox, oy - profile.face_h - AXIS_OVERHANG - 2.0 * text_height), profile.label,
+                  layer=TEXT_LAYER, height=text_height)
+    return plan
+
+
+def clear_cache() -> None:
+    """Сбрасывает кэш профилей (например, после обновления базы)."""
+    _cached_profile.cache_clear()
+
+
+# ============================================================
+# Прямой тест (без AutoCAD)
+# ============================================================
+if __name__ == "__main__":
+    import time
+
+    from programs.at_bulk_emit import BulkEmitSession, RecordingEmitBackend
+
+    for args in (("EN 1092-1", "11", "B1", 200, 16), ("EN 1092-1", "05", "B1", 100, 40),
+                 ("EN 1092-1", "01", "A", 50, 6)):
+        p = flange_profile(*args)
+        print(p.label, p.half_section)
+
+    backend = RecordingEmitBackend()
+    with BulkEmitSession(backend) as session:
+        session.queue(flange_plan("EN 1092-1", "11", "B1", 200, 16))
+        session.queue(flange_plan("EN 1092-1", "11", "B1", 250, 16, origin=(0, 600)))
+    print(session.report.summary(), list(backend.blocks))
+
+    t0 = time.perf_counter()
+    for _ in range(1000):
+        flange_plan("EN 1092-1", "11", "B1", 200, 16)
+    print(f"план из кэша: {(time.perf_counter() - t0) * 1000:.3f} мкс")
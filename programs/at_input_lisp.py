@@ -5,10 +5,33 @@
 Безопасные функции выбора точки и примитива (объекта) через LISP-мост.
 Замена нестабильным COM-вызовам вроде doc.Utility.GetPoint() и doc.Utility.GetEntity().
 Работает через модуль lisp_bridge.py.
+
+Серии выборов (лист → детали → точка вставки) собираются в один пакет
+LispBatch и стоят одного обращения к AutoCAD вместо одного на каждую команду.
 """
 
-from typing import Optional, Tuple, Any
-from programs.lisp_bridge import send_lisp_command
+from typing import Optional, Tuple, List
+from programs.lisp_bridge import send_lisp_command, LispBatch, BatchResult
+
+
+def _point_from_result(result: Optional[dict]) -> Optional[Tuple[float, float, float]]:
+    """
+    Извлекает точку из ответа LISP.
+    Поддерживает оба формата: {"point": [x, y, z]} и {"x": .., "y": .., "z": ..}.
+    """
+    if not result or result.get("cancelled"):
+        return None
+    if "point" in result:
+        return tuple(result["point"])
+    if "x" in result and "y" in result:
+        return float(result["x"]), float(result["y"]), float(result.get("z", 0.0))
+    return None
+
+
+def _entity_from_result(result: Optional[dict]) -> Optional[dict]:
+    if result and "entity" in result:
+        return result["entity"]
+    return None
 
 
 def get_point(prompt: str = "Укажите точку:") -> Optional[Tuple[float, float, float]]:
@@ -16,10 +39,7 @@ def get_point(prompt: str = "Укажите точку:") -> Optional[Tuple[floa
     Запрашивает точку у пользователя через LISP.
     Возвращает координаты (x, y, z) или None при отмене.
     """
-    result = send_lisp_command("get_point", {"prompt": prompt})
-    if result and "point" in result:
-        return tuple(result["point"])
-    return None
+    return _point_from_result(send_lisp_command("get_point", {"prompt": prompt}))
 
 
 def get_entity(prompt: str = "Выберите объект:") -> Optional[dict]:
@@ -27,7 +47,32 @@ def get_entity(prompt: str = "Выберите объект:") -> Optional[dict]
     Запрашивает выбор примитива у пользователя.
     Возвращает словарь с данными объекта (handle, тип, слой и т.д.) или None при отмене.
     """
-    result = send_lisp_command("get_entity", {"prompt": prompt})
-    if result and "entity" in result:
-        return result["entity"]
-    return None
+    return _entity_from_result(send_lisp_command("get_entity", {"prompt": prompt}))
+
+
+def get_sheet_parts_point(
+    sheet_prompt: str = "Выберите лист:",
+    parts_prompt: str = "Выберите детали:",
+    point_prompt: str = "Укажите точку вставки:"
+) -> Tuple[Optional[dict], List[dict], Optional[Tuple[float, float, float]], BatchResult]:
+    """
+    Выбор листа, его деталей и точки вставки за одно обращение к AutoCAD.
+
+    При отмене на любом шаге следующие шаги не выполняются
+    (их статус в BatchResult — "skipped").
+
+    Возвращает:
+        (лист, детали, точка, BatchResult) — лист/точка None, детали []
+        для невыполненных шагов.
+    """
+    batch = LispBatch()
+    i_sheet = batch.get_entity(sheet_prompt)
+    i_parts = batch.get_selection(parts_prompt)
+    i_point = batch.get_point(point_prompt)
+    result = batch.send()
+
+    sheet = _entity_from_result(result[i_sheet].data)
+    parts_data = result[i_parts].data if result[i_parts].ok else None
+    parts = list(parts_data.get("entities", [])) if parts_data else []
+    point = _point_from_result(result[i_point].data)
+    return sheet, parts, point, result
@@ -0,0 +1,371 @@
+"""
+Файл: at_lisp_plan.py
+Путь: programs/at_lisp_plan.py
+
+Описание:
+Компиляция плана построения (DrawingPlan) в один AutoLISP-файл
+для выполнения за одно обращение к AutoCAD.
+
+Вместо тысяч COM-вызовов (_add_line, _add_polyline, add_text, ...)
+план превращается в последовательность (entmake ...) — AutoCAD создаёт
+объекты внутри своего процесса без межпроцессных вызовов на каждый объект.
+
+Состав файла:
+    1. служебные функции (создание слоёв, запись результата);
+    2. (defun atc-plan-run ...) — undo-блок, определения блоков плана
+       (BLOCK ... ENDBLK, если блока ещё нет), entmake для каждого примитива,
+       линейные размеры через _.DIMLINEAR/_.DIMALIGNED;
+    3. проверка: после построения LISP проходит по новым объектам
+       (entnext от (entlast) до начала) и считает их по типам;
+    4. результат пишется в JSON-файл и в переменную atc-plan-last-result.
+
+Выполнение:
+    run_plan(plan, via="command") — (load "...") через один SendCommand
+    run_plan(plan, via="bridge")  — команда load_file LISP-моста
+
+Проверка:
+    verify_plan(plan, result) сравнивает ожидаемые количества
+    (plan.counts()) с тем, что LISP насчитал в чертеже.
+
+Компилятор детерминирован (фиксированный формат чисел, порядок плана),
+поэтому результат compile_plan() можно сравнивать с эталонным текстом.
+Модуль не импортирует win32com на уровне модуля.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+from programs.at_plan import (
+    DrawingPlan, PlanEntity, dim_line_point,
+    LINE, CIRCLE, POLYLINE, SPLINE, TEXT, DIMENSION, INSERT,
+)
+
+# Тип примитива плана → тип объекта DXF (группа 0)
+DXF_TYPES = {
+    LINE: "LINE",
+    CIRCLE: "CIRCLE",
+    POLYLINE: "LWPOLYLINE",
+    SPLINE: "SPLINE",
+    TEXT: "TEXT",
+    DIMENSION: "DIMENSION",
+    INSERT: "INSERT",
+}
+
+# acAlignment (COM) → (группа 72, группа 73) DXF
+TEXT_ALIGNMENT = {
+    0: (0, 0), 1: (1, 0), 2: (2, 0), 3: (3, 0), 4: (4, 0), 5: (5, 0),
+    6: (0, 3), 7: (1, 3), 8: (2, 3),
+    9: (0, 2), 10: (1, 2), 11: (2, 2),
+    12: (0, 1), 13: (1, 1), 14: (2, 1),
+}
+
+_BRIDGE_DIR = Path(__file__).resolve().parent.parent / "lisp_bridge"
+PLAN_FILE = _BRIDGE_DIR / "plan.lsp"
+PLAN_RESULT_FILE = _BRIDGE_DIR / "plan_result.json"
+
+_PROLOG = """\
+(defun atc-plan-layer (name)
+  (if (not (tblsearch "LAYER" name))
+    (entmake (list '(0 . "LAYER") '(100 . "AcDbSymbolTableRecord")
+                   '(100 . "AcDbLayerTableRecord") (cons 2 name) '(70 . 0))))
+)
+
+(defun atc-plan-make (data)
+  (if (entmake data)
+    (setq atc-plan-made (1+ atc-plan-made))
+    (setq atc-plan-failed (1+ atc-plan-failed)))
+)
+
+(defun atc-plan-count (start / ent typ counts pair)
+  (setq ent (if start (entnext start) (entnext)))
+  (while ent
+    (setq typ (cdr (assoc 0 (entget ent))))
+    (if (setq pair (assoc typ counts))
+      (setq counts (subst (cons typ (1+ (cdr pair))) pair counts))
+      (setq counts (cons (cons typ 1) counts)))
+    (setq ent (entnext ent)))
+  counts
+)
+
+(defun atc-plan-json (counts / text)
+  (setq text "")
+  (foreach pair (reverse counts)
+    (setq text (strcat text (if (= text "") "" ", ")
+                       "\\"" (car pair) "\\": " (itoa (cdr pair)))))
+  (strcat "{\\"status\\": \\"ok\\", \\"failed\\": " (itoa atc-plan-failed)
+          ", \\"counts\\": {" text "}}")
+)
+
+(defun atc-plan-write (fname text / f)
+  (if (setq f (open fname "w"))
+    (progn (write-line text f) (close f)))
+)
+"""
+
+
+# ============================================================
+# ФОРМАТИРОВАНИЕ
+# ============================================================
+
+def lisp_num(value: float) -> str:
+    """Число в фиксированном формате AutoLISP: 100.0, -0.5, 12.34567891."""
+    text = f"{float(value):.8f}".rstrip("0")
+    if text.endswith("."):
+        text += "0"
+    return "0.0" if text in ("-0.0", "-0") else text
+
+
+def lisp_str(value: str) -> str:
+    """Строковый литерал AutoLISP с экранированием."""
+    return '"' + str(value).replace("\\", "\\\\").replace('"', '\\"') + '"'
+
+
+def lisp_point(point: Iterable[float]) -> str:
+    return "(" + " ".join(lisp_num(c) for c in point) + ")"
+
+
+def _pair(code: int, value: str) -> str:
+    return f"({code} . {value})"
+
+
+def _group_point(code: int, point: Iterable[float]) -> str:
+    return f"({code} " + " ".join(lisp_num(c) for c in point) + ")"
+
+
+# ============================================================
+# КОМПИЛЯЦИЯ ПРИМИТИВОВ
+# ============================================================
+
+def compile_entity(entity: PlanEntity) -> str:
+    """Одна LISP-форма для примитива плана."""
+    d = entity.data
+    layer = _pair(8, lisp_str(entity.layer))
+
+    if entity.kind == LINE:
+        groups = ['(0 . "LINE")', layer, _group_point(10, d["start"]), _group_point(11, d["end"])]
+        return f"(atc-plan-make '({' '.join(groups)}))"
+
+    if entity.kind == CIRCLE:
+        groups = ['(0 . "CIRCLE")', layer, _group_point(10, d["center"]), _pair(40, lisp_num(d["radius"]))]
+        return f"(atc-plan-make '({' '.join(groups)}))"
+
+    if entity.kind == POLYLINE:
+        groups = ['(0 . "LWPOLYLINE")', '(100 . "AcDbEntity")', layer, '(100 . "AcDbPolyline")',
+                  _pair(90, str(len(d["vertices"]))), _pair(70, "1" if d["closed"] else "0")]
+        for x, y, b in d["vertices"]:
+            groups.append(_group_point(10, (x, y)))
+            if abs(b) > 1e-12:
+                groups.append(_pair(42, lisp_num(b)))
+        return f"(atc-plan-make '({' '.join(groups)}))"
+
+    if entity.kind == SPLINE:
+        pts = d["points"]
+        groups = ['(0 . "SPLINE")', '(100 . "AcDbEntity")', layer, '(100 . "AcDbSpline")',
+                  "(70 . 8)", "(71 . 3)", "(72 . 0)", "(73 . 0)", _pair(74, str(len(pts))),
+                  "(44 . 1e-010)"]
+        groups.extend(_group_point(11, p) for p in pts)
+        return f"(atc-plan-make '({' '.join(groups)}))"
+
+    if entity.kind == TEXT:
+        h_align, v_align = TEXT_ALIGNMENT.get(d["alignment"], (0, 0))
+        groups = ['(0 . "TEXT")', layer, _group_point(10, d["point"]), _pair(40, lisp_num(d["height"])),
+                  _pair(1, lisp_str(d["text"])), _pair(50, lisp_num(d["angle"]))]
+        if (h_align, v_align) != (0, 0):
+            groups += [_pair(72, str(h_align)), _group_point(11, d["point"]), _pair(73, str(v_align))]
+        return f"(atc-plan-make '({' '.join(groups)}))"
+
+    if entity.kind == DIMENSION:
+        dim_pt = dim_line_point(d["dim_type"], d["start"], d["end"], d["offset"])
+        p1, p2, p3 = lisp_point(d["start"]), lisp_point(d["end"]), lisp_point(dim_pt)
+        if d["dim_type"] == "L":
+            cmd = f'(command "_.DIMALIGNED" \'{p1} \'{p2} \'{p3})'
+        else:
+            cmd = f'(command "_.DIMLINEAR" \'{p1} \'{p2} "_{d["dim_type"]}" \'{p3})'
+        return f'(setvar "CLAYER" {lisp_str(entity.layer)}) {cmd}'
+
+    if entity.kind == INSERT:
+        scale = lisp_num(d["scale"])
+        groups = ['(0 . "INSERT")', layer, _pair(2, lisp_str(d["name"])), _group_point(10, d["point"]),
+                  _pair(41, scale), _pair(42, scale), _pair(43, scale),
+                  _pair(50, lisp_num(d["angle"]))]
+        return f"(atc-plan-make '({' '.join(groups)}))"
+
+    raise ValueError(f"Неизвестный тип примитива: {entity.kind}")
+
+
+def compile_block(name: str, entities: List[PlanEntity]) -> str:
+    """Определение блока: BLOCK, примитивы, ENDBLK — только если блока ещё нет."""
+    forms = [f"(entmake '((0 . \"BLOCK\") {_pair(2, lisp_str(name))} (70 . 0) (10 0.0 0.0 0.0)))"]
+    forms += [compile_entity(entity).replace("(atc-plan-make ", "(entmake ", 1) for entity in entities]
+    forms.append("(entmake '((0 . \"ENDBLK\")))")
+    return f"(if (not (tblsearch \"BLOCK\" {lisp_str(name)})) (progn {' '.join(forms)}))"
+
+
+def compile_plan(plan: DrawingPlan, result_file: Optional[os.PathLike] = None) -> str:
+    """
+    Компилирует план в текст AutoLISP-файла.
+
+    result_file — куда LISP запишет JSON с количеством созданных объектов
+    (None — только в переменную atc-plan-last-result).
+    """
+    layers = []
+    block_entities = [e for entities in plan.blocks.values() for e in entities]
+    for entity in [*block_entities, *plan]:
+        if entity.layer not in layers:
+            layers.append(entity.layer)
+
+    lines = [
+        f";; AT-CAD plan: {plan.name or '-'}, {len(plan)} entities",
+        _PROLOG,
+        "(defun atc-plan-run ( / start osmode cmdecho clayer)",
+        '  (setq start (entlast) atc-plan-made 0 atc-plan-failed 0',
+        '        osmode (getvar "OSMODE") cmdecho (getvar "CMDECHO") clayer (getvar "CLAYER"))',
+        '  (setvar "OSMODE" 0)',
+        '  (setvar "CMDECHO" 0)',
+        '  (command "_.UNDO" "_BEGIN")',
+    ]
+    lines += [f"  (atc-plan-layer {lisp_str(name)})" for name in layers]
+    lines += [f"  {compile_block(name, entities)}" for name, entities in plan.blocks.items()]
+    lines += [f"  {compile_entity(entity)}" for entity in plan]
+    lines += [
+        '  (setvar "CLAYER" clayer)',
+        '  (command "_.UNDO" "_END")',
+        '  (setvar "OSMODE" osmode)',
+        '  (setvar "CMDECHO" cmdecho)',
+        "  (setq atc-plan-last-result (atc-plan-json (atc-plan-count start)))",
+    ]
+    if result_file is not None:
+        lines.append(f"  (atc-plan-write {lisp_str(Path(result_file).as_posix())} atc-plan-last-result)")
+    lines += [
+        "  atc-plan-last-result",
+        ")",
+        "",
+        "(atc-plan-run)",
+        "(princ)",
+        "",
+    ]
+    return "\n".join(lines)
+
+
+def compile_script(plan: DrawingPlan, lsp_file: os.PathLike) -> str:
+    """Текст .scr, загружающий скомпилированный план (для SCRIPT/пакетной обработки)."""
+    return f'(load {lisp_str(Path(lsp_file).as_posix())})\n'
+
+
+# ============================================================
+# ПРОВЕРКА
+# ============================================================
+
+@dataclass
+class PlanVerification:
+    """
+    Сравнение плана с тем, что создано в чертеже.
+
+    expected — ожидаемое количество по типам DXF
+    actual   — количество новых объектов, насчитанное LISP
+    failed   — сколько entmake вернули nil
+    """
+    expected: Dict[str, int] = field(default_factory=dict)
+    actual: Dict[str, int] = field(default_factory=dict)
+    failed: int = 0
+    error: Optional[str] = None
+
+    def mismatches(self) -> Dict[str, tuple]:
+        """Тип → (ожидалось, создано) для несовпадений."""
+        keys = sorted(set(self.expected) | set(self.actual))
+        return {k: (self.expected.get(k, 0), self.actual.get(k, 0))
+                for k in keys if self.expected.get(k, 0) != self.actual.get(k, 0)}
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None and self.failed == 0 and not self.mismatches()
+
+
+def expected_counts(plan: DrawingPlan) -> Dict[str, int]:
+    return {DXF_TYPES[kind]: n for kind, n in plan.counts().items()}
+
+
+def verify_plan(plan: DrawingPlan, result: Optional[dict]) -> PlanVerification:
+    """Проверяет ответ LISP ({"counts": {...}, "failed": n}) по плану."""
+    report = PlanVerification(expected=expected_counts(plan))
+    if not isinstance(result, dict) or "counts" not in result:
+        report.error = (result or {}).get("error", "нет ответа от AutoCAD") if isinstance(result, dict) \
+            else "нет ответа от AutoCAD"
+        return report
+    report.actual = {str(k): int(v) for k, v in result["counts"].items()}
+    report.failed = int(result.get("failed", 0))
+    return report
+
+
+# ============================================================
+# ВЫПОЛНЕНИЕ
+# ============================================================
+
+def write_plan(plan: DrawingPlan, lsp_file: os.PathLike = PLAN_FILE,
+               result_file: Optional[os.PathLike] = PLAN_RESULT_FILE) -> Path:
+    lsp_file = Path(lsp_file)
+    lsp_file.parent.mkdir(parents=True, exist_ok=True)
+    if result_file is not None and Path(result_file).exists():
+        Path(result_file).unlink()
+    # AutoLISP (load) читает файл в кодировке ANSI
+    lsp_file.write_text(compile_plan(plan, result_file), encoding="cp1252", errors="replace")
+    return lsp_file
+
+
+def _wait_result(result_file: Path, timeout: float) -> Optional[dict]:
+    start = time.time()
+    while time.time() - start < timeout:
+        if result_file.exists():
+            try:
+                return json.loads(result_file.read_text(encoding="utf-8", errors="replace"))
+            except ValueError:
+                pass
+        time.sleep(0.05)
+    return None
+
+
+def run_plan(plan: DrawingPlan, adoc=None, via: str = "command",
+             timeout: float = 120.0) -> PlanVerification:
+    """
+    Выполняет план в AutoCAD одним вызовом и проверяет результат.
+
+    via="command" — (load "plan.lsp") через adoc.SendCommand
+                    (adoc по умолчанию — ActiveDocument из ATCadInit);
+    via="bridge"  — команда load_file LISP-моста, ответ приходит сразу.
+    """
+    lsp_file = write_plan(plan)
+
+    if via == "bridge":
+        from programs.lisp_bridge import send_lisp_command
+        result = send_lisp_command("load_file", {"file": lsp_file.as_posix()}, timeout=timeout)
+        return verify_plan(plan, result)
+
+    if adoc is None:
+        from config.at_cad_init import ATCadInit
+        adoc = ATCadInit().document
+    adoc.SendCommand(f'(load {lisp_str(lsp_file.as_posix())})\n')
+    return verify_plan(plan, _wait_result(PLAN_RESULT_FILE, timeout))
+
+
+# ============================================================
+# Прямой тест: вывод скомпилированного плана
+# ============================================================
+if __name__ == "__main__":
+    demo = DrawingPlan("demo")
+    demo.line((0, 0), (100, 0), layer="AM_7")
+    demo.circle((50, 50), 25, layer="AM_0")
+    demo.polyline([(0, 0), (100, 0), (100, 50), (0, 50)], layer="0", bulges=[0, 0.5, 0, 0])
+    demo.text((0, -20), 'K1234 "Test"', layer="schrift", height=30)
+    demo.dimension("H", (0, 0), (100, 0))
+    hole = DrawingPlan()
+    hole.circle((0, 0), 9, layer="AM_0")
+    demo.define_block("demo_hole", hole)
+    demo.insert("demo_hole", (80, 40), layer="AM_0")
+    print(compile_plan(demo, result_file="C:/temp/plan_result.json"))
+    print(expected_counts(demo))
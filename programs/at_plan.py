@@ -0,0 +1,304 @@
+"""
+Файл: at_plan.py
+Путь: programs/at_plan.py
+
+Описание:
+План построения (DrawingPlan) — упорядоченный список примитивов,
+которые нужно создать в чертеже, без обращения к AutoCAD.
+
+Зачем нужен:
+    Построители сначала рассчитывают геометрию и складывают её в план,
+    а создание объектов выполняется одним проходом (см. at_bulk_emit.py):
+    один undo-блок, одна смена слоя на группу, один regen в конце.
+
+Модуль намеренно не импортирует win32com/pythoncom/wx, чтобы план можно
+было строить и проверять в фоновых потоках и без Windows.
+
+Блоки:
+    Повторяющуюся геометрию (например, отверстия фланца) можно описать
+    один раз через define_block() и вставлять insert()-ом: приёмник
+    создаёт определение блока, а в чертёж попадают только вставки.
+
+Формат точек:
+    - точка: (x, y, z) — кортеж float
+    - вершина полилинии: (x, y, bulge)
+    Вход принимает list/tuple или VARIANT (по атрибуту .value).
+"""
+
+from __future__ import annotations
+
+import math
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+# Значения совпадают с config.at_config (DEFAULT_TEXT_LAYER, DEFAULT_DIM_LAYER,
+# DEFAULT_DIM_OFFSET); at_config здесь не импортируется, так как тянет wx.
+TEXT_LAYER = "schrift"
+DIM_LAYER = "AM_5"
+DIM_OFFSET = 60.0
+
+Point3 = Tuple[float, float, float]
+
+# Типы примитивов плана
+LINE = "line"
+CIRCLE = "circle"
+POLYLINE = "polyline"
+SPLINE = "spline"
+TEXT = "text"
+DIMENSION = "dimension"
+INSERT = "insert"
+
+ENTITY_KINDS = (LINE, CIRCLE, POLYLINE, SPLINE, TEXT, DIMENSION, INSERT)
+
+# Что допускается внутри определения блока
+BLOCK_ENTITY_KINDS = (LINE, CIRCLE, POLYLINE, SPLINE, TEXT)
+
+
+def _coords(point: Any) -> List[float]:
+    """Координаты точки из list/tuple или VARIANT."""
+    coords = getattr(point, "value", point)
+    if not isinstance(coords, (list, tuple)) or len(coords) < 2:
+        raise ValueError(f"Некорректная точка: {point!r}")
+    return [float(c) for c in coords]
+
+
+def to_point3(point: Any) -> Point3:
+    """Приводит точку к (x, y, z); z = 0.0, если отсутствует."""
+    c = _coords(point)
+    return c[0], c[1], c[2] if len(c) > 2 else 0.0
+
+
+def to_vertices(points: Sequence[Any], bulges: Optional[Sequence[float]] = None) -> List[Point3]:
+    """
+    Приводит вершины полилинии к [(x, y, bulge), ...].
+
+    bulge берётся из явного списка bulges (приоритет) или из третьей
+    координаты вершины — так же, как в at_construction._add_polyline.
+    """
+    result = []
+    for i, p in enumerate(points):
+        c = _coords(p)
+        b = c[2] if len(c) > 2 else 0.0
+        if bulges is not None:
+            b = float(bulges[i]) if i < len(bulges) else 0.0
+        result.append((c[0], c[1], b))
+    return result
+
+
+def dim_line_point(dim_type: str, point1: Any, point2: Any, offset: float) -> Point3:
+    """
+    Точка размерной линии линейного размера, смещённая на offset.
+
+    Для H — по нормали от точки с большей y, для V — влево от минимальной x,
+    если point1 нижняя, или вправо от максимальной x, если point1 верхняя,
+    для L — по нормали от середины отрезка.
+    Используется at_dimension.add_dimension и компилятором at_lisp_plan.
+    """
+    p1 = to_point3(point1)
+    p2 = to_point3(point2)
+
+    # Средняя y-координата
+    mid_y = (p1[1] + p2[1]) / 2.0
+
+    # Вектор p1->p2 (XY)
+    vx, vy = p2[0] - p1[0], p2[1] - p1[1]
+
+    # Инициализация результирующей точки
+    result = [0.0, mid_y, 0.0]
+
+    # Определяем нормаль и смещение
+    # nx, ny = 0.0, 0.0
+    if dim_type == "H":
+        # Для горизонтального размера: ближайшая точка с большей y
+        base_point = p2 if p2[1] > p1[1] else p1
+        # Нормаль перпендикулярна линии p1->p2
+        nx, ny = -vy, vx
+        nlen = math.hypot(nx, ny)
+        if nlen > 0:
+            nx /= nlen
+            ny /= nlen
+            # Смещение от base_point
+            result[0] = base_point[0] + nx * offset
+            result[1] = base_point[1] + ny * offset
+    elif dim_type == "V":
+        # Для вертикального размера: направление зависит от y point1
+        if p1[1] < p2[1]:  # point1 нижняя
+            # Выбираем точку с минимальной x
+            base_point = p1 if p1[0] <= p2[0] else p2
+            result[0] = base_point[0] - offset  # Влево
+        else:  # point1 верхняя или y равны
+            # Выбираем точку с максимальной x
+            base_point = p1 if p1[0] >= p2[0] else p2
+            result[0] = base_point[0] + offset  # Вправо
+        result[1] = mid_y  # Средняя y
+    elif dim_type == "L":
+        # Для линейного размера: смещение от середины
+        result[0] = (p1[0] + p2[0]) / 2.0
+        nx, ny = -vy, vx
+        nlen = math.hypot(nx, ny)
+        if nlen > 0:
+            nx /= nlen
+            ny /= nlen
+            result[0] += nx * offset
+            result[1] += ny * offset
+
+    return result[0], result[1], result[2]
+
+
+@dataclass
+class PlanEntity:
+    """
+    Один примитив плана.
+
+    kind  — тип (line, circle, polyline, spline, text, dimension, insert)
+    layer — слой, на котором должен оказаться объект
+    data  — геометрия и параметры, зависящие от типа
+    """
+    kind: str
+    layer: str
+    data: Dict[str, Any] = field(default_factory=dict)
+
+
+class DrawingPlan:
+    """
+    Упорядоченный набор примитивов для пакетного создания.
+
+    Пример:
+        plan = DrawingPlan("head")
+        plan.polyline(points, layer="AM_0", bulges=bulges)
+        plan.text((0, 0), "K1234-1", layer="schrift", height=30)
+        with BulkEmitSession(backend) as session:
+            session.queue(plan)
+    """
+
+    def __init__(self, name: str = ""):
+        self.name = name
+        self.entities: List[PlanEntity] = []
+        # Имя блока → примитивы определения (точка вставки — начало координат)
+        self.blocks: Dict[str, List[PlanEntity]] = {}
+
+    # ---------------- построители ----------------
+
+    def add(self, entity: PlanEntity) -> PlanEntity:
+        if entity.kind not in ENTITY_KINDS:
+            raise ValueError(f"Неизвестный тип примитива: {entity.kind}")
+        self.entities.append(entity)
+        return entity
+
+    def line(self, point1: Any, point2: Any, layer: str = "0") -> PlanEntity:
+        return self.add(PlanEntity(LINE, layer, {
+            "start": to_point3(point1),
+            "end": to_point3(point2),
+        }))
+
+    def circle(self, center: Any, radius: float, layer: str = "0") -> PlanEntity:
+        if radius <= 0:
+            raise ValueError(f"Радиус должен быть положительным: {radius}")
+        return self.add(PlanEntity(CIRCLE, layer, {
+            "center": to_point3(center),
+            "radius": float(radius),
+        }))
+
+    def polyline(self, points: Sequence[Any], layer: str = "0", closed: bool = True,
+                 bulges: Optional[Sequence[float]] = None) -> PlanEntity:
+        vertices = to_vertices(points, bulges)
+        if len(vertices) < 2:
+            raise ValueError("Polyline requires at least 2 points")
+        return self.add(PlanEntity(POLYLINE, layer, {
+            "vertices": vertices,
+            "closed": bool(closed),
+        }))
+
+    def spline(self, points: Sequence[Any], layer: str = "0", closed: bool = False) -> PlanEntity:
+        pts = [to_point3(p) for p in points]
+        if len(pts) < 2:
+            raise ValueError("Для сплайна требуется минимум 2 точки")
+        if closed and pts[0] != pts[-1]:
+            pts.append(pts[0])
+        return self.add(PlanEntity(SPLINE, layer, {"points": pts}))
+
+    def text(self, point: Any, text: str, layer: str = TEXT_LAYER, height: float = 30,
+             angle: float = 0.0, alignment: int = 4) -> PlanEntity:
+        return self.add(PlanEntity(TEXT, layer, {
+            "point": to_point3(point),
+            "text": str(text),
+            "height": float(height),
+            "angle": float(angle),
+            "alignment": int(alignment),
+        }))
+
+    def dimension(self, dim_type: str, start: Any, end: Any,
+                  offset: float = DIM_OFFSET, layer: str = DIM_LAYER) -> PlanEntity:
+        dim_type = dim_type.upper()[:1]
+        if dim_type not in ("H", "V", "L"):
+            raise ValueError(f"В план допускаются только линейные размеры H/V/L: {dim_type}")
+        return self.add(PlanEntity(DIMENSION, layer, {
+            "dim_type": dim_type,
+            "start": to_point3(start),
+            "end": to_point3(end),
+            "offset": float(offset),
+        }))
+
+    def define_block(self, name: str, block: "DrawingPlan") -> str:
+        """
+        Определение блока из примитивов плана block (без размеров и вставок).
+        Повторное определение с тем же именем должно совпадать с первым.
+        """
+        name = str(name).strip()
+        if not name:
+            raise ValueError("Пустое имя блока")
+        bad = sorted({e.kind for e in block.entities if e.kind not in BLOCK_ENTITY_KINDS})
+        if bad:
+            raise ValueError(f"В блок {name} не допускаются примитивы: {', '.join(bad)}")
+        existing = self.blocks.get(name)
+        if existing is not None and existing != block.entities:
+            raise ValueError(f"Блок {name} уже определён с другой геометрией")
+        self.blocks[name] = list(block.entities)
+        return name
+
+    def insert(self, name: str, point: Any, layer: str = "0", scale: float = 1.0,
+               angle: float = 0.0) -> PlanEntity:
+        """Вставка блока name; angle — в радианах, как у InsertBlock."""
+        if name not in self.blocks:
+            raise ValueError(f"Блок не определён: {name}")
+        return self.add(PlanEntity(INSERT, layer, {
+            "name": name,
+            "point": to_point3(point),
+            "scale": float(scale),
+            "angle": float(angle),
+        }))
+
+    def extend(self, other: "DrawingPlan") -> "DrawingPlan":
+        for name, entities in other.blocks.items():
+            existing = self.blocks.get(name)
+            if existing is not None and existing != entities:
+                raise ValueError(f"Блок {name} уже определён с другой геометрией")
+            self.blocks[name] = entities
+        self.entities.extend(other.entities)
+        return self
+
+    # ---------------- анализ ----------------
+
+    def layer_groups(self) -> List[Tuple[str, List[PlanEntity]]]:
+        """
+        Группирует примитивы по слою.
+        Порядок групп — по первому появлению слоя, внутри группы — исходный.
+        """
+        groups: Dict[str, List[PlanEntity]] = {}
+        for entity in self.entities:
+            groups.setdefault(entity.layer, []).append(entity)
+        return list(groups.items())
+
+    def counts(self) -> Dict[str, int]:
+        """Количество примитивов по типам."""
+        return dict(Counter(e.kind for e in self.entities))
+
+    def __len__(self) -> int:
+        return len(self.entities)
+
+    def __iter__(self) -> Iterator[PlanEntity]:
+        return iter(self.entities)
+
+    def __bool__(self) -> bool:
+        return bool(self.entities)
@@ -1,14 +1,40 @@
 # ================================================================
 # Файл: programs/lisp_bridge.py
-# Назначение: Мост между Python и AutoCAD LISP через JSON-файлы.
+# Назначение: Мост между Python и AutoCAD LISP.
 # Работает с единым Lisp-файлом ATC_LISP_BRIDGE.lsp
+#
+# Транспорты (подключаемые):
+#   - SocketTransport — постоянная сессия через TCP на localhost.
+#     Сообщения — JSON-строки, завершённые "\n". Каждый запрос несёт
+#     "id", ответ возвращает тот же "id" — это позволяет отправлять
+#     несколько запросов подряд (pipelining), не дожидаясь ответов.
+#   - FileTransport   — исходный путь через request.json/response.json
+#     с опросом каждые 150 мс. Транспорт по умолчанию: в
+#     ATC_LISP_BRIDGE.lsp слушателя сокета нет.
+#
+# Выбор транспорта:
+#   По умолчанию get_transport() возвращает FileTransport без попыток
+#   подключения. Сокет включается явно: ATC_BRIDGE_SOCKET=1 (слушатель
+#   на стороне AutoCAD или тестовый собеседник). Тогда get_transport()
+#   пробует BRIDGE_HOST:BRIDGE_PORT, при неудаче — FileTransport, а
+#   следующая попытка подключения — не раньше SOCKET_RETRY_AFTER сек.
+#   set_transport() позволяет явно задать транспорт (например,
+#   сокет тестового собеседника из programs/lisp_bridge_peer.py).
+#
+# Пакеты:
+#   LispBatch собирает несколько команд в один запрос "batch" —
+#   серия выборов стоит одного обращения к AutoCAD.
 # ================================================================
 
+import itertools
 import json
 import os
+import socket
+import threading
 import time
 import logging
-import win32com.client
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
 
 # ================================================================
 # Пути к файлам обмена
@@ -17,6 +43,16 @@ BRIDGE_DIR = os.path.join(os.path.dirname(__file__), "..", "lisp_bridge")
 REQ_FILE = os.path.join(BRIDGE_DIR, "request.json")
 RES_FILE = os.path.join(BRIDGE_DIR, "response.json")
 
+# ================================================================
+# Параметры сокет-канала
+# ================================================================
+BRIDGE_HOST = "127.0.0.1"
+BRIDGE_PORT = int(os.environ.get("ATC_BRIDGE_PORT", "47651"))
+SOCKET_ENABLED = os.environ.get("ATC_BRIDGE_SOCKET", "") == "1"
+CONNECT_TIMEOUT = 0.3   # сек — быстрый отказ, если слушателя нет
+SOCKET_RETRY_AFTER = 5.0  # сек — пауза между попытками подключения
+POLL_INTERVAL = 0.15    # сек — период опроса response.json
+
 # ================================================================
 # Служебные функции
 # ================================================================
@@ -49,36 +85,494 @@ def read_response(timeout: float = 8.0):
                 return data
             except Exception as e:
                 logging.warning(f"[Bridge] Ошибка чтения response.json: {e}")
-        time.sleep(0.15)
+        time.sleep(POLL_INTERVAL)
     return None
 
-# ================================================================
-# Основная функция вызова
-# ================================================================
-def send_lisp_command(command: str, params: dict = None, timeout: float = 8.0):
+def _send_autocad_command(text: str) -> bool:
     """
-    Передаёт команду в AutoCAD через JSON и вызывает (ATC_PROCESS_REQUEST)
-    из единого модуля ATC_LISP_BRIDGE.lsp.
+    Отправляет строку в командную строку активного документа AutoCAD.
+    win32com импортируется лениво, чтобы сокет-транспорт и тестовый
+    собеседник работали и без pywin32.
     """
-    ensure_bridge_dir()
-    payload = {"command": command, "params": params or {}}
-    write_request(payload)
-
+    try:
+        import win32com.client
+    except ImportError:
+        logging.error("[Bridge] pywin32 не установлен — вызов AutoCAD невозможен.")
+        return False
     try:
         acad = win32com.client.GetActiveObject("AutoCAD.Application")
         doc = acad.ActiveDocument
-        # ★ Вызов теперь единый — (ATC_PROCESS_REQUEST)
-        doc.SendCommand("(ATC_PROCESS_REQUEST)\n")
+        doc.SendCommand(text)
+        return True
     except Exception as e:
         logging.warning(f"[Bridge] Не удалось вызвать AutoCAD.SendCommand: {e}")
         print(f"[Bridge] Ошибка при обращении к AutoCAD: {e}")
         print("→ Проверьте, что ATC_LISP_BRIDGE.lsp загружен в AutoCAD.")
+        return False
+
+# ================================================================
+# Транспорты
+# ================================================================
+class BridgeTransport:
+    """
+    Базовый класс транспорта LISP-моста.
+
+    Контракт:
+        submit(command, params) -> request_id   — отправить запрос
+        wait(request_id, timeout) -> dict|None  — дождаться ответа
+        send(command, params, timeout)          — submit + wait
+        close()                                 — освободить ресурсы
+
+    Ответ — словарь, который вернул LISP (или None при тайм-ауте).
+    """
+
+    name = "base"
+    supports_pipelining = False
+
+    def __init__(self):
+        self._ids = itertools.count(1)
+
+    def next_id(self) -> int:
+        return next(self._ids)
+
+    def is_alive(self) -> bool:
+        return True
+
+    def submit(self, command: str, params: dict = None) -> int:
+        raise NotImplementedError
+
+    def wait(self, request_id: int, timeout: float = 8.0) -> Optional[dict]:
+        raise NotImplementedError
+
+    def send(self, command: str, params: dict = None, timeout: float = 8.0) -> Optional[dict]:
+        return self.wait(self.submit(command, params), timeout=timeout)
+
+    def close(self) -> None:
+        pass
+
+
+class FileTransport(BridgeTransport):
+    """
+    Обмен через request.json / response.json (исходная схема).
+
+    Канал однослотовый: submit() сразу выполняет полный цикл
+    «запись → (ATC_PROCESS_REQUEST) → опрос», а wait() лишь отдаёт
+    сохранённый результат. Поэтому pipelining здесь не поддерживается,
+    но интерфейс совпадает с SocketTransport.
+    """
+
+    name = "file"
+
+    def __init__(self, trigger: bool = True, timeout: float = 8.0):
+        """
+        Args:
+            trigger: вызывать ли (ATC_PROCESS_REQUEST) через SendCommand.
+                     False — запрос обработает внешний собеседник,
+                     который сам следит за request.json.
+            timeout: тайм-аут ожидания response.json для submit().
+        """
+        super().__init__()
+        self.trigger = trigger
+        self.timeout = timeout
+        self._results: Dict[int, Optional[dict]] = {}
+        self._lock = threading.Lock()
+
+    def submit(self, command: str, params: dict = None) -> int:
+        return self._roundtrip(command, params, self.timeout)
+
+    def send(self, command: str, params: dict = None, timeout: float = 8.0) -> Optional[dict]:
+        return self.wait(self._roundtrip(command, params, timeout))
+
+    def _roundtrip(self, command: str, params: Optional[dict], timeout: float) -> int:
+        request_id = self.next_id()
+        payload = {"id": request_id, "command": command, "params": params or {}}
+        with self._lock:
+            write_request(payload)
+            if self.trigger:
+                # ★ Вызов теперь единый — (ATC_PROCESS_REQUEST)
+                _send_autocad_command("(ATC_PROCESS_REQUEST)\n")
+            self._results[request_id] = read_response(timeout=timeout)
+        return request_id
+
+    def wait(self, request_id: int, timeout: float = 8.0) -> Optional[dict]:
+        return self._results.pop(request_id, None)
+
+
+class _PendingReply:
+    """Ожидающий ответ на один запрос сокет-канала."""
+
+    __slots__ = ("event", "result")
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.result: Optional[dict] = None
+
+
+class SocketTransport(BridgeTransport):
+    """
+    Постоянная TCP-сессия с AutoCAD-стороной моста.
+
+    Протокол (одна строка = одно сообщение, UTF-8):
+        → {"id": 7, "command": "get_point", "params": {...}}
+        ← {"id": 7, "x": 0.0, "y": 0.0, "z": 0.0}
+
+    Фоновый поток читает ответы и раскладывает их по id, поэтому
+    можно отправить несколько запросов подряд и ждать их в любом порядке.
+    При обрыве соединения все ожидающие запросы получают None.
+    """
+
+    name = "socket"
+    supports_pipelining = True
+
+    def __init__(self, host: str = BRIDGE_HOST, port: int = BRIDGE_PORT,
+                 connect_timeout: float = CONNECT_TIMEOUT):
+        super().__init__()
+        self.host = host
+        self.port = port
+        self.connect_timeout = connect_timeout
+        self._sock: Optional[socket.socket] = None
+        self._send_lock = threading.Lock()
+        self._pending: Dict[int, _PendingReply] = {}
+        self._pending_lock = threading.Lock()
+        self._reader: Optional[threading.Thread] = None
+
+    # ---------------- соединение ----------------
+
+    def connect(self) -> bool:
+        """Открывает сессию. Возвращает False, если слушатель недоступен."""
+        if self.is_alive():
+            return True
+        try:
+            sock = socket.create_connection((self.host, self.port), timeout=self.connect_timeout)
+        except OSError as e:
+            logging.debug(f"[Bridge] Сокет {self.host}:{self.port} недоступен: {e}")
+            return False
+        sock.settimeout(None)
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self._sock = sock
+        self._reader = threading.Thread(target=self._read_loop, args=(sock,), daemon=True)
+        self._reader.start()
+        return True
+
+    def is_alive(self) -> bool:
+        return self._sock is not None
+
+    def close(self) -> None:
+        sock, self._sock = self._sock, None
+        if sock is not None:
+            try:
+                sock.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+            sock.close()
+        self._fail_pending()
+
+    # ---------------- обмен ----------------
+
+    def submit(self, command: str, params: dict = None) -> int:
+        if not self.is_alive() and not self.connect():
+            raise ConnectionError(f"LISP-мост: нет соединения с {self.host}:{self.port}")
+
+        request_id = self.next_id()
+        pending = _PendingReply()
+        with self._pending_lock:
+            self._pending[request_id] = pending
+
+        line = json.dumps({"id": request_id, "command": command, "params": params or {}},
+                          ensure_ascii=False) + "\n"
+        try:
+            with self._send_lock:
+                self._sock.sendall(line.encode("utf-8"))
+        except (OSError, AttributeError) as e:
+            logging.warning(f"[Bridge] Ошибка отправки в сокет: {e}")
+            self.close()
+        return request_id
+
+    def wait(self, request_id: int, timeout: float = 8.0) -> Optional[dict]:
+        with self._pending_lock:
+            pending = self._pending.get(request_id)
+        if pending is None:
+            return None
+        pending.event.wait(timeout)
+        with self._pending_lock:
+            self._pending.pop(request_id, None)
+        return pending.result
+
+    # ---------------- фоновое чтение ----------------
+
+    def _read_loop(self, sock: socket.socket) -> None:
+        try:
+            with sock.makefile("r", encoding="utf-8") as stream:
+                for line in stream:
+                    line = line.strip()
+                    if not line:
+                        continue
+                    try:
+                        data = json.loads(line)
+                    except ValueError as e:
+                        logging.warning(f"[Bridge] Некорректный ответ из сокета: {e}")
+                        continue
+                    request_id = data.pop("id", None) if isinstance(data, dict) else None
+                    with self._pending_lock:
+                        pending = self._pending.get(request_id)
+                    if pending is None:
+                        logging.debug(f"[Bridge] Ответ без ожидающего запроса: id={request_id}")
+                        continue
+                    pending.result = data
+                    pending.event.set()
+        except (OSError, ValueError):
+            pass
+        finally:
+            if self._sock is sock:
+                self._sock = None
+            self._fail_pending()
 
-    res = read_response(timeout=timeout)
+    def _fail_pending(self) -> None:
+        with self._pending_lock:
+            pending = list(self._pending.values())
+        for item in pending:
+            item.event.set()
+
+
+# ================================================================
+# Выбор транспорта
+# ================================================================
+_transport: Optional[BridgeTransport] = None
+_transport_lock = threading.Lock()
+_socket_retry_at = 0.0
+
+
+def set_transport(transport: Optional[BridgeTransport]) -> None:
+    """
+    Явно задаёт транспорт моста (None — вернуться к автовыбору).
+    Предыдущий транспорт закрывается.
+    """
+    global _transport, _socket_retry_at
+    with _transport_lock:
+        if _transport is not None and _transport is not transport:
+            _transport.close()
+        _transport = transport
+        _socket_retry_at = 0.0
+
+
+def _connect_socket() -> Optional[SocketTransport]:
+    """Сокет-сессия или None; после отказа — пауза SOCKET_RETRY_AFTER."""
+    global _socket_retry_at
+    now = time.monotonic()
+    if now < _socket_retry_at:
+        return None
+    sock = _transport if isinstance(_transport, SocketTransport) else SocketTransport(port=BRIDGE_PORT)
+    if sock.connect():
+        return sock
+    _socket_retry_at = now + SOCKET_RETRY_AFTER
+    return None
+
+
+def get_transport() -> BridgeTransport:
+    """
+    Возвращает текущий транспорт.
+
+    Явно заданный (set_transport) транспорт возвращается, пока он жив.
+    Иначе: FileTransport, а при SOCKET_ENABLED — сначала живая или
+    новая сокет-сессия.
+    """
+    global _transport
+    with _transport_lock:
+        if _transport is not None and _transport.is_alive():
+            return _transport
+        if SOCKET_ENABLED or isinstance(_transport, SocketTransport):
+            sock = _connect_socket()
+            if sock is not None:
+                _transport = sock
+                return sock
+        return FileTransport()
+
+# ================================================================
+# Основная функция вызова
+# ================================================================
+def send_lisp_command(command: str, params: dict = None, timeout: float = 8.0,
+                      transport: Optional[BridgeTransport] = None):
+    """
+    Передаёт команду в AutoCAD и возвращает ответ LISP-модуля.
+
+    По умолчанию использует get_transport(): JSON-файлы и
+    (ATC_PROCESS_REQUEST) из единого модуля ATC_LISP_BRIDGE.lsp,
+    либо сокет-сессию, если она включена (ATC_BRIDGE_SOCKET=1).
+    """
+    transport = transport or get_transport()
+    try:
+        res = transport.send(command, params, timeout=timeout)
+    except ConnectionError as e:
+        logging.warning(f"[Bridge] {e} — переход на файловый транспорт.")
+        res = FileTransport().send(command, params, timeout=timeout)
     if not res:
         logging.warning("[Bridge] Ответ от AutoCAD не получен (тайм-аут).")
     return res
 
+# ================================================================
+# Пакетные запросы (batch)
+# ================================================================
+BATCH_COMMAND = "batch"
+
+STATUS_OK = "ok"
+STATUS_CANCELLED = "cancelled"
+STATUS_ERROR = "error"
+STATUS_SKIPPED = "skipped"
+
+
+@dataclass
+class BatchItemResult:
+    """Результат одной команды внутри пакета."""
+    index: int
+    command: str
+    status: str                  # ok | cancelled | error | skipped
+    data: Optional[dict] = None  # исходный ответ LISP
+
+    @property
+    def ok(self) -> bool:
+        return self.status == STATUS_OK
+
+
+@dataclass
+class BatchResult:
+    """
+    Результат пакетного запроса.
+
+    items — результаты по порядку команд (длина всегда равна числу команд).
+    trips — сколько обращений к AutoCAD понадобилось (1 при поддержке batch).
+    """
+    items: List[BatchItemResult] = field(default_factory=list)
+    trips: int = 0
+
+    @property
+    def status(self) -> str:
+        """ok — всё выполнено, error — ничего не выполнено, partial — частично."""
+        done = sum(1 for item in self.items if item.ok)
+        if done == len(self.items):
+            return STATUS_OK
+        return STATUS_ERROR if done == 0 else "partial"
+
+    def __getitem__(self, index: int) -> BatchItemResult:
+        return self.items[index]
+
+    def __iter__(self):
+        return iter(self.items)
+
+    def __len__(self) -> int:
+        return len(self.items)
+
+
+def _item_status(data: Optional[dict]) -> str:
+    if not isinstance(data, dict):
+        return STATUS_ERROR
+    if data.get("cancelled"):
+        return STATUS_CANCELLED
+    if "error" in data:
+        return STATUS_ERROR
+    return STATUS_OK
+
+
+class LispBatch:
+    """
+    Построитель пакета команд LISP-моста.
+
+    Все команды уходят в AutoCAD одним запросом {"command": "batch"}
+    и выполняются там по очереди; ответ содержит результат каждой.
+
+    Частичный отказ:
+        stop_on_cancel=True (по умолчанию) — первая отменённая (ESC) или
+        ошибочная команда прерывает пакет, остальные получают "skipped".
+        stop_on_cancel=False — выполняются все команды независимо.
+
+    Если AutoCAD-сторона не знает команды "batch" (старый atc_bridge.lsp),
+    пакет выполняется по одной команде: при pipelining-транспорте и
+    stop_on_cancel=False — все запросы отправляются сразу.
+
+    Пример:
+        batch = LispBatch()
+        sheet = batch.get_entity("Лист:")
+        point = batch.get_point("Точка вставки:")
+        result = batch.send()
+        if result[sheet].ok: ...
+    """
+
+    def __init__(self, stop_on_cancel: bool = True):
+        self.stop_on_cancel = stop_on_cancel
+        self.commands: List[dict] = []
+
+    def add(self, command: str, params: dict = None) -> int:
+        """Добавляет команду и возвращает её индекс в результате."""
+        self.commands.append({"command": command, "params": params or {}})
+        return len(self.commands) - 1
+
+    def get_point(self, prompt: str = "") -> int:
+        return self.add("get_point", {"prompt": prompt})
+
+    def get_entity(self, prompt: str = "") -> int:
+        return self.add("get_entity", {"prompt": prompt})
+
+    def get_selection(self, prompt: str = "") -> int:
+        return self.add("get_selection", {"prompt": prompt})
+
+    def get_distance(self, prompt: str = "") -> int:
+        return self.add("get_distance", {"prompt": prompt})
+
+    def get_text(self, prompt: str = "") -> int:
+        return self.add("get_text", {"prompt": prompt})
+
+    def __len__(self) -> int:
+        return len(self.commands)
+
+    # ---------------- отправка ----------------
+
+    def send(self, timeout: Optional[float] = None,
+             transport: Optional[BridgeTransport] = None) -> BatchResult:
+        """
+        Отправляет пакет. timeout по умолчанию — 8 с на каждую команду.
+        """
+        if not self.commands:
+            return BatchResult()
+        timeout = timeout if timeout is not None else 8.0 * len(self.commands)
+        transport = transport or get_transport()
+
+        reply = send_lisp_command(
+            BATCH_COMMAND,
+            {"commands": self.commands, "stop_on_cancel": self.stop_on_cancel},
+            timeout=timeout,
+            transport=transport,
+        )
+        if isinstance(reply, dict) and isinstance(reply.get("results"), list):
+            return self._collect(reply["results"], trips=1)
+        if isinstance(reply, dict) and "error" in reply:
+            logging.info("[Bridge] batch не поддерживается AutoCAD-стороной — по одной команде.")
+            return self._send_each(transport, timeout)
+        return self._collect([], trips=1, missing=STATUS_ERROR)
+
+    def _send_each(self, transport: BridgeTransport, timeout: float) -> BatchResult:
+        per_command = timeout / len(self.commands)
+        if transport.supports_pipelining and not self.stop_on_cancel:
+            ids = [transport.submit(c["command"], c["params"]) for c in self.commands]
+            return self._collect([transport.wait(i, per_command) for i in ids], trips=1)
+
+        raw: List[Optional[dict]] = []
+        for c in self.commands:
+            data = send_lisp_command(c["command"], c["params"], timeout=per_command, transport=transport)
+            raw.append(data)
+            if self.stop_on_cancel and _item_status(data) != STATUS_OK:
+                break
+        return self._collect(raw, trips=len(raw))
+
+    def _collect(self, raw: List[Optional[dict]], trips: int,
+                 missing: str = STATUS_SKIPPED) -> BatchResult:
+        items = []
+        for index, c in enumerate(self.commands):
+            if index < len(raw):
+                data = raw[index]
+                items.append(BatchItemResult(index, c["command"], _item_status(data), data))
+            else:
+                items.append(BatchItemResult(index, c["command"], missing))
+        return BatchResult(items=items, trips=trips)
+
 # ================================================================
 # Дополнительные функции
 # ================================================================
@@ -94,10 +588,8 @@ def ensure_lisp_loaded():
             logging.info("[Bridge] LISP-модуль активен.")
             return True
         # если нет, попробуем вручную вызвать загрузку
-        acad = win32com.client.GetActiveObject("AutoCAD.Application")
-        doc = acad.ActiveDocument
         # ★ Загрузка выполняется единым Lisp-файлом, без разных функций
-        doc.SendCommand('(ATC_LOAD_LISP_BRIDGE)\n')
+        _send_autocad_command('(ATC_LOAD_LISP_BRIDGE)\n')
         res = read_response(timeout=3.0)
         return bool(res)
     except Exception as e:
@@ -120,6 +612,7 @@ def ping():
 if __name__ == "__main__":
     logging.basicConfig(level=logging.DEBUG)
     print("=== Тест LISP-моста ===")
+    print("→ Транспорт:", get_transport().name)
     print("→ Проверка ping:", ping())
     print("→ Проверка загрузки LISP:", ensure_lisp_loaded())
     print("→ Попытка вызвать get_point...")
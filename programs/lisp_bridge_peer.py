@@ -0,0 +1,261 @@
+# ================================================================
+# Файл: programs/lisp_bridge_peer.py
+# Назначение: Python-заменитель AutoCAD-стороны LISP-моста.
+#
+# Эмулирует команды atc_bridge.lsp (get_point, get_entity,
+# get_selection, get_distance, get_text, set_layer, ping, load_lisp,
+# batch) и отвечает
+# в том же JSON-формате. Пользовательский ввод берётся из заранее
+# заданных очередей; пустая очередь = отмена ({"cancelled": true}).
+#
+# Режимы:
+#   - serve_socket() — слушает BRIDGE_HOST:порт, протокол SocketTransport
+#   - serve_files()  — следит за request.json и пишет response.json,
+#                      как это делает (ATC_PROCESS_REQUEST)
+#
+# Используется для проверки транспорта без AutoCAD и Windows.
+# ================================================================
+
+import collections
+import json
+import os
+import socket
+import threading
+import time
+import logging
+from typing import Any, Deque, Dict, Iterable, Optional, Tuple
+
+from programs import lisp_bridge
+from programs.lisp_bridge import BRIDGE_HOST
+
+
+class LispBridgePeer:
+    """
+    Заменитель atc_bridge.lsp.
+
+    Args:
+        points:   очередь точек (x, y, z) для get_point/get_distance
+        entities: очередь словарей {"handle", "layer", "type"} для get_entity
+        selections: очередь списков таких словарей для get_selection
+        texts:    очередь строк для get_text/set_layer
+        latency:  искусственная задержка обработки одного запроса, сек
+        batch:    понимает ли собеседник команду "batch"
+                  (False — поведение старого atc_bridge.lsp)
+    """
+
+    def __init__(self,
+                 points: Iterable[Tuple[float, float, float]] = (),
+                 entities: Iterable[dict] = (),
+                 selections: Iterable[Iterable[dict]] = (),
+                 texts: Iterable[str] = (),
+                 latency: float = 0.0,
+                 batch: bool = True):
+        self.points: Deque[Tuple[float, float, float]] = collections.deque(points)
+        self.entities: Deque[dict] = collections.deque(entities)
+        self.selections: Deque[list] = collections.deque(list(s) for s in selections)
+        self.texts: Deque[str] = collections.deque(texts)
+        self.latency = latency
+        self.batch = batch
+        self.requests_handled = 0
+        self.layers = {"0"}
+
+        self._server: Optional[socket.socket] = None
+        self._threads = []
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+
+    # ---------------- команды atc_bridge.lsp ----------------
+
+    def handle(self, request: Dict[str, Any]) -> Dict[str, Any]:
+        """Обрабатывает один запрос и возвращает ответ (без "id")."""
+        if self.latency:
+            time.sleep(self.latency)
+        with self._lock:
+            self.requests_handled += 1
+            return self._dispatch(request.get("command", ""), request.get("params") or {})
+
+    def _dispatch(self, command: str, params: dict) -> Dict[str, Any]:
+        handler = getattr(self, f"_cmd_{command}", None)
+        if handler is None or (command == "batch" and not self.batch):
+            return {"error": "unbekannter Befehl"}
+        return handler(params)
+
+    @staticmethod
+    def _cancelled() -> Dict[str, Any]:
+        return {"cancelled": True}
+
+    def _cmd_get_point(self, params: dict) -> Dict[str, Any]:
+        if not self.points:
+            return self._cancelled()
+        x, y, z = self.points.popleft()
+        return {"x": float(x), "y": float(y), "z": float(z)}
+
+    def _cmd_get_entity(self, params: dict) -> Dict[str, Any]:
+        if not self.entities:
+            return self._cancelled()
+        return {"entity": dict(self.entities.popleft())}
+
+    def _cmd_get_selection(self, params: dict) -> Dict[str, Any]:
+        if not self.selections:
+            return self._cancelled()
+        return {"entities": [dict(e) for e in self.selections.popleft()]}
+
+    def _cmd_get_distance(self, params: dict) -> Dict[str, Any]:
+        if len(self.points) < 2:
+            self.points.clear()
+            return self._cancelled()
+        p1 = self.points.popleft()
+        p2 = self.points.popleft()
+        dist = sum((a - b) ** 2 for a, b in zip(p1, p2)) ** 0.5
+        return {"distance": dist, "points": [*map(float, p1), *map(float, p2)]}
+
+    def _cmd_get_text(self, params: dict) -> Dict[str, Any]:
+        if not self.texts:
+            return self._cancelled()
+        text = self.texts.popleft()
+        return {"text": text} if text else self._cancelled()
+
+    def _cmd_set_layer(self, params: dict) -> Dict[str, Any]:
+        if not self.texts:
+            return self._cancelled()
+        name = self.texts.popleft()
+        if not name:
+            return self._cancelled()
+        self.layers.add(name)
+        return {"status": "ok", "layer": name}
+
+    def _cmd_ping(self, params: dict) -> Dict[str, Any]:
+        return {"status": "ok", "message": "pong"}
+
+    def _cmd_load_lisp(self, params: dict) -> Dict[str, Any]:
+        return {"status": "ok", "message": "LISP-Modul aktiv"}
+
+    def _cmd_batch(self, params: dict) -> Dict[str, Any]:
+        stop = params.get("stop_on_cancel", True)
+        results = []
+        for item in params.get("commands") or []:
+            command = item.get("command", "")
+            if command == "batch":
+                res = {"error": "unbekannter Befehl"}
+            else:
+                res = self._dispatch(command, item.get("params") or {})
+            results.append(res)
+            if stop and ("cancelled" in res or "error" in res):
+                break
+        return {"status": "ok", "results": results}
+
+    # ---------------- сокет-режим ----------------
+
+    def serve_socket(self, host: str = BRIDGE_HOST, port: int = 0) -> int:
+        """
+        Запускает слушатель в фоне. port=0 — свободный порт.
+        Возвращает фактический номер порта.
+        """
+        server = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        server.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        server.bind((host, port))
+        server.listen()
+        server.settimeout(0.2)
+        self._server = server
+        self._start(self._accept_loop, server)
+        return server.getsockname()[1]
+
+    def _accept_loop(self, server: socket.socket) -> None:
+        while not self._stop.is_set():
+            try:
+                conn, _ = server.accept()
+            except socket.timeout:
+                continue
+            except OSError:
+                break
+            self._start(self._serve_connection, conn)
+
+    def _serve_connection(self, conn: socket.socket) -> None:
+        with conn, conn.makefile("r", encoding="utf-8") as stream:
+            for line in stream:
+                if self._stop.is_set():
+                    break
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    request = json.loads(line)
+                except ValueError:
+                    logging.warning("[BridgePeer] Некорректный запрос пропущен")
+                    continue
+                reply = self.handle(request)
+                reply["id"] = request.get("id")
+                try:
+                    conn.sendall((json.dumps(reply, ensure_ascii=False) + "\n").encode("utf-8"))
+                except OSError:
+                    break
+
+    # ---------------- файловый режим ----------------
+
+    def serve_files(self, interval: float = 0.02) -> None:
+        """Запускает фоновое слежение за request.json (как ATC_PROCESS_REQUEST)."""
+        self._start(self._file_loop, interval)
+
+    def _file_loop(self, interval: float) -> None:
+        while not self._stop.is_set():
+            if os.path.exists(lisp_bridge.REQ_FILE):
+                try:
+                    with open(lisp_bridge.REQ_FILE, "r", encoding="utf-8") as f:
+                        request = json.load(f)
+                    os.remove(lisp_bridge.REQ_FILE)
+                except (OSError, ValueError):
+                    time.sleep(interval)
+                    continue
+                reply = self.handle(request)
+                tmp = lisp_bridge.RES_FILE + ".tmp"
+                with open(tmp, "w", encoding="utf-8") as f:
+                    json.dump(reply, f, ensure_ascii=False)
+                os.replace(tmp, lisp_bridge.RES_FILE)
+            time.sleep(interval)
+
+    # ---------------- жизненный цикл ----------------
+
+    def _start(self, target, *args) -> None:
+        thread = threading.Thread(target=target, args=args, daemon=True)
+        self._threads.append(thread)
+        thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._server is not None:
+            self._server.close()
+            self._server = None
+        for thread in self._threads:
+            thread.join(timeout=1.0)
+        self._threads.clear()
+
+    def __enter__(self) -> "LispBridgePeer":
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        self.stop()
+
+
+# ================================================================
+# Прямой тест: сравнение транспортов
+# ================================================================
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    n = 20
+    with LispBridgePeer(points=[(i, i, 0) for i in range(n * 2)]) as peer:
+        port = peer.serve_socket()
+        transport = lisp_bridge.SocketTransport(port=port)
+
+        t0 = time.perf_counter()
+        ids = [transport.submit("get_point") for _ in range(n)]
+        replies = [transport.wait(i) for i in ids]
+        t_sock = time.perf_counter() - t0
+        print(f"socket: {n} запросов (pipelining) за {t_sock * 1000:.1f} мс → {replies[-1]}")
+        transport.close()
+
+        peer.serve_files()
+        files = lisp_bridge.FileTransport(trigger=False)
+        t0 = time.perf_counter()
+        replies = [files.send("get_point") for _ in range(n)]
+        t_file = time.perf_counter() - t0
+        print(f"file:   {n} запросов за {t_file * 1000:.1f} мс → {replies[-1]}")
@@ -0,0 +1,60 @@
+;; AT-CAD plan: blocks, 2 entities
+(defun atc-plan-layer (name)
+  (if (not (tblsearch "LAYER" name))
+    (entmake (list '(0 . "LAYER") '(100 . "AcDbSymbolTableRecord")
+                   '(100 . "AcDbLayerTableRecord") (cons 2 name) '(70 . 0))))
+)
+
+(defun atc-plan-make (data)
+  (if (entmake data)
+    (setq atc-plan-made (1+ atc-plan-made))
+    (setq atc-plan-failed (1+ atc-plan-failed)))
+)
+
+(defun atc-plan-count (start / ent typ counts pair)
+  (setq ent (if start (entnext start) (entnext)))
+  (while ent
+    (setq typ (cdr (assoc 0 (entget ent))))
+    (if (setq pair (assoc typ counts))
+      (setq counts (subst (cons typ (1+ (cdr pair))) pair counts))
+      (setq counts (cons (cons typ 1) counts)))
+    (setq ent (entnext ent)))
+  counts
+)
+
+(defun atc-plan-json (counts / text)
+  (setq text "")
+  (foreach pair (reverse counts)
+    (setq text (strcat text (if (= text "") "" ", ")
+                       "\"" (car pair) "\": " (itoa (cdr pair)))))
+  (strcat "{\"status\": \"ok\", \"failed\": " (itoa atc-plan-failed)
+          ", \"counts\": {" text "}}")
+)
+
+(defun atc-plan-write (fname text / f)
+  (if (setq f (open fname "w"))
+    (progn (write-line text f) (close f)))
+)
+
+(defun atc-plan-run ( / start osmode cmdecho clayer)
+  (setq start (entlast) atc-plan-made 0 atc-plan-failed 0
+        osmode (getvar "OSMODE") cmdecho (getvar "CMDECHO") clayer (getvar "CLAYER"))
+  (setvar "OSMODE" 0)
+  (setvar "CMDECHO" 0)
+  (command "_.UNDO" "_BEGIN")
+  (atc-plan-layer "AM_0")
+  (atc-plan-layer "AM_7")
+  (if (not (tblsearch "BLOCK" "hole \"M16\"")) (progn (entmake '((0 . "BLOCK") (2 . "hole \"M16\"") (70 . 0) (10 0.0 0.0 0.0))) (entmake '((0 . "CIRCLE") (8 . "AM_0") (10 0.0 0.0 0.0) (40 . 9.0))) (entmake '((0 . "LINE") (8 . "AM_7") (10 -12.0 0.0 0.0) (11 12.0 0.0 0.0))) (entmake '((0 . "ENDBLK")))))
+  (atc-plan-make '((0 . "INSERT") (8 . "AM_0") (2 . "hole \"M16\"") (10 80.0 40.0 0.0) (41 . 1.0) (42 . 1.0) (43 . 1.0) (50 . 0.0)))
+  (atc-plan-make '((0 . "INSERT") (8 . "AM_0") (2 . "hole \"M16\"") (10 -80.0 40.0 0.0) (41 . 0.5) (42 . 0.5) (43 . 0.5) (50 . 0.52359878)))
+  (setvar "CLAYER" clayer)
+  (command "_.UNDO" "_END")
+  (setvar "OSMODE" osmode)
+  (setvar "CMDECHO" cmdecho)
+  (setq atc-plan-last-result (atc-plan-json (atc-plan-count start)))
+  (atc-plan-write "C:/AT-CAD/lisp_bridge/plan_result.json" atc-plan-last-result)
+  atc-plan-last-result
+)
+
+(atc-plan-run)
+(princ)
@@ -0,0 +1,58 @@
+;; AT-CAD plan: dimensions, 3 entities
+(defun atc-plan-layer (name)
+  (if (not (tblsearch "LAYER" name))
+    (entmake (list '(0 . "LAYER") '(100 . "AcDbSymbolTableRecord")
+                   '(100 . "AcDbLayerTableRecord") (cons 2 name) '(70 . 0))))
+)
+
+(defun atc-plan-make (data)
+  (if (entmake data)
+    (setq atc-plan-made (1+ atc-plan-made))
+    (setq atc-plan-failed (1+ atc-plan-failed)))
+)
+
+(defun atc-plan-count (start / ent typ counts pair)
+  (setq ent (if start (entnext start) (entnext)))
+  (while ent
+    (setq typ (cdr (assoc 0 (entget ent))))
+    (if (setq pair (assoc typ counts))
+      (setq counts (subst (cons typ (1+ (cdr pair))) pair counts))
+      (setq counts (cons (cons typ 1) counts)))
+    (setq ent (entnext ent)))
+  counts
+)
+
+(defun atc-plan-json (counts / text)
+  (setq text "")
+  (foreach pair (reverse counts)
+    (setq text (strcat text (if (= text "") "" ", ")
+                       "\"" (car pair) "\": " (itoa (cdr pair)))))
+  (strcat "{\"status\": \"ok\", \"failed\": " (itoa atc-plan-failed)
+          ", \"counts\": {" text "}}")
+)
+
+(defun atc-plan-write (fname text / f)
+  (if (setq f (open fname "w"))
+    (progn (write-line text f) (close f)))
+)
+
+(defun atc-plan-run ( / start osmode cmdecho clayer)
+  (setq start (entlast) atc-plan-made 0 atc-plan-failed 0
+        osmode (getvar "OSMODE") cmdecho (getvar "CMDECHO") clayer (getvar "CLAYER"))
+  (setvar "OSMODE" 0)
+  (setvar "CMDECHO" 0)
+  (command "_.UNDO" "_BEGIN")
+  (atc-plan-layer "AM_5")
+  (setvar "CLAYER" "AM_5") (command "_.DIMLINEAR" '(0.0 0.0 0.0) '(100.0 0.0 0.0) "_H" '(0.0 60.0 0.0))
+  (setvar "CLAYER" "AM_5") (command "_.DIMLINEAR" '(0.0 0.0 0.0) '(0.0 40.5 0.0) "_V" '(15.0 20.25 0.0))
+  (setvar "CLAYER" "AM_5") (command "_.DIMALIGNED" '(0.0 0.0 0.0) '(30.0 40.0 0.0) '(7.0 26.0 0.0))
+  (setvar "CLAYER" clayer)
+  (command "_.UNDO" "_END")
+  (setvar "OSMODE" osmode)
+  (setvar "CMDECHO" cmdecho)
+  (setq atc-plan-last-result (atc-plan-json (atc-plan-count start)))
+  atc-plan-last-result
+)
+
+(atc-plan-run)
+(princ)
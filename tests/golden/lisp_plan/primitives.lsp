@@ -0,0 +1,65 @@
+;; AT-CAD plan: primitives, 7 entities
+(defun atc-plan-layer (name)
+  (if (not (tblsearch "LAYER" name))
+    (entmake (list '(0 . "LAYER") '(100 . "AcDbSymbolTableRecord")
+                   '(100 . "AcDbLayerTableRecord") (cons 2 name) '(70 . 0))))
+)
+
+(defun atc-plan-make (data)
+  (if (entmake data)
+    (setq atc-plan-made (1+ atc-plan-made))
+    (setq atc-plan-failed (1+ atc-plan-failed)))
+)
+
+(defun atc-plan-count (start / ent typ counts pair)
+  (setq ent (if start (entnext start) (entnext)))
+  (while ent
+    (setq typ (cdr (assoc 0 (entget ent))))
+    (if (setq pair (assoc typ counts))
+      (setq counts (subst (cons typ (1+ (cdr pair))) pair counts))
+      (setq counts (cons (cons typ 1) counts)))
+    (setq ent (entnext ent)))
+  counts
+)
+
+(defun atc-plan-json (counts / text)
+  (setq text "")
+  (foreach pair (reverse counts)
+    (setq text (strcat text (if (= text "") "" ", ")
+                       "\"" (car pair) "\": " (itoa (cdr pair)))))
+  (strcat "{\"status\": \"ok\", \"failed\": " (itoa atc-plan-failed)
+          ", \"counts\": {" text "}}")
+)
+
+(defun atc-plan-write (fname text / f)
+  (if (setq f (open fname "w"))
+    (progn (write-line text f) (close f)))
+)
+
+(defun atc-plan-run ( / start osmode cmdecho clayer)
+  (setq start (entlast) atc-plan-made 0 atc-plan-failed 0
+        osmode (getvar "OSMODE") cmdecho (getvar "CMDECHO") clayer (getvar "CLAYER"))
+  (setvar "OSMODE" 0)
+  (setvar "CMDECHO" 0)
+  (command "_.UNDO" "_BEGIN")
+  (atc-plan-layer "AM_7")
+  (atc-plan-layer "AM_0")
+  (atc-plan-layer "0")
+  (atc-plan-layer "AM_3")
+  (atc-plan-make '((0 . "LINE") (8 . "AM_7") (10 0.0 0.0 0.0) (11 100.0 0.0 0.0)))
+  (atc-plan-make '((0 . "LINE") (8 . "AM_7") (10 0.0 0.0 0.0) (11 0.33333333 -2.5 7.0)))
+  (atc-plan-make '((0 . "CIRCLE") (8 . "AM_0") (10 50.0 50.0 0.0) (40 . 25.0)))
+  (atc-plan-make '((0 . "CIRCLE") (8 . "AM_0") (10 1234567.125 0.0 0.0) (40 . 0.1)))
+  (atc-plan-make '((0 . "LWPOLYLINE") (100 . "AcDbEntity") (8 . "0") (100 . "AcDbPolyline") (90 . 4) (70 . 1) (10 0.0 0.0) (10 100.0 0.0) (42 . 0.41421356) (10 100.0 50.0) (10 0.0 50.0) (42 . -1.0)))
+  (atc-plan-make '((0 . "LWPOLYLINE") (100 . "AcDbEntity") (8 . "0") (100 . "AcDbPolyline") (90 . 2) (70 . 0) (10 0.0 0.0) (10 10.0 10.0)))
+  (atc-plan-make '((0 . "SPLINE") (100 . "AcDbEntity") (8 . "AM_3") (100 . "AcDbSpline") (70 . 8) (71 . 3) (72 . 0) (73 . 0) (74 . 4) (44 . 1e-010) (11 0.0 0.0 0.0) (11 10.0 5.0 0.0) (11 20.0 0.0 0.0) (11 0.0 0.0 0.0)))
+  (setvar "CLAYER" clayer)
+  (command "_.UNDO" "_END")
+  (setvar "OSMODE" osmode)
+  (setvar "CMDECHO" cmdecho)
+  (setq atc-plan-last-result (atc-plan-json (atc-plan-count start)))
+  atc-plan-last-result
+)
+
+(atc-plan-run)
+(princ)
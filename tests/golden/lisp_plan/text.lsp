@@ -0,0 +1,59 @@
+;; AT-CAD plan: text "escaping", 3 entities
+(defun atc-plan-layer (name)
+  (if (not (tblsearch "LAYER" name))
+    (entmake (list '(0 . "LAYER") '(100 . "AcDbSymbolTableRecord")
+                   '(100 . "AcDbLayerTableRecord") (cons 2 name) '(70 . 0))))
+)
+
+(defun atc-plan-make (data)
+  (if (entmake data)
+    (setq atc-plan-made (1+ atc-plan-made))
+    (setq atc-plan-failed (1+ atc-plan-failed)))
+)
+
+(defun atc-plan-count (start / ent typ counts pair)
+  (setq ent (if start (entnext start) (entnext)))
+  (while ent
+    (setq typ (cdr (assoc 0 (entget ent))))
+    (if (setq pair (assoc typ counts))
+      (setq counts (subst (cons typ (1+ (cdr pair))) pair counts))
+      (setq counts (cons (cons typ 1) counts)))
+    (setq ent (entnext ent)))
+  counts
+)
+
+(defun atc-plan-json (counts / text)
+  (setq text "")
+  (foreach pair (reverse counts)
+    (setq text (strcat text (if (= text "") "" ", ")
+                       "\"" (car pair) "\": " (itoa (cdr pair)))))
+  (strcat "{\"status\": \"ok\", \"failed\": " (itoa atc-plan-failed)
+          ", \"counts\": {" text "}}")
+)
+
+(defun atc-plan-write (fname text / f)
+  (if (setq f (open fname "w"))
+    (progn (write-line text f) (close f)))
+)
+
+(defun atc-plan-run ( / start osmode cmdecho clayer)
+  (setq start (entlast) atc-plan-made 0 atc-plan-failed 0
+        osmode (getvar "OSMODE") cmdecho (getvar "CMDECHO") clayer (getvar "CLAYER"))
+  (setvar "OSMODE" 0)
+  (setvar "CMDECHO" 0)
+  (command "_.UNDO" "_BEGIN")
+  (atc-plan-layer "schrift")
+  (atc-plan-layer "layer \"q\"")
+  (atc-plan-make '((0 . "TEXT") (8 . "schrift") (10 0.0 -20.0 0.0) (40 . 30.0) (1 . "K1234 \"Test\"") (50 . 0.0) (72 . 4) (11 0.0 -20.0 0.0) (73 . 0)))
+  (atc-plan-make '((0 . "TEXT") (8 . "layer \"q\"") (10 10.0 10.0 0.0) (40 . 2.5) (1 . "C:\\temp\\plan \\\"x\\\"") (50 . 90.0)))
+  (atc-plan-make '((0 . "TEXT") (8 . "schrift") (10 0.0 0.0 0.0) (40 . 3.5) (1 . "Ø 100 ± 0,5") (50 . 0.0) (72 . 1) (11 0.0 0.0 0.0) (73 . 2)))
+  (setvar "CLAYER" clayer)
+  (command "_.UNDO" "_END")
+  (setvar "OSMODE" osmode)
+  (setvar "CMDECHO" cmdecho)
+  (setq atc-plan-last-result (atc-plan-json (atc-plan-count start)))
+  atc-plan-last-result
+)
+
+(atc-plan-run)
+(princ)
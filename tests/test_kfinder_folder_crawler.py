@@ -0,0 +1,73 @@
+"""
+FolderCrawler с журналом: каталог, который не удалось прочитать.
+"""
+
+import dataclasses
+import os
+import re
+import shutil
+import tempfile
+import unittest
+from pathlib import Path
+
+from utils.kfinder.kfinder_app.folder_crawler import FolderCrawler
+
+K_PATTERN = re.compile(r"^K\d{5}$")
+
+
+class CrawlerJournalFailureTest(unittest.TestCase):
+    def setUp(self):
+        self.root = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, self.root, ignore_errors=True)
+        self.year = self.root / "2024"
+        for folder in ("Kunde A/K00001", "Kunde B/K00002", "Kunde B/Projekt/K00003"):
+            (self.year / folder).mkdir(parents=True)
+        self.broken = str(self.year / "Kunde B")
+
+        crawler = FolderCrawler(K_PATTERN, max_workers=2)
+        crawler.crawl([(2024, self.year)], journal={})
+        self.journal = dict(crawler.last_stats.changed)
+
+    def _failing_scandir(self, path):
+        if path == self.broken:
+            raise PermissionError(13, "Zugriff verweigert", path)
+        return os.scandir(path)
+
+    def test_unreadable_dir_keeps_journal_and_hits(self):
+        # mtime изменился — каталог нужно перечитать, но чтение падает
+        state = self.journal[self.broken]
+        self.journal[self.broken] = dataclasses.replace(state, mtime_ns=state.mtime_ns - 1)
+
+        crawler = FolderCrawler(K_PATTERN, max_workers=2, scandir=self._failing_scandir)
+        found = crawler.crawl([(2024, self.year)], journal=self.journal)
+        stats = crawler.last_stats
+
+        self.assertEqual(sorted(found), ["K00001", "K00002", "K00003"])
+        self.assertEqual(stats.failed, [self.broken])
+        self.assertEqual(stats.removed, [])
+        self.assertNotIn(self.broken, stats.changed)
+
+    def test_unreadable_stat_keeps_journal(self):
+        def failing_stat(path):
+            if path == self.broken:
+                raise OSError(64, "Netzwerkname nicht mehr verfügbar", path)
+            return os.stat(path)
+
+        crawler = FolderCrawler(K_PATTERN, max_workers=2, stat=failing_stat)
+        found = crawler.crawl([(2024, self.year)], journal=self.journal)
+
+        self.assertEqual(sorted(found), ["K00001", "K00002", "K00003"])
+        self.assertEqual(crawler.last_stats.removed, [])
+
+    def test_vanished_dir_is_removed(self):
+        shutil.rmtree(self.broken)
+
+        crawler = FolderCrawler(K_PATTERN, max_workers=2)
+        found = crawler.crawl([(2024, self.year)], journal=self.journal)
+
+        self.assertEqual(sorted(found), ["K00001"])
+        self.assertEqual(crawler.last_stats.removed, [self.broken, os.path.join(self.broken, "Projekt")])
+
+
+if __name__ == "__main__":
+    unittest.main()
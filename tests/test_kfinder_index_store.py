@@ -0,0 +1,77 @@
+"""
+Чтение IndexStore из другого потока во время транзакции записи
+и закрытие соединений чтения завершившихся потоков.
+"""
+
+import gc
+import shutil
+import sqlite3
+import tempfile
+import threading
+import unittest
+from pathlib import Path
+
+from utils.kfinder.kfinder_app.index_store import IndexStore
+from utils.kfinder.kfinder_app.models import KEntry
+
+
+def _entry(k_code: str) -> KEntry:
+    return KEntry(k_code=k_code, year=2024, folder_path=f"/archive/{k_code}",
+                  sketch_path="", dwg_path="", has_folder=True)
+
+
+class IndexStoreReadersTest(unittest.TestCase):
+    def setUp(self):
+        tmp = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, tmp, ignore_errors=True)
+        self.store = IndexStore(tmp / "index.db")
+        self.addCleanup(self.store.close)
+        self.store.upsert_k_entries([_entry("K00001"), _entry("K00002")])
+
+    def test_read_does_not_wait_for_write_transaction(self):
+        in_transaction = threading.Event()
+        release = threading.Event()
+        seen_inside = []
+
+        def write():
+            with self.store.transaction() as conn:
+                conn.execute("DELETE FROM k_entries")
+                seen_inside.append(self.store.k_count())
+                in_transaction.set()
+                release.wait(5)
+
+        writer = threading.Thread(target=write)
+        writer.start()
+        try:
+            self.assertTrue(in_transaction.wait(5))
+            # Другой поток видит последнее зафиксированное состояние
+            self.assertEqual(self.store.k_count(), 2)
+            self.assertIsNotNone(self.store.k_get("K00001"))
+        finally:
+            release.set()
+            writer.join()
+
+        # Поток записи внутри транзакции видит свои изменения
+        self.assertEqual(seen_inside, [0])
+        self.assertEqual(self.store.k_count(), 0)
+
+    def test_reader_closed_when_thread_exits(self):
+        open_readers = len(self.store._readers)
+        readers = []
+
+        def read():
+            self.assertEqual(self.store.k_count(), 2)
+            readers.append(self.store._reader())
+
+        thread = threading.Thread(target=read)
+        thread.start()
+        thread.join()
+        gc.collect()
+
+        self.assertEqual(len(self.store._readers), open_readers)
+        with self.assertRaises(sqlite3.ProgrammingError):
+            readers[0].execute("SELECT 1")
+
+
+if __name__ == "__main__":
+    unittest.main()
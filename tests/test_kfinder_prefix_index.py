@@ -0,0 +1,51 @@
+"""
+PrefixIndex: чтение во время изменений из другого потока.
+"""
+
+import threading
+import unittest
+
+from utils.kfinder.kfinder_app.prefix_index import NumericPrefixIndex, PrefixIndex
+
+
+class PrefixIndexSnapshotTest(unittest.TestCase):
+    def test_items_come_from_one_snapshot(self):
+        # В каждом снимке у всех ключей одно значение — номер поколения
+        index = PrefixIndex((f"K{i:05d}", 0) for i in range(200))
+        stop = threading.Event()
+
+        def write():
+            generation = 0
+            while not stop.is_set():
+                generation += 1
+                index.rebuild((f"K{i:05d}", generation) for i in range(200 + generation % 7))
+                index.update([(f"K{i:05d}", generation) for i in range(0, 300, 3)], remove=["K00001"])
+
+        writer = threading.Thread(target=write)
+        writer.start()
+        try:
+            for _ in range(2000):
+                items = index.items("K00")
+                self.assertEqual([k for k, _ in items], sorted(k for k, _ in items))
+                self.assertEqual(len({v for _, v in items}), 1)
+        finally:
+            stop.set()
+            writer.join()
+
+    def test_batch_update(self):
+        index = PrefixIndex([("K20500", 2023), ("K20501", 2024)])
+        removed = index.update([("K20502", 2024), ("K20500", 2025)], remove=["K20501", "K99999"])
+        self.assertEqual(removed, 1)
+        self.assertEqual(index.items("K205"), [("K20500", 2025), ("K20502", 2024)])
+        self.assertTrue(index.discard("K20502"))
+        self.assertFalse(index.discard("K20502"))
+
+    def test_numeric_update(self):
+        index = NumericPrefixIndex([99, 990, 9900, 12000])
+        index.update([9901, 991], remove=[990])
+        self.assertEqual(index.find("99"), [99, 991, 9900, 9901])
+        self.assertFalse(index.discard(990))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,75 @@
+"""
+Выбор транспорта LISP-моста и переход на файловый обмен.
+AutoCAD заменяет programs/lisp_bridge_peer.py.
+"""
+
+import socket
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+from programs import lisp_bridge
+from programs.lisp_bridge_peer import LispBridgePeer
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind((lisp_bridge.BRIDGE_HOST, 0))
+        return s.getsockname()[1]
+
+
+class TransportSelectionTest(unittest.TestCase):
+    def setUp(self):
+        bridge_dir = Path(tempfile.mkdtemp())
+        patches = [
+            mock.patch.object(lisp_bridge, "BRIDGE_DIR", str(bridge_dir)),
+            mock.patch.object(lisp_bridge, "REQ_FILE", str(bridge_dir / "request.json")),
+            mock.patch.object(lisp_bridge, "RES_FILE", str(bridge_dir / "response.json")),
+        ]
+        for patch in patches:
+            patch.start()
+            self.addCleanup(patch.stop)
+        lisp_bridge.set_transport(None)
+        self.addCleanup(lisp_bridge.set_transport, None)
+
+    def test_file_transport_by_default_without_connecting(self):
+        with mock.patch.object(lisp_bridge, "SOCKET_ENABLED", False), \
+                mock.patch.object(lisp_bridge.SocketTransport, "connect") as connect:
+            transport = lisp_bridge.get_transport()
+        self.assertIsInstance(transport, lisp_bridge.FileTransport)
+        connect.assert_not_called()
+
+    def test_socket_when_enabled(self):
+        with LispBridgePeer() as peer:
+            port = peer.serve_socket()
+            with mock.patch.object(lisp_bridge, "SOCKET_ENABLED", True), \
+                    mock.patch.object(lisp_bridge, "BRIDGE_PORT", port):
+                transport = lisp_bridge.get_transport()
+                self.assertIsInstance(transport, lisp_bridge.SocketTransport)
+                self.assertIs(lisp_bridge.get_transport(), transport)
+                self.assertEqual(lisp_bridge.send_lisp_command("ping", timeout=2)["message"], "pong")
+
+    def test_enabled_without_listener_falls_back_and_backs_off(self):
+        with mock.patch.object(lisp_bridge, "SOCKET_ENABLED", True), \
+                mock.patch.object(lisp_bridge, "BRIDGE_PORT", _free_port()), \
+                mock.patch.object(lisp_bridge.SocketTransport, "connect", return_value=False) as connect:
+            self.assertIsInstance(lisp_bridge.get_transport(), lisp_bridge.FileTransport)
+            self.assertIsInstance(lisp_bridge.get_transport(), lisp_bridge.FileTransport)
+        self.assertEqual(connect.call_count, 1)
+
+    def test_explicit_transport_is_kept(self):
+        files = lisp_bridge.FileTransport(trigger=False)
+        lisp_bridge.set_transport(files)
+        self.assertIs(lisp_bridge.get_transport(), files)
+
+    def test_connection_error_falls_back_to_files(self):
+        dead = lisp_bridge.SocketTransport(port=_free_port(), connect_timeout=0.1)
+        with LispBridgePeer() as peer:
+            peer.serve_files()
+            reply = lisp_bridge.send_lisp_command("ping", timeout=2, transport=dead)
+        self.assertEqual(reply["message"], "pong")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,110 @@
+"""
+Эталонные тексты AutoLISP для compile_plan().
+
+Компилятор детерминирован, поэтому скомпилированный план сравнивается
+с файлом tests/golden/lisp_plan/<имя>.lsp целиком. После намеренного
+изменения формата эталоны пересоздаются:
+
+    AT_UPDATE_GOLDEN=1 python -m pytest tests/test_lisp_plan_golden.py
+"""
+
+import math
+import os
+import unittest
+from pathlib import Path
+
+from programs.at_lisp_plan import compile_plan, lisp_num, lisp_str
+from programs.at_plan import DrawingPlan
+
+GOLDEN_DIR = Path(__file__).resolve().parent / "golden" / "lisp_plan"
+UPDATE = os.environ.get("AT_UPDATE_GOLDEN") == "1"
+
+
+def primitives_plan() -> DrawingPlan:
+    plan = DrawingPlan("primitives")
+    plan.line((0, 0), (100, 0), layer="AM_7")
+    plan.line((-0.0, 1e-10), (1 / 3, -2.5, 7), layer="AM_7")
+    plan.circle((50, 50), 25, layer="AM_0")
+    plan.circle((1234567.125, -0.000000004), 0.1, layer="AM_0")
+    plan.polyline([(0, 0), (100, 0), (100, 50), (0, 50)], layer="0", bulges=[0, 0.41421356237, 0, -1])
+    plan.polyline([(0, 0), (10, 10)], layer="0", closed=False)
+    plan.spline([(0, 0), (10, 5), (20, 0)], layer="AM_3", closed=True)
+    return plan
+
+
+def text_plan() -> DrawingPlan:
+    plan = DrawingPlan('text "escaping"')
+    plan.text((0, -20), 'K1234 "Test"', height=30)
+    plan.text((10, 10), r"C:\temp\plan \"x\"", layer='layer "q"', height=2.5, angle=90, alignment=0)
+    plan.text((0, 0), "Ø 100 ± 0,5", layer="schrift", height=3.5, alignment=10)
+    return plan
+
+
+def dimensions_plan() -> DrawingPlan:
+    plan = DrawingPlan("dimensions")
+    plan.dimension("H", (0, 0), (100, 0))
+    plan.dimension("V", (0, 0), (0, 40.5), offset=-15)
+    plan.dimension("L", (0, 0), (30, 40), offset=10)
+    return plan
+
+
+def blocks_plan() -> DrawingPlan:
+    hole = DrawingPlan()
+    hole.circle((0, 0), 9, layer="AM_0")
+    hole.line((-12, 0), (12, 0), layer="AM_7")
+    plan = DrawingPlan("blocks")
+    plan.define_block("hole \"M16\"", hole)
+    plan.insert("hole \"M16\"", (80, 40), layer="AM_0")
+    plan.insert("hole \"M16\"", (-80, 40), layer="AM_0", scale=0.5, angle=math.pi / 6)
+    return plan
+
+
+PLANS = {
+    "primitives": (primitives_plan, None),
+    "text": (text_plan, None),
+    "dimensions": (dimensions_plan, None),
+    "blocks": (blocks_plan, "C:/AT-CAD/lisp_bridge/plan_result.json"),
+}
+
+
+class LispFormatTest(unittest.TestCase):
+    def test_numbers(self):
+        cases = {
+            100: "100.0",
+            -0.5: "-0.5",
+            -0.0: "0.0",
+            1e-10: "0.0",
+            -4e-9: "0.0",
+            1 / 3: "0.33333333",
+            1234567.125: "1234567.125",
+            12.345678915: "12.34567892",
+        }
+        for value, expected in cases.items():
+            with self.subTest(value=value):
+                self.assertEqual(lisp_num(value), expected)
+
+    def test_strings(self):
+        self.assertEqual(lisp_str('a "b"'), r'"a \"b\""')
+        self.assertEqual(lisp_str("C:\\temp\\"), r'"C:\\temp\\"')
+        self.assertEqual(lisp_str(r"\""), r'"\\\""')
+
+
+class CompiledPlanGoldenTest(unittest.TestCase):
+    def test_golden_files(self):
+        for name, (build, result_file) in PLANS.items():
+            with self.subTest(plan=name):
+                text = compile_plan(build(), result_file=result_file)
+                path = GOLDEN_DIR / f"{name}.lsp"
+                if UPDATE:
+                    path.parent.mkdir(parents=True, exist_ok=True)
+                    path.write_text(text, encoding="utf-8", newline="\n")
+                self.assertEqual(text, path.read_text(encoding="utf-8"))
+
+    def test_compile_is_deterministic(self):
+        for name, (build, result_file) in PLANS.items():
+            with self.subTest(plan=name):
+                self.assertEqual(compile_plan(build(), result_file), compile_plan(build(), result_file))
+
+
+if __name__ == "__main__":
+    unittest.main()
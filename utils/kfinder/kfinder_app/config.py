@@ -52,6 +52,7 @@ from .paths import (
     DXF_EXCEL_INDEX_JSON,
     DXF_FILES_INDEX_JSON,
     APPNR_INDEX_JSON,
+    INDEX_DB,
 )
 
 
@@ -93,6 +94,12 @@ DEFAULT_CONFIG: dict[str, Any] = {
             # Частичная индексация K:
             # сколько последних лет сканировать
             "tail_years_to_scan": 2,
+
+            # Сканирование архива: число параллельных запросов к диску
+            "scan_workers": 8,
+
+            # Сканирование архива: максимальная глубина от папки года
+            "scan_max_depth": 6,
         },
 
         "dxf": {
@@ -109,13 +116,18 @@ DEFAULT_CONFIG: dict[str, Any] = {
             # Частичная индексация DXF:
             # сколько номеров вперёд проверять
             "file_tail_forward_scan": 100,
-        },
 
-        "appnr": {
-            # Частичная индексация App.Nr.:
-            # сколько числовых префиксов назад пересчитывать
-            # относительно максимального известного prefix
-            "tail_backtrack_prefix": 100,
+            # Файловый индекс: сколько папок диапазонов читать параллельно
+            "scan_workers": 8,
+
+            # Фоновый расчёт геометрии и превью DXF (нужен ezdxf)
+            "geometry_enabled": True,
+
+            # Геометрия DXF: сколько файлов читать параллельно
+            "geometry_workers": 2,
+
+            # Геометрия DXF: ограничение чтения с диска, МБ/с на все потоки
+            "geometry_mb_per_s": 8,
         },
     },
 
@@ -129,6 +141,11 @@ DEFAULT_CONFIG: dict[str, Any] = {
         "auto_show_single": True,
         "live_search_if_missing": True,
 
+        # Фоновый поиск: пауза после ввода перед предпросмотром (мс)
+        # и предельное время поиска на диске (с)
+        "search_debounce_ms": 250,
+        "disk_search_timeout_s": 15,
+
         # Цвета
         "colors": {
             "bg": "#508050",
@@ -158,6 +175,7 @@ DEFAULT_CONFIG: dict[str, Any] = {
         "dxf_excel_index_json": str(DXF_EXCEL_INDEX_JSON),
         "dxf_files_index_json": str(DXF_FILES_INDEX_JSON),
         "appnr_index_json": str(APPNR_INDEX_JSON),
+        "index_db": str(INDEX_DB),
     },
 }
 
@@ -186,6 +204,8 @@ class KIndexingConfig:
     start_year: int
     tail_backtrack: int
     tail_years_to_scan: int
+    scan_workers: int
+    scan_max_depth: int
 
 
 @dataclass(frozen=True)
@@ -197,14 +217,10 @@ class DXFIndexingConfig:
     max_dxf_no: int
     file_tail_backtrack: int
     file_tail_forward_scan: int
-
-
-@dataclass(frozen=True)
-class AppNrIndexingConfig:
-    """
-    Параметры индексации Apparate-Nr.
-    """
-    tail_backtrack_prefix: int
+    scan_workers: int
+    geometry_enabled: bool
+    geometry_workers: int
+    geometry_mb_per_s: int
 
 
 @dataclass(frozen=True)
@@ -215,7 +231,6 @@ class IndexingConfig:
     auto_update_on_start: bool
     k: KIndexingConfig
     dxf: DXFIndexingConfig
-    appnr: AppNrIndexingConfig
 
 
 @dataclass(frozen=True)
@@ -254,6 +269,8 @@ class UiConfig:
     auto_open_single: bool
     auto_show_single: bool
     live_search_if_missing: bool
+    search_debounce_ms: int
+    disk_search_timeout_s: int
     colors: ColorsConfig
     fonts: FontsConfig
 
@@ -262,12 +279,16 @@ class UiConfig:
 class DataFilesConfig:
     """
     Пути к JSON-индексам и другим служебным файлам данных.
+
+    index_db — SQLite-хранилище индексов; JSON-файлы K/DXF/App.Nr.
+    читаются только для однократной миграции в него.
     """
     k_index_json: Path
     dxf_ranges_json: Path
     dxf_excel_index_json: Path
     dxf_files_index_json: Path
     appnr_index_json: Path
+    index_db: Path
 
 
 @dataclass(frozen=True)
@@ -428,6 +449,14 @@ def load_config() -> AppSettings:
             raw_k["tail_years_to_scan"],
             DEFAULT_CONFIG["indexing"]["k"]["tail_years_to_scan"],
         ),
+        scan_workers=max(1, _as_int(
+            raw_k["scan_workers"],
+            DEFAULT_CONFIG["indexing"]["k"]["scan_workers"],
+        )),
+        scan_max_depth=max(0, _as_int(
+            raw_k["scan_max_depth"],
+            DEFAULT_CONFIG["indexing"]["k"]["scan_max_depth"],
+        )),
     )
 
     # --------------------------------------------------------
@@ -445,17 +474,22 @@ def load_config() -> AppSettings:
             raw_dxf["file_tail_forward_scan"],
             DEFAULT_CONFIG["indexing"]["dxf"]["file_tail_forward_scan"],
         ),
-    )
-
-    # --------------------------------------------------------
-    # Indexing / App.Nr.
-    # --------------------------------------------------------
-    raw_appnr = raw_indexing["appnr"]
-    appnr_cfg = AppNrIndexingConfig(
-        tail_backtrack_prefix=_as_int(
-            raw_appnr["tail_backtrack_prefix"],
-            DEFAULT_CONFIG["indexing"]["appnr"]["tail_backtrack_prefix"],
-        )
+        scan_workers=max(1, _as_int(
+            raw_dxf["scan_workers"],
+            DEFAULT_CONFIG["indexing"]["dxf"]["scan_workers"],
+        )),
+        geometry_enabled=_as_bool(
+            raw_dxf["geometry_enabled"],
+            DEFAULT_CONFIG["indexing"]["dxf"]["geometry_enabled"],
+        ),
+        geometry_workers=max(1, _as_int(
+            raw_dxf["geometry_workers"],
+            DEFAULT_CONFIG["indexing"]["dxf"]["geometry_workers"],
+        )),
+        geometry_mb_per_s=max(1, _as_int(
+            raw_dxf["geometry_mb_per_s"],
+            DEFAULT_CONFIG["indexing"]["dxf"]["geometry_mb_per_s"],
+        )),
     )
 
     indexing_cfg = IndexingConfig(
@@ -465,7 +499,6 @@ def load_config() -> AppSettings:
         ),
         k=k_cfg,
         dxf=dxf_cfg,
-        appnr=appnr_cfg,
     )
 
     # --------------------------------------------------------
@@ -511,6 +544,14 @@ def load_config() -> AppSettings:
             raw_ui["live_search_if_missing"],
             DEFAULT_CONFIG["ui"]["live_search_if_missing"],
         ),
+        search_debounce_ms=max(0, _as_int(
+            raw_ui["search_debounce_ms"],
+            DEFAULT_CONFIG["ui"]["search_debounce_ms"],
+        )),
+        disk_search_timeout_s=max(1, _as_int(
+            raw_ui["disk_search_timeout_s"],
+            DEFAULT_CONFIG["ui"]["disk_search_timeout_s"],
+        )),
         colors=colors_cfg,
         fonts=fonts_cfg,
     )
@@ -525,6 +566,7 @@ def load_config() -> AppSettings:
         dxf_excel_index_json=_as_path(raw_data_files["dxf_excel_index_json"]),
         dxf_files_index_json=_as_path(raw_data_files["dxf_files_index_json"]),
         appnr_index_json=_as_path(raw_data_files["appnr_index_json"]),
+        index_db=_as_path(raw_data_files["index_db"]),
     )
 
     return AppSettings(
@@ -8,17 +8,21 @@ dialogs.py
 - оформление в стиле исходного монолита;
 - DXF-таблица включает колонку Ch.Nr.;
 - ServiceDialog снова содержит обе кнопки:
-  Teilaktualisierung и Vollständige Neuindizierung.
+  Teilaktualisierung и Vollständige Neuindizierung;
+- SearchResultsDialog показывает результаты общего поиска;
+- DXFResultsDialog показывает превью и геометрию выбранного DXF.
 """
 
 from __future__ import annotations
 
+import io
 from pathlib import Path
 from typing import Optional
 
 import wx
 
-from .models import AppNrRecord, DXFSearchResult, KEntry
+from .geometry_cache import PREVIEW_SIZE
+from .models import AppNrRecord, DXFSearchResult, KEntry, SearchHit
 from .texts import TXT
 from .ui_style import (
     CLR_BG,
@@ -79,21 +83,7 @@ class ResultsDialog(wx.Dialog):
         for idx, (hdr, width) in enumerate(cols):
             self.tree.InsertColumn(idx, hdr, width=width)
 
-        for entry in self.entries:
-            row = [
-                entry.k_code,
-                str(entry.year) if entry.year else "—",
-                TXT["table_has_folder_yes"] if entry.has_folder else TXT["table_has_folder_no"],
-                entry.folder_path if entry.has_folder else "—",
-                entry.sketch_path if entry.has_folder else "—",
-                entry.dwg_path if entry.has_folder else "—",
-            ]
-            idx = self.tree.InsertItem(self.tree.GetItemCount(), row[0])
-            for col, val in enumerate(row[1:], 1):
-                self.tree.SetItem(idx, col, val)
-
-            if not entry.has_folder:
-                self.tree.SetItemBackgroundColour(idx, wx.Colour("#fff0a0"))
+        self._insert_rows(self.entries)
 
         self.tree.Bind(wx.EVT_LIST_ITEM_ACTIVATED, lambda _: self._open_folder())
         tbl_sizer.Add(self.tree, 1, wx.EXPAND | wx.ALL, 6)
@@ -118,6 +108,34 @@ class ResultsDialog(wx.Dialog):
         outer.Add(act_sizer, 0, wx.EXPAND | wx.LEFT | wx.RIGHT | wx.BOTTOM, 10)
         self.SetSizer(outer)
 
+    def _insert_rows(self, entries: list[KEntry]) -> None:
+        for entry in entries:
+            row = [
+                entry.k_code,
+                str(entry.year) if entry.year else "—",
+                TXT["table_has_folder_yes"] if entry.has_folder else TXT["table_has_folder_no"],
+                entry.folder_path if entry.has_folder else "—",
+                entry.sketch_path if entry.has_folder else "—",
+                entry.dwg_path if entry.has_folder else "—",
+            ]
+            idx = self.tree.InsertItem(self.tree.GetItemCount(), row[0])
+            for col, val in enumerate(row[1:], 1):
+                self.tree.SetItem(idx, col, val)
+
+            if not entry.has_folder:
+                self.tree.SetItemBackgroundColour(idx, wx.Colour("#fff0a0"))
+
+    def add_entries(self, entries: list[KEntry]) -> None:
+        """
+        Дописывает результаты, пришедшие от фонового поиска.
+        """
+        self.entries.extend(entries)
+        self.tree.Freeze()
+        try:
+            self._insert_rows(entries)
+        finally:
+            self.tree.Thaw()
+
     def _selected(self) -> Optional[KEntry]:
         idx = self.tree.GetFirstSelected()
         if idx == wx.NOT_FOUND or idx < 0 or idx >= len(self.entries):
@@ -187,7 +205,9 @@ class DXFResultsDialog(wx.Dialog):
 
     Важно:
     - колонка Ch.Nr. возвращена;
-    - экспорт TXT/CSV тоже включает Ch.Nr.
+    - экспорт TXT/CSV тоже включает Ch.Nr.;
+    - справа превью и геометрия выбранной строки из GeometryCache
+      (если фоновый расчёт уже дошёл до этого номера).
     """
 
     def __init__(self, parent: wx.Window, results: list[DXFSearchResult], title: str):
@@ -195,8 +215,9 @@ class DXFResultsDialog(wx.Dialog):
             parent,
             title=title or TXT["dxf_results_title"],
             style=wx.DEFAULT_DIALOG_STYLE | wx.RESIZE_BORDER,
-            size=wx.Size(1220, 560),
+            size=wx.Size(1460, 560),
         )
+        self.owner = parent
         self.results = results
         self._build()
         self.CentreOnScreen()
@@ -233,28 +254,23 @@ class DXFResultsDialog(wx.Dialog):
         for idx, (hdr, width) in enumerate(cols):
             self.tree.InsertColumn(idx, hdr, width=width)
 
-        for res in self.results:
-            file_name = Path(res.main_dwg_path).name if res.main_dwg_path else "—"
-            row = [
-                str(res.dxf_no),
-                res.k_num,
-                res.wst,
-                "" if res.dicke_mm is None else f"{res.dicke_mm:g}",
-                res.ch_nr,
-                "" if res.a_kn_brutto_qm is None else f"{res.a_kn_brutto_qm:g}",
-                "" if res.laenge_zuschnitt_mm is None else f"{res.laenge_zuschnitt_mm:g}",
-                "" if res.preis_pro_laenge_eur is None else f"{res.preis_pro_laenge_eur:g}",
-                file_name,
-            ]
-            idx = self.tree.InsertItem(self.tree.GetItemCount(), row[0])
-            for col, val in enumerate(row[1:], 1):
-                self.tree.SetItem(idx, col, val)
-
-            if not res.has_main_dwg:
-                self.tree.SetItemBackgroundColour(idx, wx.Colour("#fff0a0"))
+        self._insert_rows(self.results)
 
         self.tree.Bind(wx.EVT_LIST_ITEM_ACTIVATED, lambda _: self._open_dwg_file())
-        data_sizer.Add(self.tree, 1, wx.EXPAND | wx.ALL, 6)
+        self.tree.Bind(wx.EVT_LIST_ITEM_SELECTED, lambda _: self._show_geometry())
+
+        geo_sizer = static_box_sizer(self, TXT["geo_box"])
+        self.preview = wx.StaticBitmap(self, size=wx.Size(*PREVIEW_SIZE))
+        self.preview.SetBackgroundColour(wx.WHITE)
+        self.geo_text = wx.StaticText(self, label="")
+        self.geo_text.SetForegroundColour(wx.Colour(CLR_LABEL))
+        geo_sizer.Add(self.preview, 0, wx.ALL, 6)
+        geo_sizer.Add(self.geo_text, 0, wx.LEFT | wx.RIGHT | wx.BOTTOM, 6)
+
+        data_row = wx.BoxSizer(wx.HORIZONTAL)
+        data_row.Add(self.tree, 1, wx.EXPAND | wx.ALL, 6)
+        data_row.Add(geo_sizer, 0, wx.EXPAND | wx.TOP | wx.RIGHT | wx.BOTTOM, 6)
+        data_sizer.Add(data_row, 1, wx.EXPAND)
 
         act_sizer = static_box_sizer(self, TXT["dxf_actions_box"])
         btn_row = wx.BoxSizer(wx.HORIZONTAL)
@@ -276,6 +292,38 @@ class DXFResultsDialog(wx.Dialog):
         outer.Add(act_sizer, 0, wx.EXPAND | wx.LEFT | wx.RIGHT | wx.BOTTOM, 10)
         self.SetSizer(outer)
 
+    def _insert_rows(self, results: list[DXFSearchResult]) -> None:
+        for res in results:
+            file_name = Path(res.main_dwg_path).name if res.main_dwg_path else "—"
+            row = [
+                str(res.dxf_no),
+                res.k_num,
+                res.wst,
+                "" if res.dicke_mm is None else f"{res.dicke_mm:g}",
+                res.ch_nr,
+                "" if res.a_kn_brutto_qm is None else f"{res.a_kn_brutto_qm:g}",
+                "" if res.laenge_zuschnitt_mm is None else f"{res.laenge_zuschnitt_mm:g}",
+                "" if res.preis_pro_laenge_eur is None else f"{res.preis_pro_laenge_eur:g}",
+                file_name,
+            ]
+            idx = self.tree.InsertItem(self.tree.GetItemCount(), row[0])
+            for col, val in enumerate(row[1:], 1):
+                self.tree.SetItem(idx, col, val)
+
+            if not res.has_main_dwg:
+                self.tree.SetItemBackgroundColour(idx, wx.Colour("#fff0a0"))
+
+    def add_results(self, results: list[DXFSearchResult]) -> None:
+        """
+        Дописывает результаты, пришедшие от фонового поиска.
+        """
+        self.results.extend(results)
+        self.tree.Freeze()
+        try:
+            self._insert_rows(results)
+        finally:
+            self.tree.Thaw()
+
     def _selected(self) -> Optional[DXFSearchResult]:
         idx = self.tree.GetFirstSelected()
         if idx == wx.NOT_FOUND or idx < 0 or idx >= len(self.results):
@@ -288,6 +336,33 @@ class DXFResultsDialog(wx.Dialog):
             wx.MessageBox(TXT["dxf_select_entry"], TXT["msg_hint"], wx.OK | wx.ICON_INFORMATION)
         return item
 
+    def _show_geometry(self) -> None:
+        item = self._selected()
+        cache = getattr(self.owner, "geometry_cache", None)
+        summary = cache.get(item.dxf_no) if item and cache is not None else None
+
+        bitmap = wx.NullBitmap
+        if summary is None:
+            text = TXT["geo_none"]
+        elif summary.error:
+            text = TXT["geo_error"].format(error=summary.error)
+        else:
+            text = TXT["geo_summary"].format(
+                w=summary.width,
+                h=summary.height,
+                cut=summary.cut_length_mm,
+                pierces=summary.pierce_count,
+                area=summary.area_mm2,
+            )
+            if summary.preview_png:
+                image = wx.Image(io.BytesIO(summary.preview_png), wx.BITMAP_TYPE_PNG)
+                if image.IsOk():
+                    bitmap = wx.Bitmap(image)
+
+        self.preview.SetBitmap(bitmap)
+        self.geo_text.SetLabel(text)
+        self.Layout()
+
     def _open_dwg_folder(self) -> None:
         item = self._require_selected()
         if not item:
@@ -384,7 +459,17 @@ class AppNrResultsDialog(wx.Dialog):
     Окно результатов поиска по Apparate-Nr.
     """
 
-    def __init__(self, parent: wx.Window, records: list[AppNrRecord], title: str):
+    def __init__(
+        self,
+        parent: wx.Window,
+        records: list[AppNrRecord],
+        title: str,
+        entries: Optional[list[Optional[KEntry]]] = None,
+    ):
+        """
+        entries — K-записи к records, уже найденные фоновым поиском;
+        без них диалог ищет их сам (get_or_search в UI-потоке).
+        """
         super().__init__(
             parent,
             title=title or TXT["app_results_title"],
@@ -393,6 +478,7 @@ class AppNrResultsDialog(wx.Dialog):
         )
         self.owner = parent
         self.records = records
+        self._resolved = entries
         self._entries_cache: list[Optional[KEntry]] = []
         self._build()
         self.CentreOnScreen()
@@ -425,9 +511,11 @@ class AppNrResultsDialog(wx.Dialog):
         for idx, (hdr, width) in enumerate(cols):
             self.tree.InsertColumn(idx, hdr, width=width)
 
-        for rec in self.records:
+        for i, rec in enumerate(self.records):
             entry = None
-            if hasattr(self.owner, "k_service"):
+            if self._resolved is not None:
+                entry = self._resolved[i] if i < len(self._resolved) else None
+            elif hasattr(self.owner, "k_service"):
                 try:
                     entry = self.owner.k_service.get_or_search(rec.k_code)
                 except Exception:
@@ -559,6 +647,148 @@ class AppNrResultsDialog(wx.Dialog):
             self.owner._show_dxf_results(rec.k_code)
 
 
+class SearchResultsDialog(wx.Dialog):
+    """
+    Окно результатов общего поиска (search_index.py).
+
+    В одной таблице — совпадения из K-индекса, DXF-Excel и App.Nr.,
+    отсортированные по релевантности.
+    """
+
+    def __init__(self, parent: wx.Window, hits: list[SearchHit], title: str, total: Optional[int] = None):
+        super().__init__(
+            parent,
+            title=title or TXT["text_results_title"],
+            style=wx.DEFAULT_DIALOG_STYLE | wx.RESIZE_BORDER,
+            size=wx.Size(1220, 560),
+        )
+        self.owner = parent
+        self.hits = hits
+        self.total = len(hits) if total is None else total
+        self._build()
+        self.CentreOnScreen()
+
+    def _build(self) -> None:
+        self.SetBackgroundColour(wx.Colour(CLR_BG))
+        outer = wx.BoxSizer(wx.VERTICAL)
+
+        tbl_sizer = static_box_sizer(self, TXT["text_box"])
+
+        self.tree = wx.ListCtrl(
+            self,
+            style=wx.LC_REPORT | wx.LC_SINGLE_SEL | wx.BORDER_SUNKEN,
+        )
+        self.tree.SetBackgroundColour(wx.Colour("#f0f4f0"))
+        self.tree.SetFont(wx.Font(
+            10,
+            wx.FONTFAMILY_DEFAULT,
+            wx.FONTSTYLE_NORMAL,
+            wx.FONTWEIGHT_NORMAL,
+        ))
+
+        cols = [
+            (TXT["text_col_kind"], 80),
+            (TXT["dxf_col_k"], 90),
+            (TXT["table_year"], 60),
+            (TXT["dxf_col_no"], 80),
+            (TXT["app_col_serial"], 130),
+            (TXT["dxf_col_wst"], 110),
+            (TXT["dxf_col_dicke"], 90),
+            (TXT["dxf_col_ch_nr"], 130),
+            (TXT["text_col_remark"], 380),
+        ]
+        for idx, (hdr, width) in enumerate(cols):
+            self.tree.InsertColumn(idx, hdr, width=width)
+
+        kinds = {"K": TXT["text_kind_k"], "DXF": TXT["text_kind_dxf"], "APP": TXT["text_kind_app"]}
+        for hit in self.hits:
+            dxf = hit.dxf
+            row = [
+                kinds.get(hit.kind, hit.kind),
+                hit.k_code,
+                str(hit.year) if hit.year else "—",
+                str(dxf.dxf_no) if dxf else "",
+                hit.appnr.serial_no if hit.appnr else "",
+                dxf.wst if dxf else "",
+                "" if dxf is None or dxf.dicke_mm is None else f"{dxf.dicke_mm:g}",
+                dxf.ch_nr if dxf else "",
+                dxf.bemerkung if dxf else "",
+            ]
+            idx = self.tree.InsertItem(self.tree.GetItemCount(), row[0])
+            for col, val in enumerate(row[1:], 1):
+                self.tree.SetItem(idx, col, val)
+
+            if not hit.year:
+                self.tree.SetItemBackgroundColour(idx, wx.Colour("#fff0a0"))
+
+        self.tree.Bind(wx.EVT_LIST_ITEM_ACTIVATED, lambda _: self._open_folder())
+        tbl_sizer.Add(self.tree, 1, wx.EXPAND | wx.ALL, 6)
+
+        if self.total > len(self.hits):
+            note = wx.StaticText(self, label=TXT["text_limit_note"].format(shown=len(self.hits), total=self.total))
+            note.SetForegroundColour(wx.Colour(CLR_LABEL))
+            tbl_sizer.Add(note, 0, wx.LEFT | wx.RIGHT | wx.BOTTOM, 6)
+
+        act_sizer = static_box_sizer(self, TXT["actions_title"])
+        btn_row = wx.BoxSizer(wx.HORIZONTAL)
+
+        actions = [
+            (TXT["open_folder"], CLR_BTN_OK, self._open_folder),
+            (TXT["open_dxf"], CLR_BTN_DARK, self._show_dxf),
+            (TXT["close_dialog"], CLR_BTN_DANGER, self.Close),
+        ]
+        for label, color, handler in actions:
+            btn = make_gen_button(self, label, color, wx.Size(-1, 34), 10)
+            btn.Bind(wx.EVT_BUTTON, lambda _, h=handler: h())
+            btn_row.Add(btn, 1, wx.RIGHT, 6)
+
+        act_sizer.Add(btn_row, 0, wx.EXPAND | wx.ALL, 6)
+
+        outer.Add(tbl_sizer, 1, wx.EXPAND | wx.ALL, 10)
+        outer.Add(act_sizer, 0, wx.EXPAND | wx.LEFT | wx.RIGHT | wx.BOTTOM, 10)
+        self.SetSizer(outer)
+
+    def _selected(self) -> Optional[SearchHit]:
+        idx = self.tree.GetFirstSelected()
+        if idx == wx.NOT_FOUND or idx < 0 or idx >= len(self.hits):
+            wx.MessageBox(TXT["text_select_entry"], TXT["msg_hint"], wx.OK | wx.ICON_INFORMATION)
+            return None
+        return self.hits[idx]
+
+    def _open_folder(self) -> None:
+        hit = self._selected()
+        if not hit:
+            return
+
+        entry = hit.entry
+        if entry is None and hasattr(self.owner, "k_index"):
+            entry = self.owner.k_index.find_exact(hit.k_code)
+        if not entry or not entry.has_folder:
+            wx.MessageBox(
+                TXT["msg_no_folder_single"].format(code=hit.k_code),
+                TXT["msg_no_folder_title"],
+                wx.OK | wx.ICON_WARNING,
+            )
+            return
+
+        p = Path(entry.folder_path)
+        if p.exists():
+            open_path(p)
+        else:
+            wx.MessageBox(
+                TXT["msg_folder_missing"].format(path=p),
+                TXT["msg_error"],
+                wx.OK | wx.ICON_WARNING,
+            )
+
+    def _show_dxf(self) -> None:
+        hit = self._selected()
+        if not hit:
+            return
+        if hasattr(self.owner, "_show_dxf_results"):
+            self.owner._show_dxf_results(hit.k_code)
+
+
 class ServiceDialog(wx.Dialog):
     """
     Служебное окно.
@@ -0,0 +1,288 @@
+"""
+excel_ingest.py
+===============
+
+Инкрементальное чтение Excel-таблиц (DXF-2017.xlsm, App.Nr.) для индексов.
+
+Зачем нужен
+-----------
+Раньше rebuild_excel_index и AppNrRepository.rebuild_full / rebuild_tail
+при каждом обновлении открывали книгу, проходили все строки, заново
+строили все записи и переписывали таблицу целиком — даже если файл
+с прошлого раза не менялся. Частичное обновление в main_frame
+тратило на это большую часть времени.
+
+ExcelIngest:
+- если размер и mtime файла совпадают с сохранёнными — книга
+  вообще не открывается;
+- читает только нужные колонки (max_col по последней из них);
+- режет строки на блоки по block_rows и считает отпечаток (хэш)
+  каждого блока; в репозиторий отдаются только блоки, отпечаток
+  которых изменился, — только их строки разбираются в записи
+  и перезаписываются в базе;
+- состояние (отпечатки блоков, stamp файла) хранится в meta
+  хранилища и пишется в той же транзакции, что и записи блоков.
+
+Точка продолжения
+-----------------
+Изменённые блоки сбрасываются в базу пачками по flush_blocks. Если
+обновление прервано (закрыли программу, упала сеть), отпечатки уже
+записанных блоков сохранены вместе с их строками, а stamp файла — нет.
+Следующий запуск снова читает книгу, но блоки до resume_row уже
+совпадают по отпечатку и пропускаются.
+
+Важно
+-----
+Формат xlsx читается только потоком с начала листа, поэтому
+пропустить чтение неизменённых строк нельзя — экономится разбор
+строк в записи и запись в базу. Изменение набора колонок или
+размера блока сбрасывает состояние (полное чтение).
+"""
+
+from __future__ import annotations
+
+import hashlib
+import os
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Callable, Optional
+
+from openpyxl import load_workbook
+from openpyxl.utils import column_index_from_string
+
+from .index_store import IndexStore
+from .logging_setup import get_logger
+
+logger = get_logger()
+
+
+BLOCK_ROWS = 256
+FLUSH_BLOCKS = 20
+
+
+@dataclass
+class IngestBatch:
+    """
+    Пачка изменённых блоков для записи в одной транзакции.
+
+    rows:
+        Пары (номер строки Excel, значения нужных колонок) всех
+        строк изменённых блоков — в порядке columns.
+
+    spans:
+        Диапазоны строк [first, last] изменённых блоков: записи,
+        взятые раньше из этих строк, удаляются перед вставкой.
+
+    reset:
+        True — перед записью таблица очищается целиком (полное чтение).
+
+    truncate_after:
+        Номер последней строки листа (только в последней пачке):
+        записи из строк ниже удаляются.
+
+    meta_key / meta:
+        Состояние инжеста, которое пишется вместе с записями.
+    """
+    rows: list[tuple[int, tuple]] = field(default_factory=list)
+    spans: list[tuple[int, int]] = field(default_factory=list)
+    reset: bool = False
+    truncate_after: Optional[int] = None
+    meta_key: str = ""
+    meta: dict = field(default_factory=dict)
+
+
+@dataclass
+class IngestStats:
+    """
+    Итог одного запуска.
+    """
+    skipped: bool = False
+    rows: int = 0
+    blocks: int = 0
+    changed_blocks: int = 0
+
+
+class ExcelIngest:
+    """
+    Инкрементальное чтение одного листа Excel.
+
+    Параметры:
+    ----------
+    store:
+        IndexStore — состояние хранится в meta["ingest.<name>"].
+
+    name:
+        Имя источника (dxf_excel, appnr).
+
+    path / sheet:
+        Файл книги и имя листа (None — активный лист).
+
+    columns:
+        Буквы нужных колонок, например "ABCDEFIKNS".
+
+    Пример:
+        ingest = ExcelIngest(store, "appnr", path, columns="AE")
+        stats = ingest.run(apply_batch)
+    """
+
+    def __init__(
+        self,
+        store: IndexStore,
+        name: str,
+        path: Path,
+        columns: str,
+        sheet: Optional[str] = None,
+        header_rows: int = 1,
+        block_rows: int = BLOCK_ROWS,
+        flush_blocks: int = FLUSH_BLOCKS,
+        keep_vba: bool = False,
+    ):
+        self.store = store
+        self.name = name
+        self.path = Path(path)
+        self.columns = columns.upper()
+        self.sheet = sheet
+        self.header_rows = header_rows
+        self.block_rows = max(1, int(block_rows))
+        self.flush_blocks = max(1, int(flush_blocks))
+        self.keep_vba = keep_vba
+
+        self._indexes = [column_index_from_string(c) - 1 for c in self.columns]
+        self._max_col = max(self._indexes) + 1
+
+    @property
+    def meta_key(self) -> str:
+        return f"ingest.{self.name}"
+
+    # --------------------------------------------------------
+    # Состояние
+    # --------------------------------------------------------
+
+    def _stamp(self) -> dict:
+        st = os.stat(self.path)
+        return {"size": st.st_size, "mtime_ns": st.st_mtime_ns}
+
+    def load_state(self) -> dict:
+        """
+        Сохранённое состояние; при другом наборе колонок / размере блока — пустое.
+        """
+        state = self.store.get_meta(self.meta_key, {}) or {}
+        if state.get("columns") != self.columns or state.get("block_rows") != self.block_rows:
+            return {}
+        return state
+
+    def is_unchanged(self) -> bool:
+        """
+        True, если файл не менялся с последнего полного чтения.
+        """
+        state = self.load_state()
+        return bool(state) and state.get("stamp") == self._stamp()
+
+    def _fingerprint(self, values: list[tuple]) -> str:
+        return hashlib.sha1(repr(values).encode("utf-8")).hexdigest()[:16]
+
+    # --------------------------------------------------------
+    # Чтение
+    # --------------------------------------------------------
+
+    def run(self, apply: Callable[[IngestBatch], None], full: bool = False) -> IngestStats:
+        """
+        Читает лист и передаёт изменённые блоки в apply пачками.
+
+        full=True — состояние игнорируется, все блоки считаются
+        изменёнными, первая пачка очищает таблицу (reset).
+
+        Raises:
+            KeyError: листа sheet нет в книге.
+        """
+        stats = IngestStats()
+        stamp = self._stamp()
+        state = {} if full else self.load_state()
+
+        if not full and state.get("stamp") == stamp:
+            stats.skipped = True
+            return stats
+
+        old_blocks: list[str] = list(state.get("blocks", []))
+        new_blocks: list[str] = list(old_blocks)
+        resume_row = state.get("resume_row")
+        if resume_row:
+            logger.info(f"ExcelIngest {self.name}: Fortsetzung ab Zeile {resume_row}")
+
+        pending = IngestBatch(reset=not state)
+        pending_blocks = 0
+
+        def meta(complete: bool, last_row: int) -> dict:
+            return {
+                "columns": self.columns,
+                "block_rows": self.block_rows,
+                "blocks": new_blocks,
+                "stamp": stamp if complete else None,
+                "resume_row": None if complete else last_row,
+            }
+
+        def flush(last_row: int, truncate_after: Optional[int] = None) -> None:
+            nonlocal pending, pending_blocks
+            pending.truncate_after = truncate_after
+            pending.meta_key = self.meta_key
+            pending.meta = meta(truncate_after is not None, last_row)
+            apply(pending)
+            pending = IngestBatch()
+            pending_blocks = 0
+
+        def close_block(index: int, block: list[tuple[int, tuple]]) -> None:
+            nonlocal pending_blocks
+            fp = self._fingerprint([values for _, values in block])
+            stats.blocks += 1
+
+            if index < len(old_blocks) and old_blocks[index] == fp:
+                return
+
+            stats.changed_blocks += 1
+            if index < len(new_blocks):
+                new_blocks[index] = fp
+            else:
+                new_blocks.append(fp)
+
+            first = self.header_rows + 1 + index * self.block_rows
+            pending.spans.append((first, first + self.block_rows - 1))
+            pending.rows.extend(block)
+            pending_blocks += 1
+
+            if pending_blocks >= self.flush_blocks:
+                flush(block[-1][0])
+
+        wb = load_workbook(self.path, data_only=True, read_only=True, keep_vba=self.keep_vba)
+        try:
+            if self.sheet is None:
+                ws = wb.active
+            elif self.sheet in wb.sheetnames:
+                ws = wb[self.sheet]
+            else:
+                raise KeyError(f"Blatt '{self.sheet}' wurde in der Excel-Datei nicht gefunden.")
+
+            block: list[tuple[int, tuple]] = []
+            index = 0
+            row_no = self.header_rows
+
+            for row in ws.iter_rows(min_row=self.header_rows + 1, max_col=self._max_col, values_only=True):
+                row_no += 1
+                values = tuple(row[i] if i < len(row) else None for i in self._indexes)
+                block.append((row_no, values))
+
+                if len(block) == self.block_rows:
+                    close_block(index, block)
+                    block = []
+                    index += 1
+
+            if block:
+                close_block(index, block)
+                index += 1
+        finally:
+            wb.close()
+
+        # Блоки за концом листа больше не существуют
+        del new_blocks[index:]
+        stats.rows = row_no - self.header_rows
+        flush(row_no, truncate_after=row_no)
+        return stats
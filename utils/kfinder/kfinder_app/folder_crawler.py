@@ -0,0 +1,364 @@
+"""
+folder_crawler.py
+=================
+
+Параллельный обход архива заказов в поисках папок Kxxxxx.
+
+Зачем нужен
+-----------
+Архив G:\\Auftragsdokumente лежит на сетевом диске. Однопоточный
+os.walk по каждому году тратит почти всё время на ожидание ответа
+сервера на каждый listdir/stat, поэтому полный rebuild K-индекса идёт
+очень долго.
+
+FolderCrawler:
+- читает каталоги через os.scandir (тип записи приходит вместе
+  с листингом, без отдельного stat на каждую запись);
+- обходит годы и подкаталоги в ограниченном пуле потоков — запросы
+  к серверу идут параллельно;
+- не спускается внутрь найденной папки Kxxxxx и ниже max_depth;
+- поддерживает отмену (threading.Event) и досрочную остановку
+  на первой найденной папке (точечный поиск одного кода);
+- сообщает прогресс через progress_cb: "2024: 812 Ordner" по мере
+  завершения каждого года.
+
+Журнал каталогов
+----------------
+Если в crawl() передан журнал (путь -> DirState), обход инкрементальный:
+
+- для каждого известного каталога выполняется только stat;
+- каталог перечитывается (scandir), только если его mtime изменился —
+  при создании, удалении или переименовании вложенной папки
+  ОС обновляет mtime родителя;
+- для неизменённых каталогов список подпапок и найденные K-папки
+  берутся из журнала;
+- исчезнувшие каталоги попадают в CrawlStats.removed.
+
+Так находятся и K-папки, созданные или перенесённые в старые годы,
+а повторное обновление стоит одного stat на каталог вместо листинга.
+
+Для проверки без сетевого диска функции чтения каталога и stat можно
+подменить (параметры scandir, stat) — например, обёртками с time.sleep,
+имитирующими задержку сети на синтетическом дереве папок.
+
+Важно
+-----
+Модуль не содержит GUI и не знает о KEntry — результат обхода
+превращает в записи индекса KIndex.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import os
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Callable, Iterable, Optional
+
+from .logging_setup import get_logger
+
+logger = get_logger()
+
+
+@dataclass
+class DirState:
+    """
+    Состояние одного просмотренного каталога в журнале.
+
+    year / depth:
+        Год архива и глубина от папки года.
+
+    mtime_ns:
+        mtime каталога на момент листинга.
+
+    listing_hash:
+        Хэш отсортированного списка вложенных папок.
+
+    subdirs:
+        Имена вложенных папок, в которые нужно спускаться.
+
+    hits:
+        Имена найденных вложенных K-папок.
+    """
+    year: int
+    depth: int
+    mtime_ns: int
+    listing_hash: str
+    subdirs: list[str] = field(default_factory=list)
+    hits: list[str] = field(default_factory=list)
+
+
+@dataclass
+class CrawlStats:
+    """
+    Итог обхода.
+
+    listed  — каталогов прочитано через scandir
+    reused  — каталогов взято из журнала (mtime не изменился)
+    changed — новые/изменённые записи журнала (путь -> DirState)
+    removed — пути журнала, которых больше нет на диске
+    failed  — каталоги журнала, которые не удалось прочитать;
+              их состояние и найденные папки взяты из журнала
+    """
+    listed: int = 0
+    reused: int = 0
+    changed: dict[str, DirState] = field(default_factory=dict)
+    removed: list[str] = field(default_factory=list)
+    failed: list[str] = field(default_factory=list)
+
+
+def listing_hash(names: Iterable[str]) -> str:
+    """
+    Хэш набора имён вложенных папок (порядок не важен).
+    """
+    return hashlib.sha1("\n".join(sorted(names)).encode("utf-8")).hexdigest()
+
+
+def _is_better(hit: tuple[int, Path], prev: tuple[int, Path]) -> bool:
+    """
+    Более поздний год важнее; внутри года — меньший путь (детерминированно).
+    """
+    if hit[0] != prev[0]:
+        return hit[0] > prev[0]
+    return hit[1] < prev[1]
+
+
+class CrawlCancelled(Exception):
+    """
+    Обход прерван вызовом cancel().
+    """
+
+
+class FolderCrawler:
+    """
+    Параллельный поиск папок, имя которых соответствует шаблону.
+
+    Параметры:
+    ----------
+    pattern:
+        Регулярное выражение для имени папки (например, ^K\\d{5}$).
+
+    max_workers:
+        Размер пула потоков (одновременных запросов к диску).
+
+    max_depth:
+        Максимальная глубина спуска от папки года (0 — только сама папка года).
+
+    cancel_event:
+        Событие отмены; если не передано — создаётся своё.
+
+    scandir / stat:
+        Функции чтения каталога и stat (по умолчанию os.scandir / os.stat).
+    """
+
+    def __init__(
+        self,
+        pattern: re.Pattern,
+        max_workers: int = 8,
+        max_depth: int = 6,
+        cancel_event: Optional[threading.Event] = None,
+        scandir: Callable[[str], Iterable[os.DirEntry]] = os.scandir,
+        stat: Callable[[str], os.stat_result] = os.stat,
+    ):
+        self.pattern = pattern
+        self.max_workers = max(1, int(max_workers))
+        self.max_depth = max(0, int(max_depth))
+        self.cancel_event = cancel_event or threading.Event()
+        self.scandir = scandir
+        self.stat = stat
+        self.last_stats = CrawlStats()
+
+    def cancel(self) -> None:
+        """
+        Прерывает текущий обход (crawl поднимет CrawlCancelled).
+        """
+        self.cancel_event.set()
+
+    @property
+    def cancelled(self) -> bool:
+        return self.cancel_event.is_set()
+
+    # --------------------------------------------------------
+    # Чтение одного каталога
+    # --------------------------------------------------------
+
+    def _list_dir(self, path: str, year: int, depth: int, mtime_ns: int) -> DirState:
+        """
+        Читает каталог и возвращает его состояние для журнала.
+        """
+        subdirs: list[str] = []
+        hits: list[str] = []
+        with self.scandir(path) as it:
+            for entry in it:
+                try:
+                    if not entry.is_dir():
+                        continue
+                except OSError:
+                    continue
+
+                if self.pattern.fullmatch(entry.name.upper()):
+                    # Внутрь найденной K-папки не спускаемся
+                    hits.append(entry.name)
+                elif depth < self.max_depth:
+                    subdirs.append(entry.name)
+
+        return DirState(
+            year=year,
+            depth=depth,
+            mtime_ns=mtime_ns,
+            listing_hash=listing_hash(subdirs + hits),
+            subdirs=sorted(subdirs),
+            hits=sorted(hits),
+        )
+
+    # --------------------------------------------------------
+    # Обход
+    # --------------------------------------------------------
+
+    def crawl(
+        self,
+        years: Iterable[tuple[int, Path]],
+        progress_cb: Optional[Callable[[str], None]] = None,
+        target: Optional[str] = None,
+        journal: Optional[dict[str, DirState]] = None,
+    ) -> dict[str, tuple[int, Path]]:
+        """
+        Обходит папки годов и возвращает {ИМЯ_ПАПКИ: (год, путь)}.
+
+        years:
+            Пары (год, путь к папке года). Несуществующие пропускаются.
+
+        target:
+            Если задан — обход останавливается, как только найдена папка
+            с этим именем (в верхнем регистре); результат содержит только её.
+
+        journal:
+            Журнал предыдущего обхода (путь -> DirState). Если передан,
+            перечитываются только каталоги с изменённым mtime. Изменения
+            журнала — в self.last_stats (changed / removed); сам словарь
+            не изменяется. Известный каталог, который не удалось прочитать
+            (ошибка, кроме FileNotFoundError), остаётся как в журнале
+            вместе с поддеревом — см. last_stats.failed.
+
+        При совпадении имени в нескольких местах побеждает более поздний год,
+        внутри года — лексикографически меньший путь.
+        """
+        stats = CrawlStats()
+        self.last_stats = stats
+        use_journal = journal is not None and target is None
+        journal = journal or {}
+
+        found: dict[str, tuple[int, Path]] = {}
+        counts: dict[int, int] = {}
+        pending_by_year: dict[int, int] = {}
+        visited: set[str] = set()
+        scanned_years: set[int] = set()
+        pending = 0
+        done = threading.Condition()
+        stop = threading.Event()
+
+        def finish_dir(year: int) -> None:
+            nonlocal pending
+            with done:
+                pending -= 1
+                pending_by_year[year] -= 1
+                if pending_by_year[year] == 0 and progress_cb and not stop.is_set():
+                    progress_cb(f"{year}: {counts.get(year, 0)} Ordner")
+                if pending == 0:
+                    done.notify_all()
+
+        def submit(pool: ThreadPoolExecutor, year: int, path: str, depth: int) -> None:
+            nonlocal pending
+            with done:
+                pending += 1
+                pending_by_year[year] = pending_by_year.get(year, 0) + 1
+            pool.submit(scan_dir, pool, year, path, depth)
+
+        def add_hits(state: DirState, path: str) -> None:
+            with done:
+                for name in state.hits:
+                    key = name.upper()
+                    counts[state.year] = counts.get(state.year, 0) + 1
+                    hit = (state.year, Path(path) / name)
+                    prev = found.get(key)
+                    if prev is None or _is_better(hit, prev):
+                        found[key] = hit
+
+        def scan_dir(pool: ThreadPoolExecutor, year: int, path: str, depth: int) -> None:
+            try:
+                if self.cancel_event.is_set() or stop.is_set():
+                    return
+
+                prev = journal.get(path) if use_journal else None
+                try:
+                    mtime_ns = self.stat(path).st_mtime_ns if use_journal else 0
+                    if prev is not None and prev.mtime_ns == mtime_ns and prev.depth == depth:
+                        state = prev
+                        with done:
+                            visited.add(path)
+                            stats.reused += 1
+                    else:
+                        state = self._list_dir(path, year, depth, mtime_ns)
+                        with done:
+                            visited.add(path)
+                            stats.listed += 1
+                            if use_journal and state != prev:
+                                stats.changed[path] = state
+                except FileNotFoundError:
+                    return
+                except OSError as e:
+                    if prev is None:
+                        raise
+                    # Каталог есть, но не читается (права, сбой сети):
+                    # его поддерево остаётся таким, как в журнале
+                    logger.warning(f"FolderCrawler.scan_dir {path}: {e} — Stand aus dem Journal")
+                    state = prev
+                    with done:
+                        visited.add(path)
+                        stats.failed.append(path)
+
+                add_hits(state, path)
+                if target is not None and target in (name.upper() for name in state.hits):
+                    stop.set()
+                    return
+
+                for name in state.subdirs:
+                    if self.cancel_event.is_set() or stop.is_set():
+                        break
+                    submit(pool, year, os.path.join(path, name), depth + 1)
+            except Exception as e:
+                logger.error(f"FolderCrawler.scan_dir {path}: {e}")
+            finally:
+                finish_dir(year)
+
+        with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="kfinder-crawl") as pool:
+            for year, year_path in years:
+                if self.cancel_event.is_set():
+                    break
+                scanned_years.add(year)
+                if not os.path.isdir(year_path):
+                    if progress_cb:
+                        progress_cb(f"{year}: 0 Ordner")
+                    continue
+                submit(pool, year, str(year_path), 0)
+
+            with done:
+                while pending > 0:
+                    done.wait(0.1)
+
+        if self.cancel_event.is_set():
+            raise CrawlCancelled()
+
+        if use_journal:
+            stats.removed = sorted(
+                path for path, state in journal.items()
+                if state.year in scanned_years and path not in visited
+            )
+
+        if target is not None:
+            return {target: found[target]} if target in found else {}
+
+        return found
@@ -0,0 +1,532 @@
+"""
+geometry_cache.py
+=================
+
+Фоновый расчёт геометрии и превью DXF-чертежей деталей.
+
+Зачем нужен
+-----------
+В диалоге DXF-результатов видно только номер, материал и толщину.
+Чтобы понять, что за деталь, DWG приходилось открывать в CAD,
+а габариты и длину реза — смотреть там же.
+
+GeometryCache для каждого DXF-номера с основным DWG:
+- берёт DXF рядом с DWG (xxxxx.dxf), а если его нет — сам DWG через
+  ODA File Converter (ezdxf.addons.odafc), если он установлен;
+- считает габариты, длину реза, число врезок (контуров) и площадь
+  детали (внешний контур минус отверстия);
+- рисует маленькое PNG-превью контуров;
+- сохраняет результат в таблицу dxf_geometry (index_store.py).
+
+Кэш
+---
+Сводка считается актуальной, пока у файла тот же путь, размер и
+mtime. Если отметка изменилась, файл читается и хэшируется: при том
+же sha1 (файл переписали без изменений) обновляется только отметка,
+иначе геометрия пересчитывается. Каждая сводка сохраняется сразу —
+прерванный проход продолжается со следующего файла.
+
+Файлы, которые не удалось разобрать, тоже сохраняются (с error),
+чтобы не читать их заново при каждом запуске.
+
+Важно
+-----
+- ezdxf — необязательная зависимость: без неё расчёт просто
+  отключается, остальной K-Finder работает как раньше;
+- чтение с сетевого диска ограничено geometry_mb_per_s (на все
+  потоки вместе), потоков — geometry_workers: проход не должен
+  мешать остальным пользователям общего диска;
+- модуль не содержит GUI.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import io
+import os
+import struct
+import threading
+import time
+import zlib
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, Iterator, Optional
+
+from .config import AppSettings
+from .index_store import IndexStore
+from .logging_setup import get_logger
+from .models import DXFFileRecord, GeometrySummary
+
+logger = get_logger()
+
+
+# Версия алгоритма: при изменении расчёта все сводки пересчитываются
+GEOMETRY_VERSION = 1
+
+# Размер превью, px
+PREVIEW_SIZE = (200, 150)
+PREVIEW_MARGIN = 6
+
+# Точность аппроксимации дуг и сплайнов, мм
+FLATTEN_TOLERANCE = 0.05
+
+# Допуск стыковки концов отрезков в один контур, мм
+JOIN_TOLERANCE = 0.01
+
+# Блок чтения файла (ограничение скорости считается по блокам)
+READ_CHUNK = 256 * 1024
+
+# Типы примитивов, которые образуют контур реза.
+# Текст, размеры и штриховка в геометрию не входят.
+CUT_TYPES = frozenset({
+    "LINE",
+    "ARC",
+    "CIRCLE",
+    "ELLIPSE",
+    "LWPOLYLINE",
+    "POLYLINE",
+    "SPLINE",
+})
+
+Point = tuple[float, float]
+
+
+def ezdxf_available() -> bool:
+    """
+    True, если установлена библиотека ezdxf.
+    """
+    try:
+        import ezdxf  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+# ------------------------------------------------------------
+# Геометрия
+# ------------------------------------------------------------
+
+def _entity_paths(entity) -> Iterator:
+    from ezdxf import path as ezpath
+
+    kind = entity.dxftype()
+    if kind == "INSERT":
+        for sub in entity.virtual_entities():
+            yield from _entity_paths(sub)
+        return
+    if kind not in CUT_TYPES:
+        return
+
+    try:
+        path = ezpath.make_path(entity)
+    except (TypeError, ValueError):
+        return
+    yield from path.sub_paths()
+
+
+def _same(a: Point, b: Point, tol: float = JOIN_TOLERANCE) -> bool:
+    return abs(a[0] - b[0]) <= tol and abs(a[1] - b[1]) <= tol
+
+
+def _key(p: Point) -> tuple[int, int]:
+    return round(p[0] / JOIN_TOLERANCE), round(p[1] / JOIN_TOLERANCE)
+
+
+def _chain(pieces: list[list[Point]]) -> list[list[Point]]:
+    """
+    Склеивает открытые куски (LINE/ARC) в контуры по совпадающим концам.
+    """
+    ends: dict[tuple[int, int], list[int]] = {}
+    for i, piece in enumerate(pieces):
+        ends.setdefault(_key(piece[0]), []).append(i)
+        ends.setdefault(_key(piece[-1]), []).append(i)
+
+    used = [False] * len(pieces)
+
+    def take(point: Point) -> Optional[list[Point]]:
+        for i in ends.get(_key(point), ()):
+            if used[i]:
+                continue
+            used[i] = True
+            piece = pieces[i]
+            return piece if _same(piece[0], point) else piece[::-1]
+        return None
+
+    chains: list[list[Point]] = []
+    for i, piece in enumerate(pieces):
+        if used[i]:
+            continue
+        used[i] = True
+        chain = list(piece)
+
+        while not _same(chain[0], chain[-1]):
+            nxt = take(chain[-1])
+            if nxt is None:
+                break
+            chain.extend(nxt[1:])
+
+        while not _same(chain[0], chain[-1]):
+            prev = take(chain[0])
+            if prev is None:
+                break
+            chain[:0] = prev[::-1][:-1]
+
+        chains.append(chain)
+    return chains
+
+
+def extract_contours(doc, tolerance: float = FLATTEN_TOLERANCE) -> list[list[Point]]:
+    """
+    Контуры реза из modelspace: ломаные, замкнутые повторяют первую точку в конце.
+    """
+    closed: list[list[Point]] = []
+    pieces: list[list[Point]] = []
+
+    for entity in doc.modelspace():
+        for sub in _entity_paths(entity):
+            points = [(v.x, v.y) for v in sub.flattening(tolerance)]
+            if len(points) < 2:
+                continue
+            if sub.is_closed or _same(points[0], points[-1]):
+                closed.append(points)
+            else:
+                pieces.append(points)
+
+    return closed + _chain(pieces)
+
+
+def _length(points: list[Point]) -> float:
+    return sum(
+        ((x2 - x1) ** 2 + (y2 - y1) ** 2) ** 0.5
+        for (x1, y1), (x2, y2) in zip(points, points[1:])
+    )
+
+
+def _area(points: list[Point]) -> float:
+    return abs(sum(
+        x1 * y2 - x2 * y1
+        for (x1, y1), (x2, y2) in zip(points, points[1:])
+    )) / 2.0
+
+
+def summarize(summary: GeometrySummary, contours: list[list[Point]]) -> None:
+    """
+    Заполняет габариты, длину реза, число врезок и площадь.
+
+    Площадь: наибольший замкнутый контур считается внешним,
+    остальные замкнутые — отверстиями.
+    """
+    if not contours:
+        summary.error = "Keine Konturen"
+        return
+
+    xs = [p[0] for c in contours for p in c]
+    ys = [p[1] for c in contours for p in c]
+    summary.min_x, summary.max_x = min(xs), max(xs)
+    summary.min_y, summary.max_y = min(ys), max(ys)
+
+    summary.cut_length_mm = sum(_length(c) for c in contours)
+    summary.pierce_count = len(contours)
+
+    areas = sorted(
+        (_area(c) for c in contours if len(c) > 3 and _same(c[0], c[-1])),
+        reverse=True,
+    )
+    summary.area_mm2 = max(0.0, areas[0] - sum(areas[1:])) if areas else 0.0
+
+
+# ------------------------------------------------------------
+# Превью
+# ------------------------------------------------------------
+
+def _png_gray(width: int, height: int, pixels: bytearray) -> bytes:
+    raw = b"".join(
+        b"\x00" + bytes(pixels[y * width:(y + 1) * width])
+        for y in range(height)
+    )
+
+    def chunk(tag: bytes, data: bytes) -> bytes:
+        return (
+            struct.pack(">I", len(data))
+            + tag
+            + data
+            + struct.pack(">I", zlib.crc32(tag + data) & 0xFFFFFFFF)
+        )
+
+    return (
+        b"\x89PNG\r\n\x1a\n"
+        + chunk(b"IHDR", struct.pack(">IIBBBBB", width, height, 8, 0, 0, 0, 0))
+        + chunk(b"IDAT", zlib.compress(raw, 9))
+        + chunk(b"IEND", b"")
+    )
+
+
+def render_preview(
+    contours: list[list[Point]],
+    bbox: tuple[float, float, float, float],
+    size: tuple[int, int] = PREVIEW_SIZE,
+) -> bytes:
+    """
+    Чёрные контуры на белом фоне, PNG в оттенках серого (без wx и PIL).
+    """
+    width, height = size
+    min_x, min_y, max_x, max_y = bbox
+    pixels = bytearray(b"\xff" * (width * height))
+
+    span_x = max(max_x - min_x, 1e-9)
+    span_y = max(max_y - min_y, 1e-9)
+    scale = min((width - 2 * PREVIEW_MARGIN) / span_x, (height - 2 * PREVIEW_MARGIN) / span_y)
+    off_x = (width - span_x * scale) / 2
+    off_y = (height - span_y * scale) / 2
+
+    def to_px(p: Point) -> tuple[int, int]:
+        px = int(round(off_x + (p[0] - min_x) * scale))
+        py = int(round(height - 1 - (off_y + (p[1] - min_y) * scale)))
+        return min(max(px, 0), width - 1), min(max(py, 0), height - 1)
+
+    for contour in contours:
+        prev = to_px(contour[0])
+        for point in contour[1:]:
+            cur = to_px(point)
+            if cur == prev:
+                continue
+
+            # Брезенхэм
+            x0, y0 = prev
+            x1, y1 = cur
+            dx, dy = abs(x1 - x0), -abs(y1 - y0)
+            sx = 1 if x0 < x1 else -1
+            sy = 1 if y0 < y1 else -1
+            err = dx + dy
+            while True:
+                pixels[y0 * width + x0] = 0
+                if x0 == x1 and y0 == y1:
+                    break
+                e2 = 2 * err
+                if e2 >= dy:
+                    err += dy
+                    x0 += sx
+                if e2 <= dx:
+                    err += dx
+                    y0 += sy
+            prev = cur
+
+    return _png_gray(width, height, pixels)
+
+
+# ------------------------------------------------------------
+# Чтение файлов
+# ------------------------------------------------------------
+
+class _Throttle:
+    """
+    Общее для всех потоков ограничение скорости чтения, байт/с.
+    """
+
+    def __init__(self, bytes_per_s: float):
+        self.rate = bytes_per_s
+        self._lock = threading.Lock()
+        self._next = time.monotonic()
+
+    def consume(self, n: int) -> None:
+        if self.rate <= 0:
+            return
+        with self._lock:
+            now = time.monotonic()
+            start = max(now, self._next)
+            self._next = start + n / self.rate
+        delay = start - now
+        if delay > 0:
+            time.sleep(delay)
+
+
+def _read_file(path: Path, throttle: _Throttle, cancel_event: threading.Event) -> Optional[bytes]:
+    """
+    Читает файл блоками с ограничением скорости; None — проход отменён.
+    """
+    buf = io.BytesIO()
+    with open(path, "rb") as f:
+        while True:
+            if cancel_event.is_set():
+                return None
+            chunk = f.read(READ_CHUNK)
+            if not chunk:
+                break
+            throttle.consume(len(chunk))
+            buf.write(chunk)
+    return buf.getvalue()
+
+
+def _load_document(path: Path, data: bytes):
+    if path.suffix.lower() == ".dxf":
+        from ezdxf import recover
+
+        doc, _auditor = recover.read(io.BytesIO(data))
+        return doc
+
+    from ezdxf.addons import odafc
+
+    if not odafc.is_installed():
+        raise RuntimeError("DWG ohne DXF-Kopie (ODA File Converter nicht installiert)")
+    return odafc.readfile(str(path))
+
+
+# ------------------------------------------------------------
+# Кэш
+# ------------------------------------------------------------
+
+@dataclass
+class GeometryStats:
+    """
+    Итог одного прохода GeometryCache.run().
+    """
+    total: int = 0
+    reused: int = 0
+    touched: int = 0
+    computed: int = 0
+    failed: int = 0
+    missing: int = 0
+    cancelled: int = 0
+
+
+class GeometryCache:
+    """
+    Кэш геометрии и превью DXF в index_store.
+
+    Пример:
+        cache = GeometryCache(settings)
+        stats = cache.run()            # фоновый проход
+        summary = cache.get(11601)     # из диалога
+    """
+
+    def __init__(self, settings: AppSettings):
+        self.settings = settings
+        self.cfg = settings.indexing.dxf
+        self.store = IndexStore.for_settings(settings)
+        self._cancel = threading.Event()
+        self._running = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return self.cfg.geometry_enabled and ezdxf_available()
+
+    def get(self, dxf_no: int) -> Optional[GeometrySummary]:
+        return self.store.dxf_geometry(dxf_no)
+
+    def cancel(self) -> None:
+        self._cancel.set()
+
+    def run(self, progress_cb: Optional[Callable[[str], None]] = None) -> Optional[GeometryStats]:
+        """
+        Досчитывает сводки для всех DXF с основным DWG.
+
+        Возвращает None, если расчёт отключён или проход уже идёт.
+        """
+        if not self.cfg.geometry_enabled:
+            return None
+        if not ezdxf_available():
+            logger.warning("GeometryCache: ezdxf nicht installiert, DXF-Vorschau deaktiviert")
+            return None
+        if not self._running.acquire(blocking=False):
+            return None
+
+        try:
+            self._cancel.clear()
+            t0 = time.perf_counter()
+
+            pruned = self.store.prune_dxf_geometry()
+            stamps = self.store.dxf_geometry_stamps()
+            records = self.store.dxf_files_with_dwg()
+            throttle = _Throttle(self.cfg.geometry_mb_per_s * 1024 * 1024)
+
+            stats = GeometryStats(total=len(records))
+            with ThreadPoolExecutor(
+                max_workers=self.cfg.geometry_workers,
+                thread_name_prefix="kfinder-geometry",
+            ) as pool:
+                futures = [
+                    pool.submit(self._process, rec, stamps.get(rec.dxf_no), throttle)
+                    for rec in records
+                ]
+                for done, fut in enumerate(as_completed(futures), 1):
+                    outcome = fut.result()
+                    setattr(stats, outcome, getattr(stats, outcome) + 1)
+                    if progress_cb and done % 100 == 0:
+                        progress_cb(f"DXF-Vorschau: {done}/{stats.total}")
+
+            logger.info(
+                f"GeometryCache: {stats.total} DXF, neu {stats.computed}, "
+                f"unverändert {stats.reused + stats.touched}, Fehler {stats.failed}, "
+                f"fehlend {stats.missing}, abgebrochen {stats.cancelled}, "
+                f"entfernt {pruned} ({time.perf_counter() - t0:.1f} s)"
+            )
+            return stats
+        finally:
+            self._running.release()
+
+    # --------------------------------------------------------
+    # Внутреннее
+    # --------------------------------------------------------
+
+    @staticmethod
+    def _source_for(dwg_path: Path) -> Path:
+        for suffix in (".dxf", ".DXF"):
+            candidate = dwg_path.with_suffix(suffix)
+            if candidate.is_file():
+                return candidate
+        return dwg_path
+
+    def _process(
+        self,
+        rec: DXFFileRecord,
+        stamp: Optional[tuple[str, int, int, str, int]],
+        throttle: _Throttle,
+    ) -> str:
+        if self._cancel.is_set():
+            return "cancelled"
+
+        source = self._source_for(Path(rec.main_dwg_path))
+        try:
+            st = os.stat(source)
+        except OSError:
+            return "missing"
+
+        same_source = stamp is not None and stamp[0] == str(source) and stamp[4] == GEOMETRY_VERSION
+        if same_source and stamp[1] == st.st_size and stamp[2] == st.st_mtime_ns:
+            return "reused"
+
+        try:
+            data = _read_file(source, throttle, self._cancel)
+        except OSError as e:
+            logger.warning(f"GeometryCache: {source}: {e}")
+            return "missing"
+        if data is None:
+            return "cancelled"
+
+        sha1 = hashlib.sha1(data).hexdigest()
+        if same_source and stamp[3] == sha1:
+            self.store.touch_dxf_geometry(rec.dxf_no, st.st_size, st.st_mtime_ns)
+            return "touched"
+
+        summary = GeometrySummary(
+            dxf_no=rec.dxf_no,
+            source_path=str(source),
+            size=st.st_size,
+            mtime_ns=st.st_mtime_ns,
+            sha1=sha1,
+        )
+        try:
+            contours = extract_contours(_load_document(source, data))
+            summarize(summary, contours)
+            if not summary.error:
+                summary.preview_png = render_preview(
+                    contours,
+                    (summary.min_x, summary.min_y, summary.max_x, summary.max_y),
+                )
+        except Exception as e:
+            summary.error = str(e) or type(e).__name__
+            logger.warning(f"GeometryCache: {source}: {summary.error}")
+
+        self.store.upsert_dxf_geometry([summary], GEOMETRY_VERSION)
+        return "failed" if summary.error else "computed"
@@ -0,0 +1,1144 @@
+"""
+index_store.py
+==============
+
+Единое SQLite-хранилище индексов K-Finder.
+
+Зачем нужен
+-----------
+Раньше каждый индекс жил в отдельном JSON-файле (k_index.json,
+dxf_excel_index.json, dxf_index.json, appnr_index.json):
+
+- при старте все файлы целиком читались через json.load
+  и каждая запись сразу превращалась в dataclass;
+- любое хвостовое обновление переписывало весь файл
+  (мегабайты JSON с отступами).
+
+Теперь все индексы лежат в одной базе data/kfinder_index.db:
+
+- база открывается в режиме WAL, у каждого потока своё соединение
+  для чтения — чтение из GUI не ждёт фоновой индексации;
+- у таблиц есть индексы по полям точного поиска (K-номер, DXF-номер, App.Nr.);
+- записи читаются по запросу и превращаются в dataclass только
+  при обращении (ленивая гидратация);
+- хвостовые обновления пишут только изменённые строки (upsert).
+
+Миграция
+--------
+При первом открытии пустой базы данные один раз переносятся из старых
+JSON-файлов (пути берутся из AppSettings.data_files). После переноса
+в таблице meta ставится отметка, и JSON больше не читается и не пишется.
+
+Таблицы
+-------
+meta       : key -> JSON-значение (метаданные индексов, отметки миграции)
+k_entries  : KEntry реальных папок, ключ k_code, доп. колонка num (числовой номер)
+k_missing  : свободные K-номера (заглушки) диапазонами [start, end]
+dxf_excel  : DXFExcelRecord, индексы по k_num и dxf_no
+dxf_files  : DXFFileRecord, ключ dxf_no
+appnr      : AppNrRecord, ключ (serial_no, k_code), индексы по k_code
+             и числовому prefix
+             (у dxf_excel и appnr колонка src_row — номер строки Excel,
+             из которой пришла запись; см. excel_ingest.py)
+dir_journal: журнал каталогов архива заказов (folder_crawler.DirState):
+             mtime, хэш листинга, вложенные папки и найденные K-папки
+dxf_geometry: сводка геометрии и PNG-превью DXF-чертежей (geometry_cache.py),
+             ключ dxf_no; актуальность — по размеру/mtime/sha1 файла
+search_fts : полнотекстовый индекс FTS5 по K, DXF-Excel и App.Nr.
+             (см. search_index.py); ведётся триггерами на k_entries,
+             dxf_excel и appnr, поэтому любое обновление индексов
+             сразу попадает и в него
+
+Поиск по началу ключа выполняется не SQL-запросом, а префиксными
+индексами в памяти (prefix_index.py), которые строятся из хранилища.
+
+Потоки
+------
+Запись идёт через одно соединение под RLock (транзакции BEGIN IMMEDIATE).
+Чтение — через отдельное соединение только для чтения, своё у каждого
+потока: в режиме WAL оно видит последнее зафиксированное состояние
+и не ждёт ни RLock, ни идущей транзакции записи. Соединение потока
+закрывается, когда поток завершается. Экземпляр общий для всех
+репозиториев — см. for_settings().
+"""
+
+from __future__ import annotations
+
+import json
+import sqlite3
+import threading
+import weakref
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Iterable, Iterator, Optional
+
+from .config import AppSettings
+from .folder_crawler import DirState
+from .logging_setup import get_logger
+from .models import AppNrRecord, DXFExcelRecord, DXFFileRecord, GeometrySummary, KEntry
+from .range_set import RangeSet
+
+logger = get_logger()
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (
+    key   TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS k_entries (
+    k_code      TEXT PRIMARY KEY,
+    num         INTEGER NOT NULL,
+    year        INTEGER NOT NULL,
+    folder_path TEXT NOT NULL,
+    sketch_path TEXT NOT NULL,
+    dwg_path    TEXT NOT NULL,
+    has_folder  INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS ix_k_entries_num ON k_entries (num, has_folder);
+
+CREATE TABLE IF NOT EXISTS k_missing (
+    start INTEGER PRIMARY KEY,
+    end   INTEGER NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS dxf_excel (
+    id                   INTEGER PRIMARY KEY,
+    dxf_no               INTEGER NOT NULL,
+    k_num                TEXT NOT NULL,
+    schluessel           TEXT NOT NULL,
+    wst                  TEXT NOT NULL,
+    dicke_mm             REAL,
+    ch_nr                TEXT NOT NULL,
+    a_kn_brutto_qm       REAL,
+    laenge_zuschnitt_mm  REAL,
+    preis_pro_laenge_eur REAL,
+    bemerkung            TEXT NOT NULL,
+    src_row              INTEGER
+);
+CREATE INDEX IF NOT EXISTS ix_dxf_excel_k_num ON dxf_excel (k_num);
+CREATE INDEX IF NOT EXISTS ix_dxf_excel_dxf_no ON dxf_excel (dxf_no);
+CREATE INDEX IF NOT EXISTS ix_dxf_excel_src_row ON dxf_excel (src_row);
+
+CREATE TABLE IF NOT EXISTS dxf_files (
+    dxf_no        INTEGER PRIMARY KEY,
+    folder_name   TEXT NOT NULL,
+    folder_path   TEXT NOT NULL,
+    main_dwg_path TEXT NOT NULL,
+    has_main_dwg  INTEGER NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS appnr (
+    serial_no     TEXT NOT NULL,
+    k_code        TEXT NOT NULL,
+    serial_prefix TEXT NOT NULL,
+    prefix_num    INTEGER,
+    serial_upper  TEXT NOT NULL,
+    src_row       INTEGER,
+    PRIMARY KEY (serial_no, k_code)
+);
+CREATE INDEX IF NOT EXISTS ix_appnr_k_code ON appnr (k_code);
+CREATE INDEX IF NOT EXISTS ix_appnr_serial_upper ON appnr (serial_upper);
+CREATE INDEX IF NOT EXISTS ix_appnr_prefix_num ON appnr (prefix_num);
+CREATE INDEX IF NOT EXISTS ix_appnr_src_row ON appnr (src_row);
+
+CREATE TABLE IF NOT EXISTS dxf_geometry (
+    dxf_no        INTEGER PRIMARY KEY,
+    source_path   TEXT NOT NULL,
+    size          INTEGER NOT NULL,
+    mtime_ns      INTEGER NOT NULL,
+    sha1          TEXT NOT NULL,
+    version       INTEGER NOT NULL,
+    min_x         REAL NOT NULL,
+    min_y         REAL NOT NULL,
+    max_x         REAL NOT NULL,
+    max_y         REAL NOT NULL,
+    cut_length_mm REAL NOT NULL,
+    pierce_count  INTEGER NOT NULL,
+    area_mm2      REAL NOT NULL,
+    preview_png   BLOB NOT NULL,
+    error         TEXT NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS dir_journal (
+    path         TEXT PRIMARY KEY,
+    year         INTEGER NOT NULL,
+    depth        INTEGER NOT NULL,
+    mtime_ns     INTEGER NOT NULL,
+    listing_hash TEXT NOT NULL,
+    subdirs      TEXT NOT NULL,
+    hits         TEXT NOT NULL
+);
+"""
+
+# Полнотекстовый индекс. rowid документа = rowid исходной строки * 4 + вид,
+# поэтому триггеры удаляют документ по rowid без поиска.
+SEARCH_KIND_K = 1
+SEARCH_KIND_DXF = 2
+SEARCH_KIND_APP = 3
+
+_SEARCH_DICKE = (
+    "CASE WHEN {row}.dicke_mm IS NULL THEN '' "
+    "WHEN {row}.dicke_mm = CAST({row}.dicke_mm AS INTEGER) "
+    "THEN CAST(CAST({row}.dicke_mm AS INTEGER) AS TEXT) "
+    "ELSE CAST({row}.dicke_mm AS TEXT) END"
+)
+
+_SEARCH_DOCS = {
+    # таблица: (вид, колонки FTS, выражения по строке {row})
+    "k_entries": (SEARCH_KIND_K, "k", "{row}.k_code"),
+    "dxf_excel": (
+        SEARCH_KIND_DXF,
+        "k, dxf, wst, dicke, ch_nr, bemerkung",
+        "{row}.k_num, CAST({row}.dxf_no AS TEXT), {row}.wst, " + _SEARCH_DICKE + ", {row}.ch_nr, {row}.bemerkung",
+    ),
+    "appnr": (SEARCH_KIND_APP, "k, appnr", "{row}.k_code, {row}.serial_no"),
+}
+
+
+def _search_schema() -> str:
+    parts = ["""
+CREATE VIRTUAL TABLE IF NOT EXISTS search_fts USING fts5(
+    k, dxf, appnr, wst, dicke, ch_nr, bemerkung,
+    tokenize = "unicode61 tokenchars '.-/'",
+    prefix = '1 2 3'
+);
+"""]
+    for table, (kind, columns, values) in _SEARCH_DOCS.items():
+        insert = (
+            f"INSERT INTO search_fts (rowid, {columns}) "
+            f"VALUES (new.rowid * 4 + {kind}, {values.format(row='new')});"
+        )
+        delete = f"DELETE FROM search_fts WHERE rowid = old.rowid * 4 + {kind};"
+        parts.append(
+            f"CREATE TRIGGER IF NOT EXISTS {table}_fts_ai AFTER INSERT ON {table} BEGIN {insert} END;\n"
+            f"CREATE TRIGGER IF NOT EXISTS {table}_fts_ad AFTER DELETE ON {table} BEGIN {delete} END;\n"
+            f"CREATE TRIGGER IF NOT EXISTS {table}_fts_au AFTER UPDATE ON {table} BEGIN {delete} {insert} END;\n"
+        )
+    return "".join(parts)
+
+
+SEARCH_SCHEMA = _search_schema()
+
+K_COLUMNS = "k_code, year, folder_path, sketch_path, dwg_path, has_folder"
+DXF_EXCEL_COLUMNS = (
+    "dxf_no, k_num, schluessel, wst, dicke_mm, ch_nr, "
+    "a_kn_brutto_qm, laenge_zuschnitt_mm, preis_pro_laenge_eur, bemerkung"
+)
+DXF_FILE_COLUMNS = "dxf_no, folder_name, folder_path, main_dwg_path, has_main_dwg"
+APPNR_COLUMNS = "serial_no, serial_prefix, k_code"
+GEOMETRY_COLUMNS = (
+    "dxf_no, source_path, size, mtime_ns, sha1, min_x, min_y, max_x, max_y, "
+    "cut_length_mm, pierce_count, area_mm2, preview_png, error"
+)
+
+
+# ============================================================
+# Преобразование строк <-> моделей
+# ============================================================
+
+def _k_row(entry: KEntry) -> tuple:
+    return (
+        entry.k_code,
+        _k_num(entry.k_code),
+        entry.year,
+        entry.folder_path,
+        entry.sketch_path,
+        entry.dwg_path,
+        int(entry.has_folder),
+    )
+
+
+def _k_entry(row: tuple) -> KEntry:
+    return KEntry(
+        k_code=row[0],
+        year=row[1],
+        folder_path=row[2],
+        sketch_path=row[3],
+        dwg_path=row[4],
+        has_folder=bool(row[5]),
+    )
+
+
+def _k_num(k_code: str) -> int:
+    return int(k_code[1:]) if k_code[1:].isdigit() else 0
+
+
+def _k_code(num: int) -> str:
+    return f"K{num:05d}"
+
+
+def _k_placeholder(k_code: str) -> KEntry:
+    return KEntry(
+        k_code=k_code,
+        year=0,
+        folder_path="",
+        sketch_path="",
+        dwg_path="",
+        has_folder=False,
+    )
+
+
+def _dxf_excel_row(rec: DXFExcelRecord) -> tuple:
+    return (
+        rec.dxf_no, rec.k_num, rec.schluessel, rec.wst, rec.dicke_mm, rec.ch_nr,
+        rec.a_kn_brutto_qm, rec.laenge_zuschnitt_mm, rec.preis_pro_laenge_eur, rec.bemerkung,
+    )
+
+
+def _dxf_excel_record(row: tuple) -> DXFExcelRecord:
+    return DXFExcelRecord(*row)
+
+
+def _dxf_file_row(rec: DXFFileRecord) -> tuple:
+    return (rec.dxf_no, rec.folder_name, rec.folder_path, rec.main_dwg_path, int(rec.has_main_dwg))
+
+
+def _dxf_file_record(row: tuple) -> DXFFileRecord:
+    return DXFFileRecord(
+        dxf_no=row[0],
+        folder_name=row[1],
+        folder_path=row[2],
+        main_dwg_path=row[3],
+        has_main_dwg=bool(row[4]),
+    )
+
+
+def _appnr_row(rec: AppNrRecord) -> tuple:
+    prefix_num = int(rec.serial_prefix) if rec.serial_prefix.isdigit() else None
+    return (rec.serial_no, rec.k_code, rec.serial_prefix, prefix_num, rec.serial_no.upper())
+
+
+def _appnr_record(row: tuple) -> AppNrRecord:
+    return AppNrRecord(serial_no=row[0], serial_prefix=row[1], k_code=row[2])
+
+
+def _geometry_row(g: GeometrySummary, version: int) -> tuple:
+    return (
+        g.dxf_no, g.source_path, g.size, g.mtime_ns, g.sha1,
+        g.min_x, g.min_y, g.max_x, g.max_y,
+        g.cut_length_mm, g.pierce_count, g.area_mm2, g.preview_png, g.error,
+        version,
+    )
+
+
+def _geometry_summary(row: tuple) -> GeometrySummary:
+    return GeometrySummary(
+        dxf_no=row[0],
+        source_path=row[1],
+        size=row[2],
+        mtime_ns=row[3],
+        sha1=row[4],
+        min_x=row[5],
+        min_y=row[6],
+        max_x=row[7],
+        max_y=row[8],
+        cut_length_mm=row[9],
+        pierce_count=row[10],
+        area_mm2=row[11],
+        preview_png=bytes(row[12]),
+        error=row[13],
+    )
+
+
+class _Reader:
+    """
+    Соединение для чтения одного потока.
+
+    Живёт в threading.local потока: когда поток завершается, объект
+    удаляется и соединение закрывается (close).
+    """
+
+    __slots__ = ("conn", "close", "__weakref__")
+
+    def __init__(self, conn: sqlite3.Connection):
+        self.conn = conn
+        self.close = weakref.finalize(self, conn.close)
+
+
+# ============================================================
+# Хранилище
+# ============================================================
+
+class IndexStore:
+    """
+    SQLite-хранилище всех индексов K-Finder.
+
+    Получать через IndexStore.for_settings(settings) — так KIndex,
+    DXFRepository и AppNrRepository работают с одним соединением.
+    """
+
+    _instances: dict[Path, "IndexStore"] = {}
+    _instances_lock = threading.Lock()
+
+    def __init__(self, db_file: Path, settings: Optional[AppSettings] = None):
+        self.db_file = Path(db_file)
+        self.db_file.parent.mkdir(parents=True, exist_ok=True)
+
+        self._lock = threading.RLock()
+        self._conn = sqlite3.connect(
+            str(self.db_file),
+            check_same_thread=False,
+            isolation_level=None,
+        )
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        # INSERT OR REPLACE удаляет старую строку — триггеры search_fts
+        # должны срабатывать и на это удаление
+        self._conn.execute("PRAGMA recursive_triggers=ON")
+        self._conn.executescript(SCHEMA)
+        self._conn.executescript(SEARCH_SCHEMA)
+
+        # Соединения для чтения: по одному на поток, пока поток жив
+        self._local = threading.local()
+        self._readers: weakref.WeakSet[_Reader] = weakref.WeakSet()
+        self._readers_lock = threading.Lock()
+
+        self._k_missing = self._load_k_missing()
+
+        if settings is not None:
+            self.migrate_from_json(settings)
+
+    @classmethod
+    def for_settings(cls, settings: AppSettings) -> "IndexStore":
+        """
+        Возвращает общий экземпляр хранилища для settings.data_files.index_db.
+        """
+        db_file = Path(settings.data_files.index_db).resolve()
+        with cls._instances_lock:
+            store = cls._instances.get(db_file)
+            if store is None:
+                store = cls(db_file, settings)
+                cls._instances[db_file] = store
+            return store
+
+    def close(self) -> None:
+        with self._readers_lock:
+            for reader in list(self._readers):
+                reader.close()
+            self._readers.clear()
+        with self._lock:
+            self._conn.close()
+        with self._instances_lock:
+            if self._instances.get(self.db_file.resolve()) is self:
+                del self._instances[self.db_file.resolve()]
+
+    # --------------------------------------------------------
+    # Базовые операции
+    # --------------------------------------------------------
+
+    @contextmanager
+    def transaction(self) -> Iterator[sqlite3.Connection]:
+        """
+        Одна транзакция записи (BEGIN IMMEDIATE ... COMMIT/ROLLBACK).
+        """
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            self._local.writing = True
+            try:
+                yield self._conn
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+            finally:
+                self._local.writing = False
+            self._conn.execute("COMMIT")
+
+    def _reader(self) -> sqlite3.Connection:
+        """
+        Соединение для чтения текущего потока.
+
+        Внутри transaction() того же потока — соединение записи,
+        чтобы видеть ещё не зафиксированные изменения.
+        """
+        if getattr(self._local, "writing", False):
+            return self._conn
+        reader = getattr(self._local, "reader", None)
+        if reader is None:
+            reader = _Reader(sqlite3.connect(
+                self.db_file.resolve().as_uri() + "?mode=ro",
+                uri=True,
+                check_same_thread=False,
+                isolation_level=None,
+            ))
+            self._local.reader = reader
+            with self._readers_lock:
+                self._readers.add(reader)
+        return reader.conn
+
+    def _fetchall(self, sql: str, params: Iterable = ()) -> list[tuple]:
+        return self._reader().execute(sql, tuple(params)).fetchall()
+
+    def _fetchone(self, sql: str, params: Iterable = ()) -> Optional[tuple]:
+        return self._reader().execute(sql, tuple(params)).fetchone()
+
+    # --------------------------------------------------------
+    # meta
+    # --------------------------------------------------------
+
+    def get_meta(self, key: str, default=None):
+        row = self._fetchone("SELECT value FROM meta WHERE key = ?", (key,))
+        if row is None:
+            return default
+        try:
+            return json.loads(row[0])
+        except json.JSONDecodeError:
+            return default
+
+    def set_meta(self, key: str, value, conn: Optional[sqlite3.Connection] = None) -> None:
+        sql = "INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)"
+        params = (key, json.dumps(value, ensure_ascii=False))
+        if conn is not None:
+            conn.execute(sql, params)
+            return
+        with self._lock:
+            self._conn.execute(sql, params)
+
+    def _apply_ingest(
+        self,
+        conn: sqlite3.Connection,
+        table: str,
+        spans: Iterable[tuple[int, int]],
+        reset: bool,
+        truncate_after: Optional[int],
+        meta_key: str,
+        meta: dict,
+    ) -> None:
+        """
+        Удаляет строки таблицы, пришедшие из перечитанных строк Excel
+        (колонка src_row), и сохраняет состояние инжеста (excel_ingest.py).
+        """
+        if reset:
+            conn.execute(f"DELETE FROM {table}")
+        else:
+            conn.executemany(f"DELETE FROM {table} WHERE src_row BETWEEN ? AND ?", list(spans))
+            if truncate_after is not None:
+                conn.execute(f"DELETE FROM {table} WHERE src_row > ?", (truncate_after,))
+        self.set_meta(meta_key, meta, conn)
+
+    # --------------------------------------------------------
+    # Полнотекстовый индекс
+    # --------------------------------------------------------
+
+    def rebuild_search_index(self, conn: Optional[sqlite3.Connection] = None) -> None:
+        """
+        Полностью перестраивает search_fts из k_entries, dxf_excel и appnr.
+        """
+        if conn is None:
+            with self.transaction() as conn:
+                self.rebuild_search_index(conn)
+            return
+
+        conn.execute("DELETE FROM search_fts")
+        for table, (kind, columns, values) in _SEARCH_DOCS.items():
+            conn.execute(
+                f"INSERT INTO search_fts (rowid, {columns}) "
+                f"SELECT src.rowid * 4 + {kind}, {values.format(row='src')} FROM {table} AS src"
+            )
+
+    def search_text(
+        self,
+        match: str,
+        year: Optional[int] = None,
+        limit: int = 200,
+    ) -> list[tuple[int, int, float, int]]:
+        """
+        Запрос к search_fts (выражение FTS5 MATCH), лучшие совпадения первыми.
+
+        year — только записи, чей K-заказ относится к этому году.
+        Возвращает кортежи (вид, rowid исходной строки, оценка bm25, год).
+        """
+        sql = (
+            "SELECT f.rowid, bm25(search_fts, 5.0, 5.0, 5.0, 3.0, 2.0, 4.0, 1.0) AS score, "
+            "COALESCE(ke.year, 0) "
+            "FROM search_fts AS f LEFT JOIN k_entries AS ke ON ke.k_code = f.k "
+            "WHERE search_fts MATCH ?"
+        )
+        params: list = [match]
+        if year is not None:
+            sql += " AND ke.year = ?"
+            params.append(year)
+        sql += " ORDER BY score LIMIT ?"
+        params.append(limit)
+
+        return [(rowid % 4, rowid // 4, score, y) for rowid, score, y in self._fetchall(sql, params)]
+
+    def search_text_count(self, match: str, year: Optional[int] = None) -> int:
+        sql = (
+            "SELECT COUNT(*) FROM search_fts AS f LEFT JOIN k_entries AS ke ON ke.k_code = f.k "
+            "WHERE search_fts MATCH ?"
+        )
+        params: list = [match]
+        if year is not None:
+            sql += " AND ke.year = ?"
+            params.append(year)
+        return self._fetchone(sql, params)[0]
+
+    def _rows_by_rowids(self, table: str, columns: str, rowids: list[int]) -> dict[int, tuple]:
+        found: dict[int, tuple] = {}
+        for i in range(0, len(rowids), 500):
+            chunk = rowids[i:i + 500]
+            marks = ",".join("?" * len(chunk))
+            for r in self._fetchall(f"SELECT rowid, {columns} FROM {table} WHERE rowid IN ({marks})", chunk):
+                found[r[0]] = r[1:]
+        return found
+
+    def k_by_rowids(self, rowids: list[int]) -> dict[int, KEntry]:
+        return {i: _k_entry(r) for i, r in self._rows_by_rowids("k_entries", K_COLUMNS, rowids).items()}
+
+    def dxf_excel_by_rowids(self, rowids: list[int]) -> dict[int, DXFExcelRecord]:
+        rows = self._rows_by_rowids("dxf_excel", DXF_EXCEL_COLUMNS, rowids)
+        return {i: _dxf_excel_record(r) for i, r in rows.items()}
+
+    def appnr_by_rowids(self, rowids: list[int]) -> dict[int, AppNrRecord]:
+        return {i: _appnr_record(r) for i, r in self._rows_by_rowids("appnr", APPNR_COLUMNS, rowids).items()}
+
+    # --------------------------------------------------------
+    # Миграция из JSON
+    # --------------------------------------------------------
+
+    def migrate_from_json(self, settings: AppSettings) -> None:
+        """
+        Однократный перенос старых JSON-индексов в базу.
+
+        Каждый индекс переносится отдельно и только если для него
+        ещё нет отметки migrated.<name>.
+        """
+        files = settings.data_files
+        steps = (
+            ("k", files.k_index_json, self._import_k_json),
+            ("dxf_excel", files.dxf_excel_index_json, self._import_dxf_excel_json),
+            ("dxf_files", files.dxf_files_index_json, self._import_dxf_files_json),
+            ("appnr", files.appnr_index_json, self._import_appnr_json),
+        )
+
+        for name, path, importer in steps:
+            flag = f"migrated.{name}"
+            if self.get_meta(flag):
+                continue
+
+            count = 0
+            if path.is_file():
+                try:
+                    with path.open("r", encoding="utf-8") as f:
+                        data = json.load(f)
+                    count = importer(data)
+                except (OSError, json.JSONDecodeError, KeyError, TypeError, ValueError) as e:
+                    logger.error(f"IndexStore.migrate_from_json {path}: {e}")
+                    continue
+
+            self.set_meta(flag, {"source": str(path), "count": count})
+
+    def _import_k_json(self, data: dict) -> int:
+        entries = []
+        for code, item in (data.get("items") or {}).items():
+            try:
+                entries.append(KEntry.from_dict(item))
+            except (KeyError, ValueError, TypeError) as e:
+                logger.error(f"IndexStore._import_k_json bad record {code}: {e}")
+        self.replace_k_entries(entries, data.get("_meta") or {})
+        return len(entries)
+
+    def _import_dxf_excel_json(self, data: dict) -> int:
+        records = [DXFExcelRecord.from_dict(item) for items in data.values() for item in items]
+        self.replace_dxf_excel(records)
+        return len(records)
+
+    def _import_dxf_files_json(self, data: dict) -> int:
+        records = [DXFFileRecord.from_dict(item) for item in data.values()]
+        self.replace_dxf_files(records)
+        return len(records)
+
+    def _import_appnr_json(self, data: dict) -> int:
+        records = []
+        for item in data.get("items", []):
+            try:
+                records.append(AppNrRecord.from_dict(item))
+            except (KeyError, TypeError, ValueError):
+                continue
+        self.replace_appnr(records)
+        return len(records)
+
+    # ========================================================
+    # K entries
+    # ========================================================
+    #
+    # В k_entries лежат только реальные папки. Свободные номера
+    # (заглушки has_folder = False) хранятся диапазонами в k_missing
+    # и в памяти (self._k_missing, RangeSet); KEntry-заглушка
+    # создаётся только при чтении.
+
+    def _load_k_missing(self) -> RangeSet:
+        return RangeSet.from_ranges(self._fetchall("SELECT start, end FROM k_missing"))
+
+    def _save_k_missing(self, conn: sqlite3.Connection, missing: RangeSet) -> None:
+        conn.execute("DELETE FROM k_missing")
+        conn.executemany("INSERT INTO k_missing (start, end) VALUES (?, ?)", missing.ranges())
+
+    def _apply_k(
+        self,
+        conn: sqlite3.Connection,
+        entries: Iterable[KEntry],
+        missing: RangeSet,
+    ) -> int:
+        """
+        Пишет реальные записи в k_entries, заглушки — в missing (копия в памяти).
+        """
+        rows = []
+        placeholders = []
+        for e in entries:
+            if e.has_folder:
+                rows.append(_k_row(e))
+            else:
+                placeholders.append(e.k_code)
+
+        conn.executemany(
+            "INSERT OR REPLACE INTO k_entries "
+            "(k_code, num, year, folder_path, sketch_path, dwg_path, has_folder) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?)",
+            rows,
+        )
+        conn.executemany("DELETE FROM k_entries WHERE k_code = ?", [(c,) for c in placeholders])
+
+        for row in rows:
+            missing.discard(row[1])
+        missing.update(_k_num(c) for c in placeholders)
+        return len(rows) + len(placeholders)
+
+    def _commit_k_missing(self, conn: sqlite3.Connection, missing: RangeSet) -> None:
+        if missing.ranges() != self._k_missing.ranges():
+            self._save_k_missing(conn, missing)
+
+    def k_get(self, k_code: str) -> Optional[KEntry]:
+        row = self._fetchone(f"SELECT {K_COLUMNS} FROM k_entries WHERE k_code = ?", (k_code,))
+        if row:
+            return _k_entry(row)
+        if _k_num(k_code) in self._k_missing:
+            return _k_placeholder(k_code)
+        return None
+
+    def k_get_many(self, codes: list[str]) -> list[KEntry]:
+        """
+        Записи по списку кодов в порядке списка (отсутствующие пропускаются).
+        """
+        found: dict[str, KEntry] = {}
+        for i in range(0, len(codes), 500):
+            chunk = codes[i:i + 500]
+            marks = ",".join("?" * len(chunk))
+            for r in self._fetchall(
+                f"SELECT {K_COLUMNS} FROM k_entries WHERE k_code IN ({marks})",
+                chunk,
+            ):
+                found[r[0]] = _k_entry(r)
+
+        result = []
+        for c in codes:
+            if c in found:
+                result.append(found[c])
+            elif _k_num(c) in self._k_missing:
+                result.append(_k_placeholder(c))
+        return result
+
+    def k_years(self) -> list[tuple[str, int]]:
+        """
+        Пары (k_code, year) реальных записей — для построения префиксного индекса.
+        """
+        return self._fetchall("SELECT k_code, year FROM k_entries")
+
+    def k_missing_ranges(self, start_num: int = 0, end_num: Optional[int] = None) -> list[tuple[int, int]]:
+        """
+        Диапазоны свободных номеров (заглушек), обрезанные по [start_num, end_num].
+        """
+        if end_num is None:
+            end_num = self._k_missing.max() or 0
+        return self._k_missing.intersect(start_num, end_num)
+
+    def k_range(self, start_num: int, end_num: int) -> dict[str, KEntry]:
+        rows = self._fetchall(
+            f"SELECT {K_COLUMNS} FROM k_entries WHERE num BETWEEN ? AND ?",
+            (start_num, end_num),
+        )
+        result = {r[0]: _k_entry(r) for r in rows}
+        for num in self._k_missing.numbers_between(start_num, end_num):
+            code = _k_code(num)
+            result[code] = _k_placeholder(code)
+        return result
+
+    def k_all(self) -> dict[str, KEntry]:
+        rows = self._fetchall(f"SELECT {K_COLUMNS} FROM k_entries ORDER BY k_code")
+        result = {r[0]: _k_entry(r) for r in rows}
+        for num in self._k_missing:
+            code = _k_code(num)
+            result[code] = _k_placeholder(code)
+        return dict(sorted(result.items()))
+
+    def k_count(self) -> int:
+        """
+        Количество записей K вместе с заглушками.
+        """
+        return self._fetchone("SELECT COUNT(*) FROM k_entries")[0] + len(self._k_missing)
+
+    def k_max_num(self, real_only: bool = False) -> int:
+        real = self._fetchone("SELECT MAX(num) FROM k_entries")[0] or 0
+        if real_only:
+            return real
+        return max(real, self._k_missing.max() or 0)
+
+    def upsert_k_entries(self, entries: Iterable[KEntry], meta: Optional[dict] = None) -> int:
+        """
+        Добавляет или заменяет записи (только переданные строки).
+        Заглушки добавляются в k_missing, реальная строка того же кода удаляется.
+        """
+        with self.transaction() as conn:
+            missing = RangeSet.from_ranges(self._k_missing.ranges())
+            count = self._apply_k(conn, entries, missing)
+            self._commit_k_missing(conn, missing)
+            if meta is not None:
+                self.set_meta("k", meta, conn)
+        self._k_missing = missing
+        return count
+
+    def add_k_missing(self, ranges: Iterable[tuple[int, int]]) -> None:
+        """
+        Помечает диапазоны номеров как свободные, не создавая записей.
+        Реальные папки из этих диапазонов не удаляются.
+        """
+        with self.transaction() as conn:
+            missing = RangeSet.from_ranges(self._k_missing.ranges())
+            for start, end in ranges:
+                missing.add_range(start, end)
+                for (num,) in conn.execute("SELECT num FROM k_entries WHERE num BETWEEN ? AND ?", (start, end)):
+                    missing.discard(num)
+            self._commit_k_missing(conn, missing)
+        self._k_missing = missing
+
+    def trim_k_entries_above(self, num: int, meta: Optional[dict] = None) -> int:
+        """
+        Удаляет записи и заглушки с номером больше num.
+        """
+        with self.transaction() as conn:
+            missing = RangeSet.from_ranges(self._k_missing.ranges())
+            removed = len(missing)
+            missing.discard_from(num + 1)
+            removed -= len(missing)
+            removed += conn.execute("DELETE FROM k_entries WHERE num > ?", (num,)).rowcount
+            self._commit_k_missing(conn, missing)
+            if meta is not None:
+                self.set_meta("k", meta, conn)
+        self._k_missing = missing
+        return removed
+
+    def replace_k_entries(
+        self,
+        entries: Iterable[KEntry],
+        meta: dict,
+        missing: Optional[RangeSet] = None,
+    ) -> int:
+        """
+        Полная замена таблицы K (rebuild).
+
+        missing — свободные номера диапазонами; заглушки из entries
+        добавляются к ним.
+        """
+        new_missing = RangeSet.from_ranges(missing.ranges()) if missing is not None else RangeSet()
+        with self.transaction() as conn:
+            conn.execute("DELETE FROM k_entries")
+            count = self._apply_k(conn, entries, new_missing)
+            self._save_k_missing(conn, new_missing)
+            self.set_meta("k", meta, conn)
+        self._k_missing = new_missing
+        return count
+
+    # ========================================================
+    # DXF Excel
+    # ========================================================
+
+    def dxf_excel_by_k(self, k_num: str) -> list[DXFExcelRecord]:
+        rows = self._fetchall(
+            f"SELECT {DXF_EXCEL_COLUMNS} FROM dxf_excel WHERE k_num = ? ORDER BY dxf_no, schluessel, id",
+            (k_num,),
+        )
+        return [_dxf_excel_record(r) for r in rows]
+
+    def dxf_excel_by_numbers(self, numbers: Iterable[int]) -> dict[int, list[DXFExcelRecord]]:
+        """
+        Excel-строки для набора DXF-номеров: dxf_no -> записи.
+        """
+        result: dict[int, list[DXFExcelRecord]] = {}
+        nums = sorted(set(numbers))
+        for i in range(0, len(nums), 500):
+            chunk = nums[i:i + 500]
+            marks = ",".join("?" * len(chunk))
+            rows = self._fetchall(
+                f"SELECT {DXF_EXCEL_COLUMNS} FROM dxf_excel WHERE dxf_no IN ({marks}) "
+                "ORDER BY k_num, dxf_no, schluessel, id",
+                chunk,
+            )
+            for r in rows:
+                result.setdefault(r[0], []).append(_dxf_excel_record(r))
+        return result
+
+    def dxf_excel_numbers(self) -> list[int]:
+        return [r[0] for r in self._fetchall("SELECT DISTINCT dxf_no FROM dxf_excel")]
+
+    def dxf_excel_count(self) -> int:
+        return self._fetchone("SELECT COUNT(*) FROM dxf_excel")[0]
+
+    def replace_dxf_excel(self, records: Iterable[DXFExcelRecord]) -> int:
+        rows = [_dxf_excel_row(r) for r in records]
+        with self.transaction() as conn:
+            conn.execute("DELETE FROM dxf_excel")
+            conn.executemany(
+                f"INSERT INTO dxf_excel ({DXF_EXCEL_COLUMNS}) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                rows,
+            )
+        return len(rows)
+
+    def ingest_dxf_excel(
+        self,
+        records: Iterable[tuple[int, DXFExcelRecord]],
+        spans: Iterable[tuple[int, int]],
+        meta_key: str,
+        meta: dict,
+        reset: bool = False,
+        truncate_after: Optional[int] = None,
+    ) -> int:
+        """
+        Заменяет записи перечитанных строк Excel: records — пары (src_row, запись).
+        """
+        rows = [_dxf_excel_row(rec) + (src_row,) for src_row, rec in records]
+        with self.transaction() as conn:
+            self._apply_ingest(conn, "dxf_excel", spans, reset, truncate_after, meta_key, meta)
+            conn.executemany(
+                f"INSERT INTO dxf_excel ({DXF_EXCEL_COLUMNS}, src_row) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                rows,
+            )
+        return len(rows)
+
+    # ========================================================
+    # DXF files
+    # ========================================================
+
+    def dxf_file(self, dxf_no: int) -> Optional[DXFFileRecord]:
+        row = self._fetchone(f"SELECT {DXF_FILE_COLUMNS} FROM dxf_files WHERE dxf_no = ?", (dxf_no,))
+        return _dxf_file_record(row) if row else None
+
+    def dxf_files_by_numbers(self, numbers: Iterable[int]) -> dict[int, DXFFileRecord]:
+        result: dict[int, DXFFileRecord] = {}
+        nums = sorted(set(numbers))
+        for i in range(0, len(nums), 500):
+            chunk = nums[i:i + 500]
+            marks = ",".join("?" * len(chunk))
+            for r in self._fetchall(
+                f"SELECT {DXF_FILE_COLUMNS} FROM dxf_files WHERE dxf_no IN ({marks})",
+                chunk,
+            ):
+                result[r[0]] = _dxf_file_record(r)
+        return result
+
+    def dxf_result_count(self, numbers: Iterable[int]) -> int:
+        """
+        Число результатов DXF-поиска по номерам без чтения записей:
+        Excel-строки номера, а без них — 1, если есть файл.
+        """
+        count = 0
+        nums = sorted(set(numbers))
+        for i in range(0, len(nums), 500):
+            chunk = nums[i:i + 500]
+            marks = ",".join("?" * len(chunk))
+            count += self._fetchone(f"SELECT COUNT(*) FROM dxf_excel WHERE dxf_no IN ({marks})", chunk)[0]
+            count += self._fetchone(
+                f"SELECT COUNT(*) FROM dxf_files f WHERE f.dxf_no IN ({marks}) "
+                "AND NOT EXISTS (SELECT 1 FROM dxf_excel e WHERE e.dxf_no = f.dxf_no)",
+                chunk,
+            )[0]
+        return count
+
+    def dxf_file_numbers(self) -> list[int]:
+        return [r[0] for r in self._fetchall("SELECT dxf_no FROM dxf_files")]
+
+    def dxf_files_with_dwg(self) -> list[DXFFileRecord]:
+        """
+        Записи с существующим основным DWG, новые номера первыми.
+        """
+        rows = self._fetchall(
+            f"SELECT {DXF_FILE_COLUMNS} FROM dxf_files WHERE has_main_dwg = 1 ORDER BY dxf_no DESC"
+        )
+        return [_dxf_file_record(r) for r in rows]
+
+    def dxf_files_count(self) -> int:
+        return self._fetchone("SELECT COUNT(*) FROM dxf_files")[0]
+
+    def upsert_dxf_files(self, records: Iterable[DXFFileRecord], meta: Optional[dict] = None) -> int:
+        rows = [_dxf_file_row(r) for r in records]
+        with self.transaction() as conn:
+            conn.executemany(
+                f"INSERT OR REPLACE INTO dxf_files ({DXF_FILE_COLUMNS}) VALUES (?, ?, ?, ?, ?)",
+                rows,
+            )
+            if meta is not None:
+                self.set_meta("dxf_files", meta, conn)
+        return len(rows)
+
+    def replace_dxf_files(self, records: Iterable[DXFFileRecord], meta: Optional[dict] = None) -> int:
+        rows = [_dxf_file_row(r) for r in records]
+        with self.transaction() as conn:
+            conn.execute("DELETE FROM dxf_files")
+            conn.executemany(
+                f"INSERT OR REPLACE INTO dxf_files ({DXF_FILE_COLUMNS}) VALUES (?, ?, ?, ?, ?)",
+                rows,
+            )
+            if meta is not None:
+                self.set_meta("dxf_files", meta, conn)
+        return len(rows)
+
+    # ========================================================
+    # Геометрия DXF
+    # ========================================================
+
+    def dxf_geometry(self, dxf_no: int) -> Optional[GeometrySummary]:
+        row = self._fetchone(f"SELECT {GEOMETRY_COLUMNS} FROM dxf_geometry WHERE dxf_no = ?", (dxf_no,))
+        return _geometry_summary(row) if row else None
+
+    def dxf_geometry_stamps(self) -> dict[int, tuple[str, int, int, str, int]]:
+        """
+        dxf_no -> (source_path, size, mtime_ns, sha1, version) для проверки актуальности кэша.
+        """
+        rows = self._fetchall("SELECT dxf_no, source_path, size, mtime_ns, sha1, version FROM dxf_geometry")
+        return {r[0]: tuple(r[1:]) for r in rows}
+
+    def upsert_dxf_geometry(self, summaries: Iterable[GeometrySummary], version: int) -> int:
+        rows = [_geometry_row(g, version) for g in summaries]
+        with self.transaction() as conn:
+            conn.executemany(
+                f"INSERT OR REPLACE INTO dxf_geometry ({GEOMETRY_COLUMNS}, version) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                rows,
+            )
+        return len(rows)
+
+    def touch_dxf_geometry(self, dxf_no: int, size: int, mtime_ns: int) -> None:
+        """
+        Файл переписан без изменений (тот же sha1) — обновляется только отметка.
+        """
+        with self.transaction() as conn:
+            conn.execute(
+                "UPDATE dxf_geometry SET size = ?, mtime_ns = ? WHERE dxf_no = ?",
+                (size, mtime_ns, dxf_no),
+            )
+
+    def prune_dxf_geometry(self) -> int:
+        """
+        Удаляет сводки номеров, у которых больше нет основного DWG.
+        """
+        with self.transaction() as conn:
+            cur = conn.execute(
+                "DELETE FROM dxf_geometry WHERE dxf_no NOT IN "
+                "(SELECT dxf_no FROM dxf_files WHERE has_main_dwg = 1)"
+            )
+            return cur.rowcount
+
+    # ========================================================
+    # App.Nr.
+    # ========================================================
+
+    def appnr_all(self) -> list[AppNrRecord]:
+        rows = self._fetchall(f"SELECT {APPNR_COLUMNS} FROM appnr ORDER BY serial_upper, k_code")
+        return [_appnr_record(r) for r in rows]
+
+    def appnr_serials_for_k(self, k_code: str) -> list[str]:
+        rows = self._fetchall(
+            "SELECT DISTINCT serial_no FROM appnr WHERE k_code = ? ORDER BY serial_no",
+            (k_code,),
+        )
+        return [r[0] for r in rows]
+
+    def appnr_count(self) -> int:
+        return self._fetchone("SELECT COUNT(*) FROM appnr")[0]
+
+    def replace_appnr(self, records: Iterable[AppNrRecord]) -> int:
+        rows = [_appnr_row(r) for r in records]
+        with self.transaction() as conn:
+            conn.execute("DELETE FROM appnr")
+            conn.executemany(
+                "INSERT OR REPLACE INTO appnr "
+                "(serial_no, k_code, serial_prefix, prefix_num, serial_upper) VALUES (?, ?, ?, ?, ?)",
+                rows,
+            )
+        return len(rows)
+
+    def ingest_appnr(
+        self,
+        records: Iterable[tuple[int, AppNrRecord]],
+        spans: Iterable[tuple[int, int]],
+        meta_key: str,
+        meta: dict,
+        reset: bool = False,
+        truncate_after: Optional[int] = None,
+    ) -> int:
+        """
+        Заменяет записи перечитанных строк Excel: records — пары (src_row, запись).
+        """
+        rows = [_appnr_row(rec) + (src_row,) for src_row, rec in records]
+        with self.transaction() as conn:
+            self._apply_ingest(conn, "appnr", spans, reset, truncate_after, meta_key, meta)
+            conn.executemany(
+                "INSERT OR REPLACE INTO appnr "
+                "(serial_no, k_code, serial_prefix, prefix_num, serial_upper, src_row) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                rows,
+            )
+        return len(rows)
+
+    # ========================================================
+    # Журнал каталогов архива
+    # ========================================================
+
+    def load_dir_journal(self) -> dict[str, DirState]:
+        rows = self._fetchall(
+            "SELECT path, year, depth, mtime_ns, listing_hash, subdirs, hits FROM dir_journal"
+        )
+        return {
+            r[0]: DirState(
+                year=r[1],
+                depth=r[2],
+                mtime_ns=r[3],
+                listing_hash=r[4],
+                subdirs=r[5].split("\n") if r[5] else [],
+                hits=r[6].split("\n") if r[6] else [],
+            )
+            for r in rows
+        }
+
+    def update_dir_journal(
+        self,
+        changed: dict[str, DirState],
+        removed: Iterable[str] = (),
+        replace: bool = False,
+    ) -> None:
+        """
+        Записывает изменённые каталоги и удаляет исчезнувшие.
+        replace=True — журнал полностью заменяется (полный rebuild).
+        """
+        rows = [
+            (path, s.year, s.depth, s.mtime_ns, s.listing_hash, "\n".join(s.subdirs), "\n".join(s.hits))
+            for path, s in changed.items()
+        ]
+        with self.transaction() as conn:
+            if replace:
+                conn.execute("DELETE FROM dir_journal")
+            conn.executemany("DELETE FROM dir_journal WHERE path = ?", [(p,) for p in removed])
+            conn.executemany(
+                "INSERT OR REPLACE INTO dir_journal "
+                "(path, year, depth, mtime_ns, listing_hash, subdirs, hits) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                rows,
+            )
+
+    def k_real_folders(self) -> dict[str, tuple[int, str]]:
+        """
+        Реальные записи K: k_code -> (year, folder_path).
+        """
+        rows = self._fetchall("SELECT k_code, year, folder_path FROM k_entries WHERE has_folder = 1")
+        return {r[0]: (r[1], r[2]) for r in rows}
@@ -10,11 +10,11 @@ k_repository.py
 
 Содержит:
 1. KIndex
-   In-memory индекс папок заказов:
-   - загрузка/сохранение JSON
+   Индекс папок заказов:
+   - хранение в SQLite (index_store.IndexStore), записи читаются по запросу
    - точный поиск
    - частичный поиск
-   - хвостовое обновление
+   - хвостовое (инкрементальное) обновление по журналу каталогов
    - полное перестроение
 
 2. SearchService
@@ -38,39 +38,41 @@ k_repository.py
 
 from __future__ import annotations
 
-import json
-import os
 import re
+import threading
 from datetime import datetime
 from pathlib import Path
-from typing import Callable, Optional
+from typing import Callable, Iterator, Optional
 
 from .config import AppSettings
+from .folder_crawler import FolderCrawler
+from .index_store import IndexStore
 from .logging_setup import get_logger
 from .models import KEntry
+from .prefix_index import PrefixIndex
+from .range_set import RangeSet
 
 logger = get_logger()
 
 
 class KIndex:
     """
-    In-memory индекс папок заказов K-Finder.
+    Индекс папок заказов K-Finder.
 
-    Формат JSON:
+    Записи хранятся в SQLite (таблица k_entries, см. index_store.py):
+    - поиск идёт запросами по индексу, в память индекс целиком не грузится;
+    - свободные номера (заглушки) хранятся не записями, а диапазонами
+      (k_missing, RangeSet); KEntry-заглушка создаётся только при чтении;
+    - хвостовое обновление пишет только изменённые строки;
+    - журнал каталогов (dir_journal) позволяет при обновлении
+      перечитывать только каталоги с изменённым mtime.
+
+    Метаданные (meta["k"]):
     {
-      "_meta": {
-        "root": "...",
-        "start_year": 2011,
-        "generated_at": "...",
-        "count": N
-      },
-      "items": {
-        "K12345": {
-          "k_code": "K12345",
-          "year": 2024,
-          ...
-        }
-      }
+      "root": "...",
+      "start_year": 2011,
+      "generated_at": "...",
+      "count": N
     }
     """
 
@@ -83,9 +85,15 @@ class KIndex:
         self.cfg_idx = settings.indexing.k
         self.data_files = settings.data_files
 
-        self._items: dict[str, KEntry] = {}
+        self.store: IndexStore
         self._meta: dict = {}
 
+        # k_code -> year реальных папок: префиксный индекс для частичного поиска
+        self._codes = PrefixIndex()
+
+        # Отмена текущего сканирования диска (cancel_scan)
+        self._cancel = threading.Event()
+
         self._load_cache()
 
     # ========================================================
@@ -102,7 +110,7 @@ class KIndex:
     @property
     def index_file(self) -> Path:
         """
-        JSON-файл индекса K.
+        Старый JSON-файл индекса K (источник однократной миграции).
         """
         return self.data_files.k_index_json
 
@@ -121,80 +129,52 @@ class KIndex:
         return self.cfg_paths.sketch_folder_name
 
     # ========================================================
-    # JSON / cache
+    # Хранилище / meta
     # ========================================================
 
     def _load_cache(self) -> None:
         """
-        Загружает индекс с диска в память.
-        """
-        data = self._load_raw()
-        self._meta = data.get("_meta", {})
-        self._items = {}
+        Подключает SQLite-хранилище и читает метаданные индекса.
 
-        for code, item in data.get("items", {}).items():
-            try:
-                self._items[code] = KEntry.from_dict(item)
-            except (KeyError, ValueError, TypeError) as e:
-                logger.error(f"KIndex._load_cache bad record {code}: {e}")
+        Сами записи в память не загружаются: они читаются из базы
+        по запросу (find_exact, find_partial) и превращаются в KEntry
+        только при обращении. При первом запуске хранилище один раз
+        переносит в себя старый k_index.json.
+        """
+        self.store = IndexStore.for_settings(self.settings)
+        self._meta = self.store.get_meta("k", {}) or {}
+        self._codes.rebuild(self.store.k_years())
 
     def reload(self) -> None:
         """
-        Принудительно перечитывает индекс с диска.
+        Принудительно перечитывает метаданные индекса.
         """
         self._load_cache()
 
-    def _load_raw(self) -> dict:
-        """
-        Читает сырой JSON индекса.
-        """
-        if not self.index_file.is_file():
-            return {"_meta": {}, "items": {}}
-
-        try:
-            with self.index_file.open("r", encoding="utf-8") as f:
-                data = json.load(f)
-
-            if not isinstance(data, dict) or "items" not in data:
-                return {"_meta": {}, "items": {}}
-
-            return data
-
-        except (OSError, json.JSONDecodeError) as e:
-            logger.error(f"KIndex._load_raw: {e}")
-            return {"_meta": {}, "items": {}}
-
-    def _save_raw(self, data: dict) -> None:
-        """
-        Сохраняет сырой JSON индекса.
-        """
-        self.index_file.parent.mkdir(parents=True, exist_ok=True)
-        with self.index_file.open("w", encoding="utf-8") as f:
-            json.dump(data, f, ensure_ascii=False, indent=2)
+    def _make_meta(self, count: int) -> dict:
+        return {
+            "root": str(self.root_dir),
+            "start_year": self.start_year,
+            "generated_at": datetime.now().isoformat(timespec="seconds"),
+            "count": count,
+        }
 
     def load_entries(self) -> dict[str, KEntry]:
         """
-        Возвращает копию текущего in-memory кэша.
+        Возвращает все записи индекса (полная гидратация — только для сервисных задач).
         """
-        return dict(self._items)
+        return self.store.k_all()
 
     def save_entries(self, items: dict[str, KEntry]) -> None:
         """
-        Сохраняет словарь записей в память и на диск.
+        Полностью заменяет записи индекса.
         """
-        self._items = dict(items)
-        self._meta = {
-            "root": str(self.root_dir),
-            "start_year": self.start_year,
-            "generated_at": datetime.now().isoformat(timespec="seconds"),
-            "count": len(self._items),
-        }
-
-        payload = {
-            "_meta": self._meta,
-            "items": {k: v.to_dict() for k, v in sorted(self._items.items())},
-        }
-        self._save_raw(payload)
+        self._meta = self._make_meta(len(items))
+        self._codes.rebuild((code, entry.year) for code, entry in items.items() if entry.has_folder)
+        self.store.replace_k_entries(
+            (v for _, v in sorted(items.items())),
+            self._meta,
+        )
 
     def get_meta(self) -> dict:
         """
@@ -204,10 +184,15 @@ class KIndex:
 
     def update_entry(self, entry: KEntry) -> None:
         """
-        Добавляет или заменяет одну запись и сохраняет индекс.
+        Добавляет или заменяет одну запись (upsert одной строки).
         """
-        self._items[entry.k_code] = entry
-        self.save_entries(self._items)
+        self.store.upsert_k_entries([entry])
+        if entry.has_folder:
+            self._codes.set(entry.k_code, entry.year)
+        else:
+            self._codes.discard(entry.k_code)
+        self._meta = self._make_meta(self.store.k_count())
+        self.store.set_meta("k", self._meta)
 
     # ========================================================
     # Вспомогательные методы
@@ -288,12 +273,7 @@ class KIndex:
         """
         Возвращает максимальный известный числовой K-номер.
         """
-        nums = [
-            self._code_to_num(code)
-            for code in self._items
-            if self.FULL_RE.fullmatch(code)
-        ]
-        return max(nums) if nums else 0
+        return self.store.k_max_num()
 
     def _make_entry(self, k_code: str, year: int, folder: Path) -> KEntry:
         """
@@ -328,6 +308,35 @@ class KIndex:
     # Сканирование диска
     # ========================================================
 
+    def _make_crawler(self, cancel_event: Optional[threading.Event] = None) -> FolderCrawler:
+        """
+        Создаёт параллельный обходчик архива с текущими настройками.
+
+        cancel_event — собственное событие отмены (фоновый поиск
+        из UI); без него используется общее событие cancel_scan().
+        """
+        if cancel_event is None:
+            self._cancel.clear()
+            cancel_event = self._cancel
+        return FolderCrawler(
+            self.FULL_RE,
+            max_workers=self.cfg_idx.scan_workers,
+            max_depth=self.cfg_idx.scan_max_depth,
+            cancel_event=cancel_event,
+        )
+
+    def cancel_scan(self) -> None:
+        """
+        Прерывает текущее сканирование диска.
+
+        update_tail / rebuild / search_on_disk поднимут CrawlCancelled,
+        индекс при этом не изменяется.
+        """
+        self._cancel.set()
+
+    def _year_paths(self, start_year: int, end_year: int) -> list[tuple[int, Path]]:
+        return [(year, self.root_dir / str(year)) for year in range(start_year, end_year + 1)]
+
     def _scan_years_for_kfolders(
         self,
         start_year: int,
@@ -338,30 +347,63 @@ class KIndex:
         Выполняет один массовый проход по годовым папкам.
 
         Алгоритм:
-        - обходит папки годов;
+        - годы и подпапки обходятся параллельно (FolderCrawler, os.scandir);
         - если папка называется Kxxxxx, добавляет её в результат;
         - внутрь найденной K-папки дальше не спускается.
-        """
-        found: dict[str, KEntry] = {}
 
-        for year in range(start_year, end_year + 1):
-            year_path = self.root_dir / str(year)
-            count_year = 0
+        Raises:
+            CrawlCancelled: сканирование прервано через cancel_scan().
+        """
+        hits = self._make_crawler().crawl(
+            self._year_paths(start_year, end_year),
+            progress_cb=progress_cb,
+        )
+        return self._hits_to_entries(hits)
 
-            if year_path.is_dir():
-                for dirpath, dirnames, _ in os.walk(year_path):
-                    current = Path(dirpath)
-                    name = current.name.upper()
+    def _scan_with_journal(
+        self,
+        years: list[int],
+        progress_cb: Optional[Callable[[str], None]] = None,
+        full: bool = False,
+    ) -> dict[str, KEntry]:
+        """
+        Обход годовых папок с журналом каталогов (таблица dir_journal).
 
-                    if self.FULL_RE.fullmatch(name):
-                        found[name] = self._make_entry(name, year, current)
-                        dirnames[:] = []
-                        count_year += 1
+        full=False:
+            известные каталоги только проверяются по mtime, перечитываются
+            лишь изменённые; журнал дополняется изменениями.
+        full=True:
+            все каталоги читаются заново, журнал полностью заменяется.
 
-            if progress_cb:
-                progress_cb(f"{year}: {count_year} Ordner")
+        Raises:
+            CrawlCancelled: сканирование прервано через cancel_scan().
+        """
+        journal = {} if full else self.store.load_dir_journal()
+        crawler = self._make_crawler()
+        hits = crawler.crawl(
+            [(year, self.root_dir / str(year)) for year in years],
+            progress_cb=progress_cb,
+            journal=journal,
+        )
 
-        return found
+        stats = crawler.last_stats
+        self.store.update_dir_journal(stats.changed, stats.removed, replace=full)
+        logger.info(
+            f"Verzeichnis-Journal: {stats.listed} gelesen, {stats.reused} unverändert, "
+            f"{len(stats.changed)} geändert, {len(stats.removed)} entfernt"
+        )
+        if stats.failed:
+            logger.warning(
+                f"Verzeichnis-Journal: {len(stats.failed)} Ordner nicht lesbar, "
+                f"Stand aus dem Journal übernommen: {', '.join(stats.failed[:5])}"
+            )
+        return self._hits_to_entries(hits)
+
+    def _hits_to_entries(self, hits: dict[str, tuple[int, Path]]) -> dict[str, KEntry]:
+        return {
+            name: self._make_entry(name, year, path)
+            for name, (year, path) in hits.items()
+        }
 
     # ========================================================
     # Поиск
@@ -371,7 +413,7 @@ class KIndex:
         """
         Точный поиск по коду в памяти.
         """
-        return self._items.get(k_code)
+        return self.store.k_get(k_code)
 
     def find_partial(self, query: str) -> list[KEntry]:
         """
@@ -381,42 +423,97 @@ class KIndex:
         - 20    -> K20000, K20123, K20555 ...
         - K20   -> K20000, K20123, ...
         """
+        return [entry for chunk in self.iter_partial(query) for entry in chunk]
+
+    def _partial_digits(self, query: str) -> str:
         q = self.normalize_partial(query)
-        if not q:
-            return []
+        return q[1:] if q.startswith("K") else q
+
+    def _partial_missing_span(self, q_digits: str) -> tuple[int, int]:
+        # Свободные номера с таким началом — один числовой диапазон
+        scale = 10 ** max(0, 5 - len(q_digits))
+        lo = int(q_digits) * scale
+        return lo, lo + scale - 1
 
-        q_digits = q[1:] if q.startswith("K") else q
+    def iter_partial(self, query: str, chunk_size: int = 500) -> Iterator[list[KEntry]]:
+        """
+        Частичный поиск частями по chunk_size записей (в порядке find_partial).
+
+        Используется фоновым поиском: первые результаты показываются,
+        пока остальные ещё читаются из хранилища.
+        """
+        q_digits = self._partial_digits(query)
+        if not q_digits:
+            return
 
-        results = [
-            entry for code, entry in self._items.items()
-            if code.startswith(q) or code[1:].startswith(q_digits)
+        # Реальные папки — bisect по префиксному индексу,
+        # из хранилища читаются только найденные записи
+        matched = self._codes.items(f"K{q_digits}")
+        matched.sort(key=lambda kv: (kv[1], kv[0]))
+
+        # Заглушки (year = 0) идут первыми, как при сортировке по (year, code)
+        chunk: list[KEntry] = []
+        for start, end in self.store.k_missing_ranges(*self._partial_missing_span(q_digits)):
+            for num in range(start, end + 1):
+                chunk.append(self._make_missing_entry(self._num_to_code(num)))
+                if len(chunk) >= chunk_size:
+                    yield chunk
+                    chunk = []
+        if chunk:
+            yield chunk
+
+        codes = [code for code, _ in matched]
+        for i in range(0, len(codes), chunk_size):
+            yield self.store.k_get_many(codes[i:i + chunk_size])
+
+    def count_partial(self, query: str) -> int:
+        """
+        Число результатов find_partial без чтения самих записей.
+        """
+        q_digits = self._partial_digits(query)
+        if not q_digits:
+            return 0
+
+        missing = sum(
+            end - start + 1
+            for start, end in self.store.k_missing_ranges(*self._partial_missing_span(q_digits))
+        )
+        return missing + self._codes.count(f"K{q_digits}")
+
+    def missing_ranges(self, start_num: int = 0, end_num: Optional[int] = None) -> list[tuple[int, int]]:
+        """
+        Диапазоны K-номеров без папки (заглушки индекса), например [(20501, 20503), ...].
+        """
+        return self.store.k_missing_ranges(start_num, end_num)
+
+    def missing_numbers(self, start_num: int = 0, end_num: Optional[int] = None) -> list[int]:
+        """
+        K-номера без папки в [start_num, end_num].
+        """
+        return [
+            num
+            for start, end in self.missing_ranges(start_num, end_num)
+            for num in range(start, end + 1)
         ]
-        results.sort(key=lambda e: (e.year, e.k_code))
-        return results
 
-    def search_on_disk(self, k_code: str) -> Optional[KEntry]:
+    def search_on_disk(self, k_code: str, cancel_event: Optional[threading.Event] = None) -> Optional[KEntry]:
         """
         Точечный поиск одного K-кода по всем годовым папкам.
 
         Используется только если записи нет в индексе.
+        Обход параллельный и останавливается на первой найденной папке.
+        cancel_event прерывает обход (CrawlCancelled).
         """
         if not self.is_root_available():
             raise FileNotFoundError(f"Root nicht verfügbar: {self.root_dir}")
 
-        for year in range(self.start_year, self._current_year() + 1):
-            year_path = self.root_dir / str(year)
-            if not year_path.is_dir():
-                continue
-
-            for dirpath, dirnames, _ in os.walk(year_path):
-                current = Path(dirpath)
-                name = current.name.upper()
-
-                if name == k_code and current.is_dir():
-                    return self._make_entry(k_code, year, current)
-
-                if self.FULL_RE.fullmatch(name):
-                    dirnames[:] = []
+        hits = self._make_crawler(cancel_event).crawl(
+            self._year_paths(self.start_year, self._current_year()),
+            target=k_code,
+        )
+        if k_code in hits:
+            year, path = hits[k_code]
+            return self._make_entry(k_code, year, path)
 
         return None
 
@@ -431,14 +528,22 @@ class KIndex:
         progress_cb: Optional[Callable[[str], None]] = None,
     ) -> int:
         """
-        Хвостовое обновление индекса K.
+        Хвостовое (инкрементальное) обновление индекса K.
 
         Логика:
         1. Берём максимальный известный K-номер.
-        2. Сканируем только последние N лет.
-        3. Обновляем диапазон [max_known - backtrack .. max_found].
-        4. Старые реальные записи вне хвоста не трогаем.
+        2. Обходим последние N лет и все годы из журнала каталогов;
+           неизменённые каталоги (тот же mtime) не перечитываются.
+        3. Реальные записи обновляем по результату обхода: новые
+           и перенесённые папки (в том числе в старых годах) добавляются,
+           исчезнувшие становятся заглушками.
+        4. Заглушки дописываются в диапазон [max_known - backtrack .. max_found].
         5. Заглушки выше последнего реального номера обрезаем.
+
+        Журнал заполняется полным rebuild; без него обходятся только
+        последние N лет, как раньше.
+
+        В хранилище пишутся только изменившиеся строки.
         """
         if not self.is_root_available():
             raise FileNotFoundError(f"Root nicht verfügbar: {self.root_dir}")
@@ -448,7 +553,6 @@ class KIndex:
         if tail_years_to_scan is None:
             tail_years_to_scan = self.cfg_idx.tail_years_to_scan
 
-        items = dict(self._items)
         max_known = self._max_known_number()
 
         if max_known <= 0:
@@ -457,51 +561,53 @@ class KIndex:
         current_year = self._current_year()
         start_year_scan = max(self.start_year, current_year - tail_years_to_scan + 1)
 
-        found_recent = self._scan_years_for_kfolders(
-            start_year=start_year_scan,
-            end_year=current_year,
-            progress_cb=progress_cb,
+        years = set(range(start_year_scan, current_year + 1))
+        years.update(
+            state.year for state in self.store.load_dir_journal().values()
+            if self.start_year <= state.year <= current_year
         )
 
-        found_recent_nums = [
+        found = self._scan_with_journal(sorted(years), progress_cb=progress_cb)
+        existing_real = self.store.k_real_folders()
+        changed: dict[str, KEntry] = {}
+
+        # Реальные папки: новые, перенесённые и исчезнувшие
+        for code, entry in found.items():
+            if existing_real.get(code) != (entry.year, entry.folder_path):
+                changed[code] = entry
+
+        for code, (year, _folder) in existing_real.items():
+            if year in years and code not in found:
+                changed[code] = self._make_missing_entry(code)
+
+        found_nums = [
             self._code_to_num(code)
-            for code in found_recent
+            for code in found
             if self.FULL_RE.fullmatch(code)
         ]
 
-        max_found_recent = max(found_recent_nums) if found_recent_nums else max_known
+        max_found = max(found_nums) if found_nums else max_known
         start_num = max(1, max_known - backtrack)
-        end_num = max(max_known, max_found_recent)
-
-        for num in range(start_num, end_num + 1):
-            code = self._num_to_code(num)
-            existing = items.get(code)
-
-            if code in found_recent:
-                items[code] = found_recent[code]
-            elif existing is not None and existing.has_folder:
-                pass
-            else:
-                items[code] = self._make_missing_entry(code)
-
-        last_real_num = max(
-            (
-                self._code_to_num(code)
-                for code, entry in items.items()
-                if entry.has_folder and self.FULL_RE.fullmatch(code)
-            ),
-            default=0,
+        end_num = max(max_known, max_found)
+
+        self.store.upsert_k_entries(changed.values())
+        self._codes.update(
+            ((e.k_code, e.year) for e in changed.values() if e.has_folder),
+            remove=[e.k_code for e in changed.values() if not e.has_folder],
         )
 
-        trimmed = {
-            code: entry
-            for code, entry in items.items()
-            if not self.FULL_RE.fullmatch(code)
-            or self._code_to_num(code) <= last_real_num
-        }
+        # Свободные номера хвостового диапазона — диапазонами, без KEntry;
+        # номера реальных папок add_k_missing не трогает
+        self.store.add_k_missing([(start_num, end_num)])
+
+        # Заглушки выше последнего реального номера обрезаем
+        last_real_num = self.store.k_max_num(real_only=True)
+        self.store.trim_k_entries_above(last_real_num)
 
-        self.save_entries(trimmed)
-        return len(trimmed)
+        count = self.store.k_count()
+        self._meta = self._make_meta(count)
+        self.store.set_meta("k", self._meta)
+        return count
 
     def rebuild(
         self,
@@ -509,14 +615,16 @@ class KIndex:
     ) -> int:
         """
         Полное перестроение K-индекса по всем годам.
+
+        Все каталоги читаются заново, журнал каталогов перезаписывается.
         """
         if not self.is_root_available():
             raise FileNotFoundError(f"Root nicht verfügbar: {self.root_dir}")
 
-        found_items = self._scan_years_for_kfolders(
-            start_year=self.start_year,
-            end_year=self._current_year(),
+        found_items = self._scan_with_journal(
+            list(range(self.start_year, self._current_year() + 1)),
             progress_cb=progress_cb,
+            full=True,
         )
 
         found_nums = [
@@ -532,16 +640,19 @@ class KIndex:
         min_num = min(found_nums)
         max_num = max(found_nums)
 
-        full_items: dict[str, KEntry] = {}
-        for num in range(min_num, max_num + 1):
-            code = self._num_to_code(num)
-            if code in found_items:
-                full_items[code] = found_items[code]
-            else:
-                full_items[code] = self._make_missing_entry(code)
-
-        self.save_entries(full_items)
-        return len(full_items)
+        # Свободные номера между min и max — диапазонами, без KEntry
+        found_set = set(found_nums)
+        missing = RangeSet(n for n in range(min_num, max_num + 1) if n not in found_set)
+
+        count = max_num - min_num + 1
+        self._meta = self._make_meta(count)
+        self._codes.rebuild((code, entry.year) for code, entry in found_items.items())
+        self.store.replace_k_entries(
+            (v for _, v in sorted(found_items.items())),
+            self._meta,
+            missing=missing,
+        )
+        return count
 
 
 class SearchService:
@@ -561,12 +672,19 @@ class SearchService:
         self.index = index
         self.live_search_if_missing = settings.ui.live_search_if_missing
 
-    def get_or_search(self, k_code: str) -> Optional[KEntry]:
+    def get_or_search(
+        self,
+        k_code: str,
+        cancel_event: Optional[threading.Event] = None,
+    ) -> Optional[KEntry]:
         """
         Возвращает KEntry:
         - из индекса, если уже есть;
         - с диска, если live_search_if_missing=True;
         - либо запись-заглушку, если ничего не найдено.
+
+        cancel_event прерывает поиск на диске (CrawlCancelled);
+        прерванный поиск заглушку не сохраняет.
         """
         entry = self.index.find_exact(k_code)
 
@@ -576,7 +694,7 @@ class SearchService:
         if not self.live_search_if_missing:
             return None
 
-        entry = self.index.search_on_disk(k_code)
+        entry = self.index.search_on_disk(k_code, cancel_event=cancel_event)
         if entry:
             self.index.update_entry(entry)
             return entry
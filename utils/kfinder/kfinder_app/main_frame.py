@@ -17,14 +17,27 @@ from __future__ import annotations
 
 import threading
 from pathlib import Path
+from typing import Callable, Iterable, Optional
 
 import wx
 
 from .config import AppSettings
-from .dialogs import AboutDialog, AppNrResultsDialog, DXFResultsDialog, ResultsDialog, ServiceDialog
+from .dialogs import (
+    AboutDialog,
+    AppNrResultsDialog,
+    DXFResultsDialog,
+    ResultsDialog,
+    SearchResultsDialog,
+    ServiceDialog,
+)
+from .folder_crawler import CrawlCancelled
+from .geometry_cache import GeometryCache
 from .k_repository import KIndex, SearchService
 from .logging_setup import get_logger
+from .models import AppNrRecord, DXFSearchResult, KEntry
 from .repositories import AppNrRepository, DXFRepository
+from .search_executor import SearchExecutor, SearchTicket, SearchTimeout
+from .search_index import SearchIndex
 from .texts import TXT
 from .ui_style import (
     CLR_BG,
@@ -46,6 +59,23 @@ from .ui_style import (
 
 logger = get_logger()
 
+# Сколько лучших совпадений общего поиска показывать в таблице
+TEXT_SEARCH_LIMIT = 500
+
+
+class _ResultStream:
+    """
+    Состояние одного поиска с выдачей результатов частями.
+    """
+
+    __slots__ = ("items", "dialog", "closed", "ticket")
+
+    def __init__(self):
+        self.items: list = []
+        self.dialog: Optional[wx.Dialog] = None
+        self.closed = False
+        self.ticket: Optional[SearchTicket] = None
+
 
 class KFinderFrame(wx.Frame):
     """
@@ -62,10 +92,16 @@ class KFinderFrame(wx.Frame):
         self.k_service = SearchService(settings, self.k_index)
         self.dxf_repo = DXFRepository(settings)
         self.appnr_repo = AppNrRepository(settings)
+        self.text_index = SearchIndex(settings)
+        self.geometry_cache = GeometryCache(settings)
 
         self._busy = False
         self._main_buttons: list[wx.Window] = []
 
+        # Поиск идёт в фоне; UI получает результаты через wx.CallAfter
+        self.search_executor = SearchExecutor(deliver=wx.CallAfter)
+        self._preview_timer: Optional[wx.CallLater] = None
+
         super().__init__(
             None,
             title=TXT["app_title"],
@@ -116,6 +152,7 @@ class KFinderFrame(wx.Frame):
         ))
         self.entry.SetForegroundColour(wx.Colour(CLR_INPUT_TEXT))
         self.entry.Bind(wx.EVT_TEXT_ENTER, lambda _: self._smart_search())
+        self.entry.Bind(wx.EVT_TEXT, self._on_entry_text)
         self.entry.Bind(wx.EVT_SET_FOCUS, self._on_entry_focus)
         self.entry.Bind(wx.EVT_KILL_FOCUS, self._on_entry_kill_focus)
 
@@ -219,6 +256,7 @@ class KFinderFrame(wx.Frame):
             TXT["search_mode_k"]: TXT["input_hint_k"],
             TXT["search_mode_dxf"]: TXT["input_hint_dxf"],
             TXT["search_mode_app"]: TXT["input_hint_app"],
+            TXT["search_mode_text"]: TXT["input_hint_text"],
         }
         new_hint = hints.get(self.search_mode_value, "")
         current_value = self.entry.GetValue()
@@ -238,6 +276,8 @@ class KFinderFrame(wx.Frame):
             return CLR_BTN_DARK
         if mode == TXT["search_mode_app"]:
             return CLR_BTN_WARN
+        if mode == TXT["search_mode_text"]:
+            return CLR_BTN_OK
         return CLR_BTN_PRIMARY
 
     def _set_search_mode(self, mode: str, clear_entry: bool = True) -> None:
@@ -255,10 +295,12 @@ class KFinderFrame(wx.Frame):
         item_k = menu.Append(wx.ID_ANY, TXT["search_mode_k"])
         item_dxf = menu.Append(wx.ID_ANY, TXT["search_mode_dxf"])
         item_app = menu.Append(wx.ID_ANY, TXT["search_mode_app"])
+        item_text = menu.Append(wx.ID_ANY, TXT["search_mode_text"])
 
         self.Bind(wx.EVT_MENU, lambda _: self._set_search_mode(TXT["search_mode_k"]), item_k)
         self.Bind(wx.EVT_MENU, lambda _: self._set_search_mode(TXT["search_mode_dxf"]), item_dxf)
         self.Bind(wx.EVT_MENU, lambda _: self._set_search_mode(TXT["search_mode_app"]), item_app)
+        self.Bind(wx.EVT_MENU, lambda _: self._set_search_mode(TXT["search_mode_text"]), item_text)
 
         btn = event.GetEventObject()
         if isinstance(btn, wx.Window):
@@ -345,6 +387,7 @@ class KFinderFrame(wx.Frame):
         if self._busy:
             return
 
+        self._stop_preview()
         raw = self._get_effective_entry_value()
         if not raw:
             wx.MessageBox(TXT["msg_input_required"], TXT["msg_input_error"], wx.OK | wx.ICON_INFORMATION)
@@ -359,12 +402,164 @@ class KFinderFrame(wx.Frame):
                     self._process_partial(raw)
             elif self.search_mode_value == TXT["search_mode_dxf"]:
                 self._process_dxf(raw, action)
+            elif self.search_mode_value == TXT["search_mode_text"]:
+                self._process_text(raw)
             else:
                 self._process_app_nr(raw, action)
         except Exception as e:
             logger.error(f"_handle_action: {e}")
             wx.MessageBox(str(e), TXT["msg_error"], wx.OK | wx.ICON_ERROR)
 
+    # --------------------------------------------------------
+    # Фоновый поиск
+    # --------------------------------------------------------
+
+    def _submit_search(
+        self,
+        job: Callable[[SearchTicket], object],
+        on_done: Callable[[object], None],
+        on_chunk: Optional[Callable[[list], None]] = None,
+        disk: bool = False,
+    ) -> SearchTicket:
+        """
+        Запускает поиск в фоне; новый поиск отменяет предыдущий.
+
+        disk=True — поиск может идти на диск и ограничен таймаутом
+        ui.disk_search_timeout_s.
+        """
+        return self.search_executor.submit(
+            job,
+            on_done=on_done,
+            on_error=self._on_search_error,
+            on_chunk=on_chunk,
+            timeout=self.ui_cfg.disk_search_timeout_s if disk else None,
+        )
+
+    def _on_search_error(self, error: BaseException) -> None:
+        if isinstance(error, CrawlCancelled):
+            self._set_status(TXT["service_scan_cancelled"], "warn")
+            return
+
+        if isinstance(error, SearchTimeout):
+            self._set_status(TXT["status_search_timeout"], "warn")
+            wx.MessageBox(
+                TXT["msg_search_timeout"].format(seconds=self.ui_cfg.disk_search_timeout_s),
+                TXT["msg_warning"],
+                wx.OK | wx.ICON_WARNING,
+            )
+        else:
+            logger.error(f"search: {error}")
+            self._set_status(TXT["status_search_error"], "err")
+            wx.MessageBox(str(error), TXT["msg_error"], wx.OK | wx.ICON_ERROR)
+
+        self.entry.SetFocus()
+        self.entry.SelectAll()
+        self._refresh_button_styles()
+
+    def _stream_search(
+        self,
+        chunks: Callable[[], Iterable[list]],
+        open_dialog: Callable[[list], wx.Dialog],
+        append: Callable[[wx.Dialog, list], None],
+        finish: Callable[[list], None],
+    ) -> None:
+        """
+        Поиск с выдачей результатов частями.
+
+        Со второго найденного результата открывается диалог, в который
+        дописываются следующие части, пока он открыт. Если диалог так
+        и не открылся (0 или 1 результат), итог обрабатывает finish(items).
+        """
+        stream = _ResultStream()
+
+        def job(ticket: SearchTicket) -> None:
+            for chunk in chunks():
+                if ticket.cancelled:
+                    return
+                ticket.emit(chunk)
+
+        def on_chunk(chunk: list) -> None:
+            stream.items.extend(chunk)
+            if stream.dialog is not None:
+                append(stream.dialog, chunk)
+                return
+            if stream.closed or len(stream.items) < 2:
+                return
+
+            stream.dialog = open_dialog(list(stream.items))
+            stream.dialog.ShowModal()
+            stream.dialog.Destroy()
+            stream.dialog = None
+            stream.closed = True
+
+            # Диалог закрыт раньше, чем поиск дошёл до конца
+            self.search_executor.cancel(stream.ticket)
+            self._set_status(TXT["status_found_many"].format(count=len(stream.items)), "ok")
+            self._refresh_button_styles()
+
+        def on_done(_result: object) -> None:
+            if stream.dialog is None and not stream.closed:
+                finish(stream.items)
+
+        stream.ticket = self._submit_search(job, on_done, on_chunk=on_chunk)
+
+    # --------------------------------------------------------
+    # Предпросмотр при вводе
+    # --------------------------------------------------------
+
+    def _on_entry_text(self, event: wx.CommandEvent) -> None:
+        event.Skip()
+        self._stop_preview()
+        if self._busy or not self._get_effective_entry_value():
+            return
+        self._preview_timer = wx.CallLater(max(1, self.ui_cfg.search_debounce_ms), self._run_preview)
+
+    def _stop_preview(self) -> None:
+        if self._preview_timer is not None:
+            self._preview_timer.Stop()
+            self._preview_timer = None
+
+    def _run_preview(self) -> None:
+        """
+        Подсчёт совпадений по индексу (без поиска на диске) для строки статуса.
+        Запускается после паузы во вводе; диалоги не открываются.
+        """
+        self._preview_timer = None
+        raw = self._get_effective_entry_value()
+        if self._busy or not raw:
+            return
+
+        mode = self.search_mode_value
+
+        def job(_ticket: SearchTicket) -> tuple[str, str]:
+            if mode == TXT["search_mode_k"] and self.k_index.is_full_code(raw):
+                code = self.k_index.normalize_full(raw)
+                entry = self.k_index.find_exact(code)
+                if entry is None:
+                    return TXT["status_preview_missing"].format(code=code), "warn"
+                if not entry.has_folder:
+                    return TXT["status_no_folder"].format(code=code), "warn"
+                return TXT["status_preview_indexed"].format(code=code), "ok"
+
+            if mode == TXT["search_mode_k"]:
+                count = self.k_index.count_partial(raw)
+            elif mode == TXT["search_mode_dxf"]:
+                count = self.dxf_repo.count_by_dxf_partial(raw)
+            elif mode == TXT["search_mode_text"]:
+                count = self.text_index.count(raw)
+            else:
+                count = len(self.appnr_repo.search(raw))
+
+            if not count:
+                return TXT["status_no_hits"], "warn"
+            return TXT["status_preview"].format(count=count, query=raw), "ok"
+
+        self.search_executor.submit(
+            job,
+            on_done=lambda status: self._set_status(*status),
+            on_error=lambda e: self._set_status(str(e), "warn"),
+        )
+
     # --------------------------------------------------------
     # K-логика со старым поведением статуса
     # --------------------------------------------------------
@@ -377,8 +572,36 @@ class KFinderFrame(wx.Frame):
 
     def _process_full(self, k_code: str, action: str) -> None:
         self._set_status(TXT["status_searching"].format(code=k_code), "ok")
-        entry = self.k_service.get_or_search(k_code)
 
+        def job(ticket: SearchTicket) -> tuple:
+            entry = self.k_service.get_or_search(k_code, cancel_event=ticket.cancel_event)
+            if not entry or not entry.has_folder:
+                return entry, "", None, False
+
+            # Проверка пути — тоже обращение к диску, поэтому здесь, в фоне
+            path_map = {
+                "folder": entry.folder_path,
+                "sketch": entry.sketch_path,
+                "dwg": entry.dwg_path,
+            }
+            path = Path(path_map[action]) if action in path_map else None
+            return entry, self._get_serials_text_for_k(k_code), path, bool(path and path.exists())
+
+        self._submit_search(
+            job,
+            lambda result: self._finish_full(k_code, action, *result),
+            disk=True,
+        )
+
+    def _finish_full(
+        self,
+        k_code: str,
+        action: str,
+        entry: Optional[KEntry],
+        serials_text: str,
+        path: Optional[Path],
+        path_exists: bool,
+    ) -> None:
         if not entry:
             self._set_status(TXT["status_not_found"].format(code=k_code), "warn")
             wx.MessageBox(
@@ -401,7 +624,6 @@ class KFinderFrame(wx.Frame):
             self.entry.SelectAll()
             return
 
-        serials_text = self._get_serials_text_for_k(k_code)
         if serials_text:
             self._set_status(
                 TXT["status_found_with_serial"].format(code=k_code, serials=serials_text),
@@ -424,24 +646,25 @@ class KFinderFrame(wx.Frame):
             self._show_dxf_results(k_code)
             return
 
-        path_map = {
-            "folder": Path(entry.folder_path),
-            "sketch": Path(entry.sketch_path),
-            "dwg": Path(entry.dwg_path),
-        }
-        path = path_map.get(action)
         if path is None:
             return
 
-        if path.exists():
+        if path_exists:
             open_path(path)
         else:
             msg = TXT["msg_file_missing"] if action == "dwg" else TXT["msg_folder_missing"]
             wx.MessageBox(msg.format(path=path), TXT["msg_error"], wx.OK | wx.ICON_WARNING)
 
     def _process_partial(self, raw: str) -> None:
-        results = self.k_index.find_partial(raw)
+        self._set_status(TXT["status_searching"].format(code=raw), "ok")
+        self._stream_search(
+            lambda: self.k_index.iter_partial(raw),
+            open_dialog=lambda entries: ResultsDialog(self, entries, f"Treffer für '{raw}'"),
+            append=lambda dlg, chunk: dlg.add_entries(chunk),
+            finish=lambda results: self._finish_partial(raw, results),
+        )
 
+    def _finish_partial(self, raw: str, results: list[KEntry]) -> None:
         if not results:
             self._set_status(TXT["status_no_hits"], "warn")
             wx.MessageBox(
@@ -496,8 +719,12 @@ class KFinderFrame(wx.Frame):
     # --------------------------------------------------------
 
     def _show_dxf_results(self, k_code: str) -> None:
-        results = self.dxf_repo.search_by_k_num(k_code)
+        self._submit_search(
+            lambda _ticket: self.dxf_repo.search_by_k_num(k_code),
+            lambda results: self._finish_dxf_for_k(k_code, results),
+        )
 
+    def _finish_dxf_for_k(self, k_code: str, results: list[DXFSearchResult]) -> None:
         if not results:
             wx.MessageBox(
                 TXT["dxf_no_hits"].format(code=k_code),
@@ -519,7 +746,14 @@ class KFinderFrame(wx.Frame):
         if not s or not s.isdigit():
             raise ValueError(TXT["msg_dxf_input_error"])
 
-        results = self.dxf_repo.search_by_dxf_partial(s)
+        self._stream_search(
+            lambda: self.dxf_repo.iter_by_dxf_partial(s),
+            open_dialog=lambda results: DXFResultsDialog(self, results, f"{TXT['dxf_results_title']} — {s}"),
+            append=lambda dlg, chunk: dlg.add_results(chunk),
+            finish=lambda results: self._finish_dxf(s, action, results),
+        )
+
+    def _finish_dxf(self, s: str, action: str, results: list[DXFSearchResult]) -> None:
         if not results:
             wx.MessageBox(
                 TXT["msg_dxf_not_found"].format(query=s),
@@ -569,8 +803,36 @@ class KFinderFrame(wx.Frame):
     # --------------------------------------------------------
 
     def _process_app_nr(self, raw: str, action: str) -> None:
-        records = self.appnr_repo.search(raw)
+        def job(ticket: SearchTicket) -> tuple:
+            records = self.appnr_repo.search(raw)
+            if action != "show" and len(records) == 1:
+                return records, None
+
+            # K-записи для таблицы ищутся здесь, а не в диалоге:
+            # get_or_search может уйти на диск
+            entries: list[Optional[KEntry]] = []
+            for rec in records:
+                try:
+                    entries.append(self.k_service.get_or_search(rec.k_code, cancel_event=ticket.cancel_event))
+                except CrawlCancelled:
+                    raise
+                except Exception:
+                    entries.append(None)
+            return records, entries
+
+        self._submit_search(
+            job,
+            lambda result: self._finish_app_nr(raw, action, *result),
+            disk=True,
+        )
 
+    def _finish_app_nr(
+        self,
+        raw: str,
+        action: str,
+        records: list[AppNrRecord],
+        entries: Optional[list[Optional[KEntry]]],
+    ) -> None:
         if not records:
             wx.MessageBox(
                 TXT["msg_app_not_found"].format(query=raw),
@@ -585,7 +847,7 @@ class KFinderFrame(wx.Frame):
         self._set_status(TXT["status_found_many"].format(count=len(records)), "ok")
 
         if action == "show" or len(records) > 1:
-            dlg = AppNrResultsDialog(self, records, f"{TXT['app_results_title']} — {raw}")
+            dlg = AppNrResultsDialog(self, records, f"{TXT['app_results_title']} — {raw}", entries=entries)
             dlg.ShowModal()
             dlg.Destroy()
             self._refresh_button_styles()
@@ -598,6 +860,36 @@ class KFinderFrame(wx.Frame):
 
         self._process_full(rec.k_code, action)
 
+    # --------------------------------------------------------
+    # Общий поиск
+    # --------------------------------------------------------
+
+    def _process_text(self, raw: str) -> None:
+        self._set_status(TXT["status_searching"].format(code=raw), "ok")
+        self._submit_search(
+            lambda _ticket: (self.text_index.search(raw, limit=TEXT_SEARCH_LIMIT), self.text_index.count(raw)),
+            lambda result: self._finish_text(raw, *result),
+        )
+
+    def _finish_text(self, raw: str, hits: list, total: int) -> None:
+        if not hits:
+            self._set_status(TXT["status_no_hits"], "warn")
+            wx.MessageBox(
+                TXT["msg_no_hits"].format(query=raw),
+                TXT["msg_no_hits_title"],
+                wx.OK | wx.ICON_INFORMATION,
+            )
+            self.entry.SetFocus()
+            self.entry.SelectAll()
+            self._refresh_button_styles()
+            return
+
+        self._set_status(TXT["status_found_many"].format(count=total), "ok")
+        dlg = SearchResultsDialog(self, hits, f"{TXT['text_results_title']} — {raw}", total=total)
+        dlg.ShowModal()
+        dlg.Destroy()
+        self._refresh_button_styles()
+
     # --------------------------------------------------------
     # Диалоги
     # --------------------------------------------------------
@@ -641,10 +933,13 @@ class KFinderFrame(wx.Frame):
                 )
 
                 self.after(lambda: self._set_status("DXF: Excel-Index…", "warn"))
-                dxf_excel_count = self.dxf_repo.rebuild_excel_index()
+                dxf_excel_count = self.dxf_repo.rebuild_excel_index(incremental=True)
 
                 self.after(lambda: self._set_status("DXF: Datei-Index…", "warn"))
-                dxf_file_count = self.dxf_repo.rebuild_files_index_full()
+                dxf_file_count = self.dxf_repo.rebuild_files_index_full(
+                    progress_cb=lambda m: self.after(lambda msg=m: self._set_status(msg, "warn")),
+                    incremental=True,
+                )
 
                 self.after(lambda: self._set_status("App.Nr.: Tail-Index…", "warn"))
                 appnr_count = self.appnr_repo.rebuild_tail()
@@ -654,6 +949,7 @@ class KFinderFrame(wx.Frame):
                     "ok",
                 ))
                 self.after(self._refresh_meta)
+                self._start_geometry_update()
 
                 if not silent:
                     self.after(lambda: wx.MessageBox(
@@ -669,6 +965,8 @@ class KFinderFrame(wx.Frame):
                 if on_done:
                     self.after(on_done)
 
+            except CrawlCancelled:
+                self.after(lambda: self._set_status(TXT["service_scan_cancelled"], "warn"))
             except Exception as e:
                 logger.error(f"run_partial_update: {e}")
                 self.after(lambda: self._set_status(TXT["service_update_error"], "err"))
@@ -701,7 +999,9 @@ class KFinderFrame(wx.Frame):
                 dxf_excel_count = self.dxf_repo.rebuild_excel_index()
 
                 self.after(lambda: self._set_status("DXF: Datei Vollaufbau…", "warn"))
-                dxf_file_count = self.dxf_repo.rebuild_files_index_full()
+                dxf_file_count = self.dxf_repo.rebuild_files_index_full(
+                    progress_cb=lambda m: self.after(lambda msg=m: self._set_status(msg, "warn")),
+                )
 
                 self.after(lambda: self._set_status("App.Nr.: Vollaufbau…", "warn"))
                 appnr_count = self.appnr_repo.rebuild_full()
@@ -711,6 +1011,7 @@ class KFinderFrame(wx.Frame):
                     "ok",
                 ))
                 self.after(self._refresh_meta)
+                self._start_geometry_update()
 
                 self.after(lambda: wx.MessageBox(
                     "Vollständige Neuindizierung abgeschlossen.\n\n"
@@ -725,6 +1026,8 @@ class KFinderFrame(wx.Frame):
                 if on_done:
                     self.after(on_done)
 
+            except CrawlCancelled:
+                self.after(lambda: self._set_status(TXT["service_scan_cancelled"], "warn"))
             except Exception as e:
                 logger.error(f"run_full_rebuild: {e}")
                 self.after(lambda: self._set_status(TXT["service_rebuild_error"], "err"))
@@ -734,5 +1037,25 @@ class KFinderFrame(wx.Frame):
 
         threading.Thread(target=worker, daemon=True).start()
 
+    def _start_geometry_update(self) -> None:
+        """
+        Досчитывает превью и геометрию DXF в фоне, без статуса и сообщений.
+        """
+        if not self.geometry_cache.enabled:
+            return
+
+        def worker():
+            try:
+                self.geometry_cache.run()
+            except Exception as e:
+                logger.error(f"geometry_cache: {e}")
+
+        threading.Thread(target=worker, daemon=True).start()
+
     def _on_close(self, _evt: wx.CloseEvent) -> None:
+        # Фоновое сканирование архива и поиск не должны держать процесс после закрытия
+        self._stop_preview()
+        self.search_executor.shutdown()
+        self.k_index.cancel_scan()
+        self.geometry_cache.cancel()
         self.Destroy()
@@ -35,6 +35,12 @@ models.py
 6. AppNrRecord
    Запись индекса серийных номеров аппаратов.
 
+7. SearchHit
+   Результат общего полнотекстового поиска (search_index.py).
+
+8. GeometrySummary
+   Геометрия и превью DXF-чертежа (geometry_cache.py).
+
 Важно
 -----
 Модели не должны содержать GUI-логику.
@@ -55,7 +61,7 @@ from typing import Optional
 # K-Finder
 # ============================================================
 
-@dataclass
+@dataclass(slots=True)
 class KEntry:
     """
     Запись индекса папок заказов.
@@ -315,6 +321,62 @@ class DXFSearchResult:
         return asdict(self)
 
 
+@dataclass
+class GeometrySummary:
+    """
+    Сводка геометрии DXF-чертежа детали и его превью.
+
+    Поля:
+    -----
+    dxf_no / source_path:
+        DXF-номер и файл, из которого посчитана сводка
+        (DXF рядом с основным DWG либо сам DWG).
+
+    size / mtime_ns / sha1:
+        Отпечаток файла: по нему кэш считается актуальным.
+
+    min_x .. max_y:
+        Габарит (bbox) в единицах чертежа (мм).
+
+    cut_length_mm:
+        Суммарная длина всех контуров реза.
+
+    pierce_count:
+        Число врезок = число отдельных контуров.
+
+    area_mm2:
+        Площадь детали: внешний контур минус отверстия.
+
+    preview_png:
+        Небольшое превью (PNG); пусто, если посчитать не удалось.
+
+    error:
+        Текст ошибки, если файл не удалось прочитать.
+    """
+    dxf_no: int
+    source_path: str
+    size: int
+    mtime_ns: int
+    sha1: str = ""
+    min_x: float = 0.0
+    min_y: float = 0.0
+    max_x: float = 0.0
+    max_y: float = 0.0
+    cut_length_mm: float = 0.0
+    pierce_count: int = 0
+    area_mm2: float = 0.0
+    preview_png: bytes = b""
+    error: str = ""
+
+    @property
+    def width(self) -> float:
+        return self.max_x - self.min_x
+
+    @property
+    def height(self) -> float:
+        return self.max_y - self.min_y
+
+
 # ============================================================
 # Apparate-Nr.
 # ============================================================
@@ -357,3 +419,38 @@ class AppNrRecord:
             serial_prefix=str(data["serial_prefix"]),
             k_code=str(data["k_code"]),
         )
+
+
+# ============================================================
+# Общий поиск
+# ============================================================
+
+@dataclass
+class SearchHit:
+    """
+    Одно совпадение общего поиска по K, DXF-Excel и App.Nr.
+
+    Поля:
+    -----
+    kind:
+        "K", "DXF" или "APP" — из какого индекса запись.
+
+    k_code:
+        K-номер записи (у DXF — k_num, у App.Nr. — k_code).
+
+    year:
+        Год K-заказа по индексу папок (0 — неизвестен).
+
+    score:
+        Оценка bm25: чем меньше, тем релевантнее.
+
+    entry / dxf / appnr:
+        Исходная запись; заполнено только поле своего вида.
+    """
+    kind: str
+    k_code: str
+    year: int
+    score: float
+    entry: Optional[KEntry] = None
+    dxf: Optional[DXFExcelRecord] = None
+    appnr: Optional[AppNrRecord] = None
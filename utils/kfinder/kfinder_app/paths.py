@@ -16,6 +16,7 @@ paths.py
   - config.json
   - логам
   - всем JSON-индексам
+  - SQLite-хранилищу индексов
 
 И используется всеми остальными модулями.
 
@@ -93,3 +94,10 @@ DXF_FILES_INDEX_JSON = DATA_DIR / "dxf_index.json"
 # ----------------------------------------------------------------------
 
 APPNR_INDEX_JSON = DATA_DIR / "appnr_index.json"
+
+
+# ----------------------------------------------------------------------
+# SQLite-хранилище индексов (JSON-файлы выше — источник миграции)
+# ----------------------------------------------------------------------
+
+INDEX_DB = DATA_DIR / "kfinder_index.db"
@@ -0,0 +1,276 @@
+"""
+prefix_index.py
+===============
+
+Индексы для поиска по началу ключа (search-as-you-type).
+
+Зачем нужен
+-----------
+Частичный поиск K-Finder (K-номер, DXF-номер, App.Nr.) раньше на каждое
+нажатие клавиши перебирал все записи и сравнивал строки через startswith.
+При росте архива до 100k+ записей это заметно тормозит ввод.
+
+Здесь собраны две структуры на отсортированных массивах и bisect:
+
+1. PrefixIndex
+   Строковые ключи. Все ключи с общим началом лежат в отсортированном
+   массиве подряд, поэтому поиск — два bisect, O(log n), а результат —
+   срез массива, уже упорядоченный по ключу.
+
+2. NumericPrefixIndex
+   Целые числа (DXF-номера), поиск по началу десятичной записи.
+   Для префикса p и каждой длины числа L числа с таким началом образуют
+   непрерывный числовой диапазон [p·10^k, (p+1)·10^k - 1], k = L - len(p).
+   Диапазоны перебираются по возрастанию L, поэтому результат
+   упорядочен по значению числа.
+
+Обе структуры строятся один раз при загрузке; изменения применяются
+пачкой (update с remove) — одна копия массива на пачку.
+
+Потоки
+------
+Модуль не зависит от хранилища и моделей — только стандартная библиотека.
+Изменения выполняются репозиториями в фоновых задачах индексации,
+чтение — из GUI. Содержимое хранится неизменяемым снимком (кортежи),
+изменение строит новый снимок и подменяет его одним присваиванием
+атрибута. Чтение берёт снимок один раз и работает только с ним, поэтому
+без блокировок видит либо старое, либо новое состояние целиком — ключи
+и значения всегда из одного снимка. Изменения между собой
+сериализуются блокировкой записи.
+"""
+
+from __future__ import annotations
+
+import threading
+from bisect import bisect_left, bisect_right
+from typing import Any, Callable, Iterable, Optional
+
+
+# Символ, который больше любого символа реальных ключей
+_KEY_MAX = "\uffff"
+
+# Отличает отсутствующий ключ от значения None
+_MISSING = object()
+
+
+class PrefixIndex:
+    """
+    Отсортированный массив уникальных строковых ключей с привязанными значениями.
+
+    Пример:
+        idx = PrefixIndex([("K20500", 2024), ("K20501", 2024)])
+        idx.find("K205")    -> [2024, 2024]
+        idx.keys("K2050")   -> ["K20500", "K20501"]
+    """
+
+    __slots__ = ("_data", "_write_lock")
+
+    def __init__(self, items: Iterable[tuple[str, Any]] = ()):
+        # Снимок (ключи, значения): подменяется целиком, не изменяется
+        self._data: tuple[tuple[str, ...], tuple[Any, ...]] = ((), ())
+        self._write_lock = threading.Lock()
+        self.rebuild(items)
+
+    def _publish(self, data: dict) -> None:
+        keys = tuple(sorted(data))
+        self._data = (keys, tuple(data[k] for k in keys))
+
+    def rebuild(self, items: Iterable[tuple[str, Any]]) -> None:
+        """
+        Полностью заменяет содержимое (при повторяющихся ключах остаётся последнее значение).
+        """
+        data = dict(items)
+        with self._write_lock:
+            self._publish(data)
+
+    # --------------------------------------------------------
+    # Поиск
+    # --------------------------------------------------------
+
+    @staticmethod
+    def _span(keys: tuple[str, ...], prefix: str) -> tuple[int, int]:
+        lo = bisect_left(keys, prefix)
+        hi = bisect_left(keys, prefix + _KEY_MAX, lo)
+        return lo, hi
+
+    def span(self, prefix: str) -> tuple[int, int]:
+        """
+        Границы [lo, hi) ключей, начинающихся с prefix.
+        """
+        return self._span(self._data[0], prefix)
+
+    def keys(self, prefix: str = "", limit: Optional[int] = None) -> list[str]:
+        keys, _ = self._data
+        lo, hi = self._span(keys, prefix)
+        if limit is not None:
+            hi = min(hi, lo + limit)
+        return list(keys[lo:hi])
+
+    def find(self, prefix: str = "", limit: Optional[int] = None) -> list[Any]:
+        """
+        Значения ключей, начинающихся с prefix, в порядке ключей.
+        """
+        keys, values = self._data
+        lo, hi = self._span(keys, prefix)
+        if limit is not None:
+            hi = min(hi, lo + limit)
+        return list(values[lo:hi])
+
+    def items(self, prefix: str = "") -> list[tuple[str, Any]]:
+        keys, values = self._data
+        lo, hi = self._span(keys, prefix)
+        return list(zip(keys[lo:hi], values[lo:hi]))
+
+    def count(self, prefix: str = "") -> int:
+        lo, hi = self.span(prefix)
+        return hi - lo
+
+    def get(self, key: str, default: Any = None) -> Any:
+        keys, values = self._data
+        i = bisect_left(keys, key)
+        if i < len(keys) and keys[i] == key:
+            return values[i]
+        return default
+
+    def max_key(self) -> Optional[str]:
+        keys = self._data[0]
+        return keys[-1] if keys else None
+
+    # --------------------------------------------------------
+    # Обновление
+    # --------------------------------------------------------
+
+    def update(self, items: Iterable[tuple[str, Any]], remove: Iterable[str] = ()) -> int:
+        """
+        Добавляет или заменяет ключи items и удаляет ключи remove — одним снимком.
+        Возвращает количество удалённых ключей.
+        """
+        items = list(items)
+        remove = list(remove)
+        if not items and not remove:
+            return 0
+        with self._write_lock:
+            data = dict(zip(*self._data))
+            removed = sum(data.pop(key, _MISSING) is not _MISSING for key in remove)
+            data.update(items)
+            self._publish(data)
+        return removed
+
+    def set(self, key: str, value: Any) -> None:
+        """
+        Добавляет ключ или заменяет его значение.
+        """
+        self.update([(key, value)])
+
+    def discard(self, key: str) -> bool:
+        return self.update((), [key]) > 0
+
+    def discard_from(self, key: str) -> int:
+        """
+        Удаляет все ключи >= key. Возвращает количество удалённых.
+        """
+        with self._write_lock:
+            keys, values = self._data
+            i = bisect_left(keys, key)
+            self._data = (keys[:i], values[:i])
+        return len(keys) - i
+
+    def discard_where(self, predicate: Callable[[str, Any], bool]) -> int:
+        """
+        Удаляет пары (ключ, значение), для которых predicate вернул True.
+        """
+        with self._write_lock:
+            keys, values = self._data
+            keep = [(k, v) for k, v in zip(keys, values) if not predicate(k, v)]
+            removed = len(keys) - len(keep)
+            if removed:
+                self._data = (tuple(k for k, _ in keep), tuple(v for _, v in keep))
+        return removed
+
+    def __len__(self) -> int:
+        return len(self._data[0])
+
+    def __contains__(self, key: str) -> bool:
+        keys = self._data[0]
+        i = bisect_left(keys, key)
+        return i < len(keys) and keys[i] == key
+
+
+class NumericPrefixIndex:
+    """
+    Отсортированный набор неотрицательных целых с поиском по началу десятичной записи.
+
+    Пример:
+        idx = NumericPrefixIndex([99, 990, 9900, 9901, 12000])
+        idx.find("99")  -> [99, 990, 9900, 9901]
+    """
+
+    __slots__ = ("_nums", "_write_lock")
+
+    def __init__(self, numbers: Iterable[int] = ()):
+        # Снимок: кортеж подменяется целиком, не изменяется
+        self._nums: tuple[int, ...] = ()
+        self._write_lock = threading.Lock()
+        self.rebuild(numbers)
+
+    def rebuild(self, numbers: Iterable[int]) -> None:
+        nums = tuple(sorted({int(n) for n in numbers if int(n) >= 0}))
+        with self._write_lock:
+            self._nums = nums
+
+    def find(self, prefix: str, limit: Optional[int] = None) -> list[int]:
+        """
+        Числа, десятичная запись которых начинается с prefix, по возрастанию.
+        """
+        nums = self._nums
+        if not prefix or not prefix.isdigit() or not nums:
+            return []
+
+        p = int(prefix)
+        max_len = len(str(nums[-1]))
+        result: list[int] = []
+
+        # "0" совпадает только с нулём; "05" не совпадает ни с чем
+        if prefix[0] == "0":
+            return [0] if prefix == "0" and nums[0] == 0 else []
+
+        for extra in range(0, max_len - len(prefix) + 1):
+            scale = 10 ** extra
+            lo = bisect_left(nums, p * scale)
+            hi = bisect_right(nums, (p + 1) * scale - 1, lo)
+            result.extend(nums[lo:hi])
+            if limit is not None and len(result) >= limit:
+                return result[:limit]
+
+        return result
+
+    def count(self, prefix: str) -> int:
+        return len(self.find(prefix))
+
+    def update(self, numbers: Iterable[int], remove: Iterable[int] = ()) -> None:
+        """
+        Добавляет numbers и удаляет remove — одним снимком.
+        """
+        added = {int(n) for n in numbers if int(n) >= 0}
+        removed = {int(n) for n in remove}
+        if not added and not removed:
+            return
+        with self._write_lock:
+            self._nums = tuple(sorted((set(self._nums) | added) - removed))
+
+    def add(self, number: int) -> None:
+        self.update([number])
+
+    def discard(self, number: int) -> bool:
+        found = int(number) in self
+        if found:
+            self.update((), [number])
+        return found
+
+    def __len__(self) -> int:
+        return len(self._nums)
+
+    def __contains__(self, number: int) -> bool:
+        nums = self._nums
+        i = bisect_left(nums, int(number))
+        return i < len(nums) and nums[i] == int(number)
@@ -0,0 +1,178 @@
+"""
+range_set.py
+============
+
+Компактное множество целых чисел в виде отсортированных непрерывных диапазонов.
+
+Зачем нужен
+-----------
+K-индекс хранит заглушку (has_folder = False) для каждого свободного номера
+между минимальным и максимальным K-номером. Раньше каждая заглушка была
+отдельной строкой / KEntry с пустыми путями, хотя вся её информация —
+один номер.
+
+RangeSet хранит такие номера как диапазоны [start, end]:
+
+- подряд идущие свободные номера занимают одну пару чисел;
+- проверка номера и добавление/удаление — bisect, O(log n) по числу диапазонов;
+- запросы вида "какие номера без папки в [a, b]" — срез диапазонов,
+  а не перебор записей.
+
+Пример:
+    gaps = RangeSet([5, 6, 7, 10])
+    gaps.ranges()          -> [(5, 7), (10, 10)]
+    8 in gaps              -> False
+    gaps.intersect(6, 20)  -> [(6, 7), (10, 10)]
+
+Важно
+-----
+Модуль не зависит от хранилища и моделей — только стандартная библиотека.
+"""
+
+from __future__ import annotations
+
+from bisect import bisect_left, bisect_right
+from typing import Iterable, Iterator, Optional
+
+
+class RangeSet:
+    """
+    Множество неотрицательных целых: параллельные списки начал и концов
+    непересекающихся, не соприкасающихся диапазонов (по возрастанию).
+    """
+
+    __slots__ = ("_starts", "_ends")
+
+    def __init__(self, numbers: Iterable[int] = ()):
+        self._starts: list[int] = []
+        self._ends: list[int] = []
+        self.rebuild(numbers)
+
+    @classmethod
+    def from_ranges(cls, ranges: Iterable[tuple[int, int]]) -> "RangeSet":
+        result = cls()
+        for start, end in sorted(ranges):
+            result.add_range(start, end)
+        return result
+
+    def rebuild(self, numbers: Iterable[int]) -> None:
+        """
+        Полностью заменяет содержимое.
+        """
+        self._starts = []
+        self._ends = []
+        for n in sorted({int(n) for n in numbers}):
+            if self._ends and self._ends[-1] == n - 1:
+                self._ends[-1] = n
+            else:
+                self._starts.append(n)
+                self._ends.append(n)
+
+    # --------------------------------------------------------
+    # Запросы
+    # --------------------------------------------------------
+
+    def __contains__(self, number: int) -> bool:
+        i = bisect_right(self._starts, int(number)) - 1
+        return i >= 0 and self._ends[i] >= number
+
+    def __len__(self) -> int:
+        return sum(e - s + 1 for s, e in zip(self._starts, self._ends))
+
+    def __bool__(self) -> bool:
+        return bool(self._starts)
+
+    def __iter__(self) -> Iterator[int]:
+        for start, end in zip(self._starts, self._ends):
+            yield from range(start, end + 1)
+
+    def ranges(self) -> list[tuple[int, int]]:
+        return list(zip(self._starts, self._ends))
+
+    def max(self) -> Optional[int]:
+        return self._ends[-1] if self._ends else None
+
+    def min(self) -> Optional[int]:
+        return self._starts[0] if self._starts else None
+
+    def intersect(self, lo: int, hi: int) -> list[tuple[int, int]]:
+        """
+        Диапазоны множества, обрезанные по [lo, hi].
+        """
+        if lo > hi:
+            return []
+        i = max(0, bisect_right(self._starts, lo) - 1)
+        j = bisect_right(self._starts, hi)
+        result = []
+        for start, end in zip(self._starts[i:j], self._ends[i:j]):
+            start, end = max(start, lo), min(end, hi)
+            if start <= end:
+                result.append((start, end))
+        return result
+
+    def numbers_between(self, lo: int, hi: int) -> list[int]:
+        return [n for start, end in self.intersect(lo, hi) for n in range(start, end + 1)]
+
+    def count_between(self, lo: int, hi: int) -> int:
+        return sum(end - start + 1 for start, end in self.intersect(lo, hi))
+
+    # --------------------------------------------------------
+    # Изменение
+    # --------------------------------------------------------
+
+    def add_range(self, start: int, end: int) -> None:
+        """
+        Добавляет [start, end] со слиянием соседних и пересекающихся диапазонов.
+        """
+        start, end = int(start), int(end)
+        if start > end:
+            return
+        # Все диапазоны, которые пересекаются или соприкасаются с [start, end]
+        i = bisect_left(self._ends, start - 1)
+        j = bisect_right(self._starts, end + 1)
+        if i < j:
+            start = min(start, self._starts[i])
+            end = max(end, self._ends[j - 1])
+        self._starts[i:j] = [start]
+        self._ends[i:j] = [end]
+
+    def add(self, number: int) -> None:
+        self.add_range(number, number)
+
+    def update(self, numbers: Iterable[int]) -> None:
+        for number in numbers:
+            self.add(number)
+
+    def discard_range(self, start: int, end: int) -> None:
+        """
+        Удаляет [start, end]; частично задетые диапазоны обрезаются.
+        """
+        start, end = int(start), int(end)
+        if start > end:
+            return
+        i = bisect_left(self._ends, start)
+        j = bisect_right(self._starts, end)
+        if i >= j:
+            return
+
+        new_starts: list[int] = []
+        new_ends: list[int] = []
+        if self._starts[i] < start:
+            new_starts.append(self._starts[i])
+            new_ends.append(start - 1)
+        if self._ends[j - 1] > end:
+            new_starts.append(end + 1)
+            new_ends.append(self._ends[j - 1])
+
+        self._starts[i:j] = new_starts
+        self._ends[i:j] = new_ends
+
+    def discard(self, number: int) -> None:
+        self.discard_range(number, number)
+
+    def discard_from(self, number: int) -> None:
+        """
+        Удаляет все числа >= number.
+        """
+        if self._ends:
+            self.discard_range(number, max(number, self._ends[-1]))
@@ -23,37 +23,35 @@ repositories.py
 --------
 - GUI-логики здесь нет.
 - Все пути берутся из AppSettings.
-- Все индексы хранятся в JSON в папке data/.
+- Индексы хранятся в SQLite-хранилище data/kfinder_index.db
+  (index_store.IndexStore); в JSON остаётся только карта диапазонов
+  dxf_ranges.json.
+- Excel-книги читаются через excel_ingest.ExcelIngest: неизменённый
+  файл не открывается, перечитываются только изменённые блоки строк.
 - Модуль не зависит от main_frame.py.
 
 Важно
 -----
-DXF Excel-индекс хранится в JSON в структуре:
-{
-    "K12345": [
-        { ... DXFExcelRecord ... },
-        { ... DXFExcelRecord ... }
-    ],
-    ...
-}
-
-После загрузки дополнительно строится in-memory индекс:
-- _by_k_num   : K-номер -> список DXFExcelRecord
-- _by_dxf_no  : DXF-номер -> список DXFExcelRecord
-
-Это позволяет быстро искать и по K, и по DXF.
+Excel-строки DXF лежат в таблице dxf_excel с индексами по k_num
+и dxf_no, файловые записи — в таблице dxf_files. Поиск и по K,
+и по DXF идёт запросами к базе; в dataclass превращаются только
+найденные записи.
 """
 
 from __future__ import annotations
 
 import json
+import os
 import re
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from pathlib import Path
-from typing import Callable, Optional
+from typing import Callable, Iterator, Optional
 
 from openpyxl import load_workbook
 
 from .config import AppSettings
+from .excel_ingest import ExcelIngest, IngestBatch
+from .index_store import IndexStore
 from .logging_setup import get_logger
 from .models import (
     AppNrRecord,
@@ -62,6 +60,7 @@ from .models import (
     DXFRange,
     DXFSearchResult,
 )
+from .prefix_index import NumericPrefixIndex, PrefixIndex
 
 logger = get_logger()
 
@@ -86,22 +85,15 @@ class DXFRepository:
     Индексы:
     --------
     _ranges:
-        Список DXFRange, полученный из листа Key.
+        Список DXFRange, полученный из листа Key (dxf_ranges.json).
 
-    _excel_index:
-        Словарь:
-            K-номер -> list[DXFExcelRecord]
+    store:
+        IndexStore — таблицы dxf_excel (K-номер / DXF-номер ->
+        DXFExcelRecord) и dxf_files (dxf_no -> DXFFileRecord).
 
-    _files_index:
-        Словарь:
-            dxf_no -> DXFFileRecord
-
-    _by_k_num:
-        In-memory alias к _excel_index.
-
-    _by_dxf_no:
-        Обратный индекс:
-            dxf_no -> list[DXFExcelRecord]
+    _numbers:
+        NumericPrefixIndex всех известных DXF-номеров (Excel + файлы)
+        для частичного поиска по началу номера.
     """
 
     PRIMARY_DWG_RE = re.compile(r"^(\d+)\.dwg$", re.IGNORECASE)
@@ -113,12 +105,9 @@ class DXFRepository:
         self.indexing = settings.indexing
         self.data_files = settings.data_files
 
+        self.store = IndexStore.for_settings(settings)
         self._ranges: list[DXFRange] = []
-        self._excel_index: dict[str, list[DXFExcelRecord]] = {}
-        self._files_index: dict[int, DXFFileRecord] = {}
-
-        self._by_k_num: dict[str, list[DXFExcelRecord]] = {}
-        self._by_dxf_no: dict[int, list[DXFExcelRecord]] = {}
+        self._numbers = NumericPrefixIndex()
 
         self.reload_all()
 
@@ -219,96 +208,18 @@ class DXFRepository:
             json.dump([r.to_dict() for r in ranges], f, ensure_ascii=False, indent=2)
 
     # --------------------------------------------------------
-    # JSON: excel index
-    # --------------------------------------------------------
-
-    def _load_excel_index_json(self) -> dict[str, list[DXFExcelRecord]]:
-        path = self.data_files.dxf_excel_index_json
-        if not path.is_file():
-            return {}
-
-        try:
-            with path.open("r", encoding="utf-8") as f:
-                data = json.load(f)
-
-            return {
-                k_num: [DXFExcelRecord.from_dict(item) for item in items]
-                for k_num, items in data.items()
-            }
-        except (OSError, json.JSONDecodeError, KeyError, TypeError, ValueError) as e:
-            logger.error(f"DXFRepository._load_excel_index_json: {e}")
-            return {}
-
-    def _save_excel_index_json(self, index_data: dict[str, list[DXFExcelRecord]]) -> None:
-        path = self.data_files.dxf_excel_index_json
-        self._ensure_parent(path)
-
-        payload = {
-            k_num: [item.to_dict() for item in items]
-            for k_num, items in sorted(index_data.items())
-        }
-
-        with path.open("w", encoding="utf-8") as f:
-            json.dump(payload, f, ensure_ascii=False, indent=2)
-
-    # --------------------------------------------------------
-    # JSON: files index
-    # --------------------------------------------------------
-
-    def _load_files_index_json(self) -> dict[int, DXFFileRecord]:
-        path = self.data_files.dxf_files_index_json
-        if not path.is_file():
-            return {}
-
-        try:
-            with path.open("r", encoding="utf-8") as f:
-                data = json.load(f)
-
-            return {
-                int(key): DXFFileRecord.from_dict(item)
-                for key, item in data.items()
-            }
-        except (OSError, json.JSONDecodeError, KeyError, TypeError, ValueError) as e:
-            logger.error(f"DXFRepository._load_files_index_json: {e}")
-            return {}
-
-    def _save_files_index_json(self, index_data: dict[int, DXFFileRecord]) -> None:
-        path = self.data_files.dxf_files_index_json
-        self._ensure_parent(path)
-
-        payload = {
-            str(dxf_no): item.to_dict()
-            for dxf_no, item in sorted(index_data.items())
-        }
-
-        with path.open("w", encoding="utf-8") as f:
-            json.dump(payload, f, ensure_ascii=False, indent=2)
-
-    # --------------------------------------------------------
-    # In-memory rebuild
+    # Загрузка
     # --------------------------------------------------------
 
-    def _rebuild_memory_indexes(self) -> None:
-        """
-        Перестраивает in-memory индексы:
-        - _by_k_num
-        - _by_dxf_no
-        """
-        self._by_k_num = dict(self._excel_index)
-        self._by_dxf_no = {}
-
-        for records in self._excel_index.values():
-            for rec in records:
-                self._by_dxf_no.setdefault(rec.dxf_no, []).append(rec)
-
     def reload_all(self) -> None:
         """
-        Загружает все индексы с диска в память.
+        Загружает карту диапазонов.
+
+        Excel- и файловый индексы в память не загружаются —
+        они читаются из хранилища при поиске.
         """
         self._ranges = self._load_ranges_json()
-        self._excel_index = self._load_excel_index_json()
-        self._files_index = self._load_files_index_json()
-        self._rebuild_memory_indexes()
+        self._numbers.rebuild(self.store.dxf_excel_numbers() + self.store.dxf_file_numbers())
 
     # --------------------------------------------------------
     # Rebuild ranges from workbook
@@ -369,9 +280,60 @@ class DXFRepository:
     # Rebuild excel index
     # --------------------------------------------------------
 
-    def rebuild_excel_index(self) -> int:
+    # Колонки листа Tabelle1, которые читает rebuild_excel_index
+    EXCEL_COLUMNS = "ABCDEFIKNS"
+
+    def _parse_excel_row(self, values: tuple) -> Optional[DXFExcelRecord]:
+        """
+        Строка листа 'Tabelle1' (колонки EXCEL_COLUMNS) -> DXFExcelRecord.
+        """
+        dxf_no_raw, k_raw, schluessel, wst, dicke, ch_nr, a_kn, laenge, preis, bemerkung = values
+
+        if dxf_no_raw is None or k_raw is None:
+            return None
+
+        try:
+            dxf_no_int = int(dxf_no_raw)
+        except (TypeError, ValueError):
+            return None
+
+        k_num = self._normalize_k_num(k_raw)
+        if not k_num:
+            return None
+
+        return DXFExcelRecord(
+            dxf_no=dxf_no_int,
+            k_num=k_num,
+            schluessel=str(schluessel or ""),
+            wst=str(wst or ""),
+            dicke_mm=self._safe_float(dicke),
+            ch_nr=str(ch_nr or ""),
+            a_kn_brutto_qm=self._safe_float(a_kn),
+            laenge_zuschnitt_mm=self._safe_float(laenge),
+            preis_pro_laenge_eur=self._safe_float(preis),
+            bemerkung=str(bemerkung or ""),
+        )
+
+    def _apply_excel_batch(self, batch: IngestBatch) -> None:
+        records = []
+        for row_no, values in batch.rows:
+            rec = self._parse_excel_row(values)
+            if rec is not None:
+                records.append((row_no, rec))
+
+        self.store.ingest_dxf_excel(
+            records,
+            batch.spans,
+            batch.meta_key,
+            batch.meta,
+            reset=batch.reset,
+            truncate_after=batch.truncate_after,
+        )
+        self._numbers.update(rec.dxf_no for _, rec in records)
+
+    def rebuild_excel_index(self, incremental: bool = False) -> int:
         """
-        Строит dxf_excel_index.json из листа 'Tabelle1'.
+        Строит Excel-индекс DXF (таблица dxf_excel) из листа 'Tabelle1'.
 
         Используемые колонки:
         A=0   DXF-Nummer
@@ -384,85 +346,40 @@ class DXFRepository:
         K=10  Länge Zuschnitt
         N=13  Preis/Länge
         S=18  Bemerkung
+
+        incremental=True:
+            если файл не менялся — книга не открывается; иначе
+            перезаписываются только строки изменённых блоков
+            (см. excel_ingest.py).
+
+        Возвращает количество записей в индексе.
         """
         if not self.is_excel_available():
             raise FileNotFoundError(f"Excel-Datei nicht gefunden: {self.paths.dxf_excel_file}")
 
-        wb = load_workbook(
+        ingest = ExcelIngest(
+            self.store,
+            "dxf_excel",
             self.paths.dxf_excel_file,
-            data_only=True,
-            read_only=True,
+            columns=self.EXCEL_COLUMNS,
+            sheet="Tabelle1",
             keep_vba=True,
         )
-
-        if "Tabelle1" not in wb.sheetnames:
-            wb.close()
-            raise KeyError("Blatt 'Tabelle1' wurde in der Excel-Datei nicht gefunden.")
-
-        ws = wb["Tabelle1"]
-        index_data: dict[str, list[DXFExcelRecord]] = {}
-        first = True
-        total = 0
-
-        for row in ws.iter_rows(values_only=True):
-            if first:
-                first = False
-                continue
-
-            def _col(i: int):
-                return row[i] if len(row) > i else None
-
-            dxf_no_raw = _col(0)
-            k_raw = _col(1)
-
-            if dxf_no_raw is None or k_raw is None:
-                continue
-
-            try:
-                dxf_no_int = int(dxf_no_raw)
-            except (TypeError, ValueError):
-                continue
-
-            k_num = self._normalize_k_num(k_raw)
-            if not k_num:
-                continue
-
-            rec = DXFExcelRecord(
-                dxf_no=dxf_no_int,
-                k_num=k_num,
-                schluessel=str(_col(2) or ""),
-                wst=str(_col(3) or ""),
-                dicke_mm=self._safe_float(_col(4)),
-                ch_nr=str(_col(5) or ""),
-                a_kn_brutto_qm=self._safe_float(_col(8)),
-                laenge_zuschnitt_mm=self._safe_float(_col(10)),
-                preis_pro_laenge_eur=self._safe_float(_col(13)),
-                bemerkung=str(_col(18) or ""),
+        stats = ingest.run(self._apply_excel_batch, full=not incremental)
+        if not stats.skipped:
+            logger.info(
+                f"DXF-Excel: {stats.changed_blocks}/{stats.blocks} Blöcke neu eingelesen"
             )
-
-            index_data.setdefault(k_num, []).append(rec)
-            total += 1
-
-        wb.close()
-
-        for k_num in index_data:
-            index_data[k_num].sort(key=lambda x: (x.dxf_no, x.schluessel))
-
-        self._save_excel_index_json(index_data)
-        self._excel_index = index_data
-        self._rebuild_memory_indexes()
-        return total
+        return self.store.dxf_excel_count()
 
     # --------------------------------------------------------
     # File index rebuild
     # --------------------------------------------------------
 
-    def _build_file_record(self, dxf_no: int) -> DXFFileRecord:
+    def _build_file_record(self, dxf_no: int, dxfrange: Optional[DXFRange], has_main_dwg: bool) -> DXFFileRecord:
         """
         Строит DXFFileRecord для одного DXF-номера.
         """
-        dxfrange = self._get_range_for_dxf(dxf_no)
-
         if dxfrange is None:
             return DXFFileRecord(
                 dxf_no=dxf_no,
@@ -480,15 +397,80 @@ class DXFRepository:
             folder_name=dxfrange.folder_name,
             folder_path=str(folder_path),
             main_dwg_path=str(main_dwg),
-            has_main_dwg=main_dwg.is_file(),
+            has_main_dwg=has_main_dwg,
         )
 
+    def _folder_ranges(self, lo: int, hi: int) -> dict[str, list[tuple[DXFRange, list[int]]]]:
+        """
+        Номера [lo, hi] по папкам: folder_name -> [(диапазон, номера), ...].
+
+        Как и в _get_range_for_dxf, номер относится к первому
+        подходящему диапазону dxf_ranges.json.
+        """
+        seen: set[int] = set()
+        result: dict[str, list[tuple[DXFRange, list[int]]]] = {}
+        for item in self._ranges:
+            numbers = [
+                n for n in range(max(lo, item.min_no), min(hi, item.max_no) + 1)
+                if n not in seen
+            ]
+            if numbers:
+                seen.update(numbers)
+                result.setdefault(item.folder_name, []).append((item, numbers))
+        return result
+
+    def _list_primary_dwgs(self, folder_name: str) -> tuple[int, set[int]]:
+        """
+        Один листинг папки диапазона: (mtime_ns папки, номера основных DWG).
+
+        Несуществующая папка даёт (0, пустое множество).
+        """
+        folder_path = self.paths.dxf_root_dir / folder_name
+        try:
+            mtime_ns = os.stat(folder_path).st_mtime_ns
+        except FileNotFoundError:
+            return 0, set()
+
+        numbers: set[int] = set()
+        with os.scandir(folder_path) as it:
+            for entry in it:
+                m = self.PRIMARY_DWG_RE.fullmatch(entry.name)
+                if m is None:
+                    continue
+                try:
+                    if entry.is_file():
+                        numbers.add(int(m.group(1)))
+                except OSError:
+                    continue
+        return mtime_ns, numbers
+
+    def _folder_mtime(self, folder_name: str) -> int:
+        try:
+            return os.stat(self.paths.dxf_root_dir / folder_name).st_mtime_ns
+        except FileNotFoundError:
+            return 0
+
     def rebuild_files_index_full(
         self,
         progress_cb: Optional[Callable[[str], None]] = None,
+        incremental: bool = False,
     ) -> int:
         """
-        Полный rebuild файлового DXF-индекса.
+        Rebuild файлового DXF-индекса.
+
+        Каждая папка диапазона из dxf_ranges.json читается одним
+        os.scandir, найденные xxxxx.dwg пересекаются с диапазоном номеров
+        [min_dxf_no .. max_dxf_no] в памяти — вместо отдельного is_file()
+        на каждый номер. Папки читаются параллельно (indexing.dxf.scan_workers).
+
+        incremental=True:
+            папка перечитывается, только если её mtime изменился
+            с прошлого rebuild (добавление, удаление и переименование
+            файлов меняют mtime папки); записи остальных папок не трогаются.
+            При изменении границ номеров или набора папок выполняется
+            полный rebuild.
+
+        mtime папок хранятся в meta["dxf_files"].
         """
         if not self.is_dxf_root_available():
             raise FileNotFoundError(f"DXF-Root nicht verfügbar: {self.paths.dxf_root_dir}")
@@ -496,20 +478,65 @@ class DXFRepository:
         if not self._ranges:
             self.rebuild_ranges_from_workbook()
 
-        result: dict[int, DXFFileRecord] = {}
-        total = self.indexing.dxf.max_dxf_no - self.indexing.dxf.min_dxf_no + 1
-        done = 0
+        lo = self.indexing.dxf.min_dxf_no
+        hi = self.indexing.dxf.max_dxf_no
+        folders = self._folder_ranges(lo, hi)
 
-        for dxf_no in range(self.indexing.dxf.min_dxf_no, self.indexing.dxf.max_dxf_no + 1):
-            result[dxf_no] = self._build_file_record(dxf_no)
-            done += 1
+        prev = self.store.get_meta("dxf_files", {}) or {}
+        prev_mtimes: dict[str, int] = prev.get("folders", {})
+        if incremental and (prev.get("bounds") != [lo, hi] or set(prev_mtimes) != set(folders)):
+            incremental = False
 
-            if progress_cb and (done % 100 == 0 or done == total):
-                progress_cb(f"DXF {dxf_no} geprüft ({done}/{total})")
+        def scan(folder_name: str) -> Optional[tuple[int, set[int]]]:
+            if incremental and self._folder_mtime(folder_name) == prev_mtimes.get(folder_name):
+                return None
+            return self._list_primary_dwgs(folder_name)
 
-        self._save_files_index_json(result)
-        self._files_index = result
-        return len(result)
+        mtimes = dict(prev_mtimes) if incremental else {}
+        records: list[DXFFileRecord] = []
+        total = len(folders)
+        done = 0
+
+        with ThreadPoolExecutor(max_workers=self.indexing.dxf.scan_workers) as pool:
+            futures = {pool.submit(scan, name): name for name in folders}
+            for future in as_completed(futures):
+                folder_name = futures[future]
+                listing = future.result()
+                done += 1
+
+                if listing is None:
+                    if progress_cb:
+                        progress_cb(f"DXF {folder_name}: unverändert ({done}/{total})")
+                    continue
+
+                mtime_ns, present = listing
+                mtimes[folder_name] = mtime_ns
+                for item, numbers in folders[folder_name]:
+                    for dxf_no in numbers:
+                        records.append(self._build_file_record(dxf_no, item, dxf_no in present))
+
+                if progress_cb:
+                    progress_cb(f"DXF {folder_name}: {len(present)} Dateien ({done}/{total})")
+
+        meta = {"bounds": [lo, hi], "folders": mtimes}
+
+        if incremental:
+            self.store.upsert_dxf_files(records, meta)
+            self._numbers.update(rec.dxf_no for rec in records)
+            return self.store.dxf_files_count()
+
+        # Номера вне диапазонов Key — пустые записи, как раньше
+        covered = {rec.dxf_no for rec in records}
+        records.extend(
+            self._build_file_record(dxf_no, None, False)
+            for dxf_no in range(lo, hi + 1)
+            if dxf_no not in covered
+        )
+        records.sort(key=lambda rec: rec.dxf_no)
+
+        self.store.replace_dxf_files(records, meta)
+        self._numbers.update(rec.dxf_no for rec in records)
+        return len(records)
 
     # --------------------------------------------------------
     # Search helpers
@@ -548,10 +575,12 @@ class DXFRepository:
         if not k_norm:
             return []
 
+        records = self.store.dxf_excel_by_k(k_norm)
+        files = self.store.dxf_files_by_numbers(rec.dxf_no for rec in records)
+
         results: list[DXFSearchResult] = []
-        for rec in self._by_k_num.get(k_norm, []):
-            file_rec = self._files_index.get(rec.dxf_no)
-            results.append(self._make_search_result(rec, file_rec))
+        for rec in records:
+            results.append(self._make_search_result(rec, files.get(rec.dxf_no)))
 
         results.sort(key=lambda x: (x.dxf_no, x.k_num))
         return results
@@ -566,13 +595,12 @@ class DXFRepository:
 
         dxf_no = int(raw)
         results: list[DXFSearchResult] = []
+        file_rec = self.store.dxf_file(dxf_no)
 
-        for rec in self._by_dxf_no.get(dxf_no, []):
-            file_rec = self._files_index.get(dxf_no)
+        for rec in self.store.dxf_excel_by_numbers([dxf_no]).get(dxf_no, []):
             results.append(self._make_search_result(rec, file_rec))
 
         if not results:
-            file_rec = self._files_index.get(dxf_no)
             if file_rec:
                 results.append(DXFSearchResult(
                     dxf_no=dxf_no,
@@ -594,19 +622,41 @@ class DXFRepository:
         """
         Частичный поиск по началу DXF-номера.
         """
+        return [res for chunk in self.iter_by_dxf_partial(query) for res in chunk]
+
+    def count_by_dxf_partial(self, query: str) -> int:
+        """
+        Число результатов search_by_dxf_partial без чтения самих записей.
+        """
         raw = str(query).strip()
         if not raw or not raw.isdigit():
-            return []
+            return 0
+        return self.store.dxf_result_count(self._numbers.find(raw))
+
+    def iter_by_dxf_partial(self, query: str, chunk_size: int = 500) -> Iterator[list[DXFSearchResult]]:
+        """
+        Частичный поиск частями: номера берутся по возрастанию, записи
+        читаются из хранилища по chunk_size номеров (порядок как у
+        search_by_dxf_partial).
+        """
+        raw = str(query).strip()
+        if not raw or not raw.isdigit():
+            return
+
+        matched_numbers = sorted(self._numbers.find(raw))
+        for i in range(0, len(matched_numbers), chunk_size):
+            chunk = self._results_for_numbers(matched_numbers[i:i + chunk_size])
+            if chunk:
+                yield chunk
 
+    def _results_for_numbers(self, matched_numbers: list[int]) -> list[DXFSearchResult]:
         results: list[DXFSearchResult] = []
-        matched_numbers = sorted(
-            no for no in (set(self._by_dxf_no.keys()) | set(self._files_index.keys()))
-            if str(no).startswith(raw)
-        )
+        excel_by_no = self.store.dxf_excel_by_numbers(matched_numbers)
+        files_by_no = self.store.dxf_files_by_numbers(matched_numbers)
 
         for dxf_no in matched_numbers:
-            excel_rows = self._by_dxf_no.get(dxf_no, [])
-            file_rec = self._files_index.get(dxf_no)
+            excel_rows = excel_by_no.get(dxf_no, [])
+            file_rec = files_by_no.get(dxf_no)
 
             if excel_rows:
                 for rec in excel_rows:
@@ -646,10 +696,13 @@ class AppNrRepository:
     """
     Репозиторий серийных номеров аппаратов.
 
-    Хранит:
-    - _all_records : полный список записей
-    - _by_prefix   : prefix -> list[AppNrRecord]
-    - _by_k_code   : K-код -> list[str]
+    Записи хранятся в таблице appnr хранилища IndexStore
+    с индексами по k_code и числовому prefix.
+
+    _serials:
+        PrefixIndex "SERIAL_UPPER\0K12345" -> AppNrRecord.
+        Ключ уникален для пары (serial_no, k_code), а срез по началу
+        номера уже упорядочен по (serial_no, k_code).
     """
 
     FULL_K_RE = re.compile(r"^K\d{5}$", re.IGNORECASE)
@@ -660,9 +713,8 @@ class AppNrRepository:
         self.indexing = settings.indexing
         self.data_files = settings.data_files
 
-        self._all_records: list[AppNrRecord] = []
-        self._by_prefix: dict[str, list[AppNrRecord]] = {}
-        self._by_k_code: dict[str, list[str]] = {}
+        self.store = IndexStore.for_settings(settings)
+        self._serials = PrefixIndex()
 
         self.reload()
 
@@ -720,61 +772,77 @@ class AppNrRepository:
         """
         return self.paths.appnr_excel_file.exists() and self.paths.appnr_excel_file.is_file()
 
+    @staticmethod
+    def _serial_key(rec: AppNrRecord) -> str:
+        return f"{rec.serial_no.upper()}\0{rec.k_code}"
+
+    def reload(self) -> None:
+        """
+        Строит префиксный индекс серийных номеров из хранилища.
+        """
+        self._serials.rebuild((self._serial_key(rec), rec) for rec in self.store.appnr_all())
+
     # --------------------------------------------------------
-    # JSON
+    # Excel ingest
     # --------------------------------------------------------
 
-    def _load_raw(self) -> dict:
-        path = self.data_files.appnr_index_json
-        if not path.is_file():
-            return {"items": []}
-
-        try:
-            with path.open("r", encoding="utf-8") as f:
-                data = json.load(f)
+    # Колонки листа: A = Apparate-Nr., E = K-Nummer
+    EXCEL_COLUMNS = "AE"
 
-            if not isinstance(data, dict) or "items" not in data:
-                return {"items": []}
+    def _parse_row(self, values: tuple) -> Optional[AppNrRecord]:
+        serial_no = self._normalize_serial_text(values[0])
+        k_code = self._normalize_k_code(values[1])
 
-            return data
-        except (OSError, json.JSONDecodeError) as e:
-            logger.error(f"AppNrRepository._load_raw: {e}")
-            return {"items": []}
+        if not serial_no or not k_code:
+            return None
 
-    def _save_raw(self, data: dict) -> None:
-        path = self.data_files.appnr_index_json
-        path.parent.mkdir(parents=True, exist_ok=True)
+        prefix = self._extract_prefix(serial_no)
+        if not prefix:
+            return None
 
-        with path.open("w", encoding="utf-8") as f:
-            json.dump(data, f, ensure_ascii=False, indent=2)
+        return AppNrRecord(
+            serial_no=serial_no,
+            serial_prefix=prefix,
+            k_code=k_code,
+        )
 
-    def reload(self) -> None:
+    def _ingest(self, full: bool) -> int:
         """
-        Загружает индекс с диска в память.
-        """
-        data = self._load_raw()
-
-        self._all_records = []
-        self._by_prefix = {}
-        self._by_k_code = {}
-
-        for item in data.get("items", []):
-            try:
-                rec = AppNrRecord.from_dict(item)
-            except (KeyError, TypeError, ValueError):
-                continue
+        Читает книгу App.Nr. через ExcelIngest.
 
-            self._all_records.append(rec)
-            self._by_prefix.setdefault(rec.serial_prefix, []).append(rec)
-            self._by_k_code.setdefault(rec.k_code, []).append(rec.serial_no)
+        Возвращает общее количество записей App.Nr. в индексе.
+        """
+        if not self.is_excel_available():
+            raise FileNotFoundError(f"Excel-Datei nicht gefunden: {self.paths.appnr_excel_file}")
 
-        self._all_records.sort(key=lambda x: (x.serial_no, x.k_code))
+        def apply(batch: IngestBatch) -> None:
+            records = []
+            for row_no, values in batch.rows:
+                rec = self._parse_row(values)
+                if rec is not None:
+                    records.append((row_no, rec))
+
+            self.store.ingest_appnr(
+                records,
+                batch.spans,
+                batch.meta_key,
+                batch.meta,
+                reset=batch.reset,
+                truncate_after=batch.truncate_after,
+            )
 
-        for prefix in self._by_prefix:
-            self._by_prefix[prefix].sort(key=lambda x: (x.serial_no, x.k_code))
+        ingest = ExcelIngest(
+            self.store,
+            "appnr",
+            self.paths.appnr_excel_file,
+            columns=self.EXCEL_COLUMNS,
+        )
+        stats = ingest.run(apply, full=full)
 
-        for k_code in self._by_k_code:
-            self._by_k_code[k_code] = sorted(set(self._by_k_code[k_code]))
+        if not stats.skipped:
+            logger.info(f"App.Nr.: {stats.changed_blocks}/{stats.blocks} Blöcke neu eingelesen")
+            self.reload()
+        return self.store.appnr_count()
 
     # --------------------------------------------------------
     # Rebuild
@@ -784,121 +852,24 @@ class AppNrRepository:
         """
         Полный rebuild индекса App.Nr. из Excel.
         """
-        if not self.is_excel_available():
-            raise FileNotFoundError(f"Excel-Datei nicht gefunden: {self.paths.appnr_excel_file}")
-
-        wb = load_workbook(
-            self.paths.appnr_excel_file,
-            data_only=True,
-            read_only=True,
-        )
-        ws = wb.active
-
-        items: list[AppNrRecord] = []
-        first = True
-
-        for row in ws.iter_rows(values_only=True):
-            if first:
-                first = False
-                continue
-
-            serial_no = self._normalize_serial_text(row[0] if len(row) > 0 else None)
-            k_code = self._normalize_k_code(row[4] if len(row) > 4 else None)
-
-            if not serial_no or not k_code:
-                continue
-
-            prefix = self._extract_prefix(serial_no)
-            if not prefix:
-                continue
-
-            items.append(AppNrRecord(
-                serial_no=serial_no,
-                serial_prefix=prefix,
-                k_code=k_code,
-            ))
-
-        wb.close()
-
-        self._save_raw({"items": [x.to_dict() for x in items]})
-        self.reload()
-        return len(items)
+        return self._ingest(full=True)
 
     def rebuild_tail(self) -> int:
         """
-        Хвостовой rebuild индекса App.Nr.
+        Частичное обновление индекса App.Nr.
 
         Логика:
-        - если индекса ещё нет -> полный rebuild
-        - определяем максимальный известный serial_prefix
-        - пересчитываем только записи с prefix >= max_prefix - tail_backtrack_prefix
-        - старую "стабильную" часть индекса сохраняем без изменений
-        """
-        if not self._all_records:
-            return self.rebuild_full()
+        - если файл не менялся (размер и mtime) — книга не открывается;
+        - иначе перезаписываются только строки блоков, отпечаток
+          которых изменился (обычно — дописанный хвост листа);
+        - если индекса ещё нет — полный rebuild.
 
-        if not self.is_excel_available():
-            raise FileNotFoundError(f"Excel-Datei nicht gefunden: {self.paths.appnr_excel_file}")
-
-        tail_backtrack = self.indexing.appnr.tail_backtrack_prefix
-
-        numeric_prefixes = [
-            int(rec.serial_prefix)
-            for rec in self._all_records
-            if rec.serial_prefix.isdigit()
-        ]
-
-        if not numeric_prefixes:
+        Возвращает общее количество записей App.Nr. в индексе.
+        """
+        if not self.store.appnr_count():
             return self.rebuild_full()
 
-        max_prefix = max(numeric_prefixes)
-        limit = max(0, max_prefix - tail_backtrack)
-
-        stable_part = [
-            rec for rec in self._all_records
-            if rec.serial_prefix.isdigit() and int(rec.serial_prefix) < limit
-        ]
-
-        wb = load_workbook(
-            self.paths.appnr_excel_file,
-            data_only=True,
-            read_only=True,
-        )
-        ws = wb.active
-
-        tail_part: list[AppNrRecord] = []
-        first = True
-
-        for row in ws.iter_rows(values_only=True):
-            if first:
-                first = False
-                continue
-
-            serial_no = self._normalize_serial_text(row[0] if len(row) > 0 else None)
-            k_code = self._normalize_k_code(row[4] if len(row) > 4 else None)
-
-            if not serial_no or not k_code:
-                continue
-
-            prefix = self._extract_prefix(serial_no)
-            if not prefix or not prefix.isdigit():
-                continue
-
-            if int(prefix) >= limit:
-                tail_part.append(AppNrRecord(
-                    serial_no=serial_no,
-                    serial_prefix=prefix,
-                    k_code=k_code,
-                ))
-
-        wb.close()
-
-        merged = stable_part + tail_part
-        merged.sort(key=lambda x: (x.serial_no, x.k_code))
-
-        self._save_raw({"items": [x.to_dict() for x in merged]})
-        self.reload()
-        return len(tail_part)
+        return self._ingest(full=False)
 
     # --------------------------------------------------------
     # Search
@@ -912,16 +883,10 @@ class AppNrRepository:
         if not q:
             return []
 
-        q_upper = q.upper()
-        results = [
-            rec for rec in self._all_records
-            if rec.serial_no.upper().startswith(q_upper)
-        ]
-        results.sort(key=lambda x: (x.serial_no, x.k_code))
-        return results
+        return self._serials.find(q.upper())
 
     def get_serials_for_k(self, k_code: str) -> list[str]:
         """
         Возвращает все серийные номера для указанного K-кода.
         """
-        return list(self._by_k_code.get(k_code.strip().upper(), []))
+        return self.store.appnr_serials_for_k(k_code.strip().upper())
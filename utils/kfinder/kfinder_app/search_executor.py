@@ -0,0 +1,261 @@
+"""
+search_executor.py
+==================
+
+Фоновое выполнение поисковых запросов K-Finder.
+
+Зачем нужен
+-----------
+Раньше _process_full / _process_partial / _process_dxf в main_frame
+выполняли поиск прямо в UI-потоке. SearchService.get_or_search при
+отсутствии записи в индексе уходит на сетевой диск (G:), и пока диск
+отвечает медленно, окно программы не перерисовывается и не реагирует.
+
+SearchExecutor:
+- выполняет задания поиска в небольшом пуле фоновых потоков;
+- каждое новое задание отменяет предыдущее: у задания есть
+  собственный cancel_event (его понимает FolderCrawler), а результат
+  устаревшего задания в UI не доставляется;
+- задание может отдавать результаты частями (ticket.emit) — они
+  доставляются в UI по мере готовности, например в открытый
+  ResultsDialog;
+- для заданий с обращением к диску задаётся таймаут: по его истечении
+  задание отменяется, а в UI сразу приходит SearchTimeout, даже если
+  поток ещё висит на обращении к диску.
+
+Пример:
+    executor = SearchExecutor(deliver=wx.CallAfter)
+    executor.submit(
+        lambda ticket: service.get_or_search(code, cancel_event=ticket.cancel_event),
+        on_done=show_entry,
+        on_error=show_error,
+        timeout=15,
+    )
+
+Важно
+-----
+Модуль не зависит от wx: все колбэки вызываются через переданную
+функцию deliver (в приложении — wx.CallAfter), то есть в UI-потоке.
+
+Задания читают индексы в потоках пула одновременно с фоновой
+индексацией. Это безопасно без общей блокировки: префиксные индексы
+читаются целым неизменяемым снимком (prefix_index.py), а IndexStore
+даёт каждому потоку своё соединение для чтения (index_store.py).
+"""
+
+from __future__ import annotations
+
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Optional
+
+from .logging_setup import get_logger
+
+logger = get_logger()
+
+
+# Потоков больше одного: задание, зависшее на недоступном диске,
+# не должно задерживать следующий запрос
+SEARCH_WORKERS = 3
+
+
+class SearchTimeout(TimeoutError):
+    """
+    Поиск не уложился в заданное время.
+    """
+
+
+class SearchTicket:
+    """
+    Одно задание поиска.
+
+    generation:
+        Порядковый номер задания; актуально только последнее.
+
+    cancel_event:
+        Выставляется при отмене / таймауте; передаётся в обход диска.
+    """
+
+    __slots__ = ("generation", "cancel_event", "finished", "_emit")
+
+    def __init__(self, generation: int, emit: Callable[["SearchTicket", Any], None]):
+        self.generation = generation
+        self.cancel_event = threading.Event()
+        self.finished = False
+        self._emit = emit
+
+    @property
+    def cancelled(self) -> bool:
+        return self.cancel_event.is_set()
+
+    def emit(self, chunk: Any) -> None:
+        """
+        Передаёт в UI очередную часть результатов (on_chunk).
+        """
+        self._emit(self, chunk)
+
+
+class SearchExecutor:
+    """
+    Исполнитель поисковых заданий с отменой устаревших запросов.
+
+    Параметры:
+    ----------
+    deliver:
+        Функция, выполняющая колбэк в UI-потоке (wx.CallAfter).
+
+    max_workers:
+        Размер пула фоновых потоков.
+    """
+
+    def __init__(
+        self,
+        deliver: Callable[[Callable[[], None]], Any],
+        max_workers: int = SEARCH_WORKERS,
+    ):
+        self._deliver = deliver
+        self._pool = ThreadPoolExecutor(
+            max_workers=max(1, int(max_workers)),
+            thread_name_prefix="kfinder-search",
+        )
+        self._lock = threading.Lock()
+        self._generation = 0
+        self._current: Optional[SearchTicket] = None
+        self._chunk_handlers: dict[int, Callable[[Any], None]] = {}
+
+    # --------------------------------------------------------
+    # Управление заданиями
+    # --------------------------------------------------------
+
+    def submit(
+        self,
+        job: Callable[[SearchTicket], Any],
+        on_done: Callable[[Any], None],
+        on_error: Optional[Callable[[BaseException], None]] = None,
+        on_chunk: Optional[Callable[[Any], None]] = None,
+        timeout: Optional[float] = None,
+    ) -> SearchTicket:
+        """
+        Запускает job(ticket) в фоне; предыдущее задание отменяется.
+
+        on_done(result) / on_error(exc) / on_chunk(chunk) вызываются
+        через deliver и только пока задание актуально.
+        timeout — секунды; по истечении в on_error приходит SearchTimeout.
+        """
+        with self._lock:
+            self._cancel_locked()
+            self._generation += 1
+            ticket = SearchTicket(self._generation, self._emit)
+            self._current = ticket
+            if on_chunk is not None:
+                self._chunk_handlers[ticket.generation] = on_chunk
+
+        timer: Optional[threading.Timer] = None
+        if timeout:
+            timer = threading.Timer(timeout, self._expire, (ticket, timeout, on_error))
+            timer.daemon = True
+            timer.start()
+
+        self._pool.submit(self._run, ticket, job, on_done, on_error, timer)
+        return ticket
+
+    def cancel(self, ticket: Optional[SearchTicket] = None) -> None:
+        """
+        Отменяет текущее задание (или ticket, если оно ещё текущее).
+        """
+        with self._lock:
+            if ticket is None or ticket is self._current:
+                self._cancel_locked()
+
+    def shutdown(self) -> None:
+        """
+        Отменяет текущее задание и останавливает пул, не дожидаясь потоков.
+        """
+        self.cancel()
+        self._pool.shutdown(wait=False, cancel_futures=True)
+
+    @property
+    def is_running(self) -> bool:
+        with self._lock:
+            return self._current is not None and not self._current.finished
+
+    # --------------------------------------------------------
+    # Внутреннее
+    # --------------------------------------------------------
+
+    def _cancel_locked(self) -> None:
+        ticket = self._current
+        if ticket is not None:
+            ticket.cancel_event.set()
+            self._chunk_handlers.pop(ticket.generation, None)
+        self._current = None
+
+    def _claim(self, ticket: SearchTicket) -> bool:
+        """
+        True — задание актуально и его итог ещё не доставлен (помечается доставленным).
+        """
+        with self._lock:
+            if ticket is not self._current or ticket.finished:
+                return False
+            ticket.finished = True
+            self._chunk_handlers.pop(ticket.generation, None)
+            return True
+
+    def _emit(self, ticket: SearchTicket, chunk: Any) -> None:
+        with self._lock:
+            if ticket is not self._current or ticket.finished:
+                return
+            handler = self._chunk_handlers.get(ticket.generation)
+        if handler is not None:
+            self._deliver(lambda: self._call_chunk(ticket, handler, chunk))
+
+    def _call_chunk(self, ticket: SearchTicket, handler: Callable[[Any], None], chunk: Any) -> None:
+        # Задание могли отменить, пока колбэк стоял в очереди UI
+        if ticket.cancelled:
+            return
+        handler(chunk)
+
+    def _run(
+        self,
+        ticket: SearchTicket,
+        job: Callable[[SearchTicket], Any],
+        on_done: Callable[[Any], None],
+        on_error: Optional[Callable[[BaseException], None]],
+        timer: Optional[threading.Timer],
+    ) -> None:
+        if ticket.cancelled:
+            return
+
+        try:
+            result = job(ticket)
+        except Exception as e:
+            error = e
+            if timer is not None:
+                timer.cancel()
+            if not self._claim(ticket):
+                return
+            if on_error is None:
+                logger.error(f"SearchExecutor: {error}")
+                return
+            self._deliver(lambda: on_error(error))
+            return
+
+        if timer is not None:
+            timer.cancel()
+        if self._claim(ticket):
+            self._deliver(lambda: on_done(result))
+
+    def _expire(
+        self,
+        ticket: SearchTicket,
+        timeout: float,
+        on_error: Optional[Callable[[BaseException], None]],
+    ) -> None:
+        if not self._claim(ticket):
+            return
+
+        ticket.cancel_event.set()
+        logger.warning(f"SearchExecutor: Zeitüberschreitung nach {timeout:g} s")
+        if on_error is not None:
+            error = SearchTimeout(timeout)
+            self._deliver(lambda: on_error(error))
@@ -0,0 +1,217 @@
+"""
+search_index.py
+===============
+
+Общий полнотекстовый поиск по K-индексу, DXF-Excel и App.Nr.
+
+Зачем нужен
+-----------
+У каждого репозитория свой поиск только по своему ключу (K-номер,
+DXF-номер, App.Nr.). Поля DXF-Excel — Werkstoff, Dicke, Ch.Nr.,
+Bemerkung — не искались вовсе: чтобы найти "все детали из 1.4571,
+6 мм, за прошлый год", таблицу приходилось выгружать в Excel.
+
+Теперь все три индекса попадают в одну FTS5-таблицу search_fts
+(index_store.py). Её ведут триггеры SQLite на k_entries, dxf_excel
+и appnr: любое полное или частичное обновление индексов сразу
+обновляет и полнотекстовый индекс, отдельного перестроения не нужно.
+
+Запрос
+------
+Слова запроса объединяются по И, каждое ищется по началу слова:
+
+    1.4404 4mm K203        -> Werkstoff 1.4404*, Dicke 4, K-Nr. K203*
+    610010                 -> например, начало Ch.Nr.
+    1.4571 6mm jahr:-1     -> 1.4571, 6 мм, K-заказы прошлого года
+
+- "4mm", "4 mm", "4,5mm" — толщина (точное значение);
+- "K203" — начало K-номера;
+- "1.4404" — начало номера материала;
+- "jahr:2025" / "jahr:-1" — год K-заказа (абсолютный / относительный);
+- "feld:wert" — поиск в одном поле: k, dxf, app, wst, dicke, ch, bem;
+- остальные слова ищутся по всем полям.
+
+Результаты сортируются по bm25: совпадения в номерах весят больше,
+чем в примечании.
+
+Важно
+-----
+Модуль не содержит GUI.
+"""
+
+from __future__ import annotations
+
+import re
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Optional
+
+from .config import AppSettings
+from .index_store import SEARCH_KIND_APP, SEARCH_KIND_DXF, SEARCH_KIND_K, IndexStore
+from .logging_setup import get_logger
+from .models import SearchHit
+
+logger = get_logger()
+
+
+# Сокращения полей в запросе "feld:wert" -> колонка search_fts
+FIELD_ALIASES = {
+    "k": "k",
+    "dxf": "dxf",
+    "app": "appnr",
+    "wst": "wst",
+    "dicke": "dicke",
+    "ch": "ch_nr",
+    "bem": "bemerkung",
+}
+
+KIND_NAMES = {
+    SEARCH_KIND_K: "K",
+    SEARCH_KIND_DXF: "DXF",
+    SEARCH_KIND_APP: "APP",
+}
+
+_YEAR_RE = re.compile(r"^(?:jahr|j):(-?\d{1,4})$", re.IGNORECASE)
+_FIELD_RE = re.compile(r"^([a-z]+):(.+)$", re.IGNORECASE)
+_DICKE_RE = re.compile(r"^(\d+(?:[.,]\d+)?)mm$", re.IGNORECASE)
+_K_RE = re.compile(r"^K\d{1,5}$", re.IGNORECASE)
+_WST_RE = re.compile(r"^\d\.\d{1,4}$")
+
+
+@dataclass(frozen=True)
+class ParsedQuery:
+    """
+    Запрос, разобранный в выражение FTS5 MATCH и фильтр по году.
+    """
+    match: str
+    year: Optional[int] = None
+
+
+def _phrase(term: str, prefix: bool = True) -> str:
+    quoted = '"' + term.replace('"', '""') + '"'
+    return quoted + "*" if prefix else quoted
+
+
+def _dicke_value(raw: str) -> str:
+    # Как в триггере search_fts: 4.0 -> "4", 4.5 -> "4.5"
+    return f"{float(raw.replace(',', '.')):g}"
+
+
+def parse_query(query: str, current_year: Optional[int] = None) -> ParsedQuery:
+    """
+    Разбирает строку запроса (синтаксис — см. описание модуля).
+
+    Raises:
+        ValueError: в запросе нет ни одного слова для поиска.
+    """
+    current_year = current_year or datetime.now().year
+
+    # "4 mm" -> "4mm"
+    words = re.sub(r"(\d)\s+mm\b", r"\1mm", query.strip(), flags=re.IGNORECASE).split()
+
+    terms: list[str] = []
+    year: Optional[int] = None
+
+    for word in words:
+        m = _YEAR_RE.match(word)
+        if m:
+            value = int(m.group(1))
+            year = current_year + value if value <= 0 else value
+            continue
+
+        m = _DICKE_RE.match(word)
+        if m:
+            terms.append(f"dicke : {_phrase(_dicke_value(m.group(1)), prefix=False)}")
+            continue
+
+        m = _FIELD_RE.match(word)
+        if m and m.group(1).lower() in FIELD_ALIASES:
+            column = FIELD_ALIASES[m.group(1).lower()]
+            value = m.group(2)
+            if column == "dicke":
+                value = value[:-2] if value.lower().endswith("mm") else value
+                try:
+                    terms.append(f"dicke : {_phrase(_dicke_value(value), prefix=False)}")
+                except ValueError:
+                    pass
+            elif any(ch.isalnum() for ch in value):
+                terms.append(f"{column} : {_phrase(value)}")
+            continue
+
+        # Слова без букв и цифр токенизатор выбрасывает целиком
+        if not any(ch.isalnum() for ch in word):
+            continue
+
+        if _K_RE.match(word):
+            terms.append(f"k : {_phrase(word.upper())}")
+        elif _WST_RE.match(word):
+            terms.append(f"wst : {_phrase(word)}")
+        else:
+            terms.append(_phrase(word))
+
+    if not terms:
+        raise ValueError("Bitte mindestens einen Suchbegriff eingeben.")
+
+    return ParsedQuery(match=" AND ".join(terms), year=year)
+
+
+class SearchIndex:
+    """
+    Общий поиск по K, DXF-Excel и App.Nr. поверх search_fts.
+
+    Пример:
+        index = SearchIndex(settings)
+        hits = index.search("1.4571 6mm jahr:-1")
+    """
+
+    def __init__(self, settings: AppSettings):
+        self.settings = settings
+        self.store = IndexStore.for_settings(settings)
+
+    def count(self, query: str) -> int:
+        """
+        Число совпадений без чтения самих записей.
+        """
+        parsed = parse_query(query)
+        return self.store.search_text_count(parsed.match, parsed.year)
+
+    def search(self, query: str, limit: int = 500) -> list[SearchHit]:
+        """
+        До limit совпадений, самые релевантные первыми.
+        """
+        parsed = parse_query(query)
+        rows = self.store.search_text(parsed.match, parsed.year, limit)
+
+        by_kind: dict[int, list[int]] = {}
+        for kind, rowid, _score, _year in rows:
+            by_kind.setdefault(kind, []).append(rowid)
+
+        entries = self.store.k_by_rowids(by_kind.get(SEARCH_KIND_K, []))
+        dxf_rows = self.store.dxf_excel_by_rowids(by_kind.get(SEARCH_KIND_DXF, []))
+        appnr_rows = self.store.appnr_by_rowids(by_kind.get(SEARCH_KIND_APP, []))
+
+        hits: list[SearchHit] = []
+        for kind, rowid, score, year in rows:
+            hit = SearchHit(kind=KIND_NAMES[kind], k_code="", year=year, score=score)
+            if kind == SEARCH_KIND_K and rowid in entries:
+                hit.entry = entries[rowid]
+                hit.k_code = hit.entry.k_code
+            elif kind == SEARCH_KIND_DXF and rowid in dxf_rows:
+                hit.dxf = dxf_rows[rowid]
+                hit.k_code = hit.dxf.k_num
+            elif kind == SEARCH_KIND_APP and rowid in appnr_rows:
+                hit.appnr = appnr_rows[rowid]
+                hit.k_code = hit.appnr.k_code
+            else:
+                # Строку удалили между запросом и чтением
+                continue
+            hits.append(hit)
+
+        return hits
+
+    def rebuild(self) -> None:
+        """
+        Полностью перестраивает search_fts (обычно не нужно — его ведут триггеры).
+        """
+        self.store.rebuild_search_index()
+        logger.info("SearchIndex: Volltextindex neu aufgebaut")
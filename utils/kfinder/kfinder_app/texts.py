@@ -72,6 +72,11 @@ TXT: dict[str, str] = {
     "status_not_found":         "{code} nicht gefunden.",
     "status_no_folder":         "⚠ {code}: kein eigenes Verzeichnis",
     "status_searching":         "Suche {code}…",
+    "status_preview":           "{count} Treffer für '{query}' – Enter zum Anzeigen.",
+    "status_preview_indexed":   "{code} im Index – Enter zum Anzeigen.",
+    "status_preview_missing":   "{code} nicht im Index – Enter sucht auf dem Datenträger.",
+    "status_search_timeout":    "⚠ Zeitüberschreitung bei der Suche",
+    "status_search_error":      "Fehler bei der Suche",
     "status_start_update":      "Automatische Aktualisierung beim Start…",
     "status_ready":             "Bereit.",
 
@@ -80,9 +85,11 @@ TXT: dict[str, str] = {
     "input_hint_k":            "K-Nummer:",
     "input_hint_dxf":          "DXF-Nummer:",
     "input_hint_app":          "Apparate-Nr.:",
+    "input_hint_text":         "Suchbegriffe:",
     "search_mode_k":           "K",
     "search_mode_dxf":         "DXF",
     "search_mode_app":         "App. Nr.",
+    "search_mode_text":        "Text",
     "search_mode_menu_title":  "Suchtyp wählen",
 
     # Сообщения
@@ -105,6 +112,10 @@ TXT: dict[str, str] = {
         "{code} ist im Index vorhanden, hat aber kein eigenes Verzeichnis.\n"
         "Möglicherweise wurde dieser Auftrag unter einer anderen Nummer abgelegt."
     ),
+    "msg_search_timeout": (
+        "Die Suche wurde nach {seconds} s abgebrochen.\n"
+        "Das Laufwerk antwortet zu langsam – bitte später erneut versuchen."
+    ),
     "msg_mode_not_supported":  "Diese Aktion ist für den gewählten Suchtyp nicht verfügbar.",
 
     # Сообщения — DXF-режим
@@ -157,6 +168,15 @@ TXT: dict[str, str] = {
     "dxf_col_length":          "Länge Zuschnitt, mm",
     "dxf_col_price":           "Preis/Länge €",
     "dxf_col_file":            "DWG",
+    "geo_box":                 "Vorschau",
+    "geo_none":                "Keine Vorschau verfügbar.",
+    "geo_error":               "Vorschau nicht möglich:\n{error}",
+    "geo_summary": (
+        "Abmessungen: {w:.1f} × {h:.1f} mm\n"
+        "Schnittlänge: {cut:.0f} mm\n"
+        "Einstiche: {pierces}\n"
+        "Fläche: {area:.0f} mm²"
+    ),
 
     # Диалог результатов App.Nr.-поиска
     "app_results_title":       "Apparate-Nr.-Ergebnisse",
@@ -169,6 +189,17 @@ TXT: dict[str, str] = {
     "app_col_folder_exists":   "Ordner vorhanden",
     "app_col_folder":          "Auftragsordner",
 
+    # Диалог результатов общего поиска
+    "text_results_title":      "Suchergebnisse",
+    "text_box":                "Treffer in K, DXF und Apparate-Nr.",
+    "text_select_entry":       "Bitte eine Zeile auswählen.",
+    "text_col_kind":           "Quelle",
+    "text_col_remark":         "Bemerkung",
+    "text_kind_k":             "Auftrag",
+    "text_kind_dxf":           "DXF",
+    "text_kind_app":           "App.-Nr.",
+    "text_limit_note":         "Nur die besten {shown} von {total} Treffern werden angezeigt.",
+
     # Служебный диалог
     "service_dialog_title":    "Service",
     "service_info_box":        "Indexinformationen",
@@ -184,6 +215,7 @@ TXT: dict[str, str] = {
     "service_full_done":       "Neuindizierung abgeschlossen. Einträge: {count}",
     "service_update_error":    "Fehler bei der Teilaktualisierung",
     "service_rebuild_error":   "Fehler bei der Neuindizierung",
+    "service_scan_cancelled":  "Ordnersuche abgebrochen",
 
     # Обновление индекса (общие)
     "update_confirm_title":       "Daten aktualisieren",
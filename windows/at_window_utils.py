@@ -26,6 +26,7 @@ from windows.at_gui_utils import show_popup, get_standard_font
 from windows.at_style import style_textctrl, style_combobox, style_radiobutton, style_staticbox, style_label
 from config.at_config import load_user_settings, DEFAULT_SETTINGS, get_setting, ICON_PATH, RESOURCE_DIR
 from config.at_last_input import save_last_input
+from data.handbook_client import material_list
 
 
 # -----------------------------
@@ -370,6 +371,9 @@ def load_common_data() -> Dict:
     except (FileNotFoundError, json.JSONDecodeError) as e:
         logging.error(f"Ошибка загрузки {common_data_path}: {e}")
 
+    # Материалы: common_data.json, дополненный справочником (с кэшем по ETag)
+    _common_data_cache["material"] = material_list()
+
     # Загрузка config.json
     config_path = RESOURCE_DIR / "config.json"
     try: